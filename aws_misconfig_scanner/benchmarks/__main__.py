@@ -0,0 +1,94 @@
+import argparse
+import sys
+from aws_misconfig_scanner.benchmarks.runner import (
+    DEFAULT_MEMORY_TOLERANCE, DEFAULT_RESULTS_PATH, DEFAULT_TIME_TOLERANCE, TARGETS, BenchmarkRunner, BenchmarkStore,
+    compare,
+)
+from aws_misconfig_scanner.benchmarks.synthetic import SCALES, SyntheticAccount
+
+"""
+__main__.py
+
+Benchmark Command Line
+
+Runs the scanner benchmarks against a synthetic account, e.g.:
+
+    python -m aws_misconfig_scanner.benchmarks --scale large --save --check
+
+--save appends the run to the results history; --check compares it with the latest earlier run on
+the same account and exits with status 1 if any target regressed.
+
+Author: Tom D.
+"""
+
+
+def parse_args(argv=None):
+    """
+    Parses command line arguments for the benchmarks.
+    """
+    parser = argparse.ArgumentParser(description="AWS Misconfiguration Scanner benchmarks")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small', help="Synthetic account size preset")
+    parser.add_argument('--set', action='append', metavar='RESOURCE=N',
+                        help=f"Override a resource count of the preset ({', '.join(SCALES['small'])}) (repeatable)")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic account")
+    parser.add_argument('--targets', default=','.join(TARGETS),
+                        help=f"Comma-separated targets to run ({', '.join(TARGETS)})")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per target (the fastest is reported)")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced peak memory run")
+    parser.add_argument('--results', default=DEFAULT_RESULTS_PATH, metavar='PATH', help="Results history file")
+    parser.add_argument('--save', action='store_true', help="Append this run to the results history")
+    parser.add_argument('--check', action='store_true',
+                        help="Exit with status 1 if a target regressed against the latest run on the same account")
+    parser.add_argument('--time-tolerance', type=float, default=DEFAULT_TIME_TOLERANCE,
+                        help="Relative wall time increase tolerated by --check")
+    parser.add_argument('--memory-tolerance', type=float, default=DEFAULT_MEMORY_TOLERANCE,
+                        help="Relative peak memory increase tolerated by --check")
+    args = parser.parse_args(argv)
+    args.targets = args.targets.split(',')
+    unknown = [target for target in args.targets if target not in TARGETS]
+    if unknown:
+        parser.error(f"Unknown targets: {', '.join(unknown)}")
+    overrides = {}
+    for pair in args.set or []:
+        resource, _, count = pair.partition('=')
+        if resource not in SCALES['small'] or not count.isdigit():
+            parser.error(f"Invalid --set {pair}")
+        overrides[resource] = int(count)
+    args.overrides = overrides
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    account = SyntheticAccount(args.scale, seed=args.seed, **args.overrides)
+    print(f"Synthetic account ({args.scale}): " + ', '.join(f"{count} {kind}" for kind, count in account.scale.items()))
+
+    store = BenchmarkStore(args.results)
+    baseline = store.baseline({'scale': account.scale, 'seed': account.seed})
+    run = BenchmarkRunner(account, repeat=args.repeat, memory=not args.no_memory).run(args.targets)
+
+    print(f"\n{'Target':<16}{'Wall (s)':>10}{'Median (s)':>12}{'API calls':>11}{'Peak MiB':>10}{'Findings':>10}")
+    for target, result in run['results'].items():
+        peak = result['peak_memory_bytes']
+        print(f"{target:<16}{result['wall_seconds']:>10.3f}{result['wall_seconds_median']:>12.3f}"
+              f"{result['api_calls']:>11}{(f'{peak / 2**20:.1f}' if peak is not None else '-'):>10}"
+              f"{result['findings']:>10}")
+
+    regressions = []
+    if baseline is not None:
+        regressions = compare(run, baseline, args.time_tolerance, args.memory_tolerance)
+        print(f"\nCompared with run {baseline.get('commit') or baseline['timestamp']}: "
+              f"{len(regressions) or 'no'} regressions")
+        for regression in regressions:
+            print(f"  - {regression}")
+    elif args.check:
+        print("\nNo earlier run on this account to compare with")
+
+    if args.save:
+        store.append(run)
+        print(f"\nSaved run to {args.results}")
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
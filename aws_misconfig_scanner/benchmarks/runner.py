@@ -0,0 +1,262 @@
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import boto3
+from aws_misconfig_scanner.benchmarks.synthetic import ACCOUNT_ID, REGION, SyntheticResponder
+from aws_misconfig_scanner.main import AWSMisconfigurationScanner
+from aws_misconfig_scanner.modules.ec2_scanner import EC2Scanner
+from aws_misconfig_scanner.modules.iam_scanner import IAMScanner
+from aws_misconfig_scanner.modules.lambda_scanner import LambdaScanner
+from aws_misconfig_scanner.modules.rds_scanner import RDSScanner
+from aws_misconfig_scanner.modules.s3_scanner import S3Scanner
+from aws_misconfig_scanner.modules.sg_scanner import SGScanner
+from aws_misconfig_scanner.utils.aws_clients import ClientFactory
+from aws_misconfig_scanner.utils.logger import setup_logger
+from aws_misconfig_scanner.utils.metrics import Metrics
+from aws_misconfig_scanner.utils.rate_limiter import RateLimiter
+
+"""
+runner.py
+
+Benchmark Runner
+
+This module runs every scanner, and the full orchestrator, against a synthetic account and
+records per target:
+
+- wall time (the fastest of several repetitions, plus the median)
+- API calls issued (from the metrics registry of the run's client factory)
+- peak memory allocated during the scan (tracemalloc, in a separate run so tracing does not slow
+  down the timed runs; the synthetic account itself is generated before tracing starts)
+- the number of findings, which must not change for the same account unless a check changed
+
+Results are appended to a JSON history file and compared with the latest earlier run on the same
+synthetic account, so a change to scanner code that slows a scanner down, makes it issue more
+calls or hold more memory is reported as a regression.
+
+Log records up to WARNING are suppressed during runs, so console output does not dominate the
+measured time.
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+DEFAULT_RESULTS_PATH = os.path.join('.benchmarks', 'results.json')
+
+# Benchmark targets: the individual scanners in report order, then the full orchestrator
+TARGETS = ('EC2', 'IAM', 'Lambda', 'RDS', 'SecurityGroups', 'S3', 'Full')
+
+# Relative increases tolerated before a measurement counts as a regression
+DEFAULT_TIME_TOLERANCE = 0.25
+DEFAULT_MEMORY_TOLERANCE = 0.20
+
+# Differences below these absolute amounts are noise, whatever their relative size
+MIN_TIME_DELTA = 0.05
+MIN_MEMORY_DELTA = 2**20
+
+
+def _scan(target, clients):
+    """
+    Runs one benchmark target and returns the number of findings it produced.
+    """
+    if target == 'Full':
+        results = AWSMisconfigurationScanner(clients=clients).run_all_scans(concurrent=True)
+        return sum(len(findings) for findings in results.values())
+    scanners = {
+        'EC2': EC2Scanner,
+        'IAM': IAMScanner,
+        'Lambda': LambdaScanner,
+        'RDS': RDSScanner,
+        'SecurityGroups': SGScanner,
+        'S3': S3Scanner,
+    }
+    return sum(1 for _ in scanners[target](clients=clients).iter_findings())
+
+
+class BenchmarkRunner:
+    """
+    Class: BenchmarkRunner
+
+    Description:
+        Runs benchmark targets against one synthetic account.
+
+    Attributes:
+        account (SyntheticAccount): Account every target scans.
+        repeat (int): Number of timed runs per target.
+        memory (bool): Measure peak memory in an additional traced run.
+    """
+
+    def __init__(self, account, repeat=3, memory=True):
+        self.account = account
+        self.repeat = max(1, repeat)
+        self.memory = memory
+        # One session for every run, so botocore's service models are loaded once
+        self._session = boto3.session.Session(
+            aws_access_key_id='benchmark', aws_secret_access_key='benchmark', region_name=REGION
+        )
+
+    def _clients(self):
+        """
+        Returns a fresh client factory answered by the synthetic account, with its own metrics.
+        """
+        return ClientFactory(session=self._session, account_id=ACCOUNT_ID, rate_limiter=RateLimiter(),
+                             metrics=Metrics(), event_hooks=[SyntheticResponder(self.account)])
+
+    def run_target(self, target):
+        """
+        Benchmarks one target.
+
+        Args:
+            target (str): One of TARGETS.
+
+        Returns:
+            result (dict): wall_seconds, wall_seconds_median, api_calls, peak_memory_bytes and findings.
+        """
+        timings = []
+        for _ in range(self.repeat):
+            clients = self._clients()
+            gc.collect()
+            started = time.perf_counter()
+            findings = _scan(target, clients)
+            timings.append(time.perf_counter() - started)
+        result = {
+            'wall_seconds': round(min(timings), 4),
+            'wall_seconds_median': round(statistics.median(timings), 4),
+            'api_calls': sum(entry['calls'] for entry in clients.metrics.snapshot()['api_calls']),
+            'peak_memory_bytes': None,
+            'findings': findings,
+        }
+        if self.memory:
+            clients = self._clients()
+            gc.collect()
+            tracemalloc.start()
+            try:
+                _scan(target, clients)
+                result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        return result
+
+    def run(self, targets=TARGETS):
+        """
+        Benchmarks several targets.
+
+        Returns:
+            run (dict): Run record with the environment, the account and the results per target.
+        """
+        results = {}
+        logging.disable(logging.WARNING)
+        try:
+            for target in targets:
+                results[target] = self.run_target(target)
+        finally:
+            logging.disable(logging.NOTSET)
+        return {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'account': {'scale': self.account.scale, 'seed': self.account.seed},
+            'repeat': self.repeat,
+            'results': results,
+        }
+
+
+def _git_commit():
+    """
+    Returns the current git commit of the working directory, or None outside a repository.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              timeout=5, check=True).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class BenchmarkStore:
+    """
+    Class: BenchmarkStore
+
+    Description:
+        JSON history of benchmark runs.
+
+    Attributes:
+        path (str): Path of the history file.
+    """
+
+    def __init__(self, path=DEFAULT_RESULTS_PATH):
+        self.path = path
+
+    def runs(self):
+        """
+        Returns every stored run, oldest first.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)['runs']
+        except FileNotFoundError:
+            return []
+
+    def baseline(self, account):
+        """
+        Returns the latest stored run on the same synthetic account, or None.
+
+        Args:
+            account (dict): 'scale' and 'seed' of the account.
+        """
+        for run in reversed(self.runs()):
+            if run['account'] == account:
+                return run
+        return None
+
+    def append(self, run):
+        """
+        Appends a run to the history, replacing the file atomically.
+        """
+        runs = self.runs() + [run]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'runs': runs}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def compare(run, baseline, time_tolerance=DEFAULT_TIME_TOLERANCE, memory_tolerance=DEFAULT_MEMORY_TOLERANCE):
+    """
+    Compares a run with a baseline run on the same account.
+
+    Args:
+        run (dict): Current run.
+        baseline (dict): Earlier run.
+        time_tolerance (float): (Optional) Relative wall time increase tolerated.
+        memory_tolerance (float): (Optional) Relative peak memory increase tolerated.
+
+    Returns:
+        regressions (list): Human readable descriptions of every regression (empty if none).
+    """
+    regressions = []
+    for target, result in run['results'].items():
+        previous = baseline['results'].get(target)
+        if previous is None:
+            continue
+        wall, previous_wall = result['wall_seconds'], previous['wall_seconds']
+        if wall > previous_wall * (1 + time_tolerance) and wall - previous_wall > MIN_TIME_DELTA:
+            regressions.append(f"{target}: wall time {previous_wall:.3f}s -> {wall:.3f}s")
+        if result['api_calls'] > previous['api_calls']:
+            regressions.append(f"{target}: API calls {previous['api_calls']} -> {result['api_calls']}")
+        peak, previous_peak = result['peak_memory_bytes'], previous['peak_memory_bytes']
+        if (peak is not None and previous_peak is not None and peak > previous_peak * (1 + memory_tolerance)
+                and peak - previous_peak > MIN_MEMORY_DELTA):
+            regressions.append(f"{target}: peak memory {previous_peak / 2**20:.1f} MiB -> {peak / 2**20:.1f} MiB")
+        if result['findings'] != previous['findings']:
+            regressions.append(f"{target}: findings {previous['findings']} -> {result['findings']}")
+    return regressions
@@ -0,0 +1,662 @@
+import copy
+import csv
+import io
+import json
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from fnmatch import fnmatchcase
+from urllib.parse import quote
+import botocore.session
+from botocore.awsrequest import AWSResponse
+from aws_misconfig_scanner.utils.logger import setup_logger
+
+"""
+synthetic.py
+
+Synthetic AWS Accounts
+
+This module fabricates large AWS accounts for offline benchmarking:
+
+- SyntheticAccount: a deterministic account (seeded) of S3 buckets, EC2 instances, security groups,
+  IAM users, groups, roles and policies, Lambda functions and RDS instances, at a configurable
+  scale, with a realistic share of misconfigured resources.
+- SyntheticResponder: answers every API call the scanners make from a SyntheticAccount. It is
+  registered on botocore's before-call event, which short-circuits the call before any request is
+  signed or sent (the call's parameters are captured on before-parameter-build), so scanners run
+  unchanged against accounts far larger than moto can hold, at no network cost. Pagination
+  follows botocore's paginator models with AWS's default page sizes, describe filters used for
+  push-down are evaluated (unknown filters are rejected, as AWS does), and missing configurations
+  are returned as the same errors AWS returns.
+
+Responses are built per call from the account's resources, so the parsing-side allocations of a
+real scan (one parsed page at a time) are part of what a benchmark measures.
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+ACCOUNT_ID = '123456789012'
+REGION = 'us-east-1'
+
+# Resource counts per preset; 'large' is the reference large account
+SCALES = {
+    'small': {
+        'buckets': 200, 'instances': 1000, 'security_groups': 400, 'users': 100, 'groups': 10, 'roles': 100,
+        'policies': 50, 'functions': 200, 'db_instances': 50,
+    },
+    'medium': {
+        'buckets': 2000, 'instances': 10000, 'security_groups': 4000, 'users': 500, 'groups': 25, 'roles': 1000,
+        'policies': 250, 'functions': 1000, 'db_instances': 400,
+    },
+    'large': {
+        'buckets': 10000, 'instances': 50000, 'security_groups': 20000, 'users': 2000, 'groups': 50, 'roles': 5000,
+        'policies': 1000, 'functions': 5000, 'db_instances': 2000,
+    },
+}
+
+# Default number of items per page of paginated operations when the caller sets no limit
+DEFAULT_PAGE_SIZES = {
+    'DescribeInstances': 1000,
+    'DescribeSecurityGroups': 1000,
+    'GetManagedPrefixListEntries': 100,
+    'GetAccountAuthorizationDetails': 100,
+    'ListPolicies': 100,
+    'ListUsers': 100,
+    'ListRoles': 100,
+    'ListFunctions': 50,
+    'DescribeDBInstances': 100,
+    'ListBuckets': 10000,
+}
+DEFAULT_PAGE_SIZE = 100
+
+AWS_MANAGED_POLICIES = {
+    'arn:aws:iam::aws:policy/AdministratorAccess': {
+        'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': '*', 'Resource': '*'}],
+    },
+    'arn:aws:iam::aws:policy/ReadOnlyAccess': {
+        'Version': '2012-10-17',
+        'Statement': [{'Effect': 'Allow', 'Action': ['ec2:Describe*', 's3:Get*', 's3:List*', 'iam:Get*', 'iam:List*'],
+                       'Resource': '*'}],
+    },
+}
+
+# Customer managed policy documents, from overly permissive to narrowly scoped
+POLICY_TEMPLATES = (
+    {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': '*', 'Resource': '*'}]},
+    {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': 's3:*', 'Resource': '*'}]},
+    {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': ['iam:PassRole', 'ec2:RunInstances'],
+                                            'Resource': '*'}]},
+    {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'NotAction': 'iam:*', 'Resource': '*'}]},
+    {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': ['s3:GetObject', 's3:PutObject'],
+                                            'Resource': 'arn:aws:s3:::app-data/*'}]},
+    {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': ['dynamodb:GetItem', 'dynamodb:Query'],
+                                            'Resource': 'arn:aws:dynamodb:us-east-1:123456789012:table/app'}]},
+    {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': 'logs:*',
+                                            'Resource': 'arn:aws:logs:*:*:log-group:/app/*'}]},
+)
+
+DANGEROUS_TEST_PORTS = (22, 3389, 3306, 5432)
+
+# Request context key holding the parameters of a call
+PARAMS_KEY = 'benchmark_params'
+
+
+class SyntheticError(Exception):
+    """
+    AWS error response returned by the responder for a call.
+    """
+
+    def __init__(self, code, message='', status=400):
+        super().__init__(code)
+        self.code = code
+        self.message = message
+        self.status = status
+
+
+def _quote_document(document):
+    return quote(json.dumps(document))
+
+
+class SyntheticAccount:
+    """
+    Class: SyntheticAccount
+
+    Description:
+        Deterministic fabricated AWS account.
+
+    Attributes:
+        scale (dict): Number of resources of each kind.
+        seed (int): Seed the account is generated from.
+    """
+
+    def __init__(self, scale='small', seed=0, **overrides):
+        """
+        Generates the account.
+
+        Args:
+            scale (str or dict): (Optional) Name of a preset in SCALES, or resource counts.
+            seed (int): (Optional) Random seed.
+            **overrides: Resource counts replacing those of the preset (e.g. buckets=20000).
+        """
+        counts = dict(SCALES[scale]) if isinstance(scale, str) else dict(scale)
+        counts.update(overrides)
+        self.scale = counts
+        self.seed = seed
+        self._random = random.Random(seed)
+        self._now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self._generate()
+
+    def _generate(self):
+        rnd = self._random
+        self.prefix_lists = {
+            f"pl-{i:017x}": [f"203.0.{i}.0/24", f"198.51.{i}.0/24"] for i in range(4)
+        }
+        self.security_groups = [self._security_group(i) for i in range(self.scale['security_groups'])]
+        self.reservations = []
+        for index in range(self.scale['instances']):
+            if not self.reservations or rnd.random() < 0.4:
+                self.reservations.append({'ReservationId': f"r-{len(self.reservations):017x}",
+                                          'OwnerId': ACCOUNT_ID, 'Instances': []})
+            self.reservations[-1]['Instances'].append(self._instance(index))
+        self.db_instances = [self._db_instance(i) for i in range(self.scale['db_instances'])]
+        self.buckets = [self._bucket(i) for i in range(self.scale['buckets'])]
+        self.function_settings = {}
+        self.functions = [self._function(i) for i in range(self.scale['functions'])]
+        self._generate_iam()
+
+    def _group_ids(self, count):
+        if not self.security_groups:
+            return []
+        return [self.security_groups[self._random.randrange(len(self.security_groups))]['GroupId']
+                for _ in range(count)]
+
+    def _security_group(self, index):
+        rnd = self._random
+        permissions = [{'IpProtocol': 'tcp', 'FromPort': 443, 'ToPort': 443,
+                        'IpRanges': [{'CidrIp': '10.0.0.0/16'}], 'Ipv6Ranges': [], 'PrefixListIds': [],
+                        'UserIdGroupPairs': []}]
+        roll = rnd.random()
+        if roll < 0.08:
+            port = rnd.choice(DANGEROUS_TEST_PORTS)
+            permissions.append({'IpProtocol': 'tcp', 'FromPort': port, 'ToPort': port,
+                                'IpRanges': [{'CidrIp': '0.0.0.0/0'}], 'Ipv6Ranges': [], 'PrefixListIds': [],
+                                'UserIdGroupPairs': []})
+        elif roll < 0.11:
+            permissions.append({'IpProtocol': 'tcp', 'FromPort': 80, 'ToPort': 80, 'IpRanges': [],
+                                'Ipv6Ranges': [{'CidrIpv6': '::/0'}], 'PrefixListIds': [], 'UserIdGroupPairs': []})
+        elif roll < 0.14:
+            permissions.append({'IpProtocol': '-1', 'IpRanges': [{'CidrIp': '52.0.0.0/8'}], 'Ipv6Ranges': [],
+                                'PrefixListIds': [], 'UserIdGroupPairs': []})
+        elif roll < 0.16:
+            permissions.append({'IpProtocol': 'tcp', 'FromPort': 22, 'ToPort': 22, 'IpRanges': [],
+                                'Ipv6Ranges': [], 'UserIdGroupPairs': [],
+                                'PrefixListIds': [{'PrefixListId': rnd.choice(sorted(self.prefix_lists))}]})
+        return {
+            'GroupId': f"sg-{index:017x}", 'GroupName': f"bench-sg-{index}", 'OwnerId': ACCOUNT_ID,
+            'Description': 'benchmark security group', 'VpcId': f"vpc-{index % 20:017x}",
+            'IpPermissions': permissions,
+            'IpPermissionsEgress': [{'IpProtocol': '-1', 'IpRanges': [{'CidrIp': '0.0.0.0/0'}], 'Ipv6Ranges': [],
+                                     'PrefixListIds': [], 'UserIdGroupPairs': []}],
+            'Tags': [{'Key': 'team', 'Value': f"team-{index % 17}"}],
+        }
+
+    def _instance(self, index):
+        rnd = self._random
+        state = 'terminated' if rnd.random() < 0.05 else rnd.choice(('running', 'running', 'running', 'stopped'))
+        subnet_id = f"subnet-{index % 64:017x}"
+        groups = [{'GroupId': group_id, 'GroupName': group_id} for group_id in self._group_ids(rnd.randint(1, 3))]
+        private_ip = f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"
+        public_ip = f"54.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}" if rnd.random() < 0.2 else None
+        association = {'PublicIp': public_ip, 'IpOwnerId': 'amazon'} if public_ip else None
+        address = {'PrivateIpAddress': private_ip, 'Primary': True}
+        if association:
+            address['Association'] = association
+        interface = {
+            'NetworkInterfaceId': f"eni-{index:017x}", 'SubnetId': subnet_id, 'VpcId': f"vpc-{index % 20:017x}",
+            'PrivateIpAddress': private_ip, 'PrivateIpAddresses': [address], 'Groups': groups, 'Status': 'in-use',
+        }
+        if association:
+            interface['Association'] = association
+        instance = {
+            'InstanceId': f"i-{index:017x}", 'ImageId': f"ami-{index % 40:08x}", 'InstanceType': 't3.micro',
+            'LaunchTime': self._now - timedelta(days=index % 365), 'State': {'Code': 16, 'Name': state},
+            'SubnetId': subnet_id, 'VpcId': interface['VpcId'], 'PrivateIpAddress': private_ip,
+            'SecurityGroups': groups, 'NetworkInterfaces': [interface],
+            'Placement': {'AvailabilityZone': f"{REGION}{'abc'[index % 3]}"},
+            'Tags': [{'Key': 'Name', 'Value': f"bench-instance-{index}"}],
+        }
+        if public_ip:
+            instance['PublicIpAddress'] = public_ip
+        return instance
+
+    def _db_instance(self, index):
+        rnd = self._random
+        engine, port = rnd.choice((('postgres', 5432), ('mysql', 3306)))
+        return {
+            'DBInstanceIdentifier': f"bench-db-{index}", 'DBInstanceClass': 'db.t3.micro', 'Engine': engine,
+            'DBInstanceStatus': 'available', 'Endpoint': {'Address': f"bench-db-{index}.example.com", 'Port': port},
+            'PubliclyAccessible': rnd.random() < 0.1, 'StorageEncrypted': rnd.random() < 0.8,
+            'BackupRetentionPeriod': 0 if rnd.random() < 0.1 else 7,
+            'VpcSecurityGroups': [{'VpcSecurityGroupId': group_id, 'Status': 'active'} for group_id in self._group_ids(1)],
+            'DBSubnetGroup': {'DBSubnetGroupName': 'bench', 'Subnets': [
+                {'SubnetIdentifier': f"subnet-{index % 64:017x}"}]},
+            'InstanceCreateTime': self._now - timedelta(days=index % 700),
+        }
+
+    def _bucket(self, index):
+        rnd = self._random
+        return {
+            'Name': f"bench-bucket-{index:06d}",
+            'CreationDate': self._now - timedelta(days=index % 1000),
+            'BucketRegion': REGION,
+            'PublicAccessBlock': rnd.random() < 0.5,
+            'PublicAcl': rnd.random() < 0.05,
+            'Policy': rnd.choice((None, None, 'private', 'public')) if rnd.random() < 0.4 else None,
+            'Encrypted': rnd.random() < 0.8,
+            'Versioning': 'Enabled' if rnd.random() < 0.6 else ('Suspended' if rnd.random() < 0.5 else None),
+        }
+
+    def _function(self, index):
+        rnd = self._random
+        name = f"bench-function-{index}"
+        arn = f"arn:aws:lambda:{REGION}:{ACCOUNT_ID}:function:{name}"
+        function = {
+            'FunctionName': name, 'FunctionArn': arn, 'Runtime': 'python3.12', 'Handler': 'app.handler',
+            'Role': f"arn:aws:iam::{ACCOUNT_ID}:role/bench-role-{index % max(1, self.scale['roles'])}",
+            'CodeSize': 1024 + index, 'MemorySize': 128, 'Timeout': 30,
+            'LastModified': (self._now - timedelta(days=index % 90)).strftime('%Y-%m-%dT%H:%M:%S.000+0000'),
+            'CodeSha256': f"{index:064x}", 'Version': '$LATEST', 'PackageType': 'Zip',
+        }
+        if rnd.random() < 0.5:
+            function['KMSKeyArn'] = f"arn:aws:kms:{REGION}:{ACCOUNT_ID}:key/{index:08x}"
+        self.function_settings[name] = {
+            'ReservedConcurrentExecutions': rnd.randint(1, 50) if rnd.random() < 0.3 else None,
+            'Policy': self._function_policy(arn, rnd) if rnd.random() < 0.4 else None,
+        }
+        return function
+
+    def _function_policy(self, arn, rnd):
+        statement = {'Sid': 'invoke', 'Effect': 'Allow', 'Action': 'lambda:InvokeFunction', 'Resource': arn,
+                     'Principal': {'Service': 's3.amazonaws.com'},
+                     'Condition': {'ArnLike': {'AWS:SourceArn': 'arn:aws:s3:::bench-bucket-000001'}}}
+        if rnd.random() < 0.12:
+            statement = {'Sid': 'public', 'Effect': 'Allow', 'Action': 'lambda:InvokeFunction', 'Resource': arn,
+                         'Principal': '*'}
+        return json.dumps({'Version': '2012-10-17', 'Id': 'default', 'Statement': [statement]})
+
+    def _generate_iam(self):
+        rnd = self._random
+        self.policies = []
+        for index in range(self.scale['policies']):
+            document = POLICY_TEMPLATES[index % len(POLICY_TEMPLATES)]
+            self.policies.append({
+                'PolicyName': f"bench-policy-{index}", 'PolicyId': f"ANPA{index:017d}",
+                'Arn': f"arn:aws:iam::{ACCOUNT_ID}:policy/bench-policy-{index}", 'Path': '/',
+                'DefaultVersionId': 'v1', 'AttachmentCount': 1, 'IsAttachable': True,
+                'CreateDate': self._now - timedelta(days=index % 500), 'UpdateDate': self._now - timedelta(days=index % 30),
+                'Document': document,
+            })
+        policy_arns = [policy['Arn'] for policy in self.policies] or list(AWS_MANAGED_POLICIES)
+
+        def attachments():
+            attached = []
+            if rnd.random() < 0.05:
+                attached.append('arn:aws:iam::aws:policy/AdministratorAccess')
+            elif rnd.random() < 0.3:
+                attached.append('arn:aws:iam::aws:policy/ReadOnlyAccess')
+            if rnd.random() < 0.3:
+                attached.append(rnd.choice(policy_arns))
+            return [{'PolicyName': arn.rsplit('/', 1)[-1], 'PolicyArn': arn} for arn in attached]
+
+        self.groups = [{
+            'GroupName': f"bench-group-{index}", 'GroupId': f"AGPA{index:017d}", 'Path': '/',
+            'Arn': f"arn:aws:iam::{ACCOUNT_ID}:group/bench-group-{index}", 'CreateDate': self._now,
+            'GroupPolicyList': [], 'AttachedManagedPolicies': attachments(),
+        } for index in range(self.scale['groups'])]
+        self.users = []
+        for index in range(self.scale['users']):
+            user = {
+                'UserName': f"bench-user-{index}", 'UserId': f"AIDA{index:017d}", 'Path': '/',
+                'Arn': f"arn:aws:iam::{ACCOUNT_ID}:user/bench-user-{index}",
+                'CreateDate': self._now - timedelta(days=index % 800),
+                'UserPolicyList': [], 'AttachedManagedPolicies': attachments(),
+                'GroupList': [self.groups[rnd.randrange(len(self.groups))]['GroupName']] if self.groups else [],
+                'KeyAgeDays': rnd.choice((None, 3, 40, 200, 400)), 'KeyNeverUsed': rnd.random() < 0.1,
+            }
+            if rnd.random() < 0.05:
+                user['UserPolicyList'] = [{'PolicyName': 'inline-admin',
+                                           'PolicyDocument': _quote_document(POLICY_TEMPLATES[0])}]
+            self.users.append(user)
+        self.roles = [{
+            'RoleName': f"bench-role-{index}", 'RoleId': f"AROA{index:017d}", 'Path': '/',
+            'Arn': f"arn:aws:iam::{ACCOUNT_ID}:role/bench-role-{index}", 'CreateDate': self._now,
+            'AssumeRolePolicyDocument': _quote_document({'Version': '2012-10-17', 'Statement': [
+                {'Effect': 'Allow', 'Principal': {'Service': 'lambda.amazonaws.com'}, 'Action': 'sts:AssumeRole'}]}),
+            'RolePolicyList': [], 'AttachedManagedPolicies': attachments(), 'InstanceProfileList': [],
+        } for index in range(self.scale['roles'])]
+
+    def credential_report(self):
+        """
+        Returns the account's credential report CSV.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['user', 'arn', 'access_key_1_active', 'access_key_1_last_used_date',
+                         'access_key_2_active', 'access_key_2_last_used_date'])
+        writer.writerow(['<root_account>', f"arn:aws:iam::{ACCOUNT_ID}:root", 'false', 'N/A', 'false', 'N/A'])
+        for user in self.users:
+            if user['KeyAgeDays'] is None:
+                writer.writerow([user['UserName'], user['Arn'], 'false', 'N/A', 'false', 'N/A'])
+                continue
+            last_used = 'N/A' if user['KeyNeverUsed'] else (
+                datetime.now(timezone.utc) - timedelta(days=user['KeyAgeDays'])).isoformat()
+            writer.writerow([user['UserName'], user['Arn'], 'true', last_used, 'false', 'N/A'])
+        return buffer.getvalue().encode('utf-8')
+
+
+def _public_ips(instance):
+    return [address['Association']['PublicIp']
+            for interface in instance.get('NetworkInterfaces', [])
+            for address in interface.get('PrivateIpAddresses', [])
+            if address.get('Association', {}).get('PublicIp')]
+
+
+def _permission_values(key, field):
+    def values(group):
+        return [entry.get(field) for permission in group.get('IpPermissions', []) for entry in permission.get(key, [])]
+    return values
+
+
+# Describe filters the responder evaluates, as functions returning a resource's values for the filter
+FILTER_VALUES = {
+    'DescribeInstances': {
+        'instance-state-name': lambda instance: [instance['State']['Name']],
+        'network-interface.addresses.association.public-ip': _public_ips,
+    },
+    'DescribeSecurityGroups': {
+        'ip-permission.cidr': _permission_values('IpRanges', 'CidrIp'),
+        'ip-permission.ipv6-cidr': _permission_values('Ipv6Ranges', 'CidrIpv6'),
+        'ip-permission.prefix-list-id': _permission_values('PrefixListIds', 'PrefixListId'),
+    },
+}
+
+
+def _matches(resource, filters, filter_values):
+    for flt in filters:
+        values = filter_values[flt['Name']](resource)
+        if not any(fnmatchcase(str(value), pattern) for value in values if value for pattern in flt['Values']):
+            return False
+    return True
+
+
+class SyntheticResponder:
+    """
+    Class: SyntheticResponder
+
+    Description:
+        Answers the scanners' API calls from a SyntheticAccount through botocore's before-call event.
+
+    Attributes:
+        account (SyntheticAccount): Account the responses are built from.
+        calls (int): Number of calls answered.
+    """
+
+    def __init__(self, account):
+        self.account = account
+        self.calls = 0
+        self._paginators = {}
+        self._lock = threading.Lock()
+        self._handlers = {
+            ('sts', 'GetCallerIdentity'): lambda params: {
+                'Account': ACCOUNT_ID, 'UserId': 'AIDABENCHMARK', 'Arn': f"arn:aws:iam::{ACCOUNT_ID}:user/benchmark"},
+            ('ec2', 'DescribeRegions'): lambda params: {
+                'Regions': [{'RegionName': REGION, 'Endpoint': f"ec2.{REGION}.amazonaws.com", 'OptInStatus': 'opt-in-not-required'}]},
+            ('ec2', 'DescribeInstances'): self._describe_instances,
+            ('ec2', 'DescribeSecurityGroups'): self._describe_security_groups,
+            ('ec2', 'GetManagedPrefixListEntries'): self._prefix_list_entries,
+            ('rds', 'DescribeDBInstances'): lambda params: self._page(
+                'rds', 'DescribeDBInstances', params, {'DBInstances': account.db_instances}),
+            ('lambda', 'ListFunctions'): lambda params: self._page(
+                'lambda', 'ListFunctions', params, {'Functions': account.functions}),
+            ('lambda', 'GetFunctionConcurrency'): self._function_concurrency,
+            ('lambda', 'GetPolicy'): self._function_policy,
+            ('iam', 'GetAccountSummary'): lambda params: {'SummaryMap': {
+                'AccountMFAEnabled': 0, 'Users': len(account.users), 'Roles': len(account.roles)}},
+            ('iam', 'GetAccountAuthorizationDetails'): self._authorization_details,
+            ('iam', 'ListPolicies'): lambda params: self._page('iam', 'ListPolicies', params, {'Policies': [
+                {key: value for key, value in policy.items() if key != 'Document'} for policy in account.policies]}),
+            ('iam', 'GetPolicyVersion'): self._policy_version,
+            ('iam', 'ListUsers'): lambda params: self._page('iam', 'ListUsers', params, {'Users': [
+                {key: user[key] for key in ('UserName', 'UserId', 'Arn', 'Path', 'CreateDate')}
+                for user in account.users]}),
+            ('iam', 'ListRoles'): lambda params: self._page('iam', 'ListRoles', params, {'Roles': [
+                {key: role[key] for key in ('RoleName', 'RoleId', 'Arn', 'Path', 'CreateDate')}
+                for role in account.roles]}),
+            ('iam', 'ListAttachedUserPolicies'): lambda params: {
+                'AttachedPolicies': self._principal(self._users, params['UserName'])['AttachedManagedPolicies']},
+            ('iam', 'ListAttachedRolePolicies'): lambda params: {
+                'AttachedPolicies': self._principal(self._roles, params['RoleName'])['AttachedManagedPolicies']},
+            ('iam', 'GenerateCredentialReport'): lambda params: {'State': 'COMPLETE'},
+            ('iam', 'GetCredentialReport'): lambda params: {
+                'Content': account.credential_report(), 'ReportFormat': 'text/csv'},
+            ('s3', 'ListBuckets'): lambda params: self._page('s3', 'ListBuckets', params, {'Buckets': [
+                {'Name': b['Name'], 'CreationDate': b['CreationDate'], 'BucketRegion': b['BucketRegion']}
+                for b in account.buckets]}),
+            ('s3', 'GetPublicAccessBlock'): self._bucket_public_access_block,
+            ('s3', 'GetBucketAcl'): self._bucket_acl,
+            ('s3', 'GetBucketPolicyStatus'): self._bucket_policy_status,
+            ('s3', 'GetBucketEncryption'): self._bucket_encryption,
+            ('s3', 'GetBucketVersioning'): lambda params: {
+                key: value for key, value in (('Status', self._bucket(params)['Versioning']),) if value},
+            ('s3-control', 'GetPublicAccessBlock'): self._raise(
+                'NoSuchPublicAccessBlockConfiguration', 'The public access block configuration was not found', 404),
+        }
+        self._buckets = {bucket['Name']: bucket for bucket in account.buckets}
+        self._policies = {policy['Arn']: policy for policy in account.policies}
+        self._users = {user['UserName']: user for user in account.users}
+        self._roles = {role['RoleName']: role for role in account.roles}
+
+    @staticmethod
+    def _raise(code, message, status=400):
+        def handler(params):
+            raise SyntheticError(code, message, status)
+        return handler
+
+    def register(self, client, account_id=None):
+        """
+        Attaches the responder to a boto3 client (every client is answered from the same account).
+        """
+        client.meta.events.register('before-parameter-build', self._capture_params)
+        client.meta.events.register('before-call', self._respond)
+
+    @staticmethod
+    def _capture_params(params, context=None, **kwargs):
+        if context is not None:
+            context[PARAMS_KEY] = dict(params)
+
+    def _respond(self, event_name, context=None, **kwargs):
+        _, service, operation = event_name.split('.', 2)
+        handler = self._handlers.get((service, operation))
+        if handler is None:
+            return self._response(400, {'Error': {'Code': 'UnsupportedOperation',
+                                                  'Message': f"{service}.{operation} is not simulated"}})
+        with self._lock:
+            self.calls += 1
+        try:
+            parsed = handler((context or {}).get(PARAMS_KEY, {}))
+        except SyntheticError as e:
+            return self._response(e.status, {'Error': {'Code': e.code, 'Message': e.message}})
+        return self._response(200, parsed)
+
+    @staticmethod
+    def _response(status, parsed):
+        # botocore decodes IAM policy documents in place, so responses must not share the account's objects
+        parsed = copy.deepcopy(parsed)
+        parsed['ResponseMetadata'] = {'RequestId': 'benchmark', 'HTTPStatusCode': status, 'HTTPHeaders': {},
+                                      'RetryAttempts': 0}
+        return AWSResponse('https://benchmark.invalid', status, {'content-length': '0'}, None), parsed
+
+    def _paginator(self, service, operation):
+        key = (service, operation)
+        if key not in self._paginators:
+            model = _botocore_session().get_paginator_model(service)
+            self._paginators[key] = model.get_paginator(operation)
+        return self._paginators[key]
+
+    def _page(self, service, operation, params, results):
+        """
+        Returns one page of a paginated operation.
+
+        Args:
+            service (str): botocore service name.
+            operation (str): Operation name.
+            params (dict): Call parameters (the page token and size are read from them).
+            results (dict): Full result lists by result key.
+        """
+        config = self._paginator(service, operation)
+        start = int(params.get(config['input_token']) or 0)
+        size = params.get(config['limit_key']) or DEFAULT_PAGE_SIZES.get(operation, DEFAULT_PAGE_SIZE)
+        end = start + size
+        page = {key: items[start:end] for key, items in results.items()}
+        more = any(len(items) > end for items in results.values())
+        if more:
+            page[config['output_token']] = str(end)
+        if 'more_results' in config:
+            page[config['more_results']] = more
+        return page
+
+    def _filtered(self, operation, resources, params):
+        filters = params.get('Filters') or []
+        filter_values = FILTER_VALUES[operation]
+        for flt in filters:
+            if flt['Name'] not in filter_values:
+                raise SyntheticError('InvalidParameterValue', f"The filter '{flt['Name']}' is invalid")
+        if not filters:
+            return resources
+        return [resource for resource in resources if _matches(resource, filters, filter_values)]
+
+    def _describe_instances(self, params):
+        reservations = self.account.reservations
+        if params.get('Filters'):
+            reservations = [
+                dict(reservation, Instances=instances)
+                for reservation in reservations
+                for instances in [self._filtered('DescribeInstances', reservation['Instances'], params)]
+                if instances
+            ]
+        return self._page('ec2', 'DescribeInstances', params, {'Reservations': reservations})
+
+    def _describe_security_groups(self, params):
+        groups = self._filtered('DescribeSecurityGroups', self.account.security_groups, params)
+        return self._page('ec2', 'DescribeSecurityGroups', params, {'SecurityGroups': groups})
+
+    def _prefix_list_entries(self, params):
+        cidrs = self.account.prefix_lists.get(params['PrefixListId'])
+        if cidrs is None:
+            raise SyntheticError('InvalidPrefixListID.NotFound', f"{params['PrefixListId']} does not exist")
+        return self._page('ec2', 'GetManagedPrefixListEntries', params,
+                          {'Entries': [{'Cidr': cidr} for cidr in cidrs]})
+
+    def _function_settings(self, params):
+        name = params['FunctionName'].rsplit(':', 1)[-1]
+        settings = self.account.function_settings.get(name)
+        if settings is None:
+            raise SyntheticError('ResourceNotFoundException', f"Function not found: {name}", 404)
+        return settings
+
+    def _function_concurrency(self, params):
+        concurrency = self._function_settings(params)['ReservedConcurrentExecutions']
+        return {} if concurrency is None else {'ReservedConcurrentExecutions': concurrency}
+
+    def _function_policy(self, params):
+        policy = self._function_settings(params)['Policy']
+        if policy is None:
+            raise SyntheticError('ResourceNotFoundException', 'The resource you requested does not exist.', 404)
+        return {'Policy': policy, 'RevisionId': 'benchmark'}
+
+    def _authorization_details(self, params):
+        account = self.account
+        attached = {entry['PolicyArn'] for principal in account.users + account.groups + account.roles
+                    for entry in principal['AttachedManagedPolicies']}
+        policies = [self._policy_detail(arn) for arn in sorted(attached)]
+        users = [{key: value for key, value in user.items() if key not in ('KeyAgeDays', 'KeyNeverUsed')}
+                 for user in account.users]
+        return self._page('iam', 'GetAccountAuthorizationDetails', params, {
+            'UserDetailList': users, 'GroupDetailList': account.groups,
+            'RoleDetailList': account.roles, 'Policies': policies,
+        })
+
+    def _policy_detail(self, arn):
+        policy = self._policies.get(arn)
+        if policy is None:
+            name = arn.rsplit('/', 1)[-1]
+            policy = {'PolicyName': name, 'Arn': arn, 'DefaultVersionId': 'v1', 'Path': '/',
+                      'Document': AWS_MANAGED_POLICIES.get(arn, POLICY_TEMPLATES[-1])}
+        detail = {key: value for key, value in policy.items() if key != 'Document'}
+        detail['PolicyVersionList'] = [{'VersionId': 'v1', 'IsDefaultVersion': True,
+                                        'Document': _quote_document(policy['Document'])}]
+        return detail
+
+    @staticmethod
+    def _principal(principals, name):
+        principal = principals.get(name)
+        if principal is None:
+            raise SyntheticError('NoSuchEntity', f"The user or role with name {name} cannot be found.", 404)
+        return principal
+
+    def _policy_version(self, params):
+        policy = self._policies.get(params['PolicyArn'])
+        if policy is None:
+            raise SyntheticError('NoSuchEntity', f"Policy {params['PolicyArn']} was not found", 404)
+        return {'PolicyVersion': {'VersionId': params['VersionId'], 'IsDefaultVersion': True,
+                                  'Document': _quote_document(policy['Document'])}}
+
+    def _bucket(self, params):
+        bucket = self._buckets.get(params['Bucket'])
+        if bucket is None:
+            raise SyntheticError('NoSuchBucket', 'The specified bucket does not exist', 404)
+        return bucket
+
+    def _bucket_public_access_block(self, params):
+        if not self._bucket(params)['PublicAccessBlock']:
+            raise SyntheticError('NoSuchPublicAccessBlockConfiguration',
+                                 'The public access block configuration was not found', 404)
+        return {'PublicAccessBlockConfiguration': {
+            'BlockPublicAcls': True, 'IgnorePublicAcls': True, 'BlockPublicPolicy': True, 'RestrictPublicBuckets': True}}
+
+    def _bucket_acl(self, params):
+        grants = [{'Grantee': {'Type': 'CanonicalUser', 'ID': 'owner'}, 'Permission': 'FULL_CONTROL'}]
+        if self._bucket(params)['PublicAcl']:
+            grants.append({'Grantee': {'Type': 'Group', 'URI': 'http://acs.amazonaws.com/groups/global/AllUsers'},
+                           'Permission': 'READ'})
+        return {'Owner': {'ID': 'owner'}, 'Grants': grants}
+
+    def _bucket_policy_status(self, params):
+        policy = self._bucket(params)['Policy']
+        if policy is None:
+            raise SyntheticError('NoSuchBucketPolicy', 'The bucket policy does not exist', 404)
+        return {'PolicyStatus': {'IsPublic': policy == 'public'}}
+
+    def _bucket_encryption(self, params):
+        if not self._bucket(params)['Encrypted']:
+            raise SyntheticError('ServerSideEncryptionConfigurationNotFoundError',
+                                 'The server side encryption configuration was not found', 404)
+        return {'ServerSideEncryptionConfiguration': {'Rules': [
+            {'ApplyServerSideEncryptionByDefault': {'SSEAlgorithm': 'AES256'}, 'BucketKeyEnabled': True}]}}
+
+
+_botocore_session_instance = None
+_botocore_session_lock = threading.Lock()
+
+
+def _botocore_session():
+    """
+    Returns the botocore session paginator models are loaded from, created on first use.
+    """
+    global _botocore_session_instance
+    with _botocore_session_lock:
+        if _botocore_session_instance is None:
+            _botocore_session_instance = botocore.session.get_session()
+        return _botocore_session_instance
@@ -1,10 +1,33 @@
+import argparse
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from aws_misconfig_scanner.modules.ec2_scanner import EC2Scanner
 from aws_misconfig_scanner.modules.iam_scanner import IAMScanner
 from aws_misconfig_scanner.modules.lambda_scanner import LambdaScanner
 from aws_misconfig_scanner.modules.rds_scanner import RDSScanner
+from aws_misconfig_scanner.modules.resource_graph import ResourceGraph
 from aws_misconfig_scanner.modules.s3_scanner import S3Scanner
-from aws_misconfig_scanner.modules.sg_scanner import SGScanner
-from aws_misconfig_scanner.utils.logger import setup_logger
+from aws_misconfig_scanner.modules.sg_scanner import DANGEROUS_PORTS, SGScanner
+from aws_misconfig_scanner.utils.async_engine import AsyncScanEngine
+from aws_misconfig_scanner.utils.aws_clients import DEFAULT_MAX_POOL_CONNECTIONS, ClientFactory, get_default_factory
+from aws_misconfig_scanner.utils.cache import DEFAULT_CACHE_PATH, ScanCache
+from aws_misconfig_scanner.utils.findings import Finding, count_by
+from aws_misconfig_scanner.utils.journal import DEFAULT_JOURNAL_PATH, ScanJournal
+from aws_misconfig_scanner.utils.logger import (
+    DEFAULT_PROGRESS_INTERVAL, DEFAULT_RATE_LIMIT, LOG_FORMATS, configure_logging, setup_logger,
+)
+from aws_misconfig_scanner.utils.metrics import EXPORT_FORMATS
+from aws_misconfig_scanner.utils.organization import DEFAULT_ROLE_NAME, AccountSessions, discover_accounts
+from aws_misconfig_scanner.utils.profiler import DEFAULT_PROFILE_PATH, ScanProfiler, format_top
+from aws_misconfig_scanner.utils.rate_limiter import RateLimiter
+from aws_misconfig_scanner.utils.recording import DEFAULT_SNAPSHOT_PATH, SnapshotRecorder, SnapshotReplayer
+from aws_misconfig_scanner.utils.rules import load_rules
+from aws_misconfig_scanner.utils.scheduler import ScanJob, ScanScheduler
+from aws_misconfig_scanner.utils.sharding import Shard, ShardQueue, merge_results
 
 
 
@@ -22,12 +45,128 @@ This file orchestrates the execution of multiple AWS misconfiguration scanners a
 - Security Groups (VPC firewall rules)
 
 Each scanner analyzes a specific AWS service for potential misconfigurations and collects security findings.
+The EC2, RDS and Security Group scanners also feed a resource graph, which is correlated after the
+scan into 'Exposure' findings for resources that are actually reachable from the internet.
+
+Large accounts can be scanned in shards (see utils/sharding.py): every shard scans its share of the
+scan units (a service in a region, with the services feeding the resource graph kept together), in
+its own worker process or on another host working a shared filesystem queue, and the partial
+results are merged into one report.
+
+Organization mode scans many accounts in parallel, each through a role assumed in that account
+(see utils/organization.py), and merges their findings tagged with the account id.
+
+Long scans can keep a checkpoint journal (see utils/journal.py); an interrupted scan resumed from
+it replays the jobs and resources it had finished and only scans the rest.
+
+Every API call, scan job and check is timed (see utils/metrics.py); the metrics can be exported as
+JSON or Prometheus text, and --profile dumps a cProfile profile of the scan (see utils/profiler.py).
+
+--record saves every API response of a scan to a snapshot file, and --replay re-runs the scan
+against a snapshot without network access (see utils/recording.py).
+
+Logging is asynchronous, rate limited per call site and available as JSON lines; per-resource
+progress is summarized periodically instead of logged line by line (see utils/logger.py).
 
 Author: Tom D.
 """
 
 logger = setup_logger(__name__)
 
+# Report order of services
+SERVICE_ORDER = ['EC2', 'IAM', 'Lambda', 'RDS', 'SecurityGroups', 'S3']
+
+# Regional services and the scanner class used for each region
+REGIONAL_SCANNERS = {
+    'EC2': EC2Scanner,
+    'Lambda': LambdaScanner,
+    'RDS': RDSScanner,
+    'SecurityGroups': SGScanner,
+}
+
+# Scanners that accept a persistent evaluation cache
+CACHED_SERVICES = {'IAM', 'Lambda', 'RDS'}
+
+# Scanners whose checks are declarative rules
+RULE_SERVICES = {'Lambda', 'RDS'}
+
+# Scanners feeding the cross-service resource graph, and the report key of its correlated findings
+GRAPH_SERVICES = {'EC2', 'RDS', 'SecurityGroups'}
+EXPOSURE_SERVICE = 'Exposure'
+
+# Execution engines for concurrent scans: a thread per job, or coroutines on one event loop
+ENGINES = ('threads', 'asyncio')
+
+# Report key of shards that failed as a whole in a sharded scan
+SHARD_ERRORS_SERVICE = 'Shards'
+
+# Seconds a node waits for shards claimed by other nodes before reporting them as unfinished
+DEFAULT_SHARD_TIMEOUT = 3600.0
+
+# Report key of accounts that could not be scanned in organization mode
+ACCOUNT_ERRORS_SERVICE = 'Accounts'
+
+
+def _tag_region(iter_findings, region):
+    """
+    Wraps a finding iterator factory so every finding it yields without a region is tagged with
+    the region of its scan job.
+    """
+    def run():
+        for finding in iter_findings():
+            yield finding if finding.region is not None else finding.replace(region=region)
+    return run
+
+
+def _timed(iter_findings, metrics, service, region):
+    """
+    Wraps a finding iterator factory so the wall time of every scan job is recorded.
+    """
+    def run():
+        started = time.perf_counter()
+        try:
+            yield from iter_findings()
+        finally:
+            metrics.record_scanner(service, region, time.perf_counter() - started)
+    return run
+
+
+def _journaled(iter_findings, progress):
+    """
+    Wraps a finding iterator factory so a job finished by a previous run replays its journaled
+    findings, and every finding of a running job is journaled as it is yielded (nothing is
+    buffered, so streaming scans stay flat in memory) until the job is recorded as finished.
+    """
+    def run():
+        replayed = progress.replay()
+        if replayed is not None:
+            yield from replayed
+            return
+        progress.start()
+        for finding in iter_findings():
+            progress.record_finding(finding)
+            yield finding
+        progress.complete()
+    return run
+
+
+def _job_func(service, iter_findings, sink=None):
+    """
+    Builds a scan job callable from a finding iterator factory.
+
+    Without a sink the job collects and returns its findings. With a sink every finding is
+    forwarded as soon as it is yielded and nothing is retained.
+    """
+    if sink is None:
+        return lambda: list(iter_findings())
+
+    def run():
+        for finding in iter_findings():
+            sink(service, finding)
+        return []
+    return run
+
+
 class AWSMisconfigurationScanner:
     """
     Class: AWSMisconfigurationScanner
@@ -43,66 +182,730 @@ class AWSMisconfigurationScanner:
         rds_scanner (RDSScanner): RDS database scanner.
         sg_scanner (SGScanner): Security Group misconfiguration scanner.
         s3_scanner (S3Scanner): S3 bucket scanner.
+        cache (ScanCache): Persistent evaluation cache shared by the scanners (None = disabled).
+        clients (ClientFactory): Client factory shared by all scanners.
+        rules (RuleSet): Compiled rules for rule-based scanners (None = bundled rules).
+        graph (ResourceGraph): Cross-service resource graph (None = correlation disabled).
+        shard (Shard): Shard of the scan units run by this scanner (None = all units).
+        journal (ScanJournal): Checkpoint journal recording finished jobs and resources (None = disabled).
     """
 
-    def __init__(self):
+    def __init__(self, cache=None, clients=None, rules=None, correlate=True, shard=None, journal=None):
         """
-        Initializes the orchestrator and all individual scanner modules.
+        Initializes the orchestrator and all individual scanner modules. No AWS clients are
+        created until a scanner first uses one.
+
+        Args:
+            cache (ScanCache): (Optional) Persistent evaluation cache for incremental rescans.
+            clients (ClientFactory): (Optional) Shared client factory. Defaults to the process-wide factory.
+            rules (RuleSet): (Optional) Compiled rules. Defaults to the bundled rules.
+            correlate (bool): (Optional) Build the resource graph and report correlated exposure.
+            shard (Shard): (Optional) Only run the scan units owned by this shard.
+            journal (ScanJournal): (Optional) Checkpoint journal to record progress in and resume from.
         """
-        self.ec2_scanner = EC2Scanner()
-        self.iam_scanner = IAMScanner()
-        self.lambda_scanner = LambdaScanner()
-        self.rds_scanner = RDSScanner()
-        self.sg_scanner = SGScanner()
-        self.s3_scanner = S3Scanner()
+        self.cache = cache
+        self.journal = journal
+        self.clients = clients or get_default_factory()
+        self.rules = rules
+        self.shard = shard
+        self.graph = ResourceGraph() if correlate else None
+        self.ec2_scanner = EC2Scanner(clients=self.clients, graph=self.graph)
+        self.iam_scanner = IAMScanner(cache=cache, clients=self.clients)
+        self.lambda_scanner = LambdaScanner(cache=cache, clients=self.clients, rules=rules)
+        self.rds_scanner = RDSScanner(cache=cache, clients=self.clients, rules=rules, graph=self.graph)
+        self.sg_scanner = SGScanner(clients=self.clients, graph=self.graph)
+        self.s3_scanner = S3Scanner(clients=self.clients)
     
-    def run_all_scans(self):
+    def discover_regions(self):
+        """
+        Discovers the regions enabled for the account (default regions plus opted-in regions).
+
+        Returns:
+            regions (list): Sorted list of enabled region names.
+        """
+        response = self.ec2_scanner.client.describe_regions(
+            Filters=[{'Name': 'opt-in-status', 'Values': ['opt-in-not-required', 'opted-in']}]
+        )
+        return sorted(region['RegionName'] for region in response['Regions'])
+
+    def _progress(self, key, service):
+        """
+        Returns the journal view of a scan job, or None if the job is not journaled.
+
+        Jobs feeding the resource graph are always rescanned when correlation is enabled, since
+        replayed findings would leave their resources out of the graph.
+        """
+        if self.journal is None or (self.graph is not None and service in GRAPH_SERVICES):
+            return None
+        if self.clients.account_id is not None:
+            key = (self.clients.account_id,) + (key if isinstance(key, tuple) else (key,))
+        return self.journal.unit(key)
+
+    def _job(self, service, scanner, iter_findings, sink, key=None):
+        """
+        Builds the timed scan job of one scanner, attaching the job's journal view when journaling.
+        """
+        if key:
+            region = key[1]
+        elif service in REGIONAL_SCANNERS:
+            region = scanner.region_name or self.clients.session.region_name
+        else:
+            region = 'global'
+        iter_findings = _timed(iter_findings, self.clients.metrics, service, region)
+        progress = self._progress(key or service, service)
+        if progress is not None:
+            if hasattr(scanner, 'progress'):
+                scanner.progress = progress
+            iter_findings = _journaled(iter_findings, progress)
+        return ScanJob(service, _job_func(service, iter_findings, sink), key=key, iter_findings=iter_findings)
+
+    def _scan_unit(self, job):
+        """
+        Returns the scan unit of a job: its service and region, with the services feeding the
+        resource graph of a region grouped into one unit so a single shard correlates them.
+        """
+        service = 'graph' if self.graph is not None and job.service in GRAPH_SERVICES else job.service
+        return service, job.key[1] if isinstance(job.key, tuple) else None
+
+    def _scan_jobs(self, regions=None, sink=None):
         """
-        Executes all scanners sequentially and collects their findings.
+        Builds the ordered list of scan jobs.
+
+        Without regions there is one job per AWS service scanner using the default region.
+        With regions, every (region, regional service) pair becomes its own job while global
+        services (IAM, S3 bucket listing) are scanned exactly once. Every finding is tagged with
+        the region it was found in ('global' for global services). In a sharded scan only the
+        jobs of the scan units owned by the shard are returned.
+
+        Args:
+            regions (list): (Optional) Regions to fan regional scanners out to.
+            sink (callable): (Optional) Callback receiving (service, finding) as findings are produced.
 
         Returns:
-            findings (dict): A dictionary containing security findings categorized by AWS service.
+            jobs (list): A list of ScanJob objects.
+        """
+        if not regions:
+            scanners = {
+                'EC2': self.ec2_scanner,
+                'IAM': self.iam_scanner,  # IAM scanner handles logging itself
+                'Lambda': self.lambda_scanner,
+                'RDS': self.rds_scanner,
+                'SecurityGroups': self.sg_scanner,
+                'S3': self.s3_scanner,
+            }
+            jobs = [self._job(service, scanners[service], scanners[service].iter_findings, sink)
+                    for service in SERVICE_ORDER]
+            return self._shard_jobs(jobs)
+
+        global_scanners = {
+            'IAM': self.iam_scanner,
+            'S3': self.s3_scanner,
+        }
+        jobs = []
+        for service in SERVICE_ORDER:
+            if service in global_scanners:
+                scanner = global_scanners[service]
+                iter_findings = _tag_region(scanner.iter_findings, 'global')
+                jobs.append(self._job(service, scanner, iter_findings, sink, key=(service, 'global')))
+                continue
+            for region in regions:
+                options = {}
+                if service in CACHED_SERVICES:
+                    options['cache'] = self.cache
+                if service in RULE_SERVICES:
+                    options['rules'] = self.rules
+                if service in GRAPH_SERVICES:
+                    options['graph'] = self.graph
+                scanner = REGIONAL_SCANNERS[service](region_name=region, clients=self.clients, **options)
+                iter_findings = _tag_region(scanner.iter_findings, region)
+                jobs.append(self._job(service, scanner, iter_findings, sink, key=(service, region)))
+        return self._shard_jobs(jobs)
+
+    def _shard_jobs(self, jobs):
         """
+        Returns the jobs of the scan units owned by the scanner's shard (all jobs when unsharded).
+        """
+        if self.shard is None:
+            return jobs
+        owned = self.shard.units(dict.fromkeys(self._scan_unit(job) for job in jobs))
+        return [job for job in jobs if self._scan_unit(job) in owned]
+
+    def run_all_scans(self, concurrent=False, max_workers=6, service_concurrency=None, timeouts=None, default_timeout=None,
+                      regions=None, sink=None, engine='threads'):
+        """
+        Executes all scanners and collects their findings.
+
+        By default the scanners run sequentially. In concurrent mode they are dispatched onto a
+        bounded worker pool so independent service crawls overlap instead of waiting for each other.
+        Multi-region mode always runs concurrently, with one job per (region, regional service) pair.
+        The 'asyncio' engine always runs concurrently too: every job is a coroutine on one event loop
+        and max_workers bounds the job steps running at once (on a thread pool) rather than the
+        number of open jobs.
+        Once every scanner has finished, the resource graph is correlated into 'Exposure' findings.
+
+        When a sink is given, every finding is forwarded to it as soon as a scanner yields it and no
+        findings are retained, so memory stays bounded regardless of account size. The sink is
+        called from worker threads but never concurrently.
+
+        Args:
+            concurrent (bool): (Optional) Run the scanners concurrently.
+            max_workers (int): (Optional) Worker pool size used in concurrent mode.
+            service_concurrency (dict): (Optional) Maximum concurrent jobs per service in concurrent mode.
+            timeouts (dict): (Optional) Timeout in seconds per service in concurrent mode.
+            default_timeout (float): (Optional) Timeout for services without an explicit entry.
+            regions (list): (Optional) Regions to scan, or ['all'] to scan every enabled region.
+            sink (callable): (Optional) Callback receiving (service, finding) for every finding.
+            engine (str): (Optional) Concurrent execution engine, one of ENGINES.
+
+        Returns:
+            findings (dict): A dictionary containing security findings categorized by AWS service,
+                or the number of findings forwarded per service when a sink is given.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(ENGINES)}")
         logger.info("===== Starting AWS Misconfiguration Scan =====")
+        if regions and list(regions) == ['all']:
+            regions = self.discover_regions()
+            logger.info("Discovered %s enabled regions: %s", len(regions), ', '.join(regions))
+        counts = {service: 0 for service in SERVICE_ORDER}
+        if self.graph is not None:
+            self.graph.clear()
+            counts[EXPOSURE_SERVICE] = 0
+        if sink is not None:
+            sink_lock = threading.Lock()
+            user_sink = sink
+
+            def sink(service, finding):
+                with sink_lock:
+                    counts[service] += 1
+                    user_sink(service, finding)
+
+        jobs = self._scan_jobs(regions, sink)
         findings = {}
-        
-        # EC2 Scan
-        logger.info("Running EC2 Scanner...")
-        findings['EC2'] = self.ec2_scanner.scan_ec2_instances()
-        
-        # IAM Scan
-        logger.info("Running IAM Scanner...")
-        findings['IAM'] = self.iam_scanner.run_all_checks()  # IAM scanner handles logging itself
-
-        # Lambda Scan
-        logger.info("Running Lambda Scanner...")
-        findings['Lambda'] = self.lambda_scanner.scan_lambda_functions()
-
-        # RDS Scan
-        logger.info("Running RDS Scanner...")
-        findings['RDS'] = self.rds_scanner.scan_rds_instances()
-
-        # Security Group Scan
-        logger.info("Running Security Group Scanner...")
-        findings['SecurityGroups'] = self.sg_scanner.scan_security_groups()
-
-        # S3 Scan
-        logger.info("Running S3 Scanner...")
-        findings['S3'] = self.s3_scanner.scan_s3_buckets()
+
+        if engine == 'asyncio':
+            logger.info("Running %s scanners on the asyncio engine (max concurrent job steps: %s)...",
+                        len(jobs), max_workers)
+            runner = AsyncScanEngine(
+                max_workers=max_workers,
+                service_concurrency=service_concurrency,
+                timeouts=timeouts,
+                default_timeout=default_timeout
+            )
+            results = runner.run(jobs, sink=sink)
+            for job in jobs:
+                findings.setdefault(job.service, []).extend(results.get(job.key, []))
+        elif concurrent or regions:
+            logger.info("Running %s scanners concurrently (max workers: %s)...", len(jobs), max_workers)
+            scheduler = ScanScheduler(
+                max_workers=max_workers,
+                service_concurrency=service_concurrency,
+                timeouts=timeouts,
+                default_timeout=default_timeout
+            )
+            results = scheduler.run(jobs, sink=sink)
+            # Consolidate in job order so the report layout does not depend on completion order
+            for job in jobs:
+                findings.setdefault(job.service, []).extend(results.get(job.key, []))
+        else:
+            for job in jobs:
+                logger.info("Running %s Scanner...", job.service)
+                findings.setdefault(job.service, []).extend(job.func())
+
+        if self.graph is not None:
+            findings[EXPOSURE_SERVICE] = self.graph.correlate(DANGEROUS_PORTS)
 
         logger.info("===== AWS Misconfiguration Scan Completed =====")
+        if self.cache is not None:
+            logger.info("Scan cache statistics: %s", self.cache.stats())
+        if self.clients.rate_limiter is not None:
+            throttled = {api: stats for api, stats in self.clients.rate_limiter.stats().items() if stats['throttles']}
+            if throttled:
+                logger.info("Throttled APIs: %s", throttled)
+        if sink is not None:
+            # Only scheduler-level errors (failed or timed-out jobs) and correlated findings are left to forward
+            for service, service_findings in findings.items():
+                for finding in service_findings:
+                    sink(service, finding)
+            return counts
         return findings
 
+
+def _forward_tagged(sink, lock, account_id, service, finding):
+    """
+    Forwards a finding of an account's scan to the shared sink, tagged with the account id.
+    """
+    with lock:
+        sink(service, finding.replace(account_id=account_id))
+
+
+def scan_accounts(accounts, clients=None, account_concurrency=4, role_name=DEFAULT_ROLE_NAME, external_id=None,
+                  cache=None, rules=None, correlate=True, sink=None, journal=None, **scan_options):
+    """
+    Scans several accounts in parallel and merges their findings into one report.
+
+    Every account is scanned by its own AWSMisconfigurationScanner through a role assumed in the
+    account, with its own client factory and its own rate limiter (AWS API limits apply per
+    account). Findings are tagged with their account id; an account whose role cannot be assumed or
+    whose scan fails is reported under 'Accounts'.
+
+    Args:
+        accounts (list): Account ids to scan, or ['all'] to scan every active account of the organization.
+        clients (ClientFactory): (Optional) Factory of the ambient credentials. Defaults to the process-wide factory.
+        account_concurrency (int): (Optional) Maximum number of accounts scanned at once.
+        role_name (str): (Optional) Role assumed in every account.
+        external_id (str): (Optional) External id required by the role's trust policy.
+        cache (ScanCache): (Optional) Persistent evaluation cache shared by all accounts.
+        rules (RuleSet): (Optional) Compiled rules. Defaults to the bundled rules.
+        correlate (bool): (Optional) Build a resource graph per account and report correlated exposure.
+        sink (callable): (Optional) Callback receiving (service, finding) for every finding.
+        journal (ScanJournal): (Optional) Checkpoint journal shared by all accounts.
+        **scan_options: Keyword arguments of AWSMisconfigurationScanner.run_all_scans.
+
+    Returns:
+        findings (dict): Findings per service in account order, or the number of findings
+            forwarded per service when a sink is given.
+    """
+    clients = clients or get_default_factory()
+    if list(accounts) == ['all']:
+        accounts = discover_accounts(clients)
+        logger.info("Discovered %s active accounts in the organization", len(accounts))
+    sessions = AccountSessions(clients, role_name=role_name, external_id=external_id)
+    base_limiter = clients.rate_limiter
+    sink_lock = threading.Lock()
+
+    def scan_account(account_id):
+        account_sink = functools.partial(_forward_tagged, sink, sink_lock, account_id) if sink is not None else None
+        try:
+            rate_limiter = None
+            if base_limiter is not None:
+                rate_limiter = RateLimiter(service_rates=base_limiter.service_rates, default_rate=base_limiter.default_rate)
+            account_clients = clients.with_session(sessions.session(account_id), account_id, rate_limiter=rate_limiter)
+            scanner = AWSMisconfigurationScanner(cache=cache, clients=account_clients, rules=rules, correlate=correlate,
+                                                 journal=journal)
+            logger.info("Scanning account %s", account_id)
+            return scanner.run_all_scans(sink=account_sink, **scan_options)
+        except Exception as e:
+            logger.error("Scan of account %s failed: %s", account_id, e)
+            error = Finding.error(e, account_id=account_id)
+            if account_sink is not None:
+                sink(ACCOUNT_ERRORS_SERVICE, error)
+                return {ACCOUNT_ERRORS_SERVICE: 1}
+            return {ACCOUNT_ERRORS_SERVICE: [error]}
+
+    with ThreadPoolExecutor(max_workers=max(1, account_concurrency), thread_name_prefix='account') as pool:
+        results = list(pool.map(scan_account, accounts))
+    logger.info("Scanned %s accounts (%s AssumeRole calls)", len(accounts), sessions.assume_calls)
+
+    merged = {}
+    for account_id, account_results in zip(accounts, results):
+        for service, service_findings in account_results.items():
+            if sink is not None:
+                merged[service] = merged.get(service, 0) + service_findings
+            else:
+                merged.setdefault(service, []).extend(
+                    finding if finding.account_id is not None else finding.replace(account_id=account_id)
+                    for finding in service_findings
+                )
+    return merged
+
+
+def _shard_cache_path(path, shard):
+    """
+    Returns the per-shard cache file for a cache path (shards never share a SQLite database).
+    """
+    base, ext = os.path.splitext(path)
+    return f"{base}.shard-{shard.index}-of-{shard.count}{ext}"
+
+
+def run_shard(shard_index, shard_count, options):
+    """
+    Runs one shard of a sharded scan; the entry point of shard worker processes.
+
+    Everything is built from picklable options inside the worker: its own client factory, rate
+    limiter, rules and cache file. Every API and region is called by a single shard, so each shard
+    keeps the full API rate limits, and every shard correlates the regions whose graph it scans.
+
+    Args:
+        shard_index (int): Index of the shard to scan.
+        shard_count (int): Total number of shards.
+        options (dict): Scan options (see run_sharded_scan).
+
+    Returns:
+        findings (dict): The shard's findings per service.
+    """
+    if options.get('logging'):
+        configure_logging(**options['logging'])
+    shard = Shard(shard_index, shard_count)
+    rate_limiter = RateLimiter(service_rates=options.get('api_rates'))
+    clients = ClientFactory(max_pool_connections=options.get('max_pool_connections', DEFAULT_MAX_POOL_CONNECTIONS),
+                            rate_limiter=rate_limiter)
+    rules = load_rules(options.get('rules', []), disabled=options.get('disabled_rules', []))
+    cache = None
+    if options.get('cache'):
+        cache = ScanCache(_shard_cache_path(options['cache'], shard), max_entries=options.get('cache_max_entries', 100000))
+    scanner = AWSMisconfigurationScanner(
+        cache=cache, clients=clients, rules=rules,
+        correlate=options.get('correlate', True), shard=shard
+    )
+    logger.info("Scanning shard %s of %s", shard_index, shard_count)
+    try:
+        return scanner.run_all_scans(**options.get('scan', {}))
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _run_shard_isolated(shard_index, shard_count, options):
+    """
+    Runs one shard, converting a failure of the whole shard into an error finding.
+    """
+    try:
+        return run_shard(shard_index, shard_count, options)
+    except Exception as e:
+        logger.error("Shard %s of %s failed: %s", shard_index, shard_count, e)
+        return {SHARD_ERRORS_SERVICE: [Finding.error(e, 'scan-shard', shard_index)]}
+
+
+def _work_queue(queue_dir, shard_count, options, timeout=None, stale_after=None):
+    """
+    Works a shared filesystem shard queue until every shard is finished; run in worker processes.
+    """
+    queue = ShardQueue(queue_dir)
+    return queue.work(lambda index: _run_shard_isolated(index, shard_count, options), shard_count,
+                      timeout=timeout, stale_after=stale_after)
+
+
+def run_sharded_scan(shard_count, options, processes=None, queue_dir=None, timeout=None, stale_after=None):
+    """
+    Scans the account in shards on a pool of worker processes and merges the results.
+
+    Without a queue directory the shards are distributed over local worker processes. With one,
+    the shards are put on a shared filesystem queue (unless another node already has) and the
+    local workers claim shards from it alongside the workers of any other node running the same
+    command; every node merges the same results once all shards are finished.
+
+    Args:
+        shard_count (int): Number of shards.
+        options (dict): Picklable scan options: 'scan' (run_all_scans keyword arguments),
+            'api_rates', 'rules', 'disabled_rules', 'cache', 'cache_max_entries',
+            'max_pool_connections', 'correlate' and 'logging' (configure_logging keyword arguments).
+        processes (int): (Optional) Number of local worker processes. Defaults to the CPU count.
+        queue_dir (str): (Optional) Shared filesystem queue directory.
+        timeout (float): (Optional) Maximum time to wait for other nodes, in queue mode.
+        stale_after (float): (Optional) Requeue shards claimed longer ago than this, in queue mode.
+
+    Returns:
+        findings (dict): Merged findings per service, in canonical order.
+    """
+    processes = max(1, min(shard_count, processes or os.cpu_count() or 1))
+    # Worker processes must not inherit boto3 sessions or client connection pools
+    context = multiprocessing.get_context('spawn')
+    partials = []
+
+    if queue_dir:
+        queue = ShardQueue(queue_dir)
+        # Every node scans with the options of the node that created the queue
+        options = queue.initialize(shard_count, options)['options']
+        logger.info("Working shard queue %s (%s shards) with %s processes", queue_dir, shard_count, processes)
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+            futures = [pool.submit(_work_queue, queue_dir, shard_count, options, timeout, stale_after)
+                       for _ in range(processes)]
+            for future in futures:
+                future.result()
+        partials = queue.results()
+        missing = shard_count - len(partials)
+        if missing:
+            logger.error("%s of %s shards did not finish in time", missing, shard_count)
+            partials.append({SHARD_ERRORS_SERVICE: [
+                Finding.error(f"{missing} of {shard_count} shards did not finish in time")
+            ]})
+    else:
+        logger.info("Scanning %s shards with %s processes", shard_count, processes)
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+            futures = [pool.submit(_run_shard_isolated, index, shard_count, options) for index in range(shard_count)]
+            partials = [future.result() for future in futures]
+
+    return merge_results(partials, SERVICE_ORDER + [EXPOSURE_SERVICE])
+
+
+def _parse_key_values(parser, option, pairs, value_type, minimum=None):
+    """
+    Parses repeated KEY=VALUE command line options into a dictionary, reporting malformed pairs
+    as parser errors.
+    """
+    parsed = {}
+    for pair in pairs or []:
+        key, separator, value = pair.partition('=')
+        if not separator or not key:
+            parser.error(f"{option} expects KEY=VALUE, got '{pair}'")
+        try:
+            parsed[key] = value_type(value)
+        except ValueError:
+            parser.error(f"{option} expects a number after '=', got '{pair}'")
+        if minimum is not None and parsed[key] < minimum:
+            parser.error(f"{option} value for {key} must be at least {minimum}, got {parsed[key]}")
+    return parsed
+
+
+def parse_args(argv=None):
+    """
+    Parses command line arguments for the scanner.
+    """
+    parser = argparse.ArgumentParser(description="AWS Misconfiguration Scanner")
+    parser.add_argument('--concurrent', action='store_true', help="Run service scanners concurrently")
+    parser.add_argument('--max-workers', type=int, default=6,
+                        help="Worker pool size for concurrent mode (maximum concurrent job steps with --engine asyncio)")
+    parser.add_argument('--engine', choices=ENGINES, default='threads',
+                        help="Concurrent execution engine: a thread per scan job, or coroutines on one event loop "
+                             "multiplexed over a --max-workers thread pool")
+    parser.add_argument('--service-concurrency', action='append', metavar='SERVICE=N',
+                        help="Maximum concurrent jobs for a service (repeatable)")
+    parser.add_argument('--timeout', type=float, default=None, help="Default per-scanner timeout in seconds")
+    parser.add_argument('--service-timeout', action='append', metavar='SERVICE=SECONDS',
+                        help="Timeout for a specific service scanner (repeatable)")
+    parser.add_argument('--regions', default=None,
+                        help="Comma-separated regions to scan, or 'all' for every enabled region")
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE_PATH, default=None, metavar='PATH',
+                        help="Reuse evaluations of unchanged resources from a persistent cache")
+    parser.add_argument('--cache-max-entries', type=int, default=100000,
+                        help="Maximum number of cached evaluations before LRU eviction")
+    parser.add_argument('--max-pool-connections', type=int, default=DEFAULT_MAX_POOL_CONNECTIONS,
+                        help="HTTP connection pool size per AWS client")
+    parser.add_argument('--api-rate', action='append', metavar='SERVICE=RPS',
+                        help="Maximum requests per second per API for a service (e.g. iam=5) or a single API "
+                             "(e.g. lambda.GetPolicy=50) (repeatable)")
+    parser.add_argument('--rules', action='append', metavar='PATH',
+                        help="Additional JSON/YAML rule file; rules override bundled rules with the same id (repeatable)")
+    parser.add_argument('--disable-rule', action='append', metavar='RULE_ID', help="Disable a rule (repeatable)")
+    parser.add_argument('--no-correlate', action='store_true',
+                        help="Skip the cross-service resource graph and correlated exposure findings")
+    parser.add_argument('--stream', action='store_true',
+                        help="Print findings as soon as they are found instead of a consolidated summary")
+    parser.add_argument('--shards', type=int, default=1,
+                        help="Split the scan units (service and region) into N shards, scanned by separate processes")
+    parser.add_argument('--shard-processes', type=int, default=None,
+                        help="Local worker processes for a sharded scan (default: CPU count)")
+    parser.add_argument('--shard-queue', default=None, metavar='DIR',
+                        help="Shared filesystem queue directory; every node running the same command works its shards")
+    parser.add_argument('--shard-stale-after', type=float, default=None, metavar='SECONDS',
+                        help="Requeue shards claimed longer ago than this (e.g. by a node that died)")
+    parser.add_argument('--shard-timeout', type=float, default=DEFAULT_SHARD_TIMEOUT, metavar='SECONDS',
+                        help="Stop waiting for shards claimed by other nodes after this long and report them as "
+                             f"unfinished (default: {DEFAULT_SHARD_TIMEOUT:.0f})")
+    parser.add_argument('--accounts', default=None,
+                        help="Comma-separated account ids to scan through an assumed role, or 'all' for every "
+                             "active account of the organization")
+    parser.add_argument('--role-name', default=DEFAULT_ROLE_NAME, help="Role assumed in every scanned account")
+    parser.add_argument('--external-id', default=None, help="External id required by the role's trust policy")
+    parser.add_argument('--account-concurrency', type=int, default=4, help="Maximum number of accounts scanned at once")
+    parser.add_argument('--journal', nargs='?', const=DEFAULT_JOURNAL_PATH, default=None, metavar='PATH',
+                        help="Record finished scan jobs and resources in a checkpoint journal (EC2, RDS and "
+                             "SecurityGroups jobs are only journaled with --no-correlate)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Resume an interrupted scan from its checkpoint journal instead of starting over; "
+                             "EC2, RDS and SecurityGroups are always rescanned unless --no-correlate is given, "
+                             "since the resource graph needs their resources")
+    parser.add_argument('--metrics', default=None, metavar='PATH',
+                        help="Export per-API call, per-scanner and per-check metrics to a file")
+    parser.add_argument('--metrics-format', choices=EXPORT_FORMATS, default='json',
+                        help="Format of the exported metrics")
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_PROFILE_PATH, default=None, metavar='PATH',
+                        help="Dump a cProfile profile of the scan (readable by pstats, snakeviz or flameprof)")
+    parser.add_argument('--record', nargs='?', const=DEFAULT_SNAPSHOT_PATH, default=None, metavar='PATH',
+                        help="Record every API response of the scan to a snapshot file")
+    parser.add_argument('--replay', default=None, metavar='PATH',
+                        help="Scan offline, answering every API call from a recorded snapshot file")
+    parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], default='INFO',
+                        help="Log level (DEBUG adds a line per scanned resource)")
+    parser.add_argument('--log-format', choices=LOG_FORMATS, default='text', help="Log output format")
+    parser.add_argument('--log-rate-limit', type=int, default=DEFAULT_RATE_LIMIT[0], metavar='N',
+                        help=f"Log records allowed per logging call site every {DEFAULT_RATE_LIMIT[1]:g} seconds "
+                             f"(0 = unlimited; errors are never suppressed)")
+    parser.add_argument('--progress-interval', type=float, default=DEFAULT_PROGRESS_INTERVAL, metavar='SECONDS',
+                        help="Seconds between progress summaries of long-running scanners")
+    args = parser.parse_args(argv)
+    args.service_concurrency = _parse_key_values(parser, '--service-concurrency', args.service_concurrency, int,
+                                                 minimum=1)
+    args.service_timeout = _parse_key_values(parser, '--service-timeout', args.service_timeout, float)
+    args.api_rate = _parse_key_values(parser, '--api-rate', args.api_rate, float)
+    if (args.record or args.replay) and (args.shards > 1 or args.shard_queue):
+        parser.error("--record and --replay cannot be combined with a sharded scan")
+    if args.record and args.replay:
+        parser.error("--record and --replay cannot be combined")
+    if args.record and (args.cache or args.resume):
+        parser.error("--record cannot be combined with --cache or --resume, which skip API calls the snapshot needs")
+    if (args.metrics or args.profile) and (args.shards > 1 or args.shard_queue):
+        parser.error("--metrics and --profile cannot be combined with a sharded scan")
+    if args.resume and not args.journal:
+        args.journal = DEFAULT_JOURNAL_PATH
+    if args.journal and (args.shards > 1 or args.shard_queue):
+        parser.error("--journal and --resume cannot be combined with a sharded scan")
+    if args.accounts and (args.shards > 1 or args.shard_queue):
+        parser.error("--accounts cannot be combined with a sharded scan")
+    if args.shards < 1:
+        parser.error("--shards must be at least 1")
+    if args.shard_timeout <= 0:
+        parser.error("--shard-timeout must be positive")
+    if args.stream and (args.shards > 1 or args.shard_queue):
+        parser.error("--stream cannot be combined with a sharded scan")
+    return args
+
+
 if __name__ == "__main__":
-    scanner = AWSMisconfigurationScanner()
-    results = scanner.run_all_scans()
-
-    # Print consolidated findings
-    print("\n=== Misconfiguration Findings Summary ===\n")
-    for service, service_findings in results.items():
-        print(f"\nService: {service}")
-        if not service_findings:
-            print("  No misconfigurations found.")
+    args = parse_args()
+    log_options = dict(
+        level=args.log_level,
+        fmt=args.log_format,
+        rate_limit=(args.log_rate_limit, DEFAULT_RATE_LIMIT[1]) if args.log_rate_limit > 0 else None,
+        progress_interval=args.progress_interval
+    )
+    configure_logging(**log_options)
+    scan_options = dict(
+        concurrent=args.concurrent,
+        max_workers=args.max_workers,
+        service_concurrency=args.service_concurrency,
+        timeouts=args.service_timeout,
+        default_timeout=args.timeout,
+        regions=args.regions.split(',') if args.regions else None,
+        engine=args.engine
+    )
+
+    profiler = ScanProfiler(args.profile) if args.profile else None
+    if profiler is not None:
+        profiler.start()
+
+    if args.shards > 1 or args.shard_queue:
+        # Caches, rate limiters and scanners live in the shard worker processes, which log their own statistics
+        cache = rate_limiter = scanner = journal = recorder = replayer = None
+        results = run_sharded_scan(args.shards, {
+            'scan': scan_options,
+            'api_rates': args.api_rate,
+            'rules': args.rules or [],
+            'disabled_rules': args.disable_rule or [],
+            'cache': args.cache,
+            'cache_max_entries': args.cache_max_entries,
+            'max_pool_connections': args.max_pool_connections,
+            'correlate': not args.no_correlate,
+            'logging': log_options,
+        }, processes=args.shard_processes, queue_dir=args.shard_queue, timeout=args.shard_timeout,
+           stale_after=args.shard_stale_after)
+    else:
+        cache = ScanCache(args.cache, max_entries=args.cache_max_entries) if args.cache else None
+        rate_limiter = RateLimiter(service_rates=args.api_rate)
+        recorder = SnapshotRecorder(args.record) if args.record else None
+        replayer = SnapshotReplayer(args.replay) if args.replay else None
+        if replayer is not None:
+            clients = replayer.client_factory(max_pool_connections=args.max_pool_connections, rate_limiter=rate_limiter)
         else:
-            for finding in service_findings:
-                print(f"  - {finding}")
\ No newline at end of file
+            clients = ClientFactory(max_pool_connections=args.max_pool_connections, rate_limiter=rate_limiter,
+                                    event_hooks=[recorder] if recorder is not None else ())
+        if recorder is not None:
+            recorder.region = clients.session.region_name
+        rules = load_rules(args.rules or [], disabled=args.disable_rule or [])
+        journal = None
+        if args.journal:
+            journal = ScanJournal(args.journal, resume=args.resume,
+                                  scope={'regions': args.regions, 'accounts': args.accounts})
+
+        def print_finding(service, finding):
+            print(f"[{service}] {finding.to_dict()}", flush=True)
+
+        if args.accounts:
+            # Every account is paced by its own limiter; the ambient limiter only paces STS and Organizations
+            scanner = None
+            results = scan_accounts(
+                args.accounts.split(','), clients=clients, account_concurrency=args.account_concurrency,
+                role_name=args.role_name, external_id=args.external_id, cache=cache, rules=rules,
+                correlate=not args.no_correlate, sink=print_finding if args.stream else None, journal=journal,
+                **scan_options
+            )
+        else:
+            scanner = AWSMisconfigurationScanner(cache=cache, clients=clients, rules=rules, correlate=not args.no_correlate,
+                                                 journal=journal)
+            results = scanner.run_all_scans(sink=print_finding if args.stream else None, **scan_options)
+
+    profile_stats = profiler.stop() if profiler is not None else None
+
+    if args.stream:
+        print("\n=== Misconfiguration Findings Count ===\n")
+        for service, count in results.items():
+            print(f"  {service}: {count}")
+    else:
+        # Print consolidated findings
+        print("\n=== Misconfiguration Findings Summary ===\n")
+        for service, service_findings in results.items():
+            print(f"\nService: {service}")
+            if not service_findings:
+                print("  No misconfigurations found.")
+            else:
+                for finding in service_findings:
+                    print(f"  - {finding.to_dict()}")
+
+        severities = count_by((finding for findings in results.values() for finding in findings), 'severity')
+        print("\n=== Findings by Severity ===\n")
+        for severity in sorted((severity for severity in severities if severity is not None), reverse=True):
+            print(f"  {severity}: {severities[severity]}")
+        if None in severities:
+            print(f"  Errors: {severities[None]}")
+
+    if cache is not None:
+        stats = cache.stats()
+        cache.close()
+        print("\n=== Cache ===\n")
+        print(f"  Hit rate: {stats['hit_rate']:.1%} ({stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['evictions']} evictions, {stats['entries']} entries)")
+
+    if journal is not None:
+        stats = journal.stats()
+        journal.close()
+        print("\n=== Journal ===\n")
+        print(f"  {args.journal}: replayed {stats['replayed_units']} jobs and {stats['replayed_resources']} resources, "
+              f"recorded {stats['recorded_units']} jobs and {stats['recorded_resources']} resources")
+
+    if recorder is not None:
+        recorder.close()
+        print("\n=== Snapshot ===\n")
+        print(f"  Recorded {recorder.calls} API responses to {args.record}")
+    if replayer is not None:
+        stats = replayer.stats()
+        replayer.close()
+        print("\n=== Snapshot ===\n")
+        print(f"  Replayed {stats['replayed']} API responses from {args.replay}, {stats['misses']} calls not recorded")
+
+    elision = scanner.s3_scanner.elision_stats() if scanner is not None else {'planning': {}}
+    if elision['planning']:
+        print("\n=== S3 Call Elision ===\n")
+        print(f"  Elided {sum(elision['elided'].values())} calls using {sum(elision['planning'].values())} "
+              f"Block Public Access lookups")
+        for operation, count in sorted(elision['elided'].items()):
+            print(f"  {operation}: {count} elided")
+
+    paced = {api: stats for api, stats in (rate_limiter.stats() if rate_limiter is not None else {}).items()
+             if stats['throttles'] or stats['wait_seconds']}
+    if paced:
+        print("\n=== API Throttling ===\n")
+        for api, stats in paced.items():
+            print(f"  {api}: {stats['calls']} calls, {stats['throttles']} throttled, "
+                  f"{stats['wait_seconds']:.1f}s waiting (rate now {stats['rate']}/s)")
+
+    if args.metrics or profile_stats is not None:
+        metrics = clients.metrics.snapshot()
+        print("\n=== Scan Timing ===\n")
+        for entry in metrics['scanners']:
+            print(f"  {entry['scanner']} ({entry['region']}): {entry['seconds']:.2f}s")
+        print("\n  Slowest APIs:")
+        for entry in metrics['api_calls'][:10]:
+            print(f"  {entry['service']}.{entry['operation']}@{entry['region']}: {entry['calls']} calls, "
+                  f"{entry['seconds']:.2f}s, {entry['retries']} retries, {entry['errors']} errors, "
+                  f"{entry['response_bytes']} bytes")
+        print("\n  Slowest checks:")
+        for entry in metrics['checks'][:10]:
+            print(f"  {entry['check']}: {entry['runs']} runs, {entry['seconds']:.3f}s")
+    if args.metrics:
+        clients.metrics.export(args.metrics, args.metrics_format)
+        print(f"\n  Metrics written to {args.metrics} ({args.metrics_format})")
+    if profile_stats is not None:
+        print("\n=== Profile ===\n")
+        print(format_top(profile_stats))
+        print(f"  Profile written to {args.profile}")
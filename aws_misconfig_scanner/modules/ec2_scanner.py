@@ -1,5 +1,7 @@
-import boto3
+from aws_misconfig_scanner.utils.aws_clients import get_default_factory
+from aws_misconfig_scanner.utils.findings import Finding, Severity, finding_type
 from aws_misconfig_scanner.utils.logger import setup_logger
+from aws_misconfig_scanner.utils.query import Check, ResourceQuery
 
 """
 ec2_scanner.py
@@ -24,54 +26,116 @@ Author: Tom D.
 # Configure logger for this module
 logger = setup_logger(__name__)
 
+# Instance states that can still hold a public IP (terminated instances are filtered out server-side)
+LIVE_INSTANCE_STATES = ['pending', 'running', 'shutting-down', 'stopping', 'stopped']
+
+# Finding type of the public IP check
+PUBLIC_IP = finding_type('ec2-public-ip', Severity.MEDIUM, 'ec2-instance',
+                         "EC2 instance {id} has a public IP address assigned: {0}")
+
 class EC2Scanner:
     """
     Class: EC2Scanner
 
     Description:
         Performs EC2 instance analysis to detect public IP address assignments
-        across all running instances in the AWS account
-    
+        across all running instances in the AWS account.
+
+        Checks declare the describe_instances filters they can push down, so by default AWS only
+        returns live instances that have a public IP association, projected to the fields read.
+
     Attributes:
         client (boto3.client): Boto3 EC2 client used to retrieve instance information.
+        clients (ClientFactory): Shared factory the client is obtained from.
+        region_name (str): AWS region scanned by this instance (None = configured default).
+        pushdown (bool): Push check filters down to describe_instances.
+        query (ResourceQuery): Describe query evaluating the EC2 checks.
+        graph (ResourceGraph): Resource graph fed with every fetched instance (None = disabled).
     """
 
-    def __init__(self):
+    def __init__(self, region_name=None, pushdown=True, clients=None, graph=None):
         """
         Initializes the EC2Scanner instance and establishes connection to the AWS EC2 service.
+
+        Args:
+            region_name (str): (Optional) AWS region to scan. Defaults to the configured region.
+            pushdown (bool): (Optional) Push check filters down to the API instead of filtering client-side.
+            clients (ClientFactory): (Optional) Shared client factory. Defaults to the process-wide factory.
+            graph (ResourceGraph): (Optional) Resource graph to feed for cross-service exposure analysis.
+        """
+        self.region_name = region_name
+        self.clients = clients or get_default_factory()
+        self.pushdown = pushdown
+        self.graph = graph
+        observers = []
+        if graph is not None:
+            observers.append(Check(
+                'graph', ('NetworkInterfaces', 'SecurityGroups', 'SubnetId', 'PublicIpAddress'),
+                lambda instance: graph.add_instance(instance, self.client.meta.region_name)
+            ))
+        self.query = ResourceQuery(
+            'describe_instances', ('Reservations', 'Instances'), 'InstanceId',
+            checks=[
+                Check(
+                    'public-ip', ('PublicIpAddress',), self._check_public_ip,
+                    filter_sets=[[{'Name': 'network-interface.addresses.association.public-ip', 'Values': ['*']}]]
+                ),
+            ],
+            base_filters=[{'Name': 'instance-state-name', 'Values': LIVE_INSTANCE_STATES}],
+            observers=observers
+        )
+
+    @property
+    def client(self):
         """
-        self.client = boto3.client('ec2')
+        Boto3 EC2 client, created lazily by the shared client factory on first use.
+        """
+        return self.clients.client('ec2', self.region_name)
 
-    def scan_ec2_instances(self):
+    def _check_public_ip(self, instance):
         """
-        Scans all EC2 instances across all reservations and identifies instances
-        that have public IP addresses assigned.
+        Flags an instance that has a public IP address assigned.
 
-        Public IP assignment is flagged as a potential misconfiguration, as it may expose workloads directly to the internet, increasing the attack surface.
+        Args:
+            instance (dict): Projected instance description.
 
         Returns:
-            findings (list): A list of dictionaries describing discovered misconfigurations.
+            findings (list): A list of Findings describing discovered misconfigurations.
         """
-        findings = []
+        instance_id = instance['InstanceId']
+        logger.debug("Scanning EC2 instance: %s", instance_id)
 
-        try:
-            reservations = self.client.describe_instances()['Reservations']
+        public_ip = instance.get('PublicIpAddress')
 
-            for reservation in reservations:
-                for instance in reservation['Instances']:
-                    instance_id = instance['InstanceId']
-                    logger.info(f"Scanning EC2 instance: {instance_id}")
+        if public_ip:
+            finding = Finding(PUBLIC_IP, instance_id, (public_ip,), region=self.client.meta.region_name)
+            logger.warning("%s", finding)
+            return [finding]
+        logger.debug("EC2 instance %s has no public IP address assigned", instance_id)
+        return []
 
-                    public_ip = instance.get('PublicIpAddress')
+    def iter_findings(self):
+        """
+        Scans EC2 instances one describe_instances page at a time and yields findings as
+        soon as they are found.
+
+        Public IP assignment is flagged as a potential misconfiguration, as it may expose workloads directly to the internet, increasing the attack surface.
 
-                    if public_ip:
-                        issue = f"EC2 instance {instance_id} has a public IP address assigned: {public_ip}"
-                        findings.append({'InstanceId': instance_id, 'Issue': issue})
-                        logger.warning(issue)
-                    else:
-                        logger.info(f"EC2 instance {instance_id} has no public IP address assigned")
+        Yields:
+            finding (Finding): A discovered misconfiguration.
+        """
+        try:
+            yield from self.query.iter_findings(self.client, self.pushdown)
         except Exception as e:
-            logger.error(f"Error scanning EC2 instances: {e}")
-            findings.append({'Error': str(e)})
+            logger.error("Error scanning EC2 instances: %s", e)
+            yield Finding.error(e, 'ec2-instance', region=self.region_name)
+
+    def scan_ec2_instances(self):
+        """
+        Scans all EC2 instances across all reservations and identifies instances
+        that have public IP addresses assigned.
 
-        return findings
\ No newline at end of file
+        Returns:
+            findings (list): A list of Findings describing discovered misconfigurations.
+        """
+        return list(self.iter_findings())
@@ -0,0 +1,487 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from bisect import bisect_left
+from fnmatch import translate
+from aws_misconfig_scanner.modules.iam_snapshot import load_policy_document, policy_statements
+from aws_misconfig_scanner.utils.logger import setup_logger
+
+"""
+iam_policy.py
+
+IAM Policy Evaluation Engine
+
+This module works out the effective privileges an IAM policy document grants, by expanding its
+action patterns against a bundled catalog of IAM actions:
+
+- Action and NotAction patterns (strings or lists, case-insensitive, '*' and '?' wildcards)
+- Explicit denies within the same document
+- Full administrative access (every catalog action allowed on every resource), including through
+  NotAction allows and through a combination of several policies
+- Service-wide wildcards (e.g. 'iam:*' or 's3:*' on '*') and privilege escalation actions
+
+Resource policies (e.g. Lambda function policies) are analyzed for statements allowing a public
+principal ('*') without a condition tying access to a source account, organization or network.
+
+Only unconditional statements applying to every resource ('*' or a NotResource allow) count
+towards effective privileges; resource-scoped statements are treated as constrained. Allow statements
+behind a condition (e.g. aws:MultiFactorAuthPresent) are evaluated separately and reported as grants
+that apply when their conditions are met, since a condition usually narrows who gets a grant rather
+than what it grants. Conditioned Deny statements are ignored, which can only overstate privileges.
+
+Patterns are expanded per service against sorted action lists: a trailing-wildcard pattern is a
+bisect range, any other wildcard is matched with a precompiled regular expression. Analyses are
+memoized by the hash of the normalized document, so a document shared by many principals is
+evaluated once.
+
+The catalog (rules/iam_actions.json.gz) is generated from the API operations in botocore's service
+models plus permission-only actions; regenerate it with:
+
+    python -m aws_misconfig_scanner.modules.iam_policy
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+# Bundled IAM action catalog ({service prefix: [action names]})
+ACTION_CATALOG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'rules', 'iam_actions.json.gz'
+)
+
+# Actions that exist only as permissions (no API operation of the same name)
+PERMISSION_ONLY_ACTIONS = {
+    'iam': ['PassRole'],
+    'lambda': ['InvokeFunction'],
+    's3': ['ListAllMyBuckets', 'ListBucket', 'ListBucketVersions'],
+}
+
+# Actions that let a principal escalate its own privileges
+PRIVILEGE_ESCALATION_ACTIONS = (
+    'iam:addusertogroup', 'iam:attachgrouppolicy', 'iam:attachrolepolicy', 'iam:attachuserpolicy',
+    'iam:createaccesskey', 'iam:createloginprofile', 'iam:createpolicyversion', 'iam:passrole',
+    'iam:putgrouppolicy', 'iam:putrolepolicy', 'iam:putuserpolicy', 'iam:setdefaultpolicyversion',
+    'iam:updateassumerolepolicy', 'iam:updateloginprofile',
+)
+
+# Condition keys restricting a public principal to a specific source account, organization or network
+SOURCE_CONDITION_KEYS = frozenset(key.lower() for key in (
+    'aws:SourceArn', 'aws:SourceAccount', 'aws:SourceOwner', 'aws:SourceOrgID', 'aws:SourceOrgPaths',
+    'aws:PrincipalOrgID', 'aws:PrincipalOrgPaths', 'aws:PrincipalAccount', 'aws:PrincipalArn',
+    'aws:SourceVpc', 'aws:SourceVpce', 'aws:SourceIp',
+))
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def normalize_document(document):
+    """
+    Returns a canonical form of a policy document: statements with list-valued, lower-cased
+    actions and sorted resources, without Sids, in a stable order.
+    """
+    statements = []
+    for smt in policy_statements(document):
+        statements.append({
+            'Effect': smt.get('Effect'),
+            'Action': sorted({action.lower() for action in _as_list(smt.get('Action'))}),
+            'NotAction': sorted({action.lower() for action in _as_list(smt.get('NotAction'))}),
+            'Resource': sorted(_as_list(smt.get('Resource'))),
+            'NotResource': sorted(_as_list(smt.get('NotResource'))),
+            'Condition': smt.get('Condition') or {},
+        })
+    return sorted(statements, key=lambda smt: json.dumps(smt, sort_keys=True))
+
+
+def _statements_hash(statements):
+    return hashlib.sha256(json.dumps(statements, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def document_hash(document):
+    """
+    Returns the hash of a policy document's normalized form.
+    """
+    return _statements_hash(normalize_document(document))
+
+
+def build_action_catalog():
+    """
+    Builds the action catalog from the API operations of botocore's bundled service models.
+
+    Returns:
+        catalog (dict): Mapping of IAM service prefix to sorted action names.
+    """
+    import botocore.session
+
+    session = botocore.session.get_session()
+    loader = session.get_component('data_loader')
+    services = {}
+    for service_name in session.get_available_services():
+        model = loader.load_service_model(service_name, 'service-2')
+        metadata = model['metadata']
+        prefix = (metadata.get('signingName') or metadata.get('endpointPrefix') or service_name).lower()
+        services.setdefault(prefix, set()).update(model['operations'])
+    for prefix, actions in PERMISSION_ONLY_ACTIONS.items():
+        services.setdefault(prefix, set()).update(actions)
+    return {prefix: sorted(actions) for prefix, actions in sorted(services.items())}
+
+
+class ActionCatalog:
+    """
+    Class: ActionCatalog
+
+    Description:
+        Catalog of IAM actions indexed by service prefix, expanding action patterns to actions.
+
+    Attributes:
+        all_actions (frozenset): Every catalog action as a lower-cased 'service:action' string.
+    """
+
+    def __init__(self, services):
+        """
+        Indexes a catalog.
+
+        Args:
+            services (dict): Mapping of service prefix to action names.
+        """
+        self._services = {
+            prefix.lower(): sorted({f"{prefix.lower()}:{action.lower()}" for action in actions})
+            for prefix, actions in services.items()
+        }
+        self.all_actions = frozenset(action for actions in self._services.values() for action in actions)
+        self._expanded = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=ACTION_CATALOG_PATH):
+        """
+        Loads the bundled catalog, building it from botocore if the file is missing.
+        """
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                return cls(json.load(f))
+        except FileNotFoundError:
+            logger.warning("IAM action catalog %s not found; building it from botocore service models", path)
+            return cls(build_action_catalog())
+
+    def expand(self, pattern):
+        """
+        Expands an action pattern to the catalog actions it matches. A literal action that is not
+        in the catalog expands to itself.
+
+        Args:
+            pattern (str): Action pattern (e.g. '*', 'iam:*', 's3:Get*', 'ec2:Describe?nstances').
+
+        Returns:
+            actions (frozenset): Matching lower-cased 'service:action' strings.
+        """
+        pattern = pattern.lower()
+        actions = self._expanded.get(pattern)
+        if actions is not None:
+            return actions
+        if pattern == '*':
+            actions = self.all_actions
+        else:
+            service, _, name = pattern.partition(':')
+            if '*' in service or '?' in service:
+                service_regex = re.compile(translate(service))
+                prefixes = [prefix for prefix in self._services if service_regex.match(prefix)]
+            else:
+                prefixes = [service]
+            matched = set()
+            for prefix in prefixes:
+                matched.update(self._expand_service(prefix, f"{prefix}:{name}"))
+            if not matched and '*' not in pattern and '?' not in pattern:
+                matched.add(pattern)
+            actions = frozenset(matched)
+        with self._lock:
+            self._expanded[pattern] = actions
+        return actions
+
+    def _expand_service(self, prefix, pattern):
+        actions = self._services.get(prefix, [])
+        stem = pattern.rstrip('*')
+        if '*' not in stem and '?' not in stem:
+            if stem == pattern:
+                return [pattern] if pattern in actions else []
+            # Trailing wildcard: every action sharing the stem is a contiguous range of the sorted list
+            start = bisect_left(actions, stem)
+            end = start
+            while end < len(actions) and actions[end].startswith(stem):
+                end += 1
+            return actions[start:end]
+        regex = re.compile(translate(pattern))
+        return [action for action in actions if regex.match(action)]
+
+
+class PolicyAnalysis:
+    """
+    Class: PolicyAnalysis
+
+    Description:
+        Effective privileges granted on every resource by one policy document (or a combination).
+
+    Attributes:
+        allowed (frozenset): Actions allowed unconditionally on every resource.
+        denied (frozenset): Actions explicitly denied on every resource.
+        full_admin (bool): Every catalog action is allowed and none is denied.
+        service_wildcards (tuple): Services granted in full through a 'service:*' pattern.
+        not_action_allows (bool): An Allow statement uses NotAction on every resource.
+        wildcard_allows (bool): An Allow statement grants '*' on every resource (possibly narrowed by denies).
+        escalations (tuple): Privilege escalation actions allowed (empty for full admin).
+        conditional (PolicyAnalysis): Privileges granted once the conditions of conditioned Allow
+            statements are met as well (None if the document has none).
+    """
+
+    __slots__ = ('allowed', 'denied', 'full_admin', 'service_wildcards', 'not_action_allows', 'wildcard_allows',
+                 'escalations', 'conditional')
+
+    def __init__(self, allowed, denied, catalog, service_wildcards=(), not_action_allows=False, wildcard_allows=False,
+                 conditional=None):
+        self.allowed = frozenset(allowed)
+        self.denied = frozenset(denied)
+        effective = self.allowed - self.denied
+        self.full_admin = catalog.all_actions.issubset(effective)
+        self.service_wildcards = tuple(sorted(service_wildcards))
+        self.not_action_allows = not_action_allows
+        self.wildcard_allows = wildcard_allows
+        self.escalations = () if self.full_admin else tuple(
+            action for action in PRIVILEGE_ESCALATION_ACTIONS if action in effective
+        )
+        self.conditional = conditional
+
+    @property
+    def overly_permissive(self):
+        """
+        True if the document grants full admin, a whole service, a '*' or NotAction allow or an escalation path,
+        unconditionally or once the conditions of its conditioned statements are met.
+        """
+        return bool(self.full_admin or self.service_wildcards or self.not_action_allows or self.wildcard_allows
+                    or self.escalations or (self.conditional is not None and self.conditional.overly_permissive))
+
+    def reasons(self):
+        """
+        Returns a human readable reason for every overly permissive grant; grants depending on
+        conditioned statements are marked as such.
+        """
+        reasons = self._unconditional_reasons()
+        if self.conditional is not None:
+            reasons += [f"{reason} when its conditions are met"
+                        for reason in self.conditional.reasons() if reason not in reasons]
+        return reasons
+
+    def _unconditional_reasons(self):
+        if self.full_admin:
+            return ['grants full administrative access (all actions on all resources)']
+        reasons = [f"grants all {service} actions on all resources" for service in self.service_wildcards]
+        if self.wildcard_allows:
+            reasons.append('allows all actions on all resources, narrowed only by explicit denies')
+        if self.not_action_allows:
+            reasons.append('allows NotAction on all resources (everything except the listed actions)')
+        if self.escalations:
+            reasons.append(f"allows privilege escalation actions on all resources: {', '.join(self.escalations)}")
+        return reasons
+
+
+class PolicyAnalyzer:
+    """
+    Class: PolicyAnalyzer
+
+    Description:
+        Thread-safe policy evaluator memoizing analyses by normalized document hash.
+
+    Attributes:
+        catalog (ActionCatalog): Catalog action patterns are expanded against.
+        evaluations (int): Number of distinct documents evaluated.
+        reuses (int): Number of analyses served from the memo.
+    """
+
+    def __init__(self, catalog=None):
+        self.catalog = catalog or get_action_catalog()
+        self.evaluations = 0
+        self.reuses = 0
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def analyze(self, document):
+        """
+        Returns the analysis of a policy document, evaluating each distinct document once.
+        """
+        statements = normalize_document(document)
+        key = _statements_hash(statements)
+        with self._lock:
+            analysis = self._memo.get(key)
+            if analysis is not None:
+                self.reuses += 1
+                return analysis
+        analysis = self._evaluate(statements)
+        with self._lock:
+            self._memo.setdefault(key, analysis)
+            self.evaluations += 1
+        return analysis
+
+    def _evaluate(self, statements):
+        unconditional = [smt for smt in statements if not smt['Condition']]
+        conditioned_allows = [smt for smt in statements if smt['Condition'] and smt['Effect'] == 'Allow']
+        conditional = None
+        if conditioned_allows:
+            conditional = self._analysis(unconditional + conditioned_allows)
+        return self._analysis(unconditional, conditional)
+
+    def _analysis(self, statements, conditional=None):
+        allowed, denied, service_wildcards, not_action_allows, wildcard_allows = self._grants(statements)
+        return PolicyAnalysis(allowed, denied, self.catalog, service_wildcards, not_action_allows, wildcard_allows,
+                              conditional)
+
+    def _grants(self, statements):
+        """
+        Returns the actions allowed and denied on every resource by statements, the services granted
+        through a 'service:*' pattern and whether a NotAction or '*' pattern is allowed.
+        """
+        allowed, denied, service_wildcards = set(), set(), set()
+        not_action_allows = wildcard_allows = False
+        for smt in statements:
+            every_resource = '*' in smt['Resource'] or (smt['Effect'] == 'Allow' and smt['NotResource'])
+            if not every_resource:
+                continue
+            if smt['Action']:
+                actions = set()
+                for pattern in smt['Action']:
+                    actions.update(self.catalog.expand(pattern))
+                    if smt['Effect'] == 'Allow' and pattern == '*':
+                        wildcard_allows = True
+                    elif smt['Effect'] == 'Allow' and pattern.endswith(':*') and '*' not in pattern[:-2]:
+                        service_wildcards.add(pattern[:-2])
+            elif smt['NotAction']:
+                excluded = set()
+                for pattern in smt['NotAction']:
+                    excluded.update(self.catalog.expand(pattern))
+                actions = self.catalog.all_actions - excluded
+                not_action_allows = not_action_allows or smt['Effect'] == 'Allow'
+            else:
+                continue
+            (allowed if smt['Effect'] == 'Allow' else denied).update(actions)
+        return allowed, denied, service_wildcards, not_action_allows, wildcard_allows
+
+    def combined_full_admin(self, analyses):
+        """
+        Returns True if several policies attached to one principal together grant full administrative access.
+        """
+        analyses = list(analyses)
+        # Policies allowing fewer actions between them than the catalog holds cannot cover it
+        if sum(len(analysis.allowed) for analysis in analyses) < len(self.catalog.all_actions):
+            return False
+        allowed = set().union(*(analysis.allowed for analysis in analyses))
+        denied = set().union(*(analysis.denied for analysis in analyses))
+        return self.catalog.all_actions.issubset(allowed - denied)
+
+    def stats(self):
+        """
+        Returns the number of distinct documents evaluated and of memoized reuses.
+        """
+        return {'evaluations': self.evaluations, 'reuses': self.reuses}
+
+
+
+def is_public_principal(principal):
+    """
+    Returns True if a statement principal is anyone ('*' or {'AWS': '*'}).
+    """
+    if principal == '*':
+        return True
+    if isinstance(principal, dict):
+        return '*' in _as_list(principal.get('AWS'))
+    return False
+
+
+def has_source_condition(condition):
+    """
+    Returns True if a statement condition restricts access by source account, organization or network.
+    """
+    return any(
+        key.lower() in SOURCE_CONDITION_KEYS
+        for clauses in (condition or {}).values() if isinstance(clauses, dict)
+        for key in clauses
+    )
+
+
+class ResourcePolicyAnalyzer:
+    """
+    Class: ResourcePolicyAnalyzer
+
+    Description:
+        Thread-safe resource policy evaluator memoizing results by policy hash. Only the parts of a
+        statement that decide public access (effect, principal and condition) are hashed, so
+        policies differing only in Sids or resource ARNs are evaluated once.
+
+    Attributes:
+        evaluations (int): Number of distinct policies evaluated.
+        reuses (int): Number of results served from the memo.
+    """
+
+    def __init__(self):
+        self.evaluations = 0
+        self.reuses = 0
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def public_statements(self, policy):
+        """
+        Returns the positions of the statements allowing a public principal without a source condition.
+
+        Args:
+            policy (str or dict): Resource policy document (JSON string or dictionary).
+
+        Returns:
+            positions (tuple): Indexes into the policy's statement list.
+        """
+        statements = policy_statements(load_policy_document(policy))
+        decisive = [[smt.get('Effect'), smt.get('Principal'), smt.get('Condition')] for smt in statements]
+        key = _statements_hash(decisive)
+        with self._lock:
+            positions = self._memo.get(key)
+            if positions is not None:
+                self.reuses += 1
+                return positions
+        positions = tuple(
+            i for i, (effect, principal, condition) in enumerate(decisive)
+            if effect == 'Allow' and is_public_principal(principal) and not has_source_condition(condition)
+        )
+        with self._lock:
+            self._memo.setdefault(key, positions)
+            self.evaluations += 1
+        return positions
+
+    def stats(self):
+        """
+        Returns the number of distinct policies evaluated and of memoized reuses.
+        """
+        return {'evaluations': self.evaluations, 'reuses': self.reuses}
+
+_default_catalog = None
+_default_catalog_lock = threading.Lock()
+
+
+def get_action_catalog():
+    """
+    Returns the bundled action catalog, loaded on first use.
+    """
+    global _default_catalog
+    with _default_catalog_lock:
+        if _default_catalog is None:
+            _default_catalog = ActionCatalog.load()
+        return _default_catalog
+
+
+if __name__ == "__main__":
+    catalog = build_action_catalog()
+    with gzip.open(ACTION_CATALOG_PATH, 'wt', encoding='utf-8') as f:
+        json.dump(catalog, f, separators=(',', ':'), sort_keys=True)
+    print(f"Wrote {sum(len(actions) for actions in catalog.values())} actions "
+          f"for {len(catalog)} services to {ACTION_CATALOG_PATH}")
@@ -1,4 +1,13 @@
-import boto3
+import csv
+import io
+import time
+from datetime import datetime, timezone
+import botocore
+from aws_misconfig_scanner.modules.iam_policy import PolicyAnalyzer
+from aws_misconfig_scanner.modules.iam_snapshot import IAMSnapshot
+from aws_misconfig_scanner.utils.cache import make_marker
+from aws_misconfig_scanner.utils.aws_clients import get_default_factory
+from aws_misconfig_scanner.utils.findings import Finding, Severity, finding_type
 from aws_misconfig_scanner.utils.logger import setup_logger
 
 """
@@ -7,7 +16,8 @@ iam_scanner.py
 AWS IAM Misconfiguration Scanner
 
 This module scans AWS Identity and Access Management (IAM) configurations for common security misconfigurations such as:
-- Overly permissive IAM policies (wildcard actions/resources)
+- Overly permissive IAM policies (full admin, service-wide wildcards, NotAction allows and
+  privilege escalation actions, evaluated by the policy engine in iam_policy.py)
 - Root account usage without MFA
 - Inactive access keys
 
@@ -18,6 +28,43 @@ Author: Tom D.
 
 logger = setup_logger(__name__)
 
+# Credential report generation polling
+CREDENTIAL_REPORT_POLL_SECONDS = 2
+CREDENTIAL_REPORT_MAX_WAIT = 60
+
+# Name of the root account row in the credential report
+ROOT_ACCOUNT_USER = '<root_account>'
+
+# Version of the policy evaluation, part of the policy cache marker (bump when evaluation changes)
+POLICY_EVALUATION_VERSION = 3
+
+# Checks evaluated against the authorization snapshot
+SNAPSHOT_CHECKS = {'overly-permissive-policies', 'user-admin-access', 'role-admin-access'}
+
+# Finding types of the IAM checks
+ROOT_MFA_DISABLED = finding_type('iam-root-mfa-disabled', Severity.CRITICAL, 'iam-account',
+                                 "Root account does not have MFA enabled. This is a security risk.")
+OVERLY_PERMISSIVE_POLICY = finding_type('iam-overly-permissive-policy', Severity.HIGH, 'iam-policy',
+                                        "Overly permissive policy found: {id}")
+ROOT_ACCESS_KEY = finding_type('iam-root-access-key', Severity.CRITICAL, 'iam-user',
+                               "Root account has an active access key ({AccessKey}). This is a security risk.")
+# Access key findings carry the key in their 'AccessKey' detail: its id when read from the API, or its
+# slot ('access_key_1', 'access_key_2') when read from the credential report, which has no key ids
+UNUSED_ACCESS_KEY = finding_type('iam-unused-access-key', Severity.MEDIUM, 'iam-user',
+                                 "Access key {AccessKey} for user {id} has never been used.")
+STALE_ACCESS_KEY = finding_type('iam-stale-access-key', Severity.MEDIUM, 'iam-user',
+                                "Access key {AccessKey} for user {id} has not been used in {0} days.")
+USER_ADMIN_POLICY = finding_type('iam-user-administrator-access', Severity.HIGH, 'iam-user',
+                                 "IAM User '{id}' has AdministratorAccess attached.")
+USER_ADMIN_ACCESS = finding_type('iam-user-admin-access', Severity.HIGH, 'iam-user',
+                                 "IAM User '{id}' has full administrative access via {0}.")
+USER_GROUP_ADMIN_ACCESS = finding_type('iam-user-group-admin-access', Severity.HIGH, 'iam-user',
+                                       "IAM User '{id}' has full administrative access via group '{GroupName}' ({0}).")
+ROLE_ADMIN_POLICY = finding_type('iam-role-administrator-access', Severity.HIGH, 'iam-role',
+                                 "IAM Role '{id}' has AdministratorAccess attached.")
+ROLE_ADMIN_ACCESS = finding_type('iam-role-admin-access', Severity.HIGH, 'iam-role',
+                                 "IAM Role '{id}' has full administrative access via {0}.")
+
 class IAMScanner:
     """
     Class: IAMScanner
@@ -30,13 +77,43 @@ class IAMScanner:
 
     Attributes:
         client (boto3.client): Boto3 IAM client used to retrieve IAM configurations.
+        clients (ClientFactory): Shared factory the client is obtained from.
+        use_snapshot (bool): Evaluate policy and admin checks against an IAMSnapshot.
+        cache (ScanCache): Persistent cache of policy evaluations keyed by DefaultVersionId/UpdateDate.
+        analyzer (PolicyAnalyzer): Policy engine memoizing analyses by document hash.
+        progress (UnitProgress): Checkpoint journal view recording every finished check (None = disabled).
     """
 
-    def __init__(self):
+    def __init__(self, use_snapshot=True, cache=None, clients=None):
         """
         Initializes the IAMScanner instance and establishes connection to the AWS IAM service.
+
+        Args:
+            use_snapshot (bool): (Optional) Use a single authorization snapshot for policy and admin checks.
+            cache (ScanCache): (Optional) Persistent cache of policy evaluations.
+            clients (ClientFactory): (Optional) Shared client factory. Defaults to the process-wide factory.
+        """
+        self.clients = clients or get_default_factory()
+        self.use_snapshot = use_snapshot
+        self.cache = cache
+        self.progress = None
+        self._analyzer = None
+
+    @property
+    def client(self):
+        """
+        Boto3 IAM client, created lazily by the shared client factory on first use.
+        """
+        return self.clients.client('iam')
+
+    @property
+    def analyzer(self):
+        """
+        Policy engine, created on first use (loading the action catalog).
         """
-        self.client = boto3.client('iam')
+        if self._analyzer is None:
+            self._analyzer = PolicyAnalyzer()
+        return self._analyzer
 
     def check_root_account_usage(self, findings):
         """
@@ -49,73 +126,301 @@ class IAMScanner:
         response = self.client.get_account_summary()
         root_mfa_enabled = response['SummaryMap'].get('AccountMFAEnabled', 0)
         if root_mfa_enabled == 0:
-            msg = "Root account does not have MFA enabled. This is a security risk."
-            logger.warning(msg)
-            findings.append({'Issue': msg})
+            finding = Finding(ROOT_MFA_DISABLED)
+            logger.warning("%s", finding)
+            findings.append(finding)
         else:
             logger.info("Root account has MFA enabled. This is a good security practice.")
 
-    def list_overly_permissive_policies(self, findings):
+    def _evaluate_policy(self, policy, load_document):
         """
-        Identifies customer-managed IAM policies that allow full administrative privileges
-        using wildcard actions and wildcard resources ('*'). Such policies are flagged
-        as overly permissive and pose high risk if misused.
+        Evaluates one customer managed policy, reusing the cached evaluation when its default
+        version and update date are unchanged (in which case the document is never loaded).
+
+        Args:
+            policy (dict): Policy entry carrying Arn, PolicyName, DefaultVersionId and UpdateDate.
+            load_document (callable): Zero-argument callable returning the default policy document.
+
+        Returns:
+            findings (list): A list of Findings describing discovered misconfigurations.
+        """
+        def evaluate():
+            findings = []
+            analysis = self.analyzer.analyze(load_document())
+            if analysis.overly_permissive:
+                finding = Finding(OVERLY_PERMISSIVE_POLICY, policy['PolicyName'], details={'Reasons': analysis.reasons()})
+                logger.warning("%s", finding)
+                findings.append(finding)
+            return findings
+
+        if self.cache is None:
+            return evaluate()
+        marker = make_marker(policy.get('DefaultVersionId'), policy.get('UpdateDate'), POLICY_EVALUATION_VERSION)
+        return self.cache.get_or_compute('iam-policy', policy['Arn'], marker, evaluate)
+
+    def list_overly_permissive_policies(self, findings, snapshot=None):
+        """
+        Identifies customer-managed IAM policies that allow full administrative privileges, every
+        action of a service, NotAction allows or privilege escalation actions on all resources.
+        Such policies are flagged as overly permissive and pose high risk if misused.
 
         Args:
             findings (list): A list to collect findings related to IAM misconfigurations.
+            snapshot (IAMSnapshot): (Optional) Authorization snapshot to evaluate instead of calling the API.
         """
+        if snapshot is not None:
+            for policy in snapshot.local_policies():
+                findings.extend(self._evaluate_policy(
+                    policy, lambda: snapshot.default_policy_document(policy['Arn'])
+                ))
+            return
+
         paginator = self.client.get_paginator('list_policies')
         for page in paginator.paginate(Scope='Local'):  # Only scan Local scope
             for policy in page['Policies']:
-                policy_version = self.client.get_policy_version(
+                findings.extend(self._evaluate_policy(policy, lambda: self.client.get_policy_version(
                     PolicyArn=policy['Arn'],
                     VersionId=policy['DefaultVersionId']
-                )
-                statements = policy_version['PolicyVersion']['Document']['Statement']
-                if not isinstance(statements, list):
-                    statements = [statements]
-                for smt in statements:
-                    if smt.get('Effect') == 'Allow' and smt.get('Action') == '*' and smt.get('Resource') == '*':
-                        msg = f"Overly permissive policy found: {policy['PolicyName']}"
-                        logger.warning(msg)
-                        findings.append({'PolicyName': policy['PolicyName'], 'Issue': msg})
+                )['PolicyVersion']['Document']))
+
+    def _fetch_credential_report(self):
+        """
+        Generates the account credential report (if needed) and downloads it.
+
+        Returns:
+            content (bytes): Raw CSV content of the credential report.
+
+        Raises:
+            TimeoutError: If the report is not ready within CREDENTIAL_REPORT_MAX_WAIT seconds.
+        """
+        deadline = time.monotonic() + CREDENTIAL_REPORT_MAX_WAIT
+        while self.client.generate_credential_report()['State'] != 'COMPLETE':
+            if time.monotonic() >= deadline:
+                raise TimeoutError("Credential report was not generated in time")
+            time.sleep(CREDENTIAL_REPORT_POLL_SECONDS)
+        return self.client.get_credential_report()['Content']
+
+    def _iter_credential_report(self, content):
+        """
+        Parses the credential report CSV row by row without materializing the whole table.
+
+        Args:
+            content (bytes): Raw CSV content of the credential report.
+
+        Yields:
+            row (dict): One credential report row keyed by column name.
+        """
+        stream = io.TextIOWrapper(io.BytesIO(content), encoding='utf-8', newline='')
+        yield from csv.DictReader(stream)
+
+    def _check_access_keys_from_report(self, findings, threshold_days, content):
+        """
+        Evaluates never-used, stale and root access keys from a single credential report.
+
+        Args:
+            findings (list): A list to collect findings related to IAM misconfigurations.
+            threshold_days (int): Number of days used as inactivity threshold.
+            content (bytes): Raw CSV content of the credential report.
+        """
+        now = datetime.now(timezone.utc)
+        for row in self._iter_credential_report(content):
+            user_name = row['user']
+            for slot in (1, 2):
+                if row.get(f'access_key_{slot}_active') != 'true':
+                    continue
+                key_label = f'access_key_{slot}'
+                if user_name == ROOT_ACCOUNT_USER:
+                    finding = Finding(ROOT_ACCESS_KEY, user_name, details={'AccessKey': key_label})
+                    logger.warning("%s", finding)
+                    findings.append(finding)
+                    continue
+
+                last_used = row.get(f'access_key_{slot}_last_used_date')
+                if last_used in (None, '', 'N/A'):
+                    finding = Finding(UNUSED_ACCESS_KEY, user_name, details={'AccessKey': key_label})
+                    logger.warning("%s", finding)
+                    findings.append(finding)
+                    continue
+
+                idle_days = (now - datetime.fromisoformat(last_used)).days
+                if idle_days > threshold_days:
+                    finding = Finding(STALE_ACCESS_KEY, user_name, (idle_days,), details={'AccessKey': key_label})
+                    logger.warning("%s", finding)
+                    findings.append(finding)
+                else:
+                    logger.debug("Access key %s for user %s last used on %s.", key_label, user_name, last_used)
+
+    def _check_access_keys_from_api(self, findings, threshold_days):
+        """
+        Evaluates active access keys with per-user and per-key API calls. Used only when the
+        credential report is unavailable.
+
+        Args:
+            findings (list): A list to collect findings related to IAM misconfigurations.
+            threshold_days (int): Number of days used as inactivity threshold.
+        """
+        now = datetime.now(timezone.utc)
+        paginator = self.client.get_paginator('list_users')
+        for page in paginator.paginate():
+            for user in page['Users']:
+                keys = self.client.list_access_keys(UserName=user['UserName'])['AccessKeyMetadata']
+                for key in keys:
+                    if key.get('Status') != 'Active':
+                        continue
+                    access_key_last_used = self.client.get_access_key_last_used(AccessKeyId=key['AccessKeyId'])
+                    last_used_date = access_key_last_used['AccessKeyLastUsed'].get('LastUsedDate')
+                    if not last_used_date:
+                        finding = Finding(UNUSED_ACCESS_KEY, user['UserName'], details={'AccessKey': key['AccessKeyId']})
+                        logger.warning("%s", finding)
+                        findings.append(finding)
+                    elif (now - last_used_date).days > threshold_days:
+                        idle_days = (now - last_used_date).days
+                        finding = Finding(STALE_ACCESS_KEY, user['UserName'], (idle_days,),
+                                          details={'AccessKey': key['AccessKeyId']})
+                        logger.warning("%s", finding)
+                        findings.append(finding)
+                    else:
+                        logger.debug("Access key %s for user %s last used on %s.",
+                                     key['AccessKeyId'], user['UserName'], last_used_date)
 
     def check_inactive_access_keys(self, findings, threshold_days=90):
         """
-        Identifies IAM users with access keys that have either:
+        Identifies active access keys that have either:
         - Never been used
         - Have not been used in a long period (inactive keys)
+        - Belong to the root account
+
+        The account credential report is used so the whole audit costs a handful of API calls.
+        If the report cannot be generated or downloaded, the per-key API path is used instead;
+        errors evaluating a downloaded report are not masked by the fallback.
 
         Args:
             findings (list): A list to collect findings related to IAM misconfigurations.
             threshold_days (int): (Optional) Number of days used as inactivity threshold.
         """
-        users = self.client.list_users()['Users']
-        for user in users:
-            keys = self.client.list_access_keys(UserName=user['UserName'])['AccessKeyMetadata']
-            for key in keys:
-                access_key_last_used = self.client.get_access_key_last_used(AccessKeyId=key['AccessKeyId'])
-                last_used_date = access_key_last_used['AccessKeyLastUsed'].get('LastUsedDate')
-                if not last_used_date:
-                    msg = f"Access key {key['AccessKeyId']} for user {user['UserName']} has never been used."
-                    logger.warning(msg)
-                    findings.append({'UserName': user['UserName'], 'AccessKeyId': key['AccessKeyId'], 'Issue': msg})
-                else:
-                    logger.info(f"Access key {key['AccessKeyId']} for user {user['UserName']} last used on {last_used_date}.")
-    
-    def check_users_for_admin_access(self, findings):
-        """Scan IAM users for attached AdministratorAccess policy."""
-        users = self.client.list_users()['Users']
-        for user in users:
-            attached_policies = self.client.list_attached_user_policies(UserName=user['UserName'])['AttachedPolicies']
-            for policy in attached_policies:
-                if policy['PolicyName'] == 'AdministratorAccess':
-                    msg = f"IAM User '{user['UserName']}' has AdministratorAccess attached."
-                    logger.warning(msg)
-                    findings.append({'UserName': user['UserName'], 'Issue': msg})
-
-    def check_roles_for_admin_access(self, findings):
-        """Scan IAM roles for attached AdministratorAccess policy (including Lambda roles)."""
+        try:
+            content = self._fetch_credential_report()
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError, TimeoutError) as e:
+            logger.warning("Credential report unavailable (%s); falling back to per-key access key checks.", e)
+            self._check_access_keys_from_api(findings, threshold_days)
+            return
+        self._check_access_keys_from_report(findings, threshold_days, content)
+
+    def _principal_analyses(self, snapshot, detail, inline_key):
+        """
+        Returns (kind, policy name, analysis) for every managed and inline policy of one principal.
+
+        Args:
+            snapshot (IAMSnapshot): Authorization snapshot.
+            detail (dict): User, role or group detail from the snapshot.
+            inline_key (str): Key holding the principal's inline policies.
+        """
+        return [
+            (kind, policy_name, self.analyzer.analyze(document) if document else None)
+            for kind, policy_name, _, document in snapshot.principal_policies(detail, inline_key)
+        ]
+
+    def _admin_grants(self, analyses):
+        """
+        Yields a description of every policy of a principal that grants full administrative access.
+
+        Args:
+            analyses (list): (kind, policy name, analysis) tuples from _principal_analyses.
+        """
+        for kind, policy_name, analysis in analyses:
+            if kind == 'managed' and policy_name == 'AdministratorAccess':
+                yield 'AdministratorAccess'
+            elif analysis is not None and analysis.full_admin:
+                yield f"{kind} policy '{policy_name}'"
+
+    def _combined_admin_grant(self, analyses):
+        """
+        Returns a description of the policies that only together grant full administrative access, or None.
+        """
+        evaluated = [(policy_name, analysis) for _, policy_name, analysis in analyses if analysis is not None]
+        if len(evaluated) > 1 and self.analyzer.combined_full_admin(analysis for _, analysis in evaluated):
+            return f"the combination of policies {', '.join(repr(policy_name) for policy_name, _ in evaluated)}"
+        return None
+
+    def check_users_for_admin_access(self, findings, snapshot=None):
+        """
+        Scan IAM users for attached AdministratorAccess policy.
+
+        With a snapshot, admin access inherited through groups, granted by inline or customer
+        managed policies, or only granted by several policies together is detected as well.
+
+        Args:
+            findings (list): A list to collect findings related to IAM misconfigurations.
+            snapshot (IAMSnapshot): (Optional) Authorization snapshot to evaluate instead of calling the API.
+        """
+        if snapshot is not None:
+            for user_name, user in snapshot.users.items():
+                analyses = self._principal_analyses(snapshot, user, 'UserPolicyList')
+                granted = False
+                for grant in self._admin_grants(analyses):
+                    if grant == 'AdministratorAccess':
+                        finding = Finding(USER_ADMIN_POLICY, user_name)
+                    else:
+                        finding = Finding(USER_ADMIN_ACCESS, user_name, (grant,))
+                    logger.warning("%s", finding)
+                    findings.append(finding)
+                    granted = True
+                for group in snapshot.user_groups(user_name):
+                    group_analyses = self._principal_analyses(snapshot, group, 'GroupPolicyList')
+                    analyses.extend(group_analyses)
+                    for grant in self._admin_grants(group_analyses):
+                        finding = Finding(USER_GROUP_ADMIN_ACCESS, user_name, (grant,),
+                                          details={'GroupName': group['GroupName']})
+                        logger.warning("%s", finding)
+                        findings.append(finding)
+                        granted = True
+                combined = None if granted else self._combined_admin_grant(analyses)
+                if combined:
+                    finding = Finding(USER_ADMIN_ACCESS, user_name, (combined,))
+                    logger.warning("%s", finding)
+                    findings.append(finding)
+            return
+
+        paginator = self.client.get_paginator('list_users')
+        for page in paginator.paginate():
+            for user in page['Users']:
+                attached_policies = self.client.list_attached_user_policies(UserName=user['UserName'])['AttachedPolicies']
+                for policy in attached_policies:
+                    if policy['PolicyName'] == 'AdministratorAccess':
+                        finding = Finding(USER_ADMIN_POLICY, user['UserName'])
+                        logger.warning("%s", finding)
+                        findings.append(finding)
+
+    def check_roles_for_admin_access(self, findings, snapshot=None):
+        """
+        Scan IAM roles for attached AdministratorAccess policy (including Lambda roles).
+
+        With a snapshot, admin access granted by inline or customer managed policies, or only by
+        several policies together, is detected as well.
+
+        Args:
+            findings (list): A list to collect findings related to IAM misconfigurations.
+            snapshot (IAMSnapshot): (Optional) Authorization snapshot to evaluate instead of calling the API.
+        """
+        if snapshot is not None:
+            for role_name, role in snapshot.roles.items():
+                analyses = self._principal_analyses(snapshot, role, 'RolePolicyList')
+                granted = False
+                for grant in self._admin_grants(analyses):
+                    if grant == 'AdministratorAccess':
+                        finding = Finding(ROLE_ADMIN_POLICY, role_name)
+                    else:
+                        finding = Finding(ROLE_ADMIN_ACCESS, role_name, (grant,))
+                    logger.warning("%s", finding)
+                    findings.append(finding)
+                    granted = True
+                combined = None if granted else self._combined_admin_grant(analyses)
+                if combined:
+                    finding = Finding(ROLE_ADMIN_ACCESS, role_name, (combined,))
+                    logger.warning("%s", finding)
+                    findings.append(finding)
+            return
+
         paginator = self.client.get_paginator('list_roles')
         for page in paginator.paginate():
             for role in page['Roles']:
@@ -123,9 +428,67 @@ class IAMScanner:
                 attached_policies = self.client.list_attached_role_policies(RoleName=role_name)['AttachedPolicies']
                 for policy in attached_policies:
                     if policy['PolicyName'] == 'AdministratorAccess':
-                        msg = f"IAM Role '{role_name}' has AdministratorAccess attached."
-                        logger.warning(msg)
-                        findings.append({'RoleName': role_name, 'Issue': msg})
+                        finding = Finding(ROLE_ADMIN_POLICY, role_name)
+                        logger.warning("%s", finding)
+                        findings.append(finding)
+
+    def load_snapshot(self):
+        """
+        Loads the account's IAM authorization snapshot, or returns None if it cannot be retrieved
+        (e.g. missing iam:GetAccountAuthorizationDetails permission).
+
+        Returns:
+            snapshot (IAMSnapshot): The loaded snapshot, or None.
+        """
+        try:
+            return IAMSnapshot.from_client(self.client)
+        except Exception as e:
+            logger.warning("IAM snapshot unavailable (%s); falling back to per-resource IAM checks.", e)
+            return None
+
+    def iter_findings(self):
+        """
+        Executes the full IAM misconfiguration assessment and yields the findings of each check
+        as soon as that check completes.
+
+        Yields:
+            finding (Finding): A discovered misconfiguration.
+        """
+        logger.info("Starting IAM Misconfiguration Scan...")
+        checks = [
+            ('root-account-usage', lambda findings: self.check_root_account_usage(findings)),
+            ('overly-permissive-policies', lambda findings: self.list_overly_permissive_policies(findings, snapshot)),
+            ('inactive-access-keys', lambda findings: self.check_inactive_access_keys(findings)),
+            ('user-admin-access', lambda findings: self.check_users_for_admin_access(findings, snapshot)),
+            ('role-admin-access', lambda findings: self.check_roles_for_admin_access(findings, snapshot)),
+        ]
+        replayed = {}
+        if self.progress is not None:
+            replayed = {name: self.progress.resource(name) for name, _ in checks}
+            replayed = {name: findings for name, findings in replayed.items() if findings is not None}
+        # The snapshot crawl is only needed if a check using it has not been replayed from the journal
+        snapshot = None
+        if self.use_snapshot and any(name not in replayed for name in SNAPSHOT_CHECKS):
+            snapshot = self.load_snapshot()
+
+        # Each check is isolated, so a throttled or denied API only costs the findings of its own check
+        for name, check in checks:
+            if name in replayed:
+                yield from replayed[name]
+                continue
+            findings = []
+            try:
+                with self.clients.metrics.check_timer(name):
+                    check(findings)
+            except Exception as e:
+                logger.error("Error during IAM check %s: %s", name, e)
+                findings.append(Finding.error(e, 'iam-check', name))
+            if self.progress is not None:
+                self.progress.record_resource(name, findings)
+            yield from findings
+        if self._analyzer is not None:
+            logger.info("IAM policy engine: %s", self._analyzer.stats())
+        logger.info("IAM Misconfiguration Scan completed.")
 
     def run_all_checks(self):
         """
@@ -133,20 +496,12 @@ class IAMScanner:
         - Root account MFA check
         - Policy permissions review
         - Inactive access key review
+        - Administrator access review for users and roles
+
+        In snapshot mode the policy and administrator access reviews are evaluated against a single
+        get_account_authorization_details crawl instead of per-policy and per-principal API calls.
 
         Returns:
-            findings (list): A list of dictionaries describing discovered misconfigurations.
+            findings (list): A list of Findings describing discovered misconfigurations.
         """
-        logger.info("Starting IAM Misconfiguration Scan...")
-        findings = []
-        try:
-            self.check_root_account_usage(findings)
-            self.list_overly_permissive_policies(findings)
-            self.check_inactive_access_keys(findings)
-            self.check_users_for_admin_access(findings)
-            self.check_roles_for_admin_access(findings)
-        except Exception as e:
-            logger.error(f"Error during IAM scan: {e}")
-            findings.append({'Error': str(e)})
-        logger.info("IAM Misconfiguration Scan completed.")
-        return findings
\ No newline at end of file
+        return list(self.iter_findings())
@@ -0,0 +1,164 @@
+import json
+from urllib.parse import unquote
+from aws_misconfig_scanner.utils.logger import setup_logger
+
+"""
+iam_snapshot.py
+
+AWS IAM Authorization Snapshot
+
+This module builds an in-memory, indexed model of an account's IAM configuration from a single
+paginated get_account_authorization_details crawl. The model contains:
+- Users, roles and groups (indexed by name)
+- Managed policies and their default policy documents (indexed by ARN)
+- Managed policy attachments and inline policies for every principal
+- Group memberships for every user
+
+IAM checks can then be evaluated against the snapshot without any further API calls, including
+privileges a user inherits through group membership or inline policies.
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+# ARN prefix of AWS managed policies (anything else is customer managed)
+AWS_MANAGED_POLICY_PREFIX = 'arn:aws:iam::aws:policy/'
+
+
+def load_policy_document(document):
+    """
+    Returns a policy document as a dictionary, decoding URL-encoded JSON strings if needed.
+    """
+    if isinstance(document, str):
+        return json.loads(unquote(document))
+    return document or {}
+
+
+def policy_statements(document):
+    """
+    Returns the statements of a policy document as a list.
+    """
+    statements = load_policy_document(document).get('Statement', [])
+    if not isinstance(statements, list):
+        statements = [statements]
+    return statements
+
+
+def policy_name_from_arn(arn):
+    """
+    Returns the policy name portion of a managed policy ARN.
+    """
+    return arn.rsplit('/', 1)[-1]
+
+
+def grants_full_admin(document):
+    """
+    Determines whether a policy document allows every action on every resource.
+    """
+    for smt in policy_statements(document):
+        if smt.get('Effect') == 'Allow' and smt.get('Action') == '*' and smt.get('Resource') == '*':
+            return True
+    return False
+
+
+class IAMSnapshot:
+    """
+    Class: IAMSnapshot
+
+    Description:
+        In-memory model of an account's IAM authorization details.
+
+    Attributes:
+        users (dict): User details indexed by user name.
+        roles (dict): Role details indexed by role name.
+        groups (dict): Group details indexed by group name.
+        policies (dict): Managed policy details indexed by policy ARN.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty snapshot.
+        """
+        self.users = {}
+        self.roles = {}
+        self.groups = {}
+        self.policies = {}
+
+    @classmethod
+    def from_client(cls, client):
+        """
+        Builds a snapshot with one paginated get_account_authorization_details crawl.
+
+        Args:
+            client (boto3.client): Boto3 IAM client.
+
+        Returns:
+            snapshot (IAMSnapshot): The populated snapshot.
+        """
+        snapshot = cls()
+        paginator = client.get_paginator('get_account_authorization_details')
+        for page in paginator.paginate():
+            snapshot.add_page(page)
+        logger.info("IAM snapshot loaded: %s users, %s roles, %s groups, %s managed policies",
+                    len(snapshot.users), len(snapshot.roles), len(snapshot.groups), len(snapshot.policies))
+        return snapshot
+
+    def add_page(self, page):
+        """
+        Indexes one page of get_account_authorization_details output.
+
+        Args:
+            page (dict): A get_account_authorization_details response page.
+        """
+        for user in page.get('UserDetailList', []):
+            self.users[user['UserName']] = user
+        for role in page.get('RoleDetailList', []):
+            self.roles[role['RoleName']] = role
+        for group in page.get('GroupDetailList', []):
+            self.groups[group['GroupName']] = group
+        for policy in page.get('Policies', []):
+            policy.setdefault('PolicyName', policy_name_from_arn(policy['Arn']))
+            self.policies[policy['Arn']] = policy
+
+    def local_policies(self):
+        """
+        Yields customer managed policies.
+        """
+        for arn, policy in self.policies.items():
+            if not arn.startswith(AWS_MANAGED_POLICY_PREFIX):
+                yield policy
+
+    def default_policy_document(self, policy_arn):
+        """
+        Returns the default version document of a managed policy, or None if it is not in the snapshot.
+        """
+        policy = self.policies.get(policy_arn)
+        if not policy:
+            return None
+        for version in policy.get('PolicyVersionList', []):
+            if version.get('IsDefaultVersion'):
+                return load_policy_document(version.get('Document'))
+        return None
+
+    def user_groups(self, user_name):
+        """
+        Returns the group details for every group the user belongs to.
+        """
+        user = self.users.get(user_name, {})
+        return [self.groups[name] for name in user.get('GroupList', []) if name in self.groups]
+
+    def principal_policies(self, detail, inline_key):
+        """
+        Yields (kind, policy name, policy ARN, document) for the managed and inline policies of one principal.
+
+        Args:
+            detail (dict): User, role or group detail.
+            inline_key (str): Key holding the principal's inline policies
+                ('UserPolicyList', 'RolePolicyList' or 'GroupPolicyList').
+        """
+        for attached in detail.get('AttachedManagedPolicies', []):
+            arn = attached['PolicyArn']
+            yield 'managed', attached.get('PolicyName', policy_name_from_arn(arn)), arn, self.default_policy_document(arn)
+        for inline in detail.get(inline_key, []) or []:
+            yield 'inline', inline['PolicyName'], None, load_policy_document(inline.get('PolicyDocument'))
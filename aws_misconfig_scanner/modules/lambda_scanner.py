@@ -1,5 +1,12 @@
-import boto3
-from aws_misconfig_scanner.utils.logger import setup_logger
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from aws_misconfig_scanner.modules.iam_policy import ResourcePolicyAnalyzer
+from aws_misconfig_scanner.modules.iam_snapshot import load_policy_document, policy_statements
+from aws_misconfig_scanner.utils.cache import make_marker, payload_marker
+from aws_misconfig_scanner.utils.aws_clients import get_default_factory
+from aws_misconfig_scanner.utils.findings import Finding
+from aws_misconfig_scanner.utils.logger import ProgressRollup, setup_logger
+from aws_misconfig_scanner.utils.rules import get_default_rules
 
 """
 lambda_scanner.py
@@ -9,7 +16,12 @@ AWS Lambda Misconfiguration Scanner
 This module scans AWS Lambda functions for common misconfigurations including:
 - Missing environment variable encryption (no KMS key assigned)
 - Unrestricted concurrency (no reserved concurrency limits)
-- Attached resource policies that may introduce overly permissive access
+- Resource policies allowing any principal ('*') without a source account, organization or network condition
+
+The checks are declarative rules for the 'lambda-function' resource type (see utils/rules.py).
+Fields that list_functions does not return are fetched by per-function enrichment calls, which are
+only made when an enabled rule reads their field. Functions are enriched on a bounded worker pool
+fed by the list_functions paginator, and findings are yielded in listing order.
 
 This scanner leverages the AWS SDK for Python (boto3) and is designed to integrate into a broader AWS misconfiguration scanning framework.
 
@@ -18,6 +30,12 @@ Author: Tom D.
 
 logger = setup_logger(__name__)
 
+# Fields supplied by per-function enrichment calls, and the method fetching them
+ENRICHMENTS = (
+    (('ReservedConcurrentExecutions',), '_fetch_concurrency'),
+    (('Policy', 'PublicPolicyStatements'), '_fetch_policy'),
+)
+
 class LambdaScanner:
     """
     Class: LambdaScanner
@@ -26,78 +44,192 @@ class LambdaScanner:
         Performs AWS Lambda configuration analysis to detect misconfigurations related to:
         - Environment variable encryption (KMS key presence)
         - Reserved concurrency enforcement
-        - Resource policy existence
+        - Publicly invocable resource policies
 
     Attributes:
         client (boto3.client): Boto3 Lambda client used to retrieve function configurations.
+        clients (ClientFactory): Shared factory the client is obtained from.
+        region_name (str): AWS region scanned by this instance (None = configured default).
+        cache (ScanCache): Persistent cache keyed by CodeSha256/LastModified/RevisionId and the enrichment fields.
+        rules (RuleGroup): Enabled rules for Lambda functions.
+        enrichments (list): (fields, fetch) pairs for the enrichment calls the rules need.
+        max_workers (int): Maximum number of functions enriched concurrently.
+        policy_analyzer (ResourcePolicyAnalyzer): Resource policy evaluator memoizing by policy hash.
+        progress (UnitProgress): Checkpoint journal view recording every evaluated function (None = disabled).
     """
 
-    def __init__(self):
+    def __init__(self, region_name=None, cache=None, clients=None, rules=None, max_workers=8):
         """
         Initializes the LambdaScanner instance and establishes connection to the AWS Lambda service.
+
+        Args:
+            region_name (str): (Optional) AWS region to scan. Defaults to the configured region.
+            cache (ScanCache): (Optional) Persistent cache of per-function evaluations.
+            clients (ClientFactory): (Optional) Shared client factory. Defaults to the process-wide factory.
+            rules (RuleSet): (Optional) Compiled rules. Defaults to the bundled rules.
+            max_workers (int): (Optional) Size of the worker pool used for function enrichment.
+        """
+        self.region_name = region_name
+        self.cache = cache
+        self.clients = clients or get_default_factory()
+        self.rules = (rules or get_default_rules()).group('lambda-function')
+        self.enrichments = [
+            (fields, getattr(self, method)) for fields, method in ENRICHMENTS
+            if any(self.rules.needs(field) for field in fields)
+        ]
+        self.max_workers = max_workers
+        self.policy_analyzer = ResourcePolicyAnalyzer()
+        self.progress = None
+
+    @property
+    def client(self):
+        """
+        Boto3 Lambda client, created lazily by the shared client factory on first use.
         """
-        self.client = boto3.client('lambda')
+        return self.clients.client('lambda', self.region_name)
 
-    def scan_lambda_functions(self):
+    def _fetch_concurrency(self, function_name):
         """
-        Scans all Lambda functions in the AWS account and evaluates potential misconfigurations.
+        Returns the function's reserved concurrency setting, if any.
+        """
+        try:
+            concurrency = self.client.get_function_concurrency(FunctionName=function_name)
+        except self.client.exceptions.ResourceNotFoundException:
+            return {}
+        if 'ReservedConcurrentExecutions' in concurrency:
+            return {'ReservedConcurrentExecutions': concurrency['ReservedConcurrentExecutions']}
+        return {}
+
+    def _fetch_policy(self, function_name):
+        """
+        Returns the function's resource policy, if one is attached, and the Sids of its statements
+        allowing any principal without a source condition.
+        """
+        try:
+            policy = self.client.get_policy(FunctionName=function_name)
+        except self.client.exceptions.ResourceNotFoundException:
+            # No policy attached, not an error
+            return {}
+        if 'Policy' not in policy:
+            return {}
+        public = self.policy_analyzer.public_statements(policy['Policy'])
+        sids = []
+        if public:
+            statements = policy_statements(load_policy_document(policy['Policy']))
+            sids = [statements[i].get('Sid', f"#{i}") for i in public]
+        return {'Policy': policy['Policy'], 'PublicPolicyStatements': sids}
+
+    def _enrich(self, function):
+        """
+        Returns a Lambda function enriched with the fields the rules need, and the fields that
+        could not be retrieved.
 
-        Checks performed:
-        - Absence of KMS key for environment variable encryption
-        - Missing reserved concurrency settings
-        - Attached resource policies (may require further analysis)
+        Args:
+            function (dict): Function configuration from list_functions.
 
         Returns:
-            findings (list): A list of dictionaries describing discovered misconfigurations.
+            resource (dict): The function configuration plus the enrichment fields.
+            unavailable (set): Fields whose enrichment call failed.
+        """
+        function_name = function['FunctionName']
+        resource = dict(function)
+        unavailable = set()
+        for fields, fetch in self.enrichments:
+            try:
+                resource.update(fetch(function_name))
+            except Exception as e:
+                # Rules reading a field that could not be retrieved are skipped rather than guessed
+                logger.error("Error retrieving %s for %s: %s", ', '.join(fields), function_name, e)
+                unavailable.update(fields)
+        return resource, unavailable
+
+    def _scan_function(self, function):
         """
-        findings = []
+        Enriches a single Lambda function with the fields the rules need and evaluates the rules,
+        reusing the cached evaluation when neither the function's configuration nor its enrichment
+        fields changed.
+
+        Resource policy and reserved concurrency changes do not change the function's CodeSha256,
+        LastModified or RevisionId, so the enrichment fields are fetched on every scan and hashed
+        into the marker; only the rule evaluation is reused.
+
+        Args:
+            function (dict): Function configuration from list_functions.
 
+        Returns:
+            findings (list): A list of Findings describing discovered misconfigurations.
+        """
+        function_name = function['FunctionName']
+        logger.debug("Scanning Lambda function: %s", function_name)
+        resource, unavailable = self._enrich(function)
+
+        def evaluate():
+            return self.rules.evaluate(resource, function_name, self.client.meta.region_name, unavailable)
+
+        if self.cache is None:
+            return evaluate()
+        enriched = {field: resource.get(field) for fields, _ in self.enrichments for field in fields}
+        marker = make_marker(
+            function.get('CodeSha256'), function.get('LastModified'), function.get('RevisionId'),
+            function.get('KMSKeyArn'), payload_marker(enriched), sorted(unavailable), self.rules.signature
+        )
+        return self.cache.get_or_compute('lambda-function', function['FunctionArn'], marker, evaluate)
+
+    def _scan_function_journaled(self, function):
+        """
+        Evaluates a Lambda function, replaying its findings instead when the checkpoint journal has them.
+        """
+        if self.progress is None:
+            return self._scan_function(function)
+        findings = self.progress.resource(function['FunctionArn'])
+        if findings is None:
+            findings = self._scan_function(function)
+            self.progress.record_resource(function['FunctionArn'], findings)
+        return findings
+
+    def iter_findings(self):
+        """
+        Scans all Lambda functions one list_functions page at a time and yields findings as
+        soon as each function has been evaluated.
+
+        Default rules:
+        - Absence of KMS key for environment variable encryption
+        - Missing reserved concurrency settings
+        - Resource policies allowing any principal without a source condition
+
+        Functions are enriched concurrently as the paginator returns them. Only a bounded window
+        of functions is in flight at a time, so memory use does not grow with the number of functions.
+
+        Yields:
+            finding (Finding): A discovered misconfiguration.
+        """
         try:
             paginator = self.client.get_paginator('list_functions')
-            for page in paginator.paginate():
-                for function in page['Functions']:
-                    function_name = function['FunctionName']
-                    logger.info(f"Scanning Lambda function: {function_name}")
-
-                    # Check environment variables encryption
-                    if 'KMSKeyArn' not in function:
-                        findings.append({
-                            'FunctionName': function_name,
-                            'Issue': 'Environment variables are not encrypted with KMS.'
-                        })
-
-                    # Check reserved concurrency
-                    try:
-                        concurrency = self.client.get_function_concurrency(FunctionName=function_name)
-                        if 'ReservedConcurrentExecutions' not in concurrency:
-                            findings.append({
-                                'FunctionName': function_name,
-                                'Issue': 'No reserved concurrency set.'
-                            })
-                    except self.client.exceptions.ResourceNotFoundException:
-                        findings.append({
-                            'FunctionName': function_name,
-                            'Issue': 'No reserved concurrency set.'
-                        })
-                    except Exception as e:
-                        logger.error(f"Error checking concurrency for {function_name}: {e}")
-
-                    # Check attached resource policy (overly permissive potential)
-                    try:
-                        policy = self.client.get_policy(FunctionName=function_name)
-                        if 'Policy' in policy:
-                            findings.append({
-                                'FunctionName': function_name,
-                                'Issue': 'Function has resource policy attached; review for overly permissive access.'
-                            })
-                    except self.client.exceptions.ResourceNotFoundException:
-                        # No policy attached, not an error
-                        pass
-                    except Exception as e:
-                        logger.error(f"Error checking policy for {function_name}: {e}")
+            rollup = ProgressRollup(logger, f"Lambda functions ({self.client.meta.region_name})")
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='lambda-function') as pool:
+                window = deque()
+                for page in paginator.paginate():
+                    for function in page['Functions']:
+                        window.append(pool.submit(self._scan_function_journaled, function))
+                        # Keep the pipeline full while bounding the number of functions held in memory
+                        if len(window) >= self.max_workers * 2:
+                            yield from window.popleft().result()
+                            rollup.tick()
+                while window:
+                    yield from window.popleft().result()
+                    rollup.tick()
+                rollup.done()
+                logger.info("Lambda resource policy analysis: %s", self.policy_analyzer.stats())
 
         except Exception as e:
-            logger.error(f"Error scanning Lambda functions: {e}")
-            findings.append({'Error': str(e)})
+            logger.error("Error scanning Lambda functions: %s", e)
+            yield Finding.error(e, 'lambda-function', region=self.region_name)
+
+    def scan_lambda_functions(self):
+        """
+        Scans all Lambda functions in the AWS account and evaluates potential misconfigurations.
 
-        return findings
\ No newline at end of file
+        Returns:
+            findings (list): A list of Findings describing discovered misconfigurations.
+        """
+        return list(self.iter_findings())
@@ -1,5 +1,8 @@
-import boto3
+from aws_misconfig_scanner.utils.aws_clients import get_default_factory
+from aws_misconfig_scanner.utils.findings import Finding
 from aws_misconfig_scanner.utils.logger import setup_logger
+from aws_misconfig_scanner.utils.query import Check, ResourceQuery
+from aws_misconfig_scanner.utils.rules import get_default_rules
 
 """
 rds_scanner.py
@@ -14,6 +17,9 @@ Misconfigurations Detected:
 - Lack of storage encryption at rest
 - Missing automated backup retention
 
+The checks are declarative rules for the 'rds-instance' resource type (see utils/rules.py), evaluated
+in a single pass over each instance.
+
 This scanner leverages the AWS SDK for Python (boto3) and integrates into a broader 
 AWS misconfiguration scanning framework.
 
@@ -34,57 +40,84 @@ class RDSScanner:
 
     Attributes:
         client (boto3.client): Boto3 RDS client used to retrieve instance configurations.
+        clients (ClientFactory): Shared factory the client is obtained from.
+        region_name (str): AWS region scanned by this instance (None = configured default).
+        query (ResourceQuery): Describe query evaluating the RDS rules client-side.
+        cache (ScanCache): Persistent cache keyed by a hash of each instance's describe payload.
+        rules (RuleGroup): Enabled rules for RDS instances.
+        graph (ResourceGraph): Resource graph fed with every fetched instance (None = disabled).
     """
 
-    def __init__(self):
+    def __init__(self, region_name=None, cache=None, clients=None, rules=None, graph=None):
         """
         Initializes the RDSScanner instance and establishes connection to the AWS RDS service.
+
+        Args:
+            region_name (str): (Optional) AWS region to scan. Defaults to the configured region.
+            cache (ScanCache): (Optional) Persistent cache of per-instance evaluations.
+            clients (ClientFactory): (Optional) Shared client factory. Defaults to the process-wide factory.
+            rules (RuleSet): (Optional) Compiled rules. Defaults to the bundled rules.
+            graph (ResourceGraph): (Optional) Resource graph to feed for cross-service exposure analysis.
+        """
+        self.region_name = region_name
+        self.cache = cache
+        self.clients = clients or get_default_factory()
+        self.rules = (rules or get_default_rules()).group('rds-instance')
+        self.graph = graph
+        observers = []
+        if graph is not None:
+            observers.append(Check(
+                'graph', ('PubliclyAccessible', 'VpcSecurityGroups', 'DBSubnetGroup', 'Endpoint'),
+                lambda instance: graph.add_db_instance(instance, self.client.meta.region_name)
+            ))
+        # The rule signature is the check id, so cached evaluations are invalidated when rules change
+        self.query = ResourceQuery(
+            'describe_db_instances', ('DBInstances',), 'DBInstanceIdentifier',
+            checks=[Check(f"rules:{self.rules.signature}", self.rules.fields, self._evaluate_rules)],
+            observers=observers
+        )
+
+    @property
+    def client(self):
         """
-        self.client = boto3.client('rds')
+        Boto3 RDS client, created lazily by the shared client factory on first use.
+        """
+        return self.clients.client('rds', self.region_name)
 
-    def scan_rds_instances(self):
+    def _evaluate_rules(self, instance):
         """
-        Scans all RDS instances in the AWS account for security misconfigurations.
+        Evaluates every enabled RDS rule against one instance.
+        """
+        logger.debug("Scanning RDS instance: %s", instance['DBInstanceIdentifier'])
+        return self.rules.evaluate(instance, instance['DBInstanceIdentifier'], self.client.meta.region_name)
 
-        Checks performed:
+    def iter_findings(self):
+        """
+        Scans all RDS instances one describe_db_instances page at a time and yields findings
+        as soon as they are found.
+
+        Default rules:
         - Public accessibility (`PubliclyAccessible`)
         - Encryption at rest (`StorageEncrypted`)
         - Backup retention (`BackupRetentionPeriod`)
 
-        Returns:
-            findings (list): A list of dictionaries describing discovered misconfigurations.
-        """
-        findings = []
+        describe_db_instances cannot filter on these attributes, so the rules are evaluated
+        client-side on instances projected to the fields they read.
 
+        Yields:
+            finding (Finding): A discovered misconfiguration.
+        """
         try:
-            instances = self.client.describe_db_instances()['DBInstances']
-            for instance in instances:
-                instance_id = instance['DBInstanceIdentifier']
-                logger.info(f"Scanning RDS instance: {instance_id}")
-
-                # Check public accessibility
-                if instance.get('PubliclyAccessible'):
-                    findings.append({
-                        'InstanceId': instance_id,
-                        'Issue': 'RDS instance is publicly accessible.'
-                    })
-
-                # Check storage encryption
-                if not instance.get('StorageEncrypted'):
-                    findings.append({
-                        'InstanceId': instance_id,
-                        'Issue': 'RDS storage encryption is not enabled.'
-                    })
-
-                # Check backup retention
-                if instance.get('BackupRetentionPeriod', 0) == 0:
-                    findings.append({
-                        'InstanceId': instance_id,
-                        'Issue': 'No backup retention configured.'
-                    })
-
+            yield from self.query.iter_findings(self.client, cache=self.cache, account_id=self.clients.account_id)
         except Exception as e:
-            logger.error(f"Error scanning RDS instances: {e}")
-            findings.append({'Error': str(e)})
+            logger.error("Error scanning RDS instances: %s", e)
+            yield Finding.error(e, 'rds-instance', region=self.region_name)
 
-        return findings
\ No newline at end of file
+    def scan_rds_instances(self):
+        """
+        Scans all RDS instances in the AWS account for security misconfigurations.
+
+        Returns:
+            findings (list): A list of Findings describing discovered misconfigurations.
+        """
+        return list(self.iter_findings())
@@ -0,0 +1,211 @@
+import threading
+from aws_misconfig_scanner.modules.sg_exposure import ExposureIndex
+from aws_misconfig_scanner.utils.findings import Finding, Severity, finding_type
+from aws_misconfig_scanner.utils.logger import setup_logger
+
+"""
+resource_graph.py
+
+Cross-Service Resource Graph
+
+This module keeps an in-memory graph of the resources the EC2, RDS and Security Group scanners
+already fetch, and correlates them into effective internet exposure:
+
+- EC2 instances are linked to their network interfaces (ENIs); each ENI carries its own public IP,
+  subnet and security groups
+- RDS instances are linked to their VPC security groups and DB subnet group subnets
+- Security groups contribute their internet-facing ingress rules through an ExposureIndex
+
+Edges are indexed by security group id, so correlation is a set of hash joins: for every sensitive
+port the exposure index returns the groups that open it, and the group index returns the ENIs and
+databases behind them. A resource is reported only if it is actually reachable: an ENI with a
+public IP, or a publicly accessible database, behind a group that opens a sensitive port (or the
+database port) to the internet.
+
+Subnet route tables are not fetched, so a public IP or PubliclyAccessible flag is taken to mean
+the subnet routes to an internet gateway; subnets are reported with each finding for review.
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+# Correlated exposure findings; the lists of ports, groups and subnets are reported as details
+EC2_REACHABLE = finding_type(
+    'exposure-ec2-reachable', Severity.CRITICAL, 'ec2-instance',
+    "EC2 instance {id} ({0}) is reachable from the internet on sensitive port(s) {Ports} through {SecurityGroups}"
+)
+RDS_REACHABLE = finding_type(
+    'exposure-rds-reachable', Severity.CRITICAL, 'rds-instance',
+    "RDS instance {id} is publicly accessible and reachable from the internet on port {Ports} through {SecurityGroups}"
+)
+
+
+class ResourceGraph:
+    """
+    Class: ResourceGraph
+
+    Description:
+        Thread-safe graph of EC2 instances, RDS instances, ENIs, subnets and security groups,
+        fed by the scanners as they fetch resources.
+
+    Attributes:
+        exposures (ExposureIndex): Internet-facing security group exposures.
+        instances (dict): EC2 instance nodes indexed by instance id.
+        databases (dict): RDS instance nodes indexed by DB instance identifier.
+        enis (dict): ENI nodes indexed by network interface id.
+    """
+
+    def __init__(self):
+        self.exposures = ExposureIndex()
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """
+        Removes every resource from the graph (the exposure index is cleared in place).
+        """
+        self.exposures.clear()
+        with self._lock:
+            self.instances = {}
+            self.databases = {}
+            self.enis = {}
+            self._group_enis = {}
+            self._group_databases = {}
+
+    def add_instance(self, instance, region=None):
+        """
+        Adds an EC2 instance and its network interfaces to the graph.
+
+        Args:
+            instance (dict): Instance description (InstanceId, NetworkInterfaces, SecurityGroups,
+                PublicIpAddress, SubnetId).
+            region (str): (Optional) Region the instance was found in.
+        """
+        instance_id = instance['InstanceId']
+        interfaces = instance.get('NetworkInterfaces') or [{
+            # Instances described without interfaces are treated as a single implicit interface
+            'NetworkInterfaceId': instance_id,
+            'Groups': instance.get('SecurityGroups', []),
+            'SubnetId': instance.get('SubnetId'),
+            'Association': {'PublicIp': instance['PublicIpAddress']} if instance.get('PublicIpAddress') else {},
+        }]
+        enis = []
+        for interface in interfaces:
+            enis.append({
+                'NetworkInterfaceId': interface['NetworkInterfaceId'],
+                'InstanceId': instance_id,
+                'PublicIp': (interface.get('Association') or {}).get('PublicIp'),
+                'SubnetId': interface.get('SubnetId'),
+                'GroupIds': [group['GroupId'] for group in interface.get('Groups', [])],
+            })
+        with self._lock:
+            self.instances[instance_id] = {'InstanceId': instance_id, 'Region': region,
+                                           'Enis': [eni['NetworkInterfaceId'] for eni in enis]}
+            for eni in enis:
+                self.enis[eni['NetworkInterfaceId']] = eni
+                for group_id in eni['GroupIds']:
+                    self._group_enis.setdefault(group_id, set()).add(eni['NetworkInterfaceId'])
+
+    def add_db_instance(self, db_instance, region=None):
+        """
+        Adds an RDS instance to the graph.
+
+        Args:
+            db_instance (dict): DB instance description (DBInstanceIdentifier, PubliclyAccessible,
+                VpcSecurityGroups, DBSubnetGroup, Endpoint).
+            region (str): (Optional) Region the database was found in.
+        """
+        db_id = db_instance['DBInstanceIdentifier']
+        node = {
+            'DBInstanceIdentifier': db_id,
+            'Region': region,
+            'PubliclyAccessible': bool(db_instance.get('PubliclyAccessible')),
+            'Port': (db_instance.get('Endpoint') or {}).get('Port'),
+            'GroupIds': [group['VpcSecurityGroupId'] for group in db_instance.get('VpcSecurityGroups', [])
+                         if group.get('Status', 'active') == 'active'],
+            'SubnetIds': [subnet['SubnetIdentifier']
+                          for subnet in (db_instance.get('DBSubnetGroup') or {}).get('Subnets', [])],
+        }
+        with self._lock:
+            self.databases[db_id] = node
+            for group_id in node['GroupIds']:
+                self._group_databases.setdefault(group_id, set()).add(db_id)
+
+    def _reaching_groups(self, port):
+        """
+        Returns the ids of the groups opening a port to the internet.
+        """
+        return {exposure.group_id for exposure in self.exposures.reachable(port)}
+
+    def correlate(self, sensitive_ports):
+        """
+        Computes the effective internet exposure of every EC2 and RDS instance in the graph.
+
+        Args:
+            sensitive_ports (iterable): Ports whose exposure is reported for EC2 instances.
+
+        Returns:
+            findings (list): Correlated exposure findings, one per reachable resource.
+        """
+        with self._lock:
+            enis = dict(self.enis)
+            instances = dict(self.instances)
+            databases = dict(self.databases)
+            group_enis = {group_id: set(ids) for group_id, ids in self._group_enis.items()}
+            group_databases = {group_id: set(ids) for group_id, ids in self._group_databases.items()}
+
+        # EC2: sensitive port -> groups opening it -> ENIs with a public IP -> instance
+        reached = {}
+        for port in sorted(set(sensitive_ports)):
+            for group_id in self._reaching_groups(port):
+                for eni_id in group_enis.get(group_id, ()):
+                    eni = enis[eni_id]
+                    if not eni['PublicIp']:
+                        continue
+                    entry = reached.setdefault(eni['InstanceId'], {'ports': set(), 'groups': set(),
+                                                                   'ips': set(), 'subnets': set()})
+                    entry['ports'].add(port)
+                    entry['groups'].add(group_id)
+                    entry['ips'].add(eni['PublicIp'])
+                    if eni['SubnetId']:
+                        entry['subnets'].add(eni['SubnetId'])
+
+        # Sorted by resource id, so the report does not depend on set iteration or scan order
+        findings = []
+        for instance_id, entry in sorted(reached.items()):
+            findings.append(Finding(
+                EC2_REACHABLE, instance_id, (sorted(entry['ips']),),
+                region=instances.get(instance_id, {}).get('Region'),
+                details={'Ports': sorted(entry['ports']), 'SecurityGroups': sorted(entry['groups']),
+                         'Subnets': sorted(entry['subnets'])}
+            ))
+
+        # RDS: database port -> groups opening it -> publicly accessible databases listening on it
+        reached = {}
+        db_ports = {node['Port'] for node in databases.values() if node['PubliclyAccessible'] and node['Port']}
+        for port in sorted(db_ports):
+            for group_id in self._reaching_groups(port):
+                for db_id in group_databases.get(group_id, ()):
+                    node = databases[db_id]
+                    if node['PubliclyAccessible'] and node['Port'] == port:
+                        reached.setdefault(db_id, []).append(group_id)
+
+        for db_id, groups in sorted(reached.items()):
+            node = databases[db_id]
+            findings.append(Finding(
+                RDS_REACHABLE, db_id, region=node['Region'],
+                details={'Ports': [node['Port']], 'SecurityGroups': sorted(groups), 'Subnets': node['SubnetIds']}
+            ))
+
+        logger.info("Resource graph: %s EC2 instances, %s RDS instances, %s internet-facing rules, "
+                    "%s reachable resources", len(instances), len(databases), len(self.exposures.exposures), len(findings))
+        return findings
+
+    def resources_in_group(self, group_id):
+        """
+        Returns the instance ids and DB instance identifiers attached to a security group.
+        """
+        with self._lock:
+            instance_ids = {self.enis[eni_id]['InstanceId'] for eni_id in self._group_enis.get(group_id, ())}
+            return sorted(instance_ids), sorted(self._group_databases.get(group_id, ()))
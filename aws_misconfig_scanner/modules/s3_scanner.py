@@ -1,6 +1,10 @@
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 import botocore
-import boto3
-from aws_misconfig_scanner.utils.logger import setup_logger
+from aws_misconfig_scanner.utils.aws_clients import get_default_factory
+from aws_misconfig_scanner.utils.findings import Finding, Severity, finding_type
+from aws_misconfig_scanner.utils.logger import ProgressRollup, setup_logger
 
 """
 s3_scanner.py
@@ -15,6 +19,15 @@ Misconfigurations Detected:
 - Disabled encryption at rest
 - Absence of versioning configuration
 
+Before any per-bucket check runs, a planning stage fetches the cheap gating facts: the account-level
+S3 Block Public Access configuration (once per scan) and each bucket's own public access block.
+Checks whose outcome those settings already decide are elided:
+- IgnorePublicAcls makes S3 ignore every ACL grant, so get_bucket_acl is skipped
+- RestrictPublicBuckets restricts access granted by a public policy to AWS service principals and the
+  bucket owner's account, so get_bucket_policy_status is skipped
+When the account-level settings already elide both checks, the bucket-level lookup is skipped too.
+Elided calls are counted and reported at the end of the scan.
+
 This scanner leverages the AWS SDK for Python (boto3) and integrates into a broader 
 AWS misconfiguration scanning framework.
 
@@ -23,6 +36,23 @@ Author: Tom D.
 
 logger = setup_logger(__name__)
 
+# Bucket checks in report order: (check method, 'service.Operation' it calls, Block Public Access setting that makes it moot)
+BUCKET_CHECKS = (
+    ('_check_public_acl', 's3.GetBucketAcl', 'IgnorePublicAcls'),
+    ('_check_public_policy', 's3.GetBucketPolicyStatus', 'RestrictPublicBuckets'),
+    ('_check_encryption', 's3.GetBucketEncryption', None),
+    ('_check_versioning', 's3.GetBucketVersioning', None),
+)
+
+# Block Public Access settings able to elide a bucket check
+GATING_SETTINGS = frozenset(setting for _, _, setting in BUCKET_CHECKS if setting)
+
+# Finding types of the bucket checks
+PUBLIC_ACL = finding_type('s3-public-acl', Severity.HIGH, 's3-bucket', "Bucket ACL allows public access ({0}).")
+PUBLIC_POLICY = finding_type('s3-public-policy', Severity.HIGH, 's3-bucket', "Bucket policy allows public access.")
+NO_ENCRYPTION = finding_type('s3-no-encryption', Severity.MEDIUM, 's3-bucket', "No server-side encryption configured.")
+NO_VERSIONING = finding_type('s3-versioning-disabled', Severity.LOW, 's3-bucket', "Bucket versioning is not enabled.")
+
 class S3Scanner:
     """
     Class: S3Scanner
@@ -33,94 +63,322 @@ class S3Scanner:
         - Lack of encryption
         - Missing versioning
 
+        Buckets are inspected on a bounded worker pool. Each bucket's region is resolved once and
+        its checks are issued through a cached client for that region, so no call pays a
+        cross-region redirect. Checks made moot by Block Public Access settings are not issued.
+
     Attributes:
-        client (boto3.client): Boto3 S3 client used to retrieve bucket configurations.
+        client (boto3.client): Boto3 S3 client used to list buckets and resolve bucket regions.
+        clients (ClientFactory): Shared factory the client is obtained from.
+        max_workers (int): Maximum number of concurrent S3 API calls.
+        elided_calls (Counter): API calls skipped by the planner during the last scan, by operation.
+        planning_calls (Counter): Gating API calls made by the planner during the last scan, by operation.
+        progress (UnitProgress): Checkpoint journal view recording every inspected bucket (None = disabled).
     """
 
-    def __init__(self):
+    def __init__(self, max_workers=16, clients=None):
         """
         Initializes the S3Scanner instance and establishes connection to the AWS S3 service.
+
+        Args:
+            max_workers (int): (Optional) Size of the worker pool used for bucket inspection.
+            clients (ClientFactory): (Optional) Shared client factory. Defaults to the process-wide factory.
         """
-        self.client = boto3.client('s3')
+        self.clients = clients or get_default_factory()
+        self.max_workers = max_workers
+        self.progress = None
+        self.elided_calls = Counter()
+        self.planning_calls = Counter()
+        self._stats_lock = threading.Lock()
 
-    def scan_s3_buckets(self):
+    @property
+    def client(self):
         """
-        Scans all S3 buckets in the AWS account for security misconfigurations.
+        Boto3 S3 client, created lazily by the shared client factory on first use.
+        """
+        return self.clients.client('s3')
+
+    def _client_for_region(self, region):
+        """
+        Returns the shared S3 client bound to the given region, creating it on first use.
+        """
+        return self.clients.client('s3', region)
+
+    def _resolve_bucket_region(self, bucket):
+        """
+        Resolves the region of a bucket, preferring the region returned by list_buckets.
+
+        Args:
+            bucket (dict): Bucket entry from list_buckets.
+
+        Returns:
+            region (str): The bucket's region name.
+        """
+        region = bucket.get('BucketRegion')
+        if not region:
+            location = self.client.get_bucket_location(Bucket=bucket['Name']).get('LocationConstraint')
+            # Buckets in us-east-1 report no location constraint, legacy eu-west-1 buckets report 'EU'
+            region = {None: 'us-east-1', '': 'us-east-1', 'EU': 'eu-west-1'}.get(location, location)
+        return region
+
+    def _count(self, counter, operation, n=1):
+        with self._stats_lock:
+            counter[operation] += n
+
+    @staticmethod
+    def _blocking_settings(configuration):
+        """
+        Returns the gating Block Public Access settings switched on in a configuration.
+        """
+        return frozenset(setting for setting in GATING_SETTINGS if configuration.get(setting))
+
+    def _account_id(self):
+        """
+        Returns the id of the scanned account, asking STS when the client factory does not know it.
+        """
+        if self.clients.account_id:
+            return self.clients.account_id
+        return self.clients.client('sts').get_caller_identity()['Account']
+
+    def _account_public_access_block(self):
+        """
+        Fetches the account-level S3 Block Public Access settings.
+
+        Returns:
+            settings (frozenset): Gating settings enabled for the whole account (empty if none or unknown).
+        """
+        try:
+            self._count(self.planning_calls, 's3control.GetPublicAccessBlock')
+            response = self.clients.client('s3control').get_public_access_block(AccountId=self._account_id())
+            settings = self._blocking_settings(response.get('PublicAccessBlockConfiguration', {}))
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] != 'NoSuchPublicAccessBlockConfiguration':
+                logger.warning("Could not read account-level S3 Block Public Access, checking every bucket: %s", e)
+            settings = frozenset()
+        except Exception as e:
+            logger.warning("Could not read account-level S3 Block Public Access, checking every bucket: %s", e)
+            settings = frozenset()
+        logger.info("Account-level S3 Block Public Access: %s", ', '.join(sorted(settings)) or 'none')
+        return settings
+
+    def _bucket_public_access_block(self, client, bucket_name):
+        """
+        Fetches a bucket's own Block Public Access settings.
+
+        Returns:
+            settings (frozenset): Gating settings enabled on the bucket (empty if none or unknown).
+        """
+        self._count(self.planning_calls, 's3.GetPublicAccessBlock')
+        try:
+            response = client.get_public_access_block(Bucket=bucket_name)
+            return self._blocking_settings(response.get('PublicAccessBlockConfiguration', {}))
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] != 'NoSuchPublicAccessBlockConfiguration':
+                logger.warning("Could not read Block Public Access for %s: %s", bucket_name, e)
+        except Exception as e:
+            logger.warning("Could not read Block Public Access for %s: %s", bucket_name, e)
+        return frozenset()
+
+    def _check_public_acl(self, client, bucket_name):
+        """
+        Checks whether the bucket ACL grants access to all users.
+        """
+        findings = []
+        acl = client.get_bucket_acl(Bucket=bucket_name)
+        for grant in acl.get('Grants', []):
+            grantee = grant.get('Grantee', {})
+            permission = grant.get('Permission')
+            if grantee.get('URI') == 'http://acs.amazonaws.com/groups/global/AllUsers':
+                findings.append(Finding(PUBLIC_ACL, bucket_name, (permission,), region=client.meta.region_name))
+        return findings
+
+    def _check_public_policy(self, client, bucket_name):
+        """
+        Checks whether the bucket policy makes the bucket public.
+        """
+        findings = []
+        try:
+            policy_status = client.get_bucket_policy_status(Bucket=bucket_name)
+            if policy_status['PolicyStatus'].get('IsPublic'):
+                findings.append(Finding(PUBLIC_POLICY, bucket_name, region=client.meta.region_name))
+        except botocore.exceptions.ClientError as e:
+            error_code = e.response['Error']['Code']
+            if error_code == 'NoSuchBucketPolicy':
+                logger.debug("No bucket policy found for %s.", bucket_name)
+            else:
+                logger.error("Error checking bucket policy for %s: %s", bucket_name, e)
+        except Exception as e:
+            logger.error("Unhandled error checking bucket policy for %s: %s", bucket_name, e)
+        return findings
+
+    def _check_encryption(self, client, bucket_name):
+        """
+        Checks whether server-side encryption is configured for the bucket.
+        """
+        findings = []
+        try:
+            encryption = client.get_bucket_encryption(Bucket=bucket_name)
+            rules = encryption['ServerSideEncryptionConfiguration']['Rules']
+            if not rules:
+                findings.append(Finding(NO_ENCRYPTION, bucket_name, region=client.meta.region_name))
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] == 'ServerSideEncryptionConfigurationNotFoundError':
+                findings.append(Finding(NO_ENCRYPTION, bucket_name, region=client.meta.region_name))
+            else:
+                logger.error("Error checking encryption for %s: %s", bucket_name, e)
+        return findings
+
+    def _check_versioning(self, client, bucket_name):
+        """
+        Checks whether versioning is enabled for the bucket.
+        """
+        findings = []
+        versioning = client.get_bucket_versioning(Bucket=bucket_name)
+        if versioning.get('Status') != 'Enabled':
+            findings.append(Finding(NO_VERSIONING, bucket_name, region=client.meta.region_name))
+        return findings
+
+    def _run_check(self, check, client, bucket_name):
+        """
+        Runs a single bucket check, converting unexpected errors into an error finding for that bucket.
+        """
+        try:
+            with self.clients.metrics.check_timer(check.__name__.lstrip('_')):
+                return check(client, bucket_name)
+        except Exception as e:
+            logger.error("Error scanning S3 bucket %s: %s", bucket_name, e)
+            return [Finding.error(e, 's3-bucket', bucket_name, region=client.meta.region_name)]
+
+    def _iter_buckets(self):
+        """
+        Yields every bucket in the account, one list_buckets page at a time where pagination is
+        supported.
+        """
+        if self.client.can_paginate('list_buckets'):
+            buckets = (bucket for page in self.client.get_paginator('list_buckets').paginate()
+                       for bucket in page.get('Buckets', []))
+        else:
+            buckets = self.client.list_buckets().get('Buckets', [])
+        yield from buckets
+
+    def _inspect_bucket_journaled(self, bucket, check_pool, account_settings=frozenset()):
+        """
+        Inspects a bucket, replaying its findings instead when the checkpoint journal has them.
+        """
+        if self.progress is None:
+            return self._inspect_bucket(bucket, check_pool, account_settings)
+        findings = self.progress.resource(bucket['Name'])
+        if findings is None:
+            findings = self._inspect_bucket(bucket, check_pool, account_settings)
+            self.progress.record_resource(bucket['Name'], findings)
+        return findings
+
+    def _inspect_bucket(self, bucket, check_pool, account_settings=frozenset()):
+        """
+        Resolves a bucket's region, plans its checks and runs them concurrently on the check pool.
+
+        Checks that no Block Public Access setting can elide are issued straight away; the bucket's
+        own settings are fetched meanwhile, and only the gated checks they do not make moot follow.
+
+        Args:
+            bucket (dict): Bucket entry from list_buckets.
+            check_pool (ThreadPoolExecutor): Pool the individual bucket checks are issued on.
+            account_settings (frozenset): (Optional) Gating settings enabled account-wide.
+
+        Returns:
+            findings (list): Findings for the bucket, in check order.
+        """
+        bucket_name = bucket['Name']
+        try:
+            region = self._resolve_bucket_region(bucket)
+        except Exception as e:
+            logger.error("Error resolving region for S3 bucket %s: %s", bucket_name, e)
+            return [Finding.error(e, 's3-bucket', bucket_name)]
+
+        logger.debug("Scanning S3 bucket: %s (%s)", bucket_name, region)
+        client = self._client_for_region(region)
+        futures = {}
+        for check, _, setting in BUCKET_CHECKS:
+            if setting is None:
+                futures[check] = check_pool.submit(self._run_check, getattr(self, check), client, bucket_name)
+
+        settings = account_settings
+        if not GATING_SETTINGS <= settings:
+            settings = settings | self._bucket_public_access_block(client, bucket_name)
+        for check, operation, setting in BUCKET_CHECKS:
+            if setting is None:
+                continue
+            if setting in settings:
+                self._count(self.elided_calls, operation)
+                continue
+            futures[check] = check_pool.submit(self._run_check, getattr(self, check), client, bucket_name)
+
+        findings = []
+        for check, _, _ in BUCKET_CHECKS:
+            if check in futures:
+                findings.extend(futures[check].result())
+        return findings
+
+    def elision_stats(self):
+        """
+        Returns the planner's call counts for the last scan.
+
+        Returns:
+            stats (dict): 'elided' and 'planning' call counts by operation.
+        """
+        with self._stats_lock:
+            return {'elided': dict(self.elided_calls), 'planning': dict(self.planning_calls)}
+
+    def iter_findings(self):
+        """
+        Scans all S3 buckets and yields findings bucket by bucket, in listing order.
 
         Checks performed:
         - Public accessibility (ACL and bucket policy)
         - Encryption at rest (SSE configuration)
         - Versioning configuration
 
-        Returns:
-            findings (list): A list of dictionaries describing discovered misconfigurations.
-        """
-        findings = []
+        The account-level Block Public Access settings are read once. Each bucket's region is
+        resolved first; its checks are then issued concurrently through the region's client,
+        except those its Block Public Access settings make moot. Only a bounded window of buckets
+        is in flight at a time, so memory use does not grow with the number of buckets.
 
+        Yields:
+            finding (Finding): A discovered misconfiguration.
+        """
+        bucket_workers = max(1, self.max_workers // 4)
+        with self._stats_lock:
+            self.elided_calls.clear()
+            self.planning_calls.clear()
         try:
-            response = self.client.list_buckets()
-            buckets = response.get('Buckets', [])
-
-            for bucket in buckets:
-                bucket_name = bucket['Name']
-                logger.info(f"Scanning S3 bucket: {bucket_name}")
-
-                # Check public ACL access
-                acl = self.client.get_bucket_acl(Bucket=bucket_name)
-                for grant in acl.get('Grants', []):
-                    grantee = grant.get('Grantee', {})
-                    permission = grant.get('Permission')
-                    if grantee.get('URI') == 'http://acs.amazonaws.com/groups/global/AllUsers':
-                        findings.append({
-                            'Bucket': bucket_name,
-                            'Issue': f'Bucket ACL allows public access ({permission}).'
-                        })
-
-                # Check public bucket policy
-                try:
-                    policy_status = self.client.get_bucket_policy_status(Bucket=bucket_name)
-                    if policy_status['PolicyStatus'].get('IsPublic'):
-                        findings.append({
-                            'Bucket': bucket_name,
-                            'Issue': 'Bucket policy allows public access.'
-                        })
-                except botocore.exceptions.ClientError as e:
-                    error_code = e.response['Error']['Code']
-                    if error_code == 'NoSuchBucketPolicy':
-                        logger.info(f"No bucket policy found for {bucket_name}.")
-                    else:
-                        logger.error(f"Error checking bucket policy for {bucket_name}: {e}")
-                except Exception as e:
-                    logger.error(f"Unhandled error checking bucket policy for {bucket_name}: {e}")
-
-                # Check encryption at rest
-                try:
-                    encryption = self.client.get_bucket_encryption(Bucket=bucket_name)
-                    rules = encryption['ServerSideEncryptionConfiguration']['Rules']
-                    if not rules:
-                        findings.append({
-                            'Bucket': bucket_name,
-                            'Issue': 'No server-side encryption configured.'
-                        })
-                except botocore.exceptions.ClientError as e:
-                    if e.response['Error']['Code'] == 'ServerSideEncryptionConfigurationNotFoundError':
-                        findings.append({
-                            'Bucket': bucket_name,
-                            'Issue': 'No server-side encryption configured.'
-                        })
-                    else:
-                        logger.error(f"Error checking encryption for {bucket_name}: {e}")
-
-                # Check versioning configuration
-                versioning = self.client.get_bucket_versioning(Bucket=bucket_name)
-                if versioning.get('Status') != 'Enabled':
-                    findings.append({
-                        'Bucket': bucket_name,
-                        'Issue': 'Bucket versioning is not enabled.'
-                    })
+            account_settings = self._account_public_access_block()
+            rollup = ProgressRollup(logger, 'S3 buckets')
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='s3-check') as check_pool, \
+                    ThreadPoolExecutor(max_workers=bucket_workers, thread_name_prefix='s3-bucket') as bucket_pool:
+                window = deque()
+                for bucket in self._iter_buckets():
+                    window.append(bucket_pool.submit(self._inspect_bucket_journaled, bucket, check_pool, account_settings))
+                    # Keep the pipeline full while bounding the number of buckets held in memory
+                    if len(window) >= bucket_workers * 2:
+                        yield from window.popleft().result()
+                        rollup.tick()
+                while window:
+                    yield from window.popleft().result()
+                    rollup.tick()
+            rollup.done()
+            stats = self.elision_stats()
+            logger.info("S3 call planner elided %s calls %s using %s gating calls",
+                        sum(stats['elided'].values()), stats['elided'], sum(stats['planning'].values()))
 
         except Exception as e:
-            logger.error(f"Error scanning S3 buckets: {e}")
-            findings.append({'Error': str(e)})
+            logger.error("Error scanning S3 buckets: %s", e)
+            yield Finding.error(e, 's3-bucket')
 
-        return findings
\ No newline at end of file
+    def scan_s3_buckets(self):
+        """
+        Scans all S3 buckets in the AWS account for security misconfigurations.
+
+        Returns:
+            findings (list): A list of Findings describing discovered misconfigurations.
+        """
+        return list(self.iter_findings())
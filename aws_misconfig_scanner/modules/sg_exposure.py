@@ -0,0 +1,299 @@
+import ipaddress
+import threading
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from aws_misconfig_scanner.utils.logger import setup_logger
+
+"""
+sg_exposure.py
+
+Security Group Exposure Index
+
+This module normalizes security group ingress rules into (protocol, port interval, network)
+exposures and indexes the internet-facing ones for range queries. An ingress rule is internet
+facing when one of its sources is:
+- The whole internet (0.0.0.0/0 or ::/0)
+- A wide public range (e.g. 0.0.0.0/1), i.e. a network no longer than WIDE_PREFIXLEN that is not
+  inside a private or reserved block
+- A managed prefix list containing such a range
+
+Port intervals are kept per protocol as distinct intervals sorted by start with a running maximum
+of their ends, so "which exposures reach port N" is a bisect plus a short backwards scan instead of
+a pass over every rule. CIDR strings repeat heavily across groups and are parsed once.
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+# Longest prefix still considered a wide public range, by IP version
+WIDE_PREFIXLEN = {4: 8, 6: 32}
+
+# Networks that never expose a resource to the internet
+PRIVATE_NETWORKS = [ipaddress.ip_network(cidr) for cidr in (
+    '10.0.0.0/8', '100.64.0.0/10', '127.0.0.0/8', '169.254.0.0/16', '172.16.0.0/12', '192.168.0.0/16',
+    'fc00::/7', 'fe80::/10', '::1/128',
+)]
+
+# IpProtocol numbers with a well-known name
+PROTOCOL_NAMES = {'6': 'tcp', '17': 'udp', '1': 'icmp', '58': 'icmpv6'}
+
+# Protocols whose rules carry a port range
+PORT_PROTOCOLS = ('tcp', 'udp')
+
+ALL_PROTOCOLS = '-1'
+MIN_PORT, MAX_PORT = 0, 65535
+
+
+@lru_cache(maxsize=65536)
+def parse_network(cidr):
+    """
+    Parses a CIDR string, returning None if it is invalid.
+    """
+    try:
+        return ipaddress.ip_network(cidr, strict=False)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=65536)
+def classify_source(cidr):
+    """
+    Classifies an ingress source CIDR.
+
+    Returns:
+        exposure (str): 'world' for 0.0.0.0/0 and ::/0, 'wide' for a wide public range, or None.
+    """
+    network = parse_network(cidr)
+    if network is None:
+        return None
+    if network.prefixlen == 0:
+        return 'world'
+    if network.prefixlen <= WIDE_PREFIXLEN[network.version] and not any(
+        network.version == private.version and network.subnet_of(private) for private in PRIVATE_NETWORKS
+    ):
+        return 'wide'
+    return None
+
+
+class Exposure:
+    """
+    Class: Exposure
+
+    Description:
+        One internet-facing (protocol, port interval, source) entry of a security group.
+
+    Attributes:
+        group_id (str): Security group the ingress rule belongs to.
+        protocol (str): 'tcp', 'udp', another protocol name/number, or '-1' for all traffic.
+        from_port (int): First port of the interval (None for protocols without ports).
+        to_port (int): Last port of the interval (None for protocols without ports).
+        source (str): Source CIDR, prefixed with the prefix list id for prefix list entries.
+        network (ipaddress network): Parsed source network.
+        exposure (str): 'world' or 'wide'.
+    """
+
+    __slots__ = ('group_id', 'protocol', 'from_port', 'to_port', 'source', 'network', 'exposure')
+
+    def __init__(self, group_id, protocol, from_port, to_port, source, network, exposure):
+        self.group_id = group_id
+        self.protocol = protocol
+        self.from_port = from_port
+        self.to_port = to_port
+        self.source = source
+        self.network = network
+        self.exposure = exposure
+
+    def covers(self, port, protocol='tcp'):
+        """
+        Returns True if the exposure reaches the given port over the given protocol.
+        """
+        if self.protocol == ALL_PROTOCOLS:
+            return True
+        return self.protocol == protocol and self.from_port is not None and self.from_port <= port <= self.to_port
+
+    def describe_ports(self):
+        """
+        Returns a human readable description of the exposed traffic.
+        """
+        if self.protocol == ALL_PROTOCOLS:
+            return 'All traffic'
+        if self.from_port is None:
+            return f"Protocol {self.protocol}"
+        if self.from_port == self.to_port:
+            return f"Port {self.from_port}/{self.protocol}"
+        return f"Ports {self.from_port}-{self.to_port}/{self.protocol}"
+
+
+def normalize_permission(group_id, permission, prefix_list_cidrs=None):
+    """
+    Yields the internet-facing exposures of one ingress permission.
+
+    Args:
+        group_id (str): Security group id.
+        permission (dict): An IpPermissions entry.
+        prefix_list_cidrs (callable): (Optional) Function returning the CIDRs of a prefix list id.
+    """
+    protocol = str(permission.get('IpProtocol', ALL_PROTOCOLS)).lower()
+    protocol = PROTOCOL_NAMES.get(protocol, protocol)
+    if protocol == ALL_PROTOCOLS:
+        from_port, to_port = MIN_PORT, MAX_PORT
+    elif protocol in PORT_PROTOCOLS:
+        from_port, to_port = permission.get('FromPort'), permission.get('ToPort')
+        if from_port is None or to_port is None or from_port < 0:
+            from_port, to_port = MIN_PORT, MAX_PORT
+    else:
+        from_port = to_port = None
+
+    sources = [ip_range.get('CidrIp') for ip_range in permission.get('IpRanges', [])]
+    sources += [ip_range.get('CidrIpv6') for ip_range in permission.get('Ipv6Ranges', [])]
+    for cidr in sources:
+        exposure = classify_source(cidr) if cidr else None
+        if exposure:
+            yield Exposure(group_id, protocol, from_port, to_port, cidr, parse_network(cidr), exposure)
+
+    for prefix_list in permission.get('PrefixListIds', []):
+        prefix_list_id = prefix_list.get('PrefixListId')
+        if not prefix_list_id or prefix_list_cidrs is None:
+            continue
+        for cidr in prefix_list_cidrs(prefix_list_id):
+            exposure = classify_source(cidr)
+            if exposure:
+                yield Exposure(group_id, protocol, from_port, to_port, f"{prefix_list_id}: {cidr}",
+                               parse_network(cidr), exposure)
+
+
+def ports_in_interval(sorted_ports, from_port, to_port):
+    """
+    Returns the ports of a sorted port list that fall inside [from_port, to_port].
+    """
+    return sorted_ports[bisect_left(sorted_ports, from_port):bisect_right(sorted_ports, to_port)]
+
+
+class _IntervalIndex:
+    """
+    Distinct port intervals of one protocol, sorted by start, with a running maximum of their ends.
+    """
+
+    def __init__(self, intervals):
+        self.intervals = sorted(intervals)
+        self.starts = [start for start, _ in self.intervals]
+        self.max_ends = []
+        max_end = -1
+        for _, end in self.intervals:
+            max_end = max(max_end, end)
+            self.max_ends.append(max_end)
+
+    def stab(self, port):
+        """
+        Yields the intervals containing a port.
+        """
+        i = bisect_right(self.starts, port) - 1
+        # Intervals left of i start earlier; once the running maximum end is below the port none can reach it
+        while i >= 0 and self.max_ends[i] >= port:
+            if self.intervals[i][1] >= port:
+                yield self.intervals[i]
+            i -= 1
+
+
+class ExposureIndex:
+    """
+    Class: ExposureIndex
+
+    Description:
+        Thread-safe index of internet-facing security group exposures answering port range queries.
+
+    Attributes:
+        exposures (list): Every indexed exposure.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """
+        Removes every indexed exposure.
+        """
+        with self._lock:
+            self.exposures = []
+            self._by_group = {}
+            self._by_interval = None
+            self._indexes = None
+
+    def add_group(self, sg, prefix_list_cidrs=None):
+        """
+        Normalizes and indexes the ingress rules of one security group.
+
+        Args:
+            sg (dict): Security group description (GroupId and IpPermissions).
+            prefix_list_cidrs (callable): (Optional) Function returning the CIDRs of a prefix list id.
+
+        Returns:
+            exposures (list): The internet-facing exposures of the group.
+        """
+        exposures = [
+            exposure
+            for permission in sg.get('IpPermissions', [])
+            for exposure in normalize_permission(sg['GroupId'], permission, prefix_list_cidrs)
+        ]
+        with self._lock:
+            # A group seen again (e.g. by an overlapping filter pass) replaces its earlier exposures,
+            # even when it no longer has any
+            previous = self._by_group.pop(sg['GroupId'], None)
+            if previous:
+                self.exposures = [exposure for exposure in self.exposures if exposure.group_id != sg['GroupId']]
+            if exposures:
+                self.exposures.extend(exposures)
+                self._by_group[sg['GroupId']] = exposures
+            if previous or exposures:
+                self._by_interval = self._indexes = None
+        return exposures
+
+    def _build(self):
+        self._by_interval = {}
+        for exposure in self.exposures:
+            if exposure.from_port is not None:
+                key = (exposure.protocol, exposure.from_port, exposure.to_port)
+                self._by_interval.setdefault(key, []).append(exposure)
+        intervals = {}
+        for protocol, from_port, to_port in self._by_interval:
+            intervals.setdefault(protocol, []).append((from_port, to_port))
+        self._indexes = {protocol: _IntervalIndex(spans) for protocol, spans in intervals.items()}
+
+    def reachable(self, port, protocol='tcp'):
+        """
+        Returns every exposure reaching a port over a protocol (including all-traffic rules).
+        """
+        with self._lock:
+            if self._indexes is None:
+                self._build()
+            indexes, by_interval = self._indexes, self._by_interval
+        found = []
+        for indexed_protocol in (protocol, ALL_PROTOCOLS):
+            index = indexes.get(indexed_protocol)
+            if index is None:
+                continue
+            for from_port, to_port in index.stab(port):
+                found.extend(by_interval[(indexed_protocol, from_port, to_port)])
+        return found
+
+    def exposed_ports(self, ports, protocol='tcp'):
+        """
+        Answers which of the given ports are reachable from the internet.
+
+        Returns:
+            exposed (dict): Mapping of each reachable port to the exposures reaching it.
+        """
+        exposed = {}
+        for port in ports:
+            found = self.reachable(port, protocol)
+            if found:
+                exposed[port] = found
+        return exposed
+
+    def group_exposures(self, group_id):
+        """
+        Returns the internet-facing exposures of one security group.
+        """
+        return self._by_group.get(group_id, [])
@@ -1,5 +1,8 @@
-import boto3
+from aws_misconfig_scanner.modules.sg_exposure import WIDE_PREFIXLEN, ExposureIndex, ports_in_interval
+from aws_misconfig_scanner.utils.aws_clients import get_default_factory
+from aws_misconfig_scanner.utils.findings import Finding, Severity, finding_type
 from aws_misconfig_scanner.utils.logger import setup_logger
+from aws_misconfig_scanner.utils.query import Check, ResourceQuery
 
 """
 sg_scanner.py
@@ -10,8 +13,12 @@ This module performs automated scanning of AWS Security Groups to identify
 potential misconfigurations that could expose cloud infrastructure to external threats.
 
 Specifically, it detects:
-- Open ports exposed to the public internet (0.0.0.0/0)
-- Dangerous or sensitive ports exposed to the public (e.g. SSH, RDP, MySQL, PostgreSQL, HTTP/HTTPS)
+- Open ports exposed to the public internet (0.0.0.0/0, ::/0, wide public ranges and prefix lists)
+- Dangerous or sensitive ports exposed to the public (e.g. SSH, RDP, MySQL, PostgreSQL, HTTP/HTTPS),
+  including through port ranges and all-traffic rules that contain them
+
+Ingress rules are normalized into an exposure index (see sg_exposure.py) that is kept on the
+scanner for cross-service analysis.
 
 This scanner leverages the AWS SDK for Python (boto3) and is designed to integrate
 into a broader AWS misconfiguration scanning framework.
@@ -24,6 +31,27 @@ logger = setup_logger(__name__)
 
 # Define dangerous ports we want to flag (commonly targeted by attackers)
 DANGEROUS_PORTS = [22, 3389, 3306, 5432, 80, 443]
+_SORTED_DANGEROUS_PORTS = sorted(DANGEROUS_PORTS)
+
+# Finding types by exposure ('world' or 'wide'); params are the ports (or port) and the rule's source
+OPEN_INGRESS = {
+    'world': finding_type('sg-world-ingress', Severity.HIGH, 'security-group', "{0} open to the world ({1})"),
+    'wide': finding_type('sg-wide-ingress', Severity.MEDIUM, 'security-group', "{0} open to a wide public range ({1})"),
+}
+DANGEROUS_PORT_INGRESS = {
+    'world': finding_type('sg-world-dangerous-port', Severity.CRITICAL, 'security-group',
+                          "Dangerous port {0} open to the world ({1})"),
+    'wide': finding_type('sg-wide-dangerous-port', Severity.HIGH, 'security-group',
+                         "Dangerous port {0} open to a wide public range ({1})"),
+}
+
+# Alternative describe filters returning every group with a potentially internet-facing ingress rule
+PUBLIC_INGRESS_FILTER_SETS = [
+    [{'Name': 'ip-permission.cidr', 'Values': [f"*/{n}" for n in range(WIDE_PREFIXLEN[4] + 1)]}],
+    [{'Name': 'ip-permission.ipv6-cidr', 'Values': [f"*/{n}" for n in range(WIDE_PREFIXLEN[6] + 1)]}],
+    [{'Name': 'ip-permission.prefix-list-id', 'Values': ['*']}],
+]
+
 class SGScanner:
     """
     Class: SGScanner
@@ -31,56 +59,123 @@ class SGScanner:
     Description:
         Performs security group analysis to identify publicly exposed ports
         and dangerous port exposures across all configured AWS Security groups.
-    
+
+        The public ingress check pushes ip-permission cidr, ipv6-cidr and prefix-list-id filters
+        down to describe_security_groups, so only groups with a potentially internet-facing rule
+        are returned.
+
     Attributes:
         client (boto3.client): Boto3 EC2 client used to retrieve security group configurations.
+        clients (ClientFactory): Shared factory the client is obtained from.
+        region_name (str): AWS region scanned by this instance (None = configured default).
+        pushdown (bool): Push check filters down to describe_security_groups.
+        query (ResourceQuery): Describe query evaluating the security group checks.
+        index (ExposureIndex): Internet-facing exposures of every scanned group (the resource
+            graph's index when a graph is given).
     """
-    def __init__(self):
+    def __init__(self, region_name=None, pushdown=True, clients=None, graph=None):
         """
        Initializes the SGScanner instance and establishes connection to the AWS EC2 service.
+
+        Args:
+            region_name (str): (Optional) AWS region to scan. Defaults to the configured region.
+            pushdown (bool): (Optional) Push check filters down to the API instead of filtering client-side.
+            clients (ClientFactory): (Optional) Shared client factory. Defaults to the process-wide factory.
+            graph (ResourceGraph): (Optional) Resource graph whose exposure index the scanner feeds.
+        """
+        self.region_name = region_name
+        self.clients = clients or get_default_factory()
+        self.pushdown = pushdown
+        self.index = graph.exposures if graph is not None else ExposureIndex()
+        self._prefix_lists = {}
+        self.query = ResourceQuery(
+            'describe_security_groups', ('SecurityGroups',), 'GroupId',
+            checks=[
+                Check(
+                    'public-ingress', ('IpPermissions',), self._check_public_ingress,
+                    filter_sets=PUBLIC_INGRESS_FILTER_SETS
+                ),
+            ]
+        )
+
+    @property
+    def client(self):
         """
-        self.client = boto3.client('ec2')
+        Boto3 EC2 client, created lazily by the shared client factory on first use.
+        """
+        return self.clients.client('ec2', self.region_name)
 
-    def scan_security_groups(self):
+    def _prefix_list_cidrs(self, prefix_list_id):
         """
-         Scans all security groups in the AWS account and checks for:
-        - Ports open to 0.0.0.0/0 (public internet)
-        - Dangerous ports exposed to the public
+        Returns the CIDRs of a managed prefix list, fetched once per scanner.
+        """
+        if prefix_list_id not in self._prefix_lists:
+            try:
+                paginator = self.client.get_paginator('get_managed_prefix_list_entries')
+                self._prefix_lists[prefix_list_id] = [
+                    entry['Cidr']
+                    for page in paginator.paginate(PrefixListId=prefix_list_id)
+                    for entry in page.get('Entries', [])
+                ]
+            except Exception as e:
+                logger.warning("Cannot resolve prefix list %s: %s", prefix_list_id, e)
+                self._prefix_lists[prefix_list_id] = []
+        return self._prefix_lists[prefix_list_id]
+
+    def _check_public_ingress(self, sg):
+        """
+        Flags ingress rules of one security group that are open to the internet, and dangerous
+        ports exposed through them.
+
+        Args:
+            sg (dict): Projected security group description.
 
         Returns:
-            findings (list): A list of dictionaries describing discovered misconfigurations.
+            findings (list): A list of Findings describing discovered misconfigurations.
         """
         findings = []
+        sg_id = sg['GroupId']
+        region = self.client.meta.region_name
+        logger.debug("Scanning Security Group: %s", sg_id)
+
+        for exposure in self.index.add_group(sg, self._prefix_list_cidrs):
+            finding = Finding(OPEN_INGRESS[exposure.exposure], sg_id, (exposure.describe_ports(), exposure.source),
+                              region=region)
+            findings.append(finding)
+            logger.warning("%s", finding)
+
+            # Flag highly sensitive ports if exposed publicly, including through port ranges
+            if exposure.protocol in ('tcp', '-1'):
+                for port in ports_in_interval(_SORTED_DANGEROUS_PORTS, exposure.from_port, exposure.to_port):
+                    finding = Finding(DANGEROUS_PORT_INGRESS[exposure.exposure], sg_id, (port, exposure.source),
+                                      region=region)
+                    findings.append(finding)
+                    logger.warning("%s", finding)
+        return findings
+
+    def iter_findings(self):
+        """
+        Scans security groups one describe_security_groups page at a time and yields
+        findings as soon as they are found. Checks performed:
+        - Ports open to the public internet
+        - Dangerous ports exposed to the public
 
+        Yields:
+            finding (Finding): A discovered misconfiguration.
+        """
         try:
-            security_groups = self.client.describe_security_groups()['SecurityGroups']
-            for sg in security_groups:
-                sg_id = sg['GroupId']
-                logger.info(f"Scanning Security Group: {sg_id}")
-
-                for permission in sg.get('IpPermissions', []):
-                    from_port = permission.get('FromPort')
-                    to_port = permission.get('ToPort')
-
-                    # Handle protocols without specific ports
-                    if from_port is None or to_port is None:
-                        from_port = to_port = 'All Ports'
-                    
-                    for ip_range in permission.get('IpRanges', []):
-                        cidr_ip = ip_range.get('CidrIp')
-
-                        # Check for unrestricted access to the internet
-                        if cidr_ip == '0.0.0.0/0':
-                            issue = f"Ports {from_port}-{to_port} open to the world (0.0.0.0/0)"
-                            findings.append({'SecurityGroup': sg_id, 'Issue': issue})
-                            logger.warning(issue)
-
-                        # Flag highly sensitive ports if exposed publicly
-                        if isinstance(from_port, int) and from_port in DANGEROUS_PORTS:
-                            issue = f"Dangerous port {from_port} open to the world (0.0.0.0/0)"
-                            findings.append({'SecurityGroup': sg_id, 'Issue': issue})
-                            logger.warning(issue)
+            yield from self.query.iter_findings(self.client, self.pushdown)
         except Exception as e:
-            logger.error(f"Error scanning Security Groups: {e}")
-            findings.append({'Error': str(e)})
-        return findings
\ No newline at end of file
+            logger.error("Error scanning Security Groups: %s", e)
+            yield Finding.error(e, 'security-group', region=self.region_name)
+
+    def scan_security_groups(self):
+        """
+         Scans all security groups in the AWS account and checks for:
+        - Ports open to the public internet
+        - Dangerous ports exposed to the public
+
+        Returns:
+            findings (list): A list of Findings describing discovered misconfigurations.
+        """
+        return list(self.iter_findings())
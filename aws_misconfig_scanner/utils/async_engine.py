@@ -0,0 +1,147 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from aws_misconfig_scanner.utils.findings import Finding
+from aws_misconfig_scanner.utils.logger import setup_logger
+from aws_misconfig_scanner.utils.scheduler import validate_concurrency
+
+"""
+async_engine.py
+
+Asynchronous Scan Engine
+
+This module runs scan jobs as coroutines on a single asyncio event loop, as an alternative to the
+thread-per-job ScanScheduler. Every job is driven one finding at a time: each step of a scanner's
+finding iterator (typically one API page plus its evaluation) is dispatched to one shared, bounded
+executor, and the coroutine awaits it. A job therefore holds a worker thread only while one of its
+steps runs, so hundreds of (service, region) jobs can be open at once on max_workers threads.
+
+This is a job multiplexer over threads, not asynchronous I/O. The scanners use botocore's blocking
+clients, so every API call still occupies a thread while it waits on the network, and the number
+of requests in flight is bounded by threads rather than by the event loop:
+- Job-level steps are capped at max_workers.
+- Scanners fanning out per resource (S3 bucket checks, Lambda enrichment) run those calls on their
+  own inner worker pools, which come on top of max_workers.
+Reaching far higher request concurrency would need an asynchronous transport (e.g. aiobotocore)
+and coroutine versions of the scanners. In exchange, the engine reuses the scanners' checks unchanged
+and produces the same findings as the threaded path; only the scheduling differs.
+
+Features:
+- Per-service concurrency limits (asyncio semaphores)
+- Per-service timeouts; a timed-out job stops fetching after its in-flight step instead of running on
+- Findings are forwarded to the sink from the event loop thread, one at a time
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+# Sentinel returned by next() when a finding iterator is exhausted
+_DONE = object()
+
+
+class AsyncScanEngine:
+    """
+    Class: AsyncScanEngine
+
+    Description:
+        Drives ScanJobs as coroutines on one event loop, stepping their finding iterators on a
+        shared bounded executor while honouring per-service concurrency limits and timeouts.
+
+    Attributes:
+        max_workers (int): Maximum number of job iterator steps running at once (scanners may add inner pools).
+        service_concurrency (dict): Maximum number of concurrently open jobs per service.
+        timeouts (dict): Timeout in seconds per service.
+        default_timeout (float): Timeout applied to services without an explicit entry (None = no limit).
+    """
+
+    def __init__(self, max_workers=32, service_concurrency=None, timeouts=None, default_timeout=None):
+        """
+        Initializes the engine.
+
+        Args:
+            max_workers (int): Size of the executor the iterator steps run on.
+            service_concurrency (dict): (Optional) Mapping of service name to concurrency limit (at least 1).
+            timeouts (dict): (Optional) Mapping of service name to timeout in seconds.
+            default_timeout (float): (Optional) Timeout for services without an explicit entry.
+
+        Raises:
+            ValueError: If a concurrency limit is below 1.
+        """
+        self.max_workers = max(1, max_workers)
+        self.service_concurrency = validate_concurrency(service_concurrency)
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+
+    def _timeout_for(self, service):
+        return self.timeouts.get(service, self.default_timeout)
+
+    async def _drain(self, job, executor, sink, collected):
+        """
+        Steps one job's finding iterator to exhaustion, forwarding or collecting every finding.
+        """
+        loop = asyncio.get_running_loop()
+        iterator = await loop.run_in_executor(executor, lambda: iter(job.iter_findings()))
+        while True:
+            finding = await loop.run_in_executor(executor, next, iterator, _DONE)
+            if finding is _DONE:
+                return
+            if sink is not None:
+                sink(job.service, finding)
+            else:
+                collected.append(finding)
+
+    async def _run_job(self, job, executor, semaphores, sink, results):
+        """
+        Runs one job under its service's semaphore and records its findings, error or timeout.
+        """
+        semaphore = semaphores.get(job.service)
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            logger.info("Started scan job %s", job.key)
+            collected = []
+            timeout = self._timeout_for(job.service)
+            try:
+                await asyncio.wait_for(self._drain(job, executor, sink, collected), timeout)
+                results[job.key] = collected
+                logger.info("Finished scan job %s", job.key)
+            except asyncio.TimeoutError:
+                # The in-flight step completes in its worker; the abandoned iterator is never stepped again
+                msg = f"Scan job {job.key} timed out after {timeout}s"
+                logger.error(msg)
+                results[job.key] = [Finding.error(msg)]
+            except Exception as e:
+                logger.error("Scan job %s failed: %s", job.key, e)
+                results[job.key] = [Finding.error(e)]
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+    async def run_async(self, jobs, sink=None):
+        """
+        Coroutine form of run(), for callers that already have an event loop.
+        """
+        semaphores = {service: asyncio.Semaphore(limit) for service, limit in self.service_concurrency.items()}
+        results = {}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scan-async')
+        try:
+            await asyncio.gather(*(self._run_job(job, executor, semaphores, sink, results) for job in jobs))
+        finally:
+            # Do not block on steps of timed-out jobs that are still in flight
+            executor.shutdown(wait=False)
+        return results
+
+    def run(self, jobs, sink=None):
+        """
+        Executes all jobs on a new event loop and waits for them to finish or time out.
+
+        Args:
+            jobs (list): ScanJob objects with an iter_findings factory.
+            sink (callable): (Optional) Callback receiving (service, finding) as findings are produced.
+                It is always called from the event loop thread.
+
+        Returns:
+            results (dict): Mapping of job key to the list of findings produced by that job (only
+                error findings when a sink is given).
+        """
+        return asyncio.run(self.run_async(jobs, sink))
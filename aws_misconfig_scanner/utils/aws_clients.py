@@ -0,0 +1,141 @@
+import threading
+import boto3
+from botocore.config import Config
+from aws_misconfig_scanner.utils.logger import setup_logger
+from aws_misconfig_scanner.utils.metrics import get_metrics
+from aws_misconfig_scanner.utils.rate_limiter import get_rate_limiter
+
+"""
+aws_clients.py
+
+Shared AWS Client Factory
+
+This module centralizes boto3 client creation for all scanners. A single boto3 session is shared
+and clients are created lazily on first use, then cached per (service, region, account), so
+scanners that talk to the same service (e.g. EC2Scanner and SGScanner) reuse one client and its
+connection pool. Clients are tuned for concurrent scanning:
+- Configurable max_pool_connections, so worker threads reuse TCP/TLS connections
+- TCP keep-alive on pooled connections
+- Standard retry mode (exponential backoff with jitter), paced by the process-wide adaptive
+  rate limiter that every client is registered with
+- Per-API call metrics, recorded by the process-wide metrics registry every client is registered with
+
+boto3 sessions are not thread-safe, so client creation is serialized; the clients themselves are
+thread-safe and can be shared by worker threads.
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+# Default tuning for concurrent scanning
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+DEFAULT_MAX_ATTEMPTS = 10
+DEFAULT_RETRY_MODE = 'standard'
+
+
+class ClientFactory:
+    """
+    Class: ClientFactory
+
+    Description:
+        Hands out lazily created, cached and tuned boto3 clients from one shared session.
+
+    Attributes:
+        session (boto3.session.Session): Session all clients are created from.
+        account_id (str): Account the session's credentials belong to (used in the cache key).
+        config (botocore.config.Config): Client configuration applied to every client.
+        rate_limiter (RateLimiter): Limiter every created client is registered with (None = unpaced).
+        metrics (Metrics): Registry recording the API calls of every created client.
+        event_hooks (tuple): Further objects registering botocore event handlers on every created
+            client through a register(client, account_id) method (e.g. a synthetic responder or a
+            snapshot recorder).
+    """
+
+    def __init__(self, session=None, account_id=None, max_pool_connections=DEFAULT_MAX_POOL_CONNECTIONS,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, retry_mode=DEFAULT_RETRY_MODE, tcp_keepalive=True,
+                 rate_limiter=None, metrics=None, event_hooks=()):
+        """
+        Initializes the factory.
+
+        Args:
+            session (boto3.session.Session): (Optional) Session to share. Defaults to a new session
+                using the ambient credentials.
+            account_id (str): (Optional) Account the session belongs to.
+            max_pool_connections (int): (Optional) Connection pool size per client.
+            max_attempts (int): (Optional) Maximum attempts per API call, including retries.
+            retry_mode (str): (Optional) botocore retry mode ('adaptive', 'standard' or 'legacy').
+            tcp_keepalive (bool): (Optional) Enable TCP keep-alive on pooled connections.
+            rate_limiter (RateLimiter): (Optional) Limiter pacing the clients. Defaults to the process-wide limiter.
+            metrics (Metrics): (Optional) Registry recording the API calls. Defaults to the process-wide registry.
+            event_hooks (iterable): (Optional) Objects registered with every created client after the
+                limiter and metrics.
+        """
+        self.session = session or boto3.session.Session()
+        self.account_id = account_id
+        self.config = Config(
+            max_pool_connections=max_pool_connections,
+            tcp_keepalive=tcp_keepalive,
+            retries={'max_attempts': max_attempts, 'mode': retry_mode}
+        )
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.metrics = metrics or get_metrics()
+        self.event_hooks = tuple(event_hooks)
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def client(self, service_name, region_name=None):
+        """
+        Returns the cached client for a service and region, creating it on first use.
+
+        Args:
+            service_name (str): AWS service name (e.g. 'ec2', 's3').
+            region_name (str): (Optional) Region. Defaults to the session's configured region.
+
+        Returns:
+            client (boto3.client): Thread-safe boto3 client.
+        """
+        region_name = region_name or self.session.region_name
+        key = (service_name, region_name, self.account_id)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self.session.client(service_name, region_name=region_name, config=self.config)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.register(client)
+                self.metrics.register(client)
+                for hook in self.event_hooks:
+                    hook.register(client, account_id=self.account_id)
+                self._clients[key] = client
+                logger.debug("Created %s client (region: %s)", service_name, client.meta.region_name)
+            return client
+
+    def with_session(self, session, account_id=None, rate_limiter=None):
+        """
+        Returns a new factory with the same client configuration for a different session
+        (e.g. assumed-role credentials for another account), paced by the given rate limiter or,
+        by default, this factory's. API calls are recorded in this factory's metrics registry and
+        the factory's event hooks are registered with the new factory's clients too.
+        """
+        factory = ClientFactory(session=session, account_id=account_id, rate_limiter=rate_limiter or self.rate_limiter,
+                                metrics=self.metrics, event_hooks=self.event_hooks)
+        factory.config = self.config
+        return factory
+
+
+_default_factory = None
+_default_factory_lock = threading.Lock()
+
+
+def get_default_factory():
+    """
+    Returns the process-wide default ClientFactory, creating it on first use.
+    """
+    global _default_factory
+    with _default_factory_lock:
+        if _default_factory is None:
+            _default_factory = ClientFactory()
+        return _default_factory
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from aws_misconfig_scanner.utils.findings import json_default, json_object_hook
+from aws_misconfig_scanner.utils.logger import setup_logger
+
+"""
+cache.py
+
+Persistent Scan Cache
+
+This module provides an on-disk (SQLite) cache of per-resource evaluations for incremental
+rescans. Entries are keyed by a resource key (e.g. a policy or function ARN) and validated
+against a change marker taken from the listing call (e.g. DefaultVersionId/UpdateDate for IAM
+policies, CodeSha256/LastModified/RevisionId plus the resource policy and concurrency for Lambda
+functions, or a hash of the describe payload). When the marker is unchanged, scanners reuse the
+cached evaluation, and skip the expensive follow-up API calls for that resource where the marker
+does not depend on them.
+
+Features:
+- Size-bounded least-recently-used eviction
+- Optional maximum entry age, to bound staleness of settings without a change marker
+- Hit/miss statistics for the run report
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+# Default cache location
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.aws_misconfig_scanner', 'cache.sqlite3')
+
+# Number of writes between commits (the cache is an optimisation, losing the tail on a crash is harmless)
+COMMIT_INTERVAL = 500
+
+# Format of the cached values (bump when it changes; entries of other versions are discarded)
+CACHE_FORMAT_VERSION = 2
+
+
+def make_marker(*parts):
+    """
+    Builds a change marker string from one or more JSON-serializable parts.
+    """
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+def payload_marker(payload):
+    """
+    Builds a change marker from the hash of a full resource payload.
+    """
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ScanCache:
+    """
+    Class: ScanCache
+
+    Description:
+        Thread-safe, size-bounded SQLite cache of per-resource evaluations.
+
+    Attributes:
+        path (str): Path of the SQLite database file.
+        max_entries (int): Maximum number of cached entries before least recently used ones are evicted.
+        max_age (float): Maximum entry age in seconds (None = no limit).
+        hits (int): Number of cache hits in this run.
+        misses (int): Number of cache misses in this run.
+        evictions (int): Number of entries evicted in this run.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=100000, max_age=None):
+        """
+        Opens (or creates) the cache database.
+
+        Args:
+            path (str): (Optional) Path of the SQLite database file.
+            max_entries (int): (Optional) Maximum number of cached entries.
+            max_age (float): (Optional) Maximum entry age in seconds.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pending_writes = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' namespace TEXT NOT NULL, key TEXT NOT NULL, marker TEXT NOT NULL, value TEXT NOT NULL,'
+            ' created REAL NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (namespace, key))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)')
+        if self._conn.execute('PRAGMA user_version').fetchone()[0] != CACHE_FORMAT_VERSION:
+            self._conn.execute('DELETE FROM entries')
+            self._conn.execute(f'PRAGMA user_version = {CACHE_FORMAT_VERSION}')
+        self._conn.commit()
+        self._size = self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def get(self, namespace, key, marker):
+        """
+        Returns the cached value for a resource if its change marker is unchanged.
+
+        Args:
+            namespace (str): Cache namespace (e.g. 'iam-policy').
+            key (str): Resource key.
+            marker (str): Current change marker of the resource.
+
+        Returns:
+            value: The cached value, or None on a miss.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT marker, value, created FROM entries WHERE namespace = ? AND key = ?', (namespace, key)
+            ).fetchone()
+            now = time.time()
+            if row is None or row[0] != marker or (self.max_age is not None and now - row[2] > self.max_age):
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                'UPDATE entries SET last_used = ? WHERE namespace = ? AND key = ?', (now, namespace, key)
+            )
+            self._note_write()
+            return json.loads(row[1], object_hook=json_object_hook)
+
+    def put(self, namespace, key, marker, value):
+        """
+        Stores the evaluation of a resource under its current change marker.
+
+        Args:
+            namespace (str): Cache namespace.
+            key (str): Resource key.
+            marker (str): Current change marker of the resource.
+            value: JSON-serializable evaluation result.
+        """
+        with self._lock:
+            now = time.time()
+            cursor = self._conn.execute(
+                'UPDATE entries SET marker = ?, value = ?, created = ?, last_used = ? WHERE namespace = ? AND key = ?',
+                (marker, json.dumps(value, default=json_default), now, now, namespace, key)
+            )
+            if cursor.rowcount == 0:
+                self._conn.execute(
+                    'INSERT INTO entries (namespace, key, marker, value, created, last_used) VALUES (?, ?, ?, ?, ?, ?)',
+                    (namespace, key, marker, json.dumps(value, default=json_default), now, now)
+                )
+                self._size += 1
+                if self._size > self.max_entries:
+                    self._evict()
+            self._note_write()
+
+    def get_or_compute(self, namespace, key, marker, compute):
+        """
+        Returns the cached value for a resource, computing and storing it on a miss.
+
+        Args:
+            namespace (str): Cache namespace.
+            key (str): Resource key.
+            marker (str): Current change marker of the resource.
+            compute (callable): Zero-argument callable producing the value on a miss.
+        """
+        value = self.get(namespace, key, marker)
+        if value is None:
+            value = compute()
+            self.put(namespace, key, marker, value)
+        return value
+
+    def _evict(self):
+        """
+        Evicts the least recently used entries, bringing the cache 10% below its size bound.
+        """
+        target = int(self.max_entries * 0.9)
+        excess = self._size - target
+        self._conn.execute(
+            'DELETE FROM entries WHERE rowid IN (SELECT rowid FROM entries ORDER BY last_used LIMIT ?)', (excess,)
+        )
+        self._size -= excess
+        self.evictions += excess
+        logger.info("Scan cache evicted %s least recently used entries", excess)
+
+    def _note_write(self):
+        self._pending_writes += 1
+        if self._pending_writes >= COMMIT_INTERVAL:
+            self._conn.commit()
+            self._pending_writes = 0
+
+    def stats(self):
+        """
+        Returns cache statistics for the run report.
+
+        Returns:
+            stats (dict): Hits, misses, hit rate, evictions and current number of entries.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': self._size,
+        }
+
+    def close(self):
+        """
+        Commits pending writes and closes the database.
+        """
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
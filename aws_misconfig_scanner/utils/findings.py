@@ -0,0 +1,389 @@
+import enum
+import sys
+import threading
+from collections import Counter
+
+"""
+findings.py
+
+Finding Model
+
+This module defines the record every scanner reports a misconfiguration with. A scan of an
+organization can produce millions of findings, so a Finding is kept small:
+
+- What was found is described by a shared FindingType (rule id, severity, resource type and message
+  template). Finding types are interned: every finding of a type references the same object, and
+  rule ids are interned strings, so grouping by rule compares pointers.
+- A Finding itself holds only that reference, the resource id, region, account, the few values the
+  message template is filled with, and any additional structured details.
+- The human-readable message is rendered from the template only when it is output.
+
+For consumers written against the earlier dictionary findings, a Finding also behaves as a
+read-only mapping with the legacy keys (e.g. 'InstanceId', 'Issue', 'Error'), and to_dict() returns
+that dictionary. Findings are encoded in JSON (journal, cache, shard queue) as
+{"$finding": [...]} objects through json_default and json_object_hook.
+
+Author: Tom D.
+"""
+
+
+class Severity(enum.IntEnum):
+    """
+    Class: Severity
+
+    Description:
+        Severity of a finding, ordered from LOW to CRITICAL.
+    """
+
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+    CRITICAL = 4
+
+    def __str__(self):
+        return self.name
+
+
+# Legacy finding key holding the resource id, by resource type (None = the finding has no resource id)
+RESOURCE_ID_KEYS = {
+    'ec2-instance': 'InstanceId',
+    'rds-instance': 'InstanceId',
+    'lambda-function': 'FunctionName',
+    's3-bucket': 'Bucket',
+    'security-group': 'SecurityGroup',
+    'iam-user': 'UserName',
+    'iam-role': 'RoleName',
+    'iam-policy': 'PolicyName',
+    'iam-check': 'Check',
+    'scan-shard': 'Shard',
+}
+
+# Rule id of error findings (a scanner, check or resource that could not be evaluated)
+ERROR_RULE_ID = sys.intern('scan-error')
+
+# Attributes findings can be grouped and counted by
+GROUP_KEYS = ('rule_id', 'severity', 'resource_type', 'region', 'account_id', 'type')
+
+
+class FindingType:
+    """
+    Class: FindingType
+
+    Description:
+        What a finding reports: shared by every finding of the same kind. Obtain instances through
+        finding_type() so they are interned.
+
+    Attributes:
+        rule_id (str): Interned rule identifier (e.g. 'ec2-public-ip').
+        severity (Severity): Severity of the findings (None for error findings).
+        resource_type (str): Type of the resources reported (e.g. 'ec2-instance'), or None.
+        template (str): str.format() message template. '{id}' is the resource id, '{0}', '{1}', ...
+            the finding's params and named fields its details; list values are joined with ', '.
+    """
+
+    __slots__ = ('rule_id', 'severity', 'resource_type', 'template')
+
+    def __init__(self, rule_id, severity, resource_type, template):
+        self.rule_id = rule_id
+        self.severity = severity
+        self.resource_type = resource_type
+        self.template = template
+
+    def __reduce__(self):
+        # Unpickling (e.g. results of shard worker processes) goes through the registry
+        return finding_type, (self.rule_id, self.severity, self.resource_type, self.template)
+
+    def __repr__(self):
+        return f"FindingType({self.rule_id!r}, {self.severity!s}, {self.resource_type!r})"
+
+
+_types = {}
+_types_lock = threading.Lock()
+
+
+def finding_type(rule_id, severity, resource_type, template):
+    """
+    Returns the interned finding type with the given definition, registering it on first use.
+
+    Args:
+        rule_id (str): Rule identifier.
+        severity (Severity|str|int): Severity (None for error findings).
+        resource_type (str): Type of the resources reported, or None.
+        template (str): Message template (see FindingType).
+
+    Returns:
+        finding_type (FindingType): The shared instance.
+    """
+    if severity is not None and not isinstance(severity, Severity):
+        severity = Severity[severity.upper()] if isinstance(severity, str) else Severity(severity)
+    key = (rule_id, severity, resource_type, template)
+    with _types_lock:
+        existing = _types.get(key)
+        if existing is None:
+            existing = _types[key] = FindingType(sys.intern(rule_id), severity, resource_type, template)
+        return existing
+
+
+def literal_template(message):
+    """
+    Returns a message template rendering a fixed message (braces in it are escaped).
+    """
+    return message.replace('{', '{{').replace('}', '}}')
+
+
+def error_type(resource_type=None):
+    """
+    Returns the finding type of errors scanning resources of the given type.
+    """
+    return finding_type(ERROR_RULE_ID, None, resource_type, '{0}')
+
+
+def _render_value(value):
+    if isinstance(value, (list, tuple)):
+        return ', '.join(map(str, value))
+    return value
+
+
+class Finding:
+    """
+    Class: Finding
+
+    Description:
+        A single misconfiguration (or scan error) reported by a scanner. Findings are immutable by
+        convention; replace() returns a modified copy.
+
+    Attributes:
+        type (FindingType): What the finding reports.
+        resource_id (str): Identifier of the affected resource (None for account-level findings).
+        region (str): Region of the resource ('global' for global services, None = not known).
+        account_id (str): Account of the resource (None = the scanned account).
+        params (tuple): Positional values of the message template.
+        details (tuple): Additional (key, value) pairs, reported under their own keys.
+    """
+
+    __slots__ = ('type', 'resource_id', 'region', 'account_id', 'params', 'details')
+
+    def __init__(self, type, resource_id=None, params=(), region=None, account_id=None, details=None):
+        """
+        Args:
+            type (FindingType): What the finding reports.
+            resource_id (str): (Optional) Identifier of the affected resource.
+            params (tuple): (Optional) Positional values of the message template.
+            region (str): (Optional) Region of the resource.
+            account_id (str): (Optional) Account of the resource.
+            details (dict|tuple): (Optional) Additional structured details (dict or (key, value) pairs).
+        """
+        self.type = type
+        self.resource_id = resource_id
+        self.region = region
+        self.account_id = account_id
+        self.params = tuple(params)
+        self.details = tuple(details.items()) if isinstance(details, dict) else (tuple(details) if details else ())
+
+    @classmethod
+    def error(cls, message, resource_type=None, resource_id=None, region=None, account_id=None, details=None):
+        """
+        Returns an error finding.
+
+        Args:
+            message (str): Error message.
+            resource_type (str): (Optional) Type of the resource that could not be evaluated.
+            resource_id (str): (Optional) Identifier of that resource.
+            region (str): (Optional) Region of the resource.
+            account_id (str): (Optional) Account of the resource.
+            details (dict): (Optional) Additional structured details.
+        """
+        return cls(error_type(resource_type), resource_id, (str(message),), region, account_id, details)
+
+    @property
+    def rule_id(self):
+        return self.type.rule_id
+
+    @property
+    def severity(self):
+        return self.type.severity
+
+    @property
+    def resource_type(self):
+        return self.type.resource_type
+
+    @property
+    def is_error(self):
+        return self.type.rule_id is ERROR_RULE_ID
+
+    @property
+    def message(self):
+        """
+        The human-readable message, rendered from the finding type's template.
+        """
+        fields = {key: _render_value(value) for key, value in self.details}
+        return self.type.template.format(*map(_render_value, self.params), id=self.resource_id, **fields)
+
+    def detail(self, key, default=None):
+        """
+        Returns one of the finding's details.
+        """
+        for name, value in self.details:
+            if name == key:
+                return value
+        return default
+
+    def replace(self, **changes):
+        """
+        Returns a copy of the finding with some attributes changed (e.g. region or account_id).
+        """
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return Finding(**values)
+
+    def to_dict(self):
+        """
+        Returns the finding as a dictionary with the legacy keys: the resource id key (e.g.
+        'InstanceId'), the details, 'Issue' (or 'Error'), 'RuleId', 'Severity', 'Region' and 'AccountId'.
+        """
+        result = {}
+        id_key = RESOURCE_ID_KEYS.get(self.type.resource_type)
+        if self.resource_id is not None and id_key is not None:
+            result[id_key] = self.resource_id
+        for key, value in self.details:
+            result[key] = value
+        if self.is_error:
+            result['Error'] = self.message
+        else:
+            result['Issue'] = self.message
+            result['RuleId'] = self.type.rule_id
+            result['Severity'] = self.type.severity.name
+        if self.region is not None:
+            result['Region'] = self.region
+        if self.account_id is not None:
+            result['AccountId'] = self.account_id
+        return result
+
+    def keys(self):
+        """
+        Returns the legacy dictionary keys of the finding, without rendering its message.
+        """
+        keys = []
+        id_key = RESOURCE_ID_KEYS.get(self.type.resource_type)
+        if self.resource_id is not None and id_key is not None:
+            keys.append(id_key)
+        keys.extend(key for key, _ in self.details)
+        keys.extend(('Error',) if self.is_error else ('Issue', 'RuleId', 'Severity'))
+        if self.region is not None:
+            keys.append('Region')
+        if self.account_id is not None:
+            keys.append('AccountId')
+        return keys
+
+    def __getitem__(self, key):
+        return self.to_dict()[key]
+
+    def get(self, key, default=None):
+        return self.to_dict().get(key, default) if key in self.keys() else default
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def to_record(self):
+        """
+        Returns the finding as a JSON-serializable list (see from_record).
+        """
+        finding_type = self.type
+        return [finding_type.rule_id, finding_type.severity, finding_type.resource_type, finding_type.template,
+                self.resource_id, self.region, self.account_id, list(self.params),
+                dict(self.details) if self.details else None]
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Rebuilds a finding from to_record() output.
+        """
+        rule_id, severity, resource_type, template, resource_id, region, account_id, params, details = record
+        return cls(finding_type(rule_id, severity, resource_type, template), resource_id, params,
+                   region, account_id, details)
+
+    def _key(self):
+        return (self.type, self.resource_id, self.region, self.account_id, self.params, self.details)
+
+    def __eq__(self, other):
+        if isinstance(other, Finding):
+            return self._key() == other._key()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return f"Finding({self.to_dict()!r})"
+
+
+def json_default(obj):
+    """
+    json.dumps default encoding findings as {"$finding": record}; other values are encoded as strings.
+    """
+    if isinstance(obj, Finding):
+        return {'$finding': obj.to_record()}
+    return str(obj)
+
+
+def json_object_hook(obj):
+    """
+    json.loads object hook decoding the findings encoded by json_default.
+    """
+    if len(obj) == 1 and '$finding' in obj:
+        return Finding.from_record(obj['$finding'])
+    return obj
+
+
+def _group_key(key):
+    if callable(key):
+        return key
+    if key not in GROUP_KEYS:
+        raise ValueError(f"Cannot group findings by '{key}', expected one of {', '.join(GROUP_KEYS)}")
+    if key == 'type':
+        return lambda finding: finding.type
+    if key in ('rule_id', 'severity', 'resource_type'):
+        return lambda finding: getattr(finding.type, key)
+    return lambda finding: getattr(finding, key)
+
+
+def count_by(findings, key='rule_id'):
+    """
+    Counts findings by one attribute, without rendering any message.
+
+    Args:
+        findings (iterable): Findings to count.
+        key (str|callable): (Optional) One of GROUP_KEYS, or a function of a finding.
+
+    Returns:
+        counts (Counter): Number of findings per value of the key.
+    """
+    return Counter(map(_group_key(key), findings))
+
+
+def group_by(findings, key='rule_id'):
+    """
+    Groups findings by one attribute, without rendering any message.
+
+    Args:
+        findings (iterable): Findings to group.
+        key (str|callable): (Optional) One of GROUP_KEYS, or a function of a finding.
+
+    Returns:
+        groups (dict): Findings per value of the key, in the order first seen.
+    """
+    get_key = _group_key(key)
+    groups = {}
+    for finding in findings:
+        groups.setdefault(get_key(finding), []).append(finding)
+    return groups
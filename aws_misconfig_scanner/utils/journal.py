@@ -0,0 +1,259 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from aws_misconfig_scanner.utils.findings import json_default, json_object_hook
+from aws_misconfig_scanner.utils.logger import setup_logger
+
+"""
+journal.py
+
+Checkpoint Journal
+
+This module records scan progress in an append-only JSON Lines journal, so an interrupted scan
+(expired credentials, OOM, a deploy) can be resumed instead of restarted:
+
+- A unit is one scan job, i.e. a (service, region) pair (prefixed with the account id in
+  organization mode). Every finding of a unit is appended as it is found, and a closing record
+  marks the unit as finished, so the journal never holds a unit's findings in memory.
+- Scanners with expensive per-resource work also record every finished resource of a unit as it
+  completes (S3 buckets, Lambda functions, IAM checks), so a unit interrupted halfway resumes at
+  the first unfinished resource.
+
+Resuming replays the journal: finished units return their recorded findings without any API call,
+and unfinished units skip the resources already recorded. Findings of a unit that never finished are
+discarded, as are those of an earlier attempt at a unit that was started again. Units or resources
+whose findings contain an error are not marked as finished, so a resumed scan retries them.
+
+Every record is written and flushed immediately, so it survives the process being killed; the file
+is fsync'd at most every sync_interval seconds (and on close), which bounds what an operating
+system crash can lose without paying an fsync per resource. A record cut short by a crash is
+ignored when the journal is replayed.
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+DEFAULT_JOURNAL_PATH = os.path.join('.cache', 'scan_journal.jsonl')
+
+# Maximum seconds between fsyncs of the journal file
+DEFAULT_SYNC_INTERVAL = 1.0
+
+JOURNAL_VERSION = 3
+
+
+def unit_name(key):
+    """
+    Returns the journal name of a unit key (a service name or a tuple such as (service, region)).
+    """
+    return '/'.join(str(part) for part in key) if isinstance(key, tuple) else str(key)
+
+
+def _has_error(findings):
+    return any(finding.is_error for finding in findings)
+
+
+class UnitProgress:
+    """
+    Class: UnitProgress
+
+    Description:
+        Journal view of one unit, handed to the scan job and scanner working on it.
+
+    Attributes:
+        journal (ScanJournal): Journal the unit is recorded in.
+        unit (str): Unit name.
+    """
+
+    def __init__(self, journal, unit):
+        self.journal = journal
+        self.unit = unit
+        self._failed = False
+
+    def replay(self):
+        """
+        Returns the recorded findings of the unit if a previous run finished it, otherwise None.
+        """
+        findings = self.journal.completed.get(self.unit)
+        if findings is not None:
+            self.journal.count('replayed_units')
+        return findings
+
+    def resource(self, resource_id):
+        """
+        Returns the recorded findings of a finished resource of the unit, or None.
+        """
+        findings = self.journal.resources.get(self.unit, {}).get(str(resource_id))
+        if findings is not None:
+            self.journal.count('replayed_resources')
+        return findings
+
+    def record_resource(self, resource_id, findings):
+        """
+        Records a finished resource of the unit (unless its findings contain an error).
+        """
+        if _has_error(findings):
+            return
+        self.journal.append({'type': 'resource', 'unit': self.unit, 'resource': str(resource_id), 'findings': findings})
+        self.journal.count('recorded_resources')
+
+    def start(self):
+        """
+        Records the start of an attempt at the unit, superseding the findings of earlier attempts.
+        """
+        self._failed = False
+        self.journal.append({'type': 'start', 'unit': self.unit})
+
+    def record_finding(self, finding):
+        """
+        Records one finding of the unit as soon as it is found.
+        """
+        self._failed = self._failed or finding.is_error
+        self.journal.append({'type': 'finding', 'unit': self.unit, 'finding': finding})
+
+    def complete(self):
+        """
+        Records the unit as finished with the findings recorded since its start (unless one of
+        them is an error).
+        """
+        if self._failed:
+            return
+        self.journal.append({'type': 'unit', 'unit': self.unit})
+        self.journal.count('recorded_units')
+
+
+class ScanJournal:
+    """
+    Class: ScanJournal
+
+    Description:
+        Thread-safe append-only checkpoint journal of finished units and resources.
+
+    Attributes:
+        path (str): Path of the JSON Lines journal file.
+        scope (dict): Options defining what is scanned (regions, accounts, ...); a journal is only
+            resumed by a scan with the same scope.
+        completed (dict): Findings of every finished unit, by unit name.
+        resources (dict): Findings of every finished resource, by unit name and resource id.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, resume=False, scope=None, sync_interval=DEFAULT_SYNC_INTERVAL):
+        """
+        Opens the journal, replaying it when resuming or starting a new one otherwise.
+
+        Args:
+            path (str): (Optional) Path of the journal file.
+            resume (bool): (Optional) Replay and extend an existing journal instead of truncating it.
+            scope (dict): (Optional) Options defining what is scanned.
+            sync_interval (float): (Optional) Maximum seconds between fsyncs.
+
+        Raises:
+            ValueError: If the journal being resumed was written by a scan with a different scope.
+        """
+        self.path = path
+        self.scope = scope or {}
+        self.sync_interval = sync_interval
+        self.completed = {}
+        self.resources = {}
+        self._counts = {'replayed_units': 0, 'replayed_resources': 0, 'recorded_units': 0, 'recorded_resources': 0}
+        self._lock = threading.Lock()
+        self._last_sync = time.monotonic()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        replayed = resume and os.path.exists(path) and self._replay()
+        self._file = open(path, 'a' if replayed else 'w', encoding='utf-8')
+        if not replayed:
+            self.append({'type': 'scan', 'version': JOURNAL_VERSION, 'scope': self.scope,
+                         'started': datetime.now(timezone.utc).isoformat()}, sync=True)
+
+    def _replay(self):
+        """
+        Loads the finished units and resources of an existing journal.
+
+        Returns:
+            replayed (bool): False if the journal holds no scan header (it is started afresh).
+        """
+        # A crash can leave the last record cut short; drop it so new records start on a fresh line
+        with open(self.path, 'rb+') as f:
+            content = f.read()
+            end = content.rfind(b'\n') + 1
+            if end < len(content):
+                logger.warning("Dropping incomplete last record of journal %s", self.path)
+                f.truncate(end)
+
+        header = None
+        attempts = {}  # Findings of the latest attempt at every unit, by unit name
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line, object_hook=json_object_hook)
+                except ValueError:
+                    logger.warning("Ignoring incomplete journal record at %s:%s", self.path, line_number)
+                    continue
+                if record.get('type') == 'scan':
+                    header = record
+                elif record.get('type') == 'start':
+                    attempts[record['unit']] = []
+                elif record.get('type') == 'finding':
+                    attempts.setdefault(record['unit'], []).append(record['finding'])
+                elif record.get('type') == 'unit':
+                    self.completed[record['unit']] = attempts.pop(record['unit'], [])
+                elif record.get('type') == 'resource':
+                    self.resources.setdefault(record['unit'], {})[record['resource']] = record['findings']
+        if header is None:
+            return False
+        if header.get('version') != JOURNAL_VERSION:
+            raise ValueError(f"Journal {self.path} was written by an incompatible version of the scanner "
+                             f"(journal version {header.get('version')}); run without --resume to start a new scan")
+        if json.loads(json.dumps(self.scope, default=str)) != header.get('scope', {}):
+            raise ValueError(f"Journal {self.path} was written by a scan with different options "
+                             f"({header.get('scope')}); run without --resume to start a new scan")
+        logger.info("Resuming from journal %s: %s finished units, %s finished resources",
+                    self.path, len(self.completed), sum(len(resources) for resources in self.resources.values()))
+        return True
+
+    def append(self, record, sync=False):
+        """
+        Appends one record, flushing it to the operating system and syncing it when due.
+        """
+        line = json.dumps(record, default=json_default) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if sync or time.monotonic() - self._last_sync >= self.sync_interval:
+                os.fsync(self._file.fileno())
+                self._last_sync = time.monotonic()
+
+    def count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def unit(self, key):
+        """
+        Returns the progress view of a unit.
+
+        Args:
+            key: Unit key (a service name or a tuple such as (service, region) or (account, service, region)).
+        """
+        return UnitProgress(self, unit_name(key))
+
+    def stats(self):
+        """
+        Returns counts of replayed and recorded units and resources.
+        """
+        with self._lock:
+            return dict(self._counts)
+
+    def close(self):
+        """
+        Syncs and closes the journal file.
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
@@ -1,18 +1,363 @@
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+"""
+logger.py
+
+Logging Pipeline
+
+This module provides the loggers of every scanner module. Logging stays off the scan's critical
+path:
+
+- Records are handed to a queue and formatted and written by a background listener thread, so a
+  slow terminal or log file never blocks a scanner thread. Messages use %-style arguments, which are
+  only merged into the message by the listener, and only for records that pass the level check.
+- Output is either the classic text format or one JSON object per line (structured fields passed
+  through 'extra' become JSON keys).
+- Each logging call site may emit a limited number of records per time window (errors are never
+  suppressed); the number of records suppressed is appended to the next record that gets through,
+  or logged when the pipeline shuts down.
+- Per-resource progress is logged at DEBUG, while a ProgressRollup logs a periodic INFO summary of
+  how many resources a scanner has processed.
+
+Author: Tom D.
+"""
+
+PACKAGE_LOGGER = 'aws_misconfig_scanner'
+
+LOG_FORMATS = ('text', 'json')
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+DEFAULT_LEVEL = logging.INFO
+
+# At most this many records per call site in each window (in seconds); None disables the limit
+DEFAULT_RATE_LIMIT = (50, 10.0)
+
+# Seconds between progress summaries of a ProgressRollup
+DEFAULT_PROGRESS_INTERVAL = 10.0
+
+# Rate limiter windows kept before expired windows are pruned
+MAX_RATE_LIMIT_WINDOWS = 10000
+
+# Argument types that can be formatted later on the listener thread without snapshotting them
+_IMMUTABLE_TYPES = (str, int, float, bool, type(None), bytes)
+
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Class: TextFormatter
+
+    Description:
+        Classic text format, noting the records the rate limiter suppressed before a record.
+    """
+
+    def format(self, record):
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            text += f" ({suppressed} similar messages suppressed)"
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Class: JsonFormatter
+
+    Description:
+        Formats records as single-line JSON objects with the time, level, logger, thread and message,
+        plus any structured fields passed through 'extra'.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Class: DeferredQueueHandler
+
+    Description:
+        Queue handler that leaves message formatting to the listener thread. Unlike
+        QueueHandler.prepare, the message is not merged in the calling thread; only arguments that
+        could change before the listener formats them are converted to strings first.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if record.args:
+            if isinstance(record.args, dict):
+                record.args = {key: value if isinstance(value, _IMMUTABLE_TYPES) else str(value)
+                               for key, value in record.args.items()}
+            else:
+                record.args = tuple(arg if isinstance(arg, _IMMUTABLE_TYPES) else str(arg) for arg in record.args)
+        if record.exc_info:
+            # Tracebacks keep their frames alive; render them now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Class: RateLimitFilter
+
+    Description:
+        Lets at most 'burst' records per call site through in each window of 'interval' seconds.
+        Records at ERROR and above and progress summaries always pass. The first record let through
+        after a suppression carries the number of suppressed records in its 'suppressed' attribute.
+
+    Attributes:
+        burst (int): Records allowed per call site and window.
+        interval (float): Window length in seconds.
+    """
+
+    def __init__(self, burst, interval, clock=time.monotonic):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._clock = clock
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR or hasattr(record, 'progress'):
+            return True
+        key = (record.pathname, record.lineno)
+        now = self._clock()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                if window is None and len(self._windows) >= MAX_RATE_LIMIT_WINDOWS:
+                    self._prune(now)
+                if window is not None and window[2]:
+                    record.suppressed = window[2]
+                self._windows[key] = [now, 1, 0, record.name, record.msg]
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+    def _prune(self, now):
+        for key, window in list(self._windows.items()):
+            if now - window[0] >= self.interval and not window[2]:
+                del self._windows[key]
+
+    def pending(self):
+        """
+        Returns (logger name, message template, suppressed count) of every window with suppressed
+        records not reported yet, and resets their counts.
+        """
+        with self._lock:
+            pending = [(window[3], window[4], window[2]) for window in self._windows.values() if window[2]]
+            for window in self._windows.values():
+                window[2] = 0
+        return pending
+
+
+class LogPipeline:
+    """
+    Class: LogPipeline
+
+    Description:
+        Queue, background listener and output handler shared by every logger of the scanner.
+
+    Attributes:
+        level (int): Level of the scanner's loggers.
+        progress_interval (float): Seconds between progress summaries of ProgressRollups.
+    """
+
+    def __init__(self):
+        self.level = DEFAULT_LEVEL
+        self.progress_interval = DEFAULT_PROGRESS_INTERVAL
+        self.output = logging.StreamHandler()
+        self.output.setFormatter(TextFormatter(TEXT_FORMAT))
+        self.rate_limit = RateLimitFilter(*DEFAULT_RATE_LIMIT)
+        self.handler = DeferredQueueHandler(queue.SimpleQueue())
+        self.handler.addFilter(self.rate_limit)
+        self._loggers = []
+        self._lock = threading.Lock()
+        self._listener = None
+        self._start()
+        atexit.register(self.stop)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def _start(self):
+        self._listener = QueueListener(self.handler.queue, self.output, respect_handler_level=True)
+        self._listener.start()
+
+    def _restart_in_child(self):
+        # The listener thread does not survive a fork
+        self.handler.queue = queue.SimpleQueue()
+        self._start()
+
+    def attach(self, logger):
+        """
+        Attaches the pipeline's queue handler to a logger.
+        """
+        with self._lock:
+            if self.handler not in logger.handlers:
+                logger.addHandler(self.handler)
+                logger.setLevel(self.level)
+                self._loggers.append(logger)
+
+    def configure(self, level=None, fmt=None, stream=None, rate_limit=(), progress_interval=None):
+        """
+        Reconfigures the pipeline.
+
+        Args:
+            level (int|str): (Optional) Level of the scanner's loggers (e.g. 'DEBUG').
+            fmt (str): (Optional) One of LOG_FORMATS.
+            stream (file): (Optional) Stream the records are written to (default: standard error).
+            rate_limit (tuple): (Optional) (burst, interval) of the per call site limit, or None to disable it.
+            progress_interval (float): (Optional) Seconds between progress summaries.
+        """
+        if fmt is not None and fmt not in LOG_FORMATS:
+            raise ValueError(f"Unknown log format '{fmt}', expected one of {', '.join(LOG_FORMATS)}")
+        with self._lock:
+            if level is not None:
+                self.level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+                for logger in self._loggers:
+                    logger.setLevel(self.level)
+            if fmt is not None:
+                self.output.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter(TEXT_FORMAT))
+            if stream is not None:
+                self.output.setStream(stream)
+            if rate_limit != ():
+                self.handler.removeFilter(self.rate_limit)
+                if rate_limit is not None:
+                    self.rate_limit = RateLimitFilter(*rate_limit)
+                    self.handler.addFilter(self.rate_limit)
+            if progress_interval is not None:
+                self.progress_interval = progress_interval
+
+    def stop(self):
+        """
+        Reports pending suppressed records and writes every queued record.
+
+        Runs at exit, possibly after the output stream was closed (e.g. a replaced sys.stderr). The
+        reports are therefore written straight to the output handler rather than queued, and
+        nothing more is written once the stream is closed.
+        """
+        stream_open = not getattr(self.output.stream, 'closed', False)
+        for name, template, suppressed in self.rate_limit.pending():
+            if stream_open:
+                self.output.handle(logging.getLogger(name).makeRecord(
+                    name, logging.WARNING, __file__, 0, "Suppressed %d further records like: %s",
+                    (suppressed, template), None
+                ))
+        if self._listener is not None:
+            if not stream_open:
+                self._listener.handlers = ()
+            self._listener.stop()
+            self._listener = None
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_log_pipeline():
+    """
+    Returns the process-wide LogPipeline, starting it on first use.
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = LogPipeline()
+        return _pipeline
+
+
+def configure_logging(**options):
+    """
+    Reconfigures the process-wide logging pipeline (see LogPipeline.configure).
+    """
+    get_log_pipeline().configure(**options)
+
 
 def setup_logger(name):
+    """
+    Returns the logger of a module, attached to the process-wide logging pipeline.
+
+    Loggers of the package's modules share the handler of the package logger; other loggers (such
+    as '__main__') get it attached directly.
+    """
+    pipeline = get_log_pipeline()
+    if name == PACKAGE_LOGGER or name.startswith(PACKAGE_LOGGER + '.'):
+        pipeline.attach(logging.getLogger(PACKAGE_LOGGER))
+        return logging.getLogger(name)
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    pipeline.attach(logger)
+    return logger
+
+
+class ProgressRollup:
+    """
+    Class: ProgressRollup
+
+    Description:
+        Counts the resources a scanner processes and logs a summary at most every progress
+        interval, instead of one line per resource. Safe to use from several threads.
 
-    if not logger.handlers:
-        # Console handler
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.INFO)
+    Attributes:
+        logger (logging.Logger): Logger the summaries are written to.
+        label (str): What is being processed (e.g. 'S3 buckets (us-east-1)').
+        count (int): Resources processed so far.
+    """
 
-        # Formatter
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        ch.setFormatter(formatter)
+    def __init__(self, logger, label, interval=None):
+        self.logger = logger
+        self.label = label
+        self.count = 0
+        self._interval = interval if interval is not None else get_log_pipeline().progress_interval
+        self._started = time.monotonic()
+        self._next = self._started + self._interval
+        self._lock = threading.Lock()
 
-        logger.addHandler(ch)
+    def tick(self, count=1):
+        """
+        Records processed resources, logging a summary if the progress interval has elapsed.
+        """
+        with self._lock:
+            self.count += count
+            now = time.monotonic()
+            if now < self._next:
+                return
+            self._next = now + self._interval
+            total = self.count
+        self.logger.info("%s: %d processed (%.1f/s)", self.label, total, total / (now - self._started),
+                         extra={'progress': self.label, 'processed': total})
 
-    return logger
\ No newline at end of file
+    def done(self):
+        """
+        Logs the final count (at DEBUG if nothing was processed).
+        """
+        elapsed = time.monotonic() - self._started
+        self.logger.log(logging.INFO if self.count else logging.DEBUG, "%s: %d processed in %.1fs",
+                        self.label, self.count, elapsed,
+                        extra={'progress': self.label, 'processed': self.count, 'seconds': round(elapsed, 3)})
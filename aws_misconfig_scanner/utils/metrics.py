@@ -0,0 +1,385 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from aws_misconfig_scanner.utils.logger import setup_logger
+
+"""
+metrics.py
+
+Scan Instrumentation
+
+This module records where scan time goes, in one process-wide registry:
+
+- API calls: every boto3 client handed out by the shared ClientFactory is registered through
+  botocore's before-call/after-call events, which fire once per API call around all of its retry
+  attempts. Calls, errors, retries, response bytes and a latency histogram are kept per
+  (service, operation, region). Latency is the caller's wall time, so it includes retry backoff
+  and time spent waiting on the rate limiter.
+- Scanners: wall time of every scan job, per scanner and region.
+- Checks: wall time of every check evaluation (query checks, rules, S3 bucket checks and IAM
+  checks), per check. Check timings nest where one check runs others (an RDS rule group check
+  includes the time of its rules).
+
+At the end of a run the registry can be exported as JSON or in the Prometheus text exposition
+format (e.g. for a node exporter textfile collector or a push gateway).
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+# Upper bounds of the API call latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Prefix of every exported Prometheus metric
+PROMETHEUS_PREFIX = 'aws_misconfig_scanner'
+
+EXPORT_FORMATS = ('json', 'prometheus')
+
+# Request context key holding the start time of an API call
+_STARTED_KEY = 'scan_metrics_started'
+
+
+class Histogram:
+    """
+    Class: Histogram
+
+    Description:
+        Fixed-bucket histogram of observed values.
+
+    Attributes:
+        bounds (tuple): Upper bounds of the buckets; a final implicit bucket holds larger values.
+        counts (list): Number of observations per bucket (not cumulative).
+        total (float): Sum of the observed values.
+        count (int): Number of observations.
+    """
+
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        Returns (upper bound, cumulative count) pairs, ending with ('+Inf', count).
+        """
+        running = 0
+        pairs = []
+        for bound, count in zip(self.bounds + ('+Inf',), self.counts):
+            running += count
+            pairs.append((bound, running))
+        return pairs
+
+
+class CallStats:
+    """
+    Class: CallStats
+
+    Description:
+        Statistics of one API (service, operation, region).
+
+    Attributes:
+        calls (int): Number of API calls.
+        errors (int): Number of calls that failed (after all retries).
+        retries (int): Number of retry attempts made by botocore.
+        response_bytes (int): Total size of the response bodies.
+        latency (Histogram): Wall time of the calls in seconds.
+    """
+
+    __slots__ = ('calls', 'errors', 'retries', 'response_bytes', 'latency')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.response_bytes = 0
+        self.latency = Histogram()
+
+
+class TimingStats:
+    """
+    Class: TimingStats
+
+    Description:
+        Accumulated wall time of a scanner or check.
+
+    Attributes:
+        count (int): Number of timed runs.
+        seconds (float): Total wall time in seconds.
+        max_seconds (float): Longest single run in seconds.
+    """
+
+    __slots__ = ('count', 'seconds', 'max_seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+
+
+def _response_size(http_response, model):
+    """
+    Returns the size of a response body, without reading streaming bodies.
+    """
+    if http_response is None:
+        return 0
+    length = http_response.headers.get('content-length')
+    if length is not None and str(length).isdigit():
+        return int(length)
+    if model is not None and model.has_streaming_output:
+        return 0
+    return len(http_response.content or b'')
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels.items()) + '}'
+
+
+class Metrics:
+    """
+    Class: Metrics
+
+    Description:
+        Thread-safe registry of API call, scanner and check metrics, attached to boto3 clients
+        through botocore events.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._scanners = {}
+        self._checks = {}
+        self._lock = threading.Lock()
+
+    def register(self, client):
+        """
+        Attaches the registry to a boto3 client.
+
+        Args:
+            client (boto3.client): Client whose API calls should be recorded.
+        """
+        region = client.meta.region_name
+
+        def before_call(event_name, context=None, **kwargs):
+            if context is not None:
+                context[_STARTED_KEY] = time.perf_counter()
+
+        def after_call(event_name, http_response=None, parsed=None, model=None, context=None, **kwargs):
+            started = (context or {}).get(_STARTED_KEY)
+            if started is None:
+                return
+            _, service, operation = event_name.split('.', 2)
+            metadata = parsed.get('ResponseMetadata', {}) if isinstance(parsed, dict) else {}
+            status = getattr(http_response, 'status_code', 200)
+            self.observe_call(
+                service, operation, region, time.perf_counter() - started,
+                retries=metadata.get('RetryAttempts', 0),
+                response_bytes=_response_size(http_response, model),
+                error=status >= 300
+            )
+
+        def after_call_error(event_name, context=None, **kwargs):
+            started = (context or {}).get(_STARTED_KEY)
+            if started is None:
+                return
+            _, service, operation = event_name.split('.', 2)
+            self.observe_call(service, operation, region, time.perf_counter() - started, error=True)
+
+        client.meta.events.register('before-call', before_call)
+        client.meta.events.register('after-call', after_call)
+        client.meta.events.register('after-call-error', after_call_error)
+
+    def observe_call(self, service, operation, region, seconds, retries=0, response_bytes=0, error=False):
+        """
+        Records one API call.
+        """
+        key = (service, operation, region)
+        with self._lock:
+            stats = self._calls.get(key)
+            if stats is None:
+                stats = self._calls[key] = CallStats()
+            stats.calls += 1
+            stats.errors += bool(error)
+            stats.retries += retries
+            stats.response_bytes += response_bytes
+            stats.latency.observe(seconds)
+
+    def record_scanner(self, scanner, region, seconds):
+        """
+        Records the wall time of one scan job.
+        """
+        with self._lock:
+            self._scanners.setdefault((scanner, region), TimingStats()).add(seconds)
+
+    def record_checks(self, timings):
+        """
+        Records the wall time of check evaluations.
+
+        Args:
+            timings (iterable): (check id, seconds) pairs.
+        """
+        with self._lock:
+            for check_id, seconds in timings:
+                stats = self._checks.get(check_id)
+                if stats is None:
+                    stats = self._checks[check_id] = TimingStats()
+                stats.add(seconds)
+
+    @contextmanager
+    def check_timer(self, check_id):
+        """
+        Context manager recording the wall time of the enclosed check evaluation.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_checks([(check_id, time.perf_counter() - started)])
+
+    def reset(self):
+        """
+        Discards every recorded metric.
+        """
+        with self._lock:
+            self._calls.clear()
+            self._scanners.clear()
+            self._checks.clear()
+
+    def snapshot(self):
+        """
+        Returns every recorded metric as JSON-serializable data.
+
+        Returns:
+            metrics (dict): 'api_calls', 'scanners' and 'checks' lists, each sorted by total time (descending).
+        """
+        with self._lock:
+            calls = [
+                {
+                    'service': service, 'operation': operation, 'region': region,
+                    'calls': stats.calls, 'errors': stats.errors, 'retries': stats.retries,
+                    'response_bytes': stats.response_bytes, 'seconds': round(stats.latency.total, 6),
+                    'latency_buckets': {str(bound): count for bound, count in stats.latency.cumulative()},
+                }
+                for (service, operation, region), stats in self._calls.items()
+            ]
+            scanners = [
+                {'scanner': scanner, 'region': region, 'runs': stats.count,
+                 'seconds': round(stats.seconds, 6), 'max_seconds': round(stats.max_seconds, 6)}
+                for (scanner, region), stats in self._scanners.items()
+            ]
+            checks = [
+                {'check': check_id, 'runs': stats.count,
+                 'seconds': round(stats.seconds, 6), 'max_seconds': round(stats.max_seconds, 6)}
+                for check_id, stats in self._checks.items()
+            ]
+        for entries in (calls, scanners, checks):
+            entries.sort(key=lambda entry: -entry['seconds'])
+        return {'api_calls': calls, 'scanners': scanners, 'checks': checks}
+
+    def to_json(self):
+        """
+        Returns the metrics as a JSON document.
+        """
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            calls = sorted(self._calls.items())
+            scanners = sorted(self._scanners.items())
+            checks = sorted(self._checks.items())
+
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            lines.extend(f"{prefix}_{sample}" for sample in samples)
+
+        def call_labels(key, **extra):
+            service, operation, region = key
+            return _labels(service=service, operation=operation, region=region, **extra)
+
+        family('api_calls_total', 'counter', 'AWS API calls.',
+               [f"api_calls_total{call_labels(key)} {stats.calls}" for key, stats in calls])
+        family('api_errors_total', 'counter', 'AWS API calls that failed after all retries.',
+               [f"api_errors_total{call_labels(key)} {stats.errors}" for key, stats in calls])
+        family('api_retries_total', 'counter', 'Retry attempts of AWS API calls.',
+               [f"api_retries_total{call_labels(key)} {stats.retries}" for key, stats in calls])
+        family('api_response_bytes_total', 'counter', 'Size of AWS API response bodies.',
+               [f"api_response_bytes_total{call_labels(key)} {stats.response_bytes}" for key, stats in calls])
+        samples = []
+        for key, stats in calls:
+            samples.extend(
+                f"api_call_duration_seconds_bucket{call_labels(key, le=bound)} {count}"
+                for bound, count in stats.latency.cumulative()
+            )
+            samples.append(f"api_call_duration_seconds_sum{call_labels(key)} {stats.latency.total:.6f}")
+            samples.append(f"api_call_duration_seconds_count{call_labels(key)} {stats.latency.count}")
+        family('api_call_duration_seconds', 'histogram', 'Wall time of AWS API calls, including retries.', samples)
+
+        samples = []
+        for (scanner, region), stats in scanners:
+            labels = _labels(scanner=scanner, region=region)
+            samples.append(f"scanner_duration_seconds_sum{labels} {stats.seconds:.6f}")
+            samples.append(f"scanner_duration_seconds_count{labels} {stats.count}")
+        family('scanner_duration_seconds', 'summary', 'Wall time of scan jobs.', samples)
+
+        samples = []
+        for check_id, stats in checks:
+            labels = _labels(check=check_id)
+            samples.append(f"check_duration_seconds_sum{labels} {stats.seconds:.6f}")
+            samples.append(f"check_duration_seconds_count{labels} {stats.count}")
+        family('check_duration_seconds', 'summary', 'Wall time of check evaluations.', samples)
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path, fmt='json'):
+        """
+        Writes the metrics to a file.
+
+        Args:
+            path (str): Output file.
+            fmt (str): (Optional) One of EXPORT_FORMATS.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown metrics format '{fmt}', expected one of {', '.join(EXPORT_FORMATS)}")
+        content = self.to_json() if fmt == 'json' else self.to_prometheus()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        logger.info("Wrote %s metrics to %s", fmt, path)
+
+
+_default_metrics = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    Returns the process-wide Metrics registry, creating it on first use.
+    """
+    global _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = Metrics()
+        return _default_metrics
@@ -0,0 +1,147 @@
+import threading
+import boto3
+from botocore.credentials import RefreshableCredentials
+from botocore.session import get_session as get_botocore_session
+from aws_misconfig_scanner.utils.logger import setup_logger
+
+"""
+organization.py
+
+Multi-Account Organization Support
+
+This module provides the pieces needed to scan many accounts of an AWS Organization from one
+process:
+
+- discover_accounts: lists the active member accounts through the Organizations API
+- AccountSessions: hands out one boto3 session per account, backed by credentials of a role
+  assumed in that account through STS
+
+Assumed-role credentials are cached per account and wrapped in botocore's RefreshableCredentials,
+which re-assumes the role ahead of expiry (an advisory refresh 15 minutes before, a mandatory one
+10 minutes before), so long scans never run on expired credentials and no account assumes its role
+more often than needed. The account the ambient credentials belong to (e.g. the management account)
+is scanned with those credentials directly.
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+# Role created in member accounts by AWS Organizations
+DEFAULT_ROLE_NAME = 'OrganizationAccountAccessRole'
+DEFAULT_SESSION_NAME = 'aws-misconfig-scanner'
+DEFAULT_DURATION_SECONDS = 3600
+
+
+def discover_accounts(clients):
+    """
+    Lists the active accounts of the organization the ambient credentials belong to.
+
+    Args:
+        clients (ClientFactory): Factory for the management (or delegated administrator) account.
+
+    Returns:
+        account_ids (list): Sorted ids of the active accounts.
+    """
+    paginator = clients.client('organizations').get_paginator('list_accounts')
+    accounts = [
+        account['Id']
+        for page in paginator.paginate()
+        for account in page['Accounts']
+        if account.get('Status', 'ACTIVE') == 'ACTIVE'
+    ]
+    return sorted(accounts)
+
+
+class AccountSessions:
+    """
+    Class: AccountSessions
+
+    Description:
+        Thread-safe cache of per-account boto3 sessions using assumed-role credentials that
+        refresh themselves before they expire.
+
+    Attributes:
+        clients (ClientFactory): Factory of the ambient credentials, used for STS calls.
+        role_name (str): Name of the role assumed in every account.
+        external_id (str): External id passed to AssumeRole (None = not required).
+        session_name (str): Role session name recorded in CloudTrail.
+        duration_seconds (int): Lifetime of each set of temporary credentials.
+        assume_calls (int): Number of AssumeRole calls made (initial and refreshes).
+    """
+
+    def __init__(self, clients, role_name=DEFAULT_ROLE_NAME, external_id=None, session_name=DEFAULT_SESSION_NAME,
+                 duration_seconds=DEFAULT_DURATION_SECONDS):
+        self.clients = clients
+        self.role_name = role_name
+        self.external_id = external_id
+        self.session_name = session_name
+        self.duration_seconds = duration_seconds
+        self.assume_calls = 0
+        self._identity = None
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _caller_identity(self):
+        if self._identity is None:
+            self._identity = self.clients.client('sts').get_caller_identity()
+        return self._identity
+
+    def caller_account(self):
+        """
+        Returns the id of the account the ambient credentials belong to.
+        """
+        return self._caller_identity()['Account']
+
+    def _refresher(self, account_id):
+        """
+        Returns a function assuming the role in an account and returning botocore credential metadata.
+        """
+        partition = self._caller_identity()['Arn'].split(':')[1]
+        params = {
+            'RoleArn': f"arn:{partition}:iam::{account_id}:role/{self.role_name}",
+            'RoleSessionName': self.session_name,
+            'DurationSeconds': self.duration_seconds,
+        }
+        if self.external_id:
+            params['ExternalId'] = self.external_id
+
+        def refresh():
+            credentials = self.clients.client('sts').assume_role(**params)['Credentials']
+            with self._lock:
+                self.assume_calls += 1
+            logger.info("Assumed %s (credentials expire %s)", params['RoleArn'], credentials['Expiration'])
+            return {
+                'access_key': credentials['AccessKeyId'],
+                'secret_key': credentials['SecretAccessKey'],
+                'token': credentials['SessionToken'],
+                'expiry_time': credentials['Expiration'].isoformat(),
+            }
+        return refresh
+
+    def session(self, account_id):
+        """
+        Returns the boto3 session for an account, assuming its role on first use.
+
+        Args:
+            account_id (str): Account to obtain a session for.
+
+        Returns:
+            session (boto3.session.Session): Session whose credentials refresh automatically.
+        """
+        session = self._sessions.get(account_id)
+        if session is not None:
+            return session
+        if account_id == self.caller_account():
+            session = self.clients.session
+        else:
+            refresh = self._refresher(account_id)
+            credentials = RefreshableCredentials.create_from_metadata(
+                metadata=refresh(), refresh_using=refresh, method='sts-assume-role'
+            )
+            botocore_session = get_botocore_session()
+            botocore_session._credentials = credentials
+            session = boto3.session.Session(botocore_session=botocore_session,
+                                            region_name=self.clients.session.region_name)
+        with self._lock:
+            return self._sessions.setdefault(account_id, session)
@@ -0,0 +1,115 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from aws_misconfig_scanner.utils.logger import setup_logger
+
+"""
+profiler.py
+
+Scan Profiler
+
+This module captures a cProfile profile of the CPU side of a scan (response parsing, rule and
+policy evaluation, correlation). Scans run on worker threads, and before Python 3.12 a cProfile
+profiler only sees the thread that enabled it, so every thread started while profiling gets its own
+profiler; their statistics are merged into one dump when profiling stops. Per-thread profilers
+measure the thread's CPU time, so threads blocked on the network or on a lock do not drown out the
+work actually done; from Python 3.12 one profiler sees every thread and measures wall time.
+
+The dump is a standard pstats file, readable with 'python -m pstats' and by flame graph and call
+graph viewers such as snakeviz, flameprof or gprof2dot.
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+DEFAULT_PROFILE_PATH = 'scan.prof'
+
+# Before Python 3.12 every thread needs its own profiler (and can then be timed by its own CPU clock)
+PER_THREAD_PROFILERS = sys.version_info < (3, 12)
+
+
+def _new_profile():
+    return cProfile.Profile(time.thread_time) if PER_THREAD_PROFILERS else cProfile.Profile()
+
+
+class ScanProfiler:
+    """
+    Class: ScanProfiler
+
+    Description:
+        Profiles the calling thread and every thread started while it is active.
+
+    Attributes:
+        path (str): File the merged statistics are dumped to.
+    """
+
+    def __init__(self, path=DEFAULT_PROFILE_PATH):
+        self.path = path
+        self._main = None
+        self._profiles = []
+        self._lock = threading.Lock()
+
+    def _profile_thread(self, frame, event, arg):
+        """
+        Profile hook installed in new threads: replaces itself with a per-thread cProfile profiler.
+        """
+        sys.setprofile(None)
+        profile = _new_profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return  # Another profiling tool is active in this thread
+        with self._lock:
+            self._profiles.append(profile)
+
+    def start(self):
+        """
+        Starts profiling.
+        """
+        self._main = _new_profile()
+        self._main.enable()
+        if PER_THREAD_PROFILERS:
+            threading.setprofile(self._profile_thread)
+
+    def stop(self):
+        """
+        Stops profiling and dumps the merged statistics.
+
+        Returns:
+            stats (pstats.Stats): Merged statistics of every profiled thread.
+        """
+        threading.setprofile(None)
+        self._main.disable()
+        stats = pstats.Stats(self._main)
+        with self._lock:
+            profiles = list(self._profiles)
+        for profile in profiles:
+            stats.add(profile)
+        stats.dump_stats(self.path)
+        logger.info("Wrote profile of %s threads to %s", len(profiles) + 1, self.path)
+        return stats
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def format_top(stats, limit=15, sort='tottime'):
+    """
+    Returns the top functions of profile statistics as text.
+    """
+    buffer = io.StringIO()
+    stream, stats.stream = stats.stream, buffer
+    try:
+        stats.sort_stats(sort).print_stats(limit)
+    finally:
+        stats.stream = stream
+    return buffer.getvalue()
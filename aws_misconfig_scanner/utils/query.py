@@ -0,0 +1,240 @@
+import time
+import botocore
+from aws_misconfig_scanner.utils.cache import payload_marker
+from aws_misconfig_scanner.utils.logger import ProgressRollup, setup_logger
+from aws_misconfig_scanner.utils.metrics import get_metrics
+
+"""
+query.py
+
+Describe Query Layer
+
+This module lets scanners declare, per check, which describe API filters can be pushed down to
+AWS and which response fields the check reads. A ResourceQuery then plans the describe calls:
+
+- When every check of a query can be pushed down, one filtered pass is issued per distinct set of
+  filters, so AWS only returns resources that can possibly produce a finding.
+- When any check cannot be pushed down, a single unfiltered pass is issued and every check is
+  evaluated client-side, producing the same findings.
+- When the API rejects a pushed-down filter (InvalidFilter / InvalidParameterValue), the pass
+  continues unfiltered and the resources not yet returned are evaluated client-side. Any other
+  error (throttling, network, a failing check) is raised.
+
+Observers (e.g. the cross-service resource graph) see every projected resource as it is fetched,
+including resources whose check results are served from the cache. With push-down, only the
+resources matching the pushed-down filters are fetched, so observers must not need the others: the
+resource graph only correlates resources the public IP and public ingress filters retain.
+
+AWS describe APIs do not support server-side field selection, so projection happens as soon as
+each page is parsed: resources are trimmed to the fields the checks read before they are handed
+to checks or retained anywhere else.
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+# Error codes of describe APIs rejecting a filter (e.g. unsupported in a region or endpoint)
+FILTER_REJECTION_CODES = {'InvalidFilter', 'InvalidParameterValue'}
+
+
+def project(resource, fields):
+    """
+    Returns a copy of a resource containing only the given top-level fields.
+    """
+    return {field: resource[field] for field in fields if field in resource}
+
+
+class Check:
+    """
+    Class: Check
+
+    Description:
+        A single misconfiguration check evaluated against one resource.
+
+    Attributes:
+        check_id (str): Identifier of the check.
+        fields (tuple): Top-level resource fields read by the check.
+        evaluate (callable): Function taking a projected resource and returning an iterable of findings.
+        filter_sets (list): Alternative describe filter lists whose union contains every resource the
+            check can flag, or None if the check cannot be pushed down.
+    """
+
+    def __init__(self, check_id, fields, evaluate, filter_sets=None):
+        self.check_id = check_id
+        self.fields = tuple(fields)
+        self.evaluate = evaluate
+        self.filter_sets = filter_sets
+
+
+class ResourceQuery:
+    """
+    Class: ResourceQuery
+
+    Description:
+        Plans and executes paginated describe calls for a set of checks, pushing filters down
+        where possible and projecting resources down to the fields the checks read.
+
+    Attributes:
+        operation (str): Paginated describe operation name (e.g. 'describe_instances').
+        resource_path (tuple): Keys leading from a response page to the resource list
+            (e.g. ('Reservations', 'Instances')).
+        id_field (str): Field uniquely identifying a resource.
+        checks (list): Checks evaluated for every resource.
+        base_filters (list): Filters applied to every pass (e.g. instance state).
+        observers (list): Checks run on every fetched resource for their side effects only; they
+            produce no findings, are never cached and do not affect push-down (so with push-down
+            they only see the resources matching the pushed-down filters).
+    """
+
+    def __init__(self, operation, resource_path, id_field, checks, base_filters=None, observers=None):
+        self.operation = operation
+        self.resource_path = tuple(resource_path)
+        self.id_field = id_field
+        self.checks = list(checks)
+        self.base_filters = list(base_filters or [])
+        self.observers = list(observers or [])
+
+    def fields(self):
+        """
+        Returns the union of fields read by all checks and observers, plus the resource id field.
+        """
+        fields = [self.id_field]
+        for check in self.checks + self.observers:
+            fields.extend(field for field in check.fields if field not in fields)
+        return fields
+
+    def plan(self, pushdown=True):
+        """
+        Plans the describe passes needed to evaluate all checks.
+
+        Args:
+            pushdown (bool): (Optional) Allow filters to be pushed down to the API.
+
+        Returns:
+            passes (list): A list of (filter_sets, checks) tuples. Each pass issues one describe per
+                alternative filter list and evaluates its checks on the deduplicated union.
+        """
+        if not pushdown or any(check.filter_sets is None for check in self.checks):
+            return [([self.base_filters], self.checks)]
+
+        passes = []
+        for check in self.checks:
+            filter_sets = [self.base_filters + list(filters) for filters in check.filter_sets]
+            for planned_sets, planned_checks in passes:
+                if planned_sets == filter_sets:
+                    planned_checks.append(check)
+                    break
+            else:
+                passes.append((filter_sets, [check]))
+        return passes
+
+    def _iter_resources(self, page):
+        items = [page]
+        for key in self.resource_path:
+            items = [child for item in items for child in item.get(key, [])]
+        return items
+
+    def iter_resources(self, client, filter_sets):
+        """
+        Yields projected resources matching any of the alternative filter lists, each resource once.
+
+        Args:
+            client (boto3.client): Client used to issue the describe calls.
+            filter_sets (list): Alternative filter lists (an empty list means unfiltered).
+        """
+        fields = self.fields()
+        paginator = client.get_paginator(self.operation)
+        seen = set() if len(filter_sets) > 1 else None
+        for filters in filter_sets:
+            kwargs = {'Filters': filters} if filters else {}
+            for page in paginator.paginate(**kwargs):
+                for resource in self._iter_resources(page):
+                    if seen is not None:
+                        if resource[self.id_field] in seen:
+                            continue
+                        seen.add(resource[self.id_field])
+                    yield project(resource, fields)
+
+    @staticmethod
+    def _run_checks(resource, checks):
+        """
+        Runs every check against one resource, recording the time each check takes.
+        """
+        findings, timings = [], []
+        for check in checks:
+            started = time.perf_counter()
+            findings.extend(check.evaluate(resource))
+            timings.append((check.check_id, time.perf_counter() - started))
+        get_metrics().record_checks(timings)
+        return findings
+
+    def _evaluate(self, resource, checks, cache, region, account_id=None):
+        """
+        Evaluates checks against one resource, reusing a cached evaluation when the projected
+        payload is unchanged since it was cached. Cache entries are keyed by account, region and
+        resource id, so accounts scanned through one cache never share or evict each other's entries.
+        """
+        if cache is None:
+            return self._run_checks(resource, checks)
+        marker = payload_marker([[check.check_id for check in checks], resource])
+        return cache.get_or_compute(
+            self.operation, f"{account_id or ''}:{region}:{resource[self.id_field]}", marker,
+            lambda: self._run_checks(resource, checks)
+        )
+
+    @staticmethod
+    def _is_filter_rejection(error):
+        """
+        Returns True if a describe call's ClientError means the API rejected one of its filters.
+        """
+        return error.response.get('Error', {}).get('Code') in FILTER_REJECTION_CODES
+
+    def _observe(self, resource):
+        for observer in self.observers:
+            observer.evaluate(resource)
+
+    def iter_findings(self, client, pushdown=True, cache=None, account_id=None):
+        """
+        Executes the planned describe passes and yields the findings of every check.
+
+        Args:
+            client (boto3.client): Client used to issue the describe calls.
+            pushdown (bool): (Optional) Allow filters to be pushed down to the API.
+            cache (ScanCache): (Optional) Cache of per-resource evaluations keyed by payload hash.
+            account_id (str): (Optional) Account the client belongs to, part of the cache key.
+
+        Yields:
+            finding (Finding): A discovered misconfiguration.
+        """
+        region = client.meta.region_name
+        rollup = ProgressRollup(logger, f"{self.operation} ({region})")
+        for filter_sets, checks in self.plan(pushdown):
+            filter_names = sorted({f['Name'] for filters in filter_sets for f in filters})
+            logger.info("%s: evaluating %s with filters %s",
+                        self.operation, ', '.join(check.check_id for check in checks), filter_names or 'none')
+            pushed_down = filter_sets != [self.base_filters]
+            evaluated = set()
+            resources = self.iter_resources(client, filter_sets)
+            while True:
+                # Only the describe calls are guarded; errors of checks and observers are never retried
+                try:
+                    resource = next(resources, None)
+                except botocore.exceptions.ClientError as e:
+                    if not pushed_down or not self._is_filter_rejection(e):
+                        raise
+                    logger.warning("%s: filter push-down rejected (%s); evaluating client-side", self.operation, e)
+                    for resource in self.iter_resources(client, [self.base_filters]):
+                        if resource[self.id_field] not in evaluated:
+                            self._observe(resource)
+                            yield from self._evaluate(resource, checks, cache, region, account_id)
+                            rollup.tick()
+                    break
+                if resource is None:
+                    break
+                if pushed_down:
+                    evaluated.add(resource[self.id_field])
+                self._observe(resource)
+                yield from self._evaluate(resource, checks, cache, region, account_id)
+                rollup.tick()
+        rollup.done()
@@ -0,0 +1,234 @@
+import threading
+import time
+from aws_misconfig_scanner.utils.logger import setup_logger
+
+"""
+rate_limiter.py
+
+Global Adaptive Rate Limiter
+
+This module paces every AWS API request issued by the scanners through a process-wide token
+bucket per (service, API, region). It hooks into botocore's event system, so it applies to every
+client handed out by the shared ClientFactory without changes to scanner code:
+
+- before-send: each HTTP attempt (including retries) takes a token, waiting if none is available
+- needs-retry: throttling errors halve the bucket's rate; successful calls recover it gradually
+
+Retries themselves use botocore's standard retry mode (exponential backoff with full jitter), so
+a throttled call is retried after a jittered delay and at the reduced rate. Throttle counts and
+time spent waiting are recorded per API for the run report.
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+# Error codes AWS services use to signal throttling
+THROTTLE_ERROR_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException',
+    'TooManyRequestsException', 'ProvisionedThroughputExceededException', 'TransactionInProgressException',
+    'RequestLimitExceeded', 'BandwidthLimitExceeded', 'RequestThrottled',
+    'SlowDown', 'PriorRequestNotComplete', 'EC2ThrottledException',
+}
+
+# Default maximum request rate (requests per second) per API, by service or by 'service.Operation'
+DEFAULT_SERVICE_RATES = {
+    'iam': 10.0,
+    'sts': 10.0,
+    's3': 100.0,
+    's3-control': 10.0,
+    'lambda': 15.0,
+    'lambda.GetFunction': 100.0,
+    'lambda.GetPolicy': 100.0,
+    'ec2': 20.0,
+    'rds': 10.0,
+    'organizations': 5.0,
+}
+DEFAULT_RATE = 20.0
+
+# Adaptive rate bounds
+MIN_RATE = 0.5
+THROTTLE_BACKOFF = 0.5
+RECOVERY_FRACTION = 0.02
+
+
+class TokenBucket:
+    """
+    Class: TokenBucket
+
+    Description:
+        Thread-safe token bucket whose refill rate adapts to observed throttling
+        (multiplicative decrease on throttle, additive recovery on success).
+
+    Attributes:
+        max_rate (float): Configured ceiling in requests per second.
+        rate (float): Current refill rate in requests per second.
+        calls (int): Number of attempts paced by the bucket.
+        throttles (int): Number of throttling errors observed.
+        wait_seconds (float): Total time callers spent waiting for tokens.
+    """
+
+    def __init__(self, max_rate, clock=time.monotonic, sleep=time.sleep):
+        """
+        Args:
+            max_rate (float): Ceiling in requests per second.
+            clock (callable): (Optional) Monotonic clock in seconds.
+            sleep (callable): (Optional) Function waiting the given number of seconds.
+        """
+        self.max_rate = max_rate
+        self.rate = max_rate
+        self.calls = 0
+        self.throttles = 0
+        self.wait_seconds = 0.0
+        self._capacity = max(1.0, max_rate)
+        self._tokens = self._capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Takes one token, sleeping until it is available.
+
+        Returns:
+            waited (float): Seconds spent waiting.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self._capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # Reserve the token now; a negative balance is the caller's place in the queue
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.calls += 1
+            self.wait_seconds += wait
+        if wait:
+            self._sleep(wait)
+        return wait
+
+    def on_throttle(self):
+        """
+        Halves the refill rate after a throttling error.
+        """
+        with self._lock:
+            self.throttles += 1
+            self.rate = max(MIN_RATE, self.rate * THROTTLE_BACKOFF)
+
+    def on_success(self):
+        """
+        Recovers the refill rate towards its ceiling after a successful call.
+        """
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_FRACTION)
+
+
+class RateLimiter:
+    """
+    Class: RateLimiter
+
+    Description:
+        Process-wide registry of token buckets keyed by (service, API, region), attached to boto3
+        clients through botocore events.
+
+    Attributes:
+        service_rates (dict): Maximum request rate per service, or per API as 'service.Operation'.
+        default_rate (float): Maximum request rate for services without an explicit entry.
+    """
+
+    def __init__(self, service_rates=None, default_rate=DEFAULT_RATE, clock=time.monotonic, sleep=time.sleep):
+        """
+        Initializes the rate limiter.
+
+        Args:
+            service_rates (dict): (Optional) Overrides of the default per-service rates.
+            default_rate (float): (Optional) Rate for services without an explicit entry.
+            clock (callable): (Optional) Monotonic clock the token buckets refill by.
+            sleep (callable): (Optional) Function the token buckets wait with.
+        """
+        self.service_rates = dict(DEFAULT_SERVICE_RATES)
+        self.service_rates.update(service_rates or {})
+        self.default_rate = default_rate
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, service, operation, region):
+        """
+        Returns the token bucket for a (service, API, region), creating it on first use.
+        """
+        key = (service, operation, region)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                rate = self.service_rates.get(f"{service}.{operation}", self.service_rates.get(service, self.default_rate))
+                bucket = self._buckets.setdefault(key, TokenBucket(rate, self._clock, self._sleep))
+        return bucket
+
+    def register(self, client):
+        """
+        Attaches the limiter to a boto3 client.
+
+        Args:
+            client (boto3.client): Client whose requests should be paced.
+        """
+        region = client.meta.region_name
+
+        def before_send(event_name, **kwargs):
+            _, service, operation = event_name.split('.', 2)
+            self.bucket(service, operation, region).acquire()
+
+        def needs_retry(event_name, response=None, **kwargs):
+            _, service, operation = event_name.split('.', 2)
+            if response is None:
+                return None
+            http_response, parsed = response
+            error_code = parsed.get('Error', {}).get('Code') if isinstance(parsed, dict) else None
+            bucket = self.bucket(service, operation, region)
+            if error_code in THROTTLE_ERROR_CODES:
+                bucket.on_throttle()
+                logger.warning("Throttled on %s.%s (%s); reducing rate to %.2f/s",
+                               service, operation, region, bucket.rate)
+            elif http_response.status_code < 300:
+                bucket.on_success()
+            # Never decide the retry ourselves; botocore's retry handler does that
+            return None
+
+        client.meta.events.register('before-send', before_send)
+        client.meta.events.register('needs-retry', needs_retry)
+
+    def stats(self):
+        """
+        Returns per-API pacing statistics for the run report.
+
+        Returns:
+            stats (dict): Mapping of 'service.API@region' to calls, throttles, waiting time and current rate.
+        """
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {
+            f"{service}.{operation}@{region}": {
+                'calls': bucket.calls,
+                'throttles': bucket.throttles,
+                'wait_seconds': round(bucket.wait_seconds, 3),
+                'rate': round(bucket.rate, 2),
+            }
+            for (service, operation, region), bucket in sorted(buckets.items(), key=lambda item: str(item[0]))
+        }
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Returns the process-wide RateLimiter, creating it on first use.
+    """
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
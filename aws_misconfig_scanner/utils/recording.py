@@ -0,0 +1,301 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+import zipfile
+from datetime import datetime, timezone
+import boto3
+from botocore.awsrequest import AWSResponse
+from aws_misconfig_scanner.utils.aws_clients import ClientFactory
+from aws_misconfig_scanner.utils.logger import setup_logger
+
+"""
+recording.py
+
+API Snapshot Recording and Replay
+
+This module records the AWS API responses a scan receives into a snapshot file, and serves them back
+to a later scan without network access, so new or changed checks can be evaluated against an
+account in seconds instead of a full API crawl, and snapshots double as deterministic test fixtures.
+
+- SnapshotRecorder: registered with every client of a live scan. Each API call's parsed response is
+  captured as botocore received it, before any after-call handler post-processes it (such as the
+  decoding of IAM policy documents), and kept once the call is final, so retried throttling errors
+  are not recorded.
+- SnapshotReplayer: registered with every client of an offline scan. It answers each API call from
+  the snapshot before it is sent. botocore's after-call handlers then post-process the response,
+  and errors are raised, exactly as for a live response. Calls missing from the snapshot fail with
+  a 'SnapshotMiss' error, which the scanners report like any other API error.
+
+Responses are keyed by account, service, operation, region and a digest of the call parameters.
+Identical calls recorded several times (e.g. a credential report polled until it is ready) are
+replayed in their recorded order, the last response repeating once the sequence is used up.
+
+A snapshot is a zip archive:
+- manifest.json: format version, creation time, default region and call counts
+- index.json: response key -> list of [member, line] references
+- responses/<service>/<operation>.jsonl: one encoded response per line (compressed)
+
+Datetimes and bytes, which JSON cannot represent, are encoded as {"$datetime": ISO 8601} and
+{"$bytes": base64} objects.
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = 'scan-snapshot.zip'
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Request context keys holding the call parameters and the latest received response
+_REQUEST_KEY = 'snapshot_request'
+_RESPONSE_KEY = 'snapshot_response'
+
+# Response metadata kept in snapshots (headers and retry counts describe the recording, not the account)
+_METADATA_FIELDS = ('RequestId', 'HTTPStatusCode')
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, (bytes, bytearray)):
+        return {'$bytes': base64.b64encode(value).decode('ascii')}
+    raise TypeError(f"Cannot encode {type(value).__name__} in a snapshot")
+
+
+def _decode_object(obj):
+    if len(obj) == 1:
+        if '$datetime' in obj:
+            return datetime.fromisoformat(obj['$datetime'])
+        if '$bytes' in obj:
+            return base64.b64decode(obj['$bytes'])
+    return obj
+
+
+def _encode(data):
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), default=_encode_value)
+
+
+def _decode(text):
+    return json.loads(text, object_hook=_decode_object)
+
+
+def _capture_request(params=None, context=None, **kwargs):
+    """
+    before-parameter-build handler keeping the encoded API call parameters in the request context.
+    """
+    if context is not None and params is not None:
+        try:
+            context[_REQUEST_KEY] = _encode(params)
+        except TypeError:
+            pass  # Streaming or otherwise unencodable parameters are neither recorded nor replayed
+
+
+def _response_key(account_id, service, operation, region, request):
+    digest = hashlib.sha256(request.encode('utf-8')).hexdigest()[:32]
+    return f"{account_id or '-'}/{service}/{operation}/{region}/{digest}"
+
+
+class SnapshotRecorder:
+    """
+    Class: SnapshotRecorder
+
+    Description:
+        Records the API responses received by registered clients into a snapshot file.
+
+    Attributes:
+        path (str): Snapshot file written by close().
+        region (str): Default region of the recorded scan, replayed as the default region.
+        calls (int): Number of responses recorded.
+    """
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH, region=None):
+        self.path = path
+        self.region = region
+        self.calls = 0
+        self._members = {}
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def register(self, client, account_id=None):
+        """
+        Attaches the recorder to a boto3 client.
+
+        Args:
+            client (boto3.client): Client whose responses should be recorded.
+            account_id (str): (Optional) Account the client's credentials belong to.
+        """
+        region = client.meta.region_name
+
+        def response_received(parsed_response=None, response_dict=None, context=None, **kwargs):
+            # Fires for every attempt, before after-call handlers post-process the response
+            if context is None or parsed_response is None or _REQUEST_KEY not in context:
+                return
+            try:
+                parsed = {key: value for key, value in parsed_response.items() if key != 'ResponseMetadata'}
+                metadata = parsed_response.get('ResponseMetadata', {})
+                parsed['ResponseMetadata'] = {field: metadata[field] for field in _METADATA_FIELDS if field in metadata}
+                body = response_dict.get('body')
+                size = len(body) if isinstance(body, bytes) else 0
+                context[_RESPONSE_KEY] = (response_dict['status_code'], size, _encode(parsed))
+            except (TypeError, ValueError):
+                context.pop(_RESPONSE_KEY, None)  # e.g. a streaming body
+
+        def after_call(event_name, context=None, **kwargs):
+            response = (context or {}).pop(_RESPONSE_KEY, None)
+            if response is None:
+                return
+            _, service, operation = event_name.split('.', 2)
+            self._add(_response_key(account_id, service, operation, region, context[_REQUEST_KEY]),
+                      service, operation, *response)
+
+        client.meta.events.register('before-parameter-build', _capture_request)
+        client.meta.events.register('response-received', response_received)
+        client.meta.events.register('after-call', after_call)
+
+    def _add(self, key, service, operation, status, size, encoded):
+        member = f"responses/{service}/{operation}.jsonl"
+        line = f'{{"status":{status},"bytes":{size},"response":{encoded}}}'
+        with self._lock:
+            lines = self._members.setdefault(member, [])
+            self._index.setdefault(key, []).append([member, len(lines)])
+            lines.append(line)
+            self.calls += 1
+
+    def stats(self):
+        """
+        Returns the number of recorded calls per service operation.
+        """
+        with self._lock:
+            return {member[len('responses/'):-len('.jsonl')].replace('/', '.'): len(lines)
+                    for member, lines in sorted(self._members.items())}
+
+    def close(self):
+        """
+        Writes the snapshot file, replacing any earlier snapshot at the path atomically.
+        """
+        operations = self.stats()
+        with self._lock:
+            members = dict(self._members)
+            index = dict(self._index)
+            manifest = {
+                'format': SNAPSHOT_FORMAT_VERSION,
+                'created': datetime.now(timezone.utc).isoformat(),
+                'region': self.region,
+                'calls': self.calls,
+                'operations': operations,
+            }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+            archive.writestr('index.json', json.dumps(index, separators=(',', ':')))
+            for member, lines in members.items():
+                archive.writestr(member, '\n'.join(lines) + '\n')
+        os.replace(tmp_path, self.path)
+        logger.info("Recorded %s API responses to %s", manifest['calls'], self.path)
+
+
+class SnapshotReplayer:
+    """
+    Class: SnapshotReplayer
+
+    Description:
+        Answers the API calls of registered clients from a snapshot file, without network access.
+
+    Attributes:
+        path (str): Snapshot file.
+        region (str): Default region of the recorded scan.
+        replayed (int): Number of calls answered from the snapshot.
+        misses (int): Number of calls missing from the snapshot.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._archive = zipfile.ZipFile(path, 'r')
+        manifest = json.loads(self._archive.read('manifest.json'))
+        if manifest.get('format') != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {manifest.get('format')} in {path}")
+        self.region = manifest.get('region')
+        self._index = json.loads(self._archive.read('index.json'))
+        self._members = {}
+        self._cursors = {}
+        self.replayed = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        logger.info("Replaying %s API responses recorded %s from %s", manifest['calls'], manifest['created'], path)
+
+    def client_factory(self, **kwargs):
+        """
+        Returns a client factory whose clients are answered from the snapshot.
+
+        The factory's session uses the recorded default region and placeholder credentials, so no
+        credential lookup (e.g. against the instance metadata service) is attempted.
+
+        Args:
+            kwargs: (Optional) Further ClientFactory arguments.
+        """
+        session = boto3.session.Session(aws_access_key_id='snapshot', aws_secret_access_key='snapshot',
+                                        region_name=self.region)
+        return ClientFactory(session=session, event_hooks=list(kwargs.pop('event_hooks', ())) + [self], **kwargs)
+
+    def register(self, client, account_id=None):
+        """
+        Attaches the replayer to a boto3 client.
+
+        Args:
+            client (boto3.client): Client whose calls should be answered from the snapshot.
+            account_id (str): (Optional) Account the client's credentials belong to.
+        """
+        region = client.meta.region_name
+
+        def before_call(event_name, context=None, **kwargs):
+            _, service, operation = event_name.split('.', 2)
+            request = (context or {}).get(_REQUEST_KEY)
+            status, size, parsed = self._response(
+                None if request is None else _response_key(account_id, service, operation, region, request))
+            if parsed is None:
+                status, size, parsed = 400, 0, {'Error': {
+                    'Code': 'SnapshotMiss',
+                    'Message': f"No recorded response for {service}.{operation} in {region} in {self.path}"}}
+            metadata = parsed.setdefault('ResponseMetadata', {})
+            metadata.update({'HTTPStatusCode': status, 'HTTPHeaders': {}, 'RetryAttempts': 0})
+            headers = {'content-length': str(size)}
+            return AWSResponse(f"https://{service}.snapshot.invalid", status, headers, None), parsed
+
+        client.meta.events.register('before-parameter-build', _capture_request)
+        client.meta.events.register('before-call', before_call)
+
+    def _response(self, key):
+        """
+        Returns the next recorded (status, response size, parsed response) for a key, or
+        (None, None, None) for a miss.
+        """
+        with self._lock:
+            references = self._index.get(key) if key is not None else None
+            if not references:
+                self.misses += 1
+                return None, None, None
+            position = self._cursors.get(key, 0)
+            self._cursors[key] = position + 1
+            member, line = references[min(position, len(references) - 1)]
+            lines = self._members.get(member)
+            if lines is None:
+                lines = self._members[member] = self._archive.read(member).decode('utf-8').splitlines()
+            self.replayed += 1
+        record = _decode(lines[line])
+        return record['status'], record['bytes'], record['response']
+
+    def stats(self):
+        """
+        Returns the number of calls answered from the snapshot and missing from it.
+        """
+        with self._lock:
+            return {'replayed': self.replayed, 'misses': self.misses}
+
+    def close(self):
+        self._archive.close()
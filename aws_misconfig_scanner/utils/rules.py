@@ -0,0 +1,338 @@
+import hashlib
+import json
+import operator
+import os
+import threading
+import time
+from aws_misconfig_scanner.utils.findings import Finding, Severity, finding_type, literal_template
+from aws_misconfig_scanner.utils.logger import setup_logger
+from aws_misconfig_scanner.utils.metrics import get_metrics
+
+"""
+rules.py
+
+Declarative Rule Engine
+
+This module loads misconfiguration rules from JSON (or YAML, when PyYAML is installed) rule files
+and compiles them once into predicate functions grouped by resource type. Every resource is then
+evaluated against all enabled rules of its type in a single pass, and each rule group reports the
+resource fields its rules read, so scanners can skip enrichment API calls no rule needs.
+
+Rule format:
+
+    {"rules": [{
+        "id": "rds-public-access",
+        "severity": "HIGH",
+        "resource": "rds-instance",
+        "fields": ["PubliclyAccessible"],
+        "condition": {"field": "PubliclyAccessible", "op": "truthy"},
+        "message": "RDS instance is publicly accessible.",
+        "enabled": true
+    }]}
+
+Conditions are either a field test {"field", "op", "value", "default"} or a combination
+{"all": [...]}, {"any": [...]} or {"not": {...}}. Fields may be dotted paths into nested values.
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+# Rules shipped with the scanner
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'rules', 'default.json')
+
+SEVERITIES = tuple(severity.name for severity in Severity)
+
+_MISSING = object()
+
+# Field tests taking no value
+_UNARY_OPS = {
+    'truthy': bool,
+    'falsy': operator.not_,
+    'present': lambda value: value is not _MISSING,
+    'missing': lambda value: value is _MISSING,
+}
+
+# Field tests comparing against the rule's value
+_BINARY_OPS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'lt': operator.lt,
+    'le': operator.le,
+    'gt': operator.gt,
+    'ge': operator.ge,
+    'in': lambda value, expected: value in expected,
+    'not_in': lambda value, expected: value not in expected,
+    'contains': lambda value, expected: expected in value,
+}
+
+
+def _field_getter(path):
+    """
+    Returns a function reading a (possibly dotted) field path from a resource, or _MISSING.
+    """
+    keys = path.split('.')
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda resource: resource.get(key, _MISSING)
+
+    def get(resource):
+        value = resource
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                return _MISSING
+            value = value[key]
+        return value
+    return get
+
+
+def compile_condition(condition, rule_id=None):
+    """
+    Compiles a condition into a predicate function.
+
+    Args:
+        condition (dict): Condition definition.
+        rule_id (str): (Optional) Rule the condition belongs to, for error messages.
+
+    Returns:
+        (predicate, fields) (tuple): The predicate taking a resource, and the field paths it reads.
+    """
+    if 'all' in condition or 'any' in condition:
+        combine = all if 'all' in condition else any
+        compiled = [compile_condition(child, rule_id) for child in condition['all' if 'all' in condition else 'any']]
+        predicates = [predicate for predicate, _ in compiled]
+        fields = {field for _, child_fields in compiled for field in child_fields}
+        return (lambda resource: combine(predicate(resource) for predicate in predicates)), fields
+    if 'not' in condition:
+        predicate, fields = compile_condition(condition['not'], rule_id)
+        return (lambda resource: not predicate(resource)), fields
+
+    field, op = condition.get('field'), condition.get('op')
+    if not field:
+        raise ValueError(f"Rule {rule_id}: condition {condition} has no field")
+    get = _field_getter(field)
+    if op in _UNARY_OPS:
+        test = _UNARY_OPS[op]
+        if op in ('present', 'missing'):
+            return (lambda resource: test(get(resource))), {field}
+        default = condition.get('default')
+        return (lambda resource: test(_value(get(resource), default))), {field}
+    if op in _BINARY_OPS:
+        if 'value' not in condition:
+            raise ValueError(f"Rule {rule_id}: operator '{op}' requires a value")
+        test, expected, default = _BINARY_OPS[op], condition['value'], condition.get('default')
+
+        def predicate(resource):
+            value = _value(get(resource), default)
+            try:
+                return value is not None and test(value, expected)
+            except TypeError:
+                return False
+        return predicate, {field}
+    raise ValueError(f"Rule {rule_id}: unknown operator '{op}'")
+
+
+def _value(value, default):
+    return default if value is _MISSING else value
+
+
+class Rule:
+    """
+    Class: Rule
+
+    Description:
+        A single compiled misconfiguration rule.
+
+    Attributes:
+        rule_id (str): Unique rule identifier.
+        severity (str): One of SEVERITIES.
+        resource_type (str): Resource type the rule applies to (e.g. 'rds-instance').
+        fields (frozenset): Top-level resource fields the rule reads.
+        message (str): Issue reported when the rule matches.
+        enabled (bool): Whether the rule is evaluated.
+        predicate (callable): Compiled condition taking a resource.
+        definition (dict): The rule definition it was compiled from.
+        finding_type (FindingType): Type of the findings the rule reports.
+    """
+
+    __slots__ = ('rule_id', 'severity', 'resource_type', 'fields', 'message', 'enabled', 'predicate', 'definition',
+                 'finding_type')
+
+    def __init__(self, definition):
+        """
+        Compiles a rule from its definition.
+
+        Args:
+            definition (dict): Rule definition loaded from a rule file.
+        """
+        self.rule_id = definition.get('id')
+        if not self.rule_id:
+            raise ValueError(f"Rule without id: {definition}")
+        self.severity = str(definition.get('severity', 'MEDIUM')).upper()
+        if self.severity not in SEVERITIES:
+            raise ValueError(f"Rule {self.rule_id}: unknown severity '{self.severity}'")
+        self.resource_type = definition.get('resource')
+        if not self.resource_type or 'condition' not in definition:
+            raise ValueError(f"Rule {self.rule_id}: 'resource' and 'condition' are required")
+        self.message = definition.get('message', self.rule_id)
+        self.enabled = definition.get('enabled', True)
+        self.predicate, paths = compile_condition(definition['condition'], self.rule_id)
+        # Declared fields are read too (e.g. by the message); projection works on top-level fields
+        paths = set(paths) | set(definition.get('fields', []))
+        self.fields = frozenset(path.split('.', 1)[0] for path in paths)
+        self.definition = definition
+        self.finding_type = finding_type(self.rule_id, self.severity, self.resource_type, literal_template(self.message))
+
+
+class RuleGroup:
+    """
+    Class: RuleGroup
+
+    Description:
+        The enabled rules of one resource type, evaluated together in a single pass.
+
+    Attributes:
+        resource_type (str): Resource type of the rules.
+        rules (list): Enabled rules in definition order.
+        fields (tuple): Union of the top-level fields read by the rules, sorted.
+        signature (str): Hash of the rule definitions (changes whenever a rule changes).
+    """
+
+    def __init__(self, resource_type, rules):
+        self.resource_type = resource_type
+        self.rules = list(rules)
+        self.fields = tuple(sorted({field for rule in self.rules for field in rule.fields}))
+        self.signature = hashlib.sha256(
+            json.dumps([rule.definition for rule in self.rules], sort_keys=True).encode('utf-8')
+        ).hexdigest()[:16]
+
+    def needs(self, field):
+        """
+        Returns True if any enabled rule reads the given top-level field.
+        """
+        return field in self.fields
+
+    def evaluate(self, resource, resource_id, region=None, unavailable=()):
+        """
+        Evaluates every rule against one resource.
+
+        Args:
+            resource (dict): The resource to evaluate.
+            resource_id (str): Identifier of the resource, reported in every finding.
+            region (str): (Optional) Region of the resource.
+            unavailable (set): (Optional) Fields that could not be retrieved; rules reading them are skipped.
+
+        Returns:
+            findings (list): A list of Findings describing discovered misconfigurations.
+        """
+        findings, timings = [], []
+        for rule in self.rules:
+            if unavailable and not rule.fields.isdisjoint(unavailable):
+                continue
+            started = time.perf_counter()
+            if rule.predicate(resource):
+                findings.append(Finding(rule.finding_type, resource_id, region=region))
+            timings.append((rule.rule_id, time.perf_counter() - started))
+        get_metrics().record_checks(timings)
+        return findings
+
+
+class RuleSet:
+    """
+    Class: RuleSet
+
+    Description:
+        Compiled rules grouped by resource type.
+
+    Attributes:
+        rules (dict): Every loaded rule (enabled or not) indexed by rule id.
+    """
+
+    def __init__(self, definitions=(), disabled=()):
+        """
+        Compiles rule definitions. A later definition with the same id replaces an earlier one.
+
+        Args:
+            definitions (iterable): Rule definitions.
+            disabled (iterable): (Optional) Ids of rules to disable.
+        """
+        self.rules = {}
+        for definition in definitions:
+            rule = Rule(definition)
+            self.rules[rule.rule_id] = rule
+        for rule_id in disabled:
+            if rule_id not in self.rules:
+                logger.warning("Cannot disable unknown rule '%s'", rule_id)
+                continue
+            self.rules[rule_id].enabled = False
+        self._groups = {}
+        for rule in self.rules.values():
+            if rule.enabled:
+                self._groups.setdefault(rule.resource_type, []).append(rule)
+        self._groups = {resource_type: RuleGroup(resource_type, rules) for resource_type, rules in self._groups.items()}
+
+    def group(self, resource_type):
+        """
+        Returns the rule group for a resource type (empty if no rule applies to it).
+        """
+        return self._groups.get(resource_type) or RuleGroup(resource_type, [])
+
+
+def read_rule_file(path):
+    """
+    Reads the rule definitions of a JSON or YAML rule file.
+
+    Args:
+        path (str): Path of the rule file ('.yaml'/'.yml' files require PyYAML).
+
+    Returns:
+        definitions (list): Rule definitions in file order.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError(f"Rule file {path} is YAML, but PyYAML is not installed")
+            document = yaml.safe_load(f)
+        else:
+            document = json.load(f)
+    if isinstance(document, dict):
+        document = document.get('rules', [])
+    return list(document or [])
+
+
+def load_rules(paths=(), disabled=(), include_defaults=True):
+    """
+    Loads and compiles rules from the bundled rule file and any additional rule files.
+
+    Args:
+        paths (iterable): (Optional) Additional rule files; their rules override bundled rules with the same id.
+        disabled (iterable): (Optional) Ids of rules to disable.
+        include_defaults (bool): (Optional) Load the bundled rules first.
+
+    Returns:
+        rules (RuleSet): The compiled rules.
+    """
+    definitions = []
+    for path in ([DEFAULT_RULES_PATH] if include_defaults else []) + list(paths):
+        definitions.extend(read_rule_file(path))
+    rules = RuleSet(definitions, disabled)
+    enabled = sum(1 for rule in rules.rules.values() if rule.enabled)
+    logger.info("Loaded %s enabled rules (%s disabled)", enabled, len(rules.rules) - enabled)
+    return rules
+
+
+_default_rules = None
+_default_rules_lock = threading.Lock()
+
+
+def get_default_rules():
+    """
+    Returns the bundled rules, compiled on first use.
+    """
+    global _default_rules
+    with _default_rules_lock:
+        if _default_rules is None:
+            _default_rules = load_rules()
+        return _default_rules
@@ -0,0 +1,235 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from aws_misconfig_scanner.utils.findings import Finding
+from aws_misconfig_scanner.utils.logger import setup_logger
+
+"""
+scheduler.py
+
+Concurrent Scan Scheduler
+
+This module runs independent scan jobs (one per AWS service scanner) concurrently on a bounded
+worker pool. Scanner work is dominated by waiting on AWS API round trips, so running the service
+crawls side by side reduces total wall time from the sum of all scanners to roughly the slowest one.
+
+Features:
+- Bounded worker pool shared by all jobs
+- Optional per-service concurrency limits
+- Optional per-service timeouts, counted from the moment a job starts running (a timed-out job is
+  reported as an error finding and stops at its next finding)
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+
+class ScanJob:
+    """
+    Class: ScanJob
+
+    Description:
+        A single unit of scan work scheduled by the ScanScheduler.
+
+    Attributes:
+        service (str): Service name the job belongs to (e.g. 'EC2', 'IAM').
+        func (callable): Zero-argument callable returning a list of findings.
+        key (hashable): Unique job identifier, defaults to the service name.
+        iter_findings (callable): (Optional) Zero-argument callable returning the job's finding
+            iterator, used by engines that step through findings (e.g. AsyncScanEngine).
+    """
+
+    def __init__(self, service, func, key=None, iter_findings=None):
+        self.service = service
+        self.func = func
+        self.key = key if key is not None else service
+        self.iter_findings = iter_findings
+
+    def __repr__(self):
+        return f"ScanJob({self.key!r})"
+
+
+class _JobState:
+    """
+    Start time and cancellation flag of one dispatched job, shared with the worker running it.
+    """
+
+    __slots__ = ('lock', 'started', 'cancelled')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = None
+        self.cancelled = False
+
+
+def validate_concurrency(service_concurrency):
+    """
+    Validates per-service concurrency limits; a limit below 1 would never let the service's jobs run.
+    """
+    for service, limit in (service_concurrency or {}).items():
+        if limit < 1:
+            raise ValueError(f"Concurrency limit for {service} must be at least 1, got {limit}")
+    return dict(service_concurrency or {})
+
+
+class ScanScheduler:
+    """
+    Class: ScanScheduler
+
+    Description:
+        Dispatches ScanJobs onto a bounded thread pool while honouring per-service concurrency
+        limits and per-service timeouts.
+
+        Python threads cannot be killed, so a job that exceeds its timeout is abandoned: its result
+        is replaced with an error finding and it stops before its next finding. Until its in-flight
+        step returns, an abandoned job keeps its worker slot, so no new job is queued behind it.
+
+    Attributes:
+        max_workers (int): Maximum number of jobs running at once, abandoned jobs included.
+        service_concurrency (dict): Maximum number of concurrently running jobs per service.
+        timeouts (dict): Timeout in seconds per service.
+        default_timeout (float): Timeout applied to services without an explicit entry (None = no limit).
+    """
+
+    # Seconds between checks for the start of jobs whose timeout cannot be scheduled yet
+    START_POLL_INTERVAL = 0.05
+
+    def __init__(self, max_workers=6, service_concurrency=None, timeouts=None, default_timeout=None):
+        """
+        Initializes the scheduler.
+
+        Args:
+            max_workers (int): Size of the worker pool.
+            service_concurrency (dict): (Optional) Mapping of service name to concurrency limit (at least 1).
+            timeouts (dict): (Optional) Mapping of service name to timeout in seconds.
+            default_timeout (float): (Optional) Timeout for services without an explicit entry.
+
+        Raises:
+            ValueError: If a concurrency limit is below 1.
+        """
+        self.max_workers = max(1, max_workers)
+        self.service_concurrency = validate_concurrency(service_concurrency)
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+
+    def _timeout_for(self, service):
+        return self.timeouts.get(service, self.default_timeout)
+
+    def _has_capacity(self, service, running_per_service):
+        limit = self.service_concurrency.get(service)
+        return limit is None or running_per_service.get(service, 0) < limit
+
+    @staticmethod
+    def _execute(job, state, sink):
+        """
+        Runs one job in a worker thread, stepping its finding iterator so a cancelled job stops
+        before its next finding. Jobs without an iterator factory run their callable to completion.
+        """
+        with state.lock:
+            if state.cancelled:
+                return []
+            state.started = time.monotonic()
+        if job.iter_findings is None:
+            return job.func() or []
+
+        collected = []
+        iterator = iter(job.iter_findings())
+        try:
+            for finding in iterator:
+                # Checked under the lock so nothing is forwarded once the job has been abandoned
+                with state.lock:
+                    if state.cancelled:
+                        break
+                    if sink is not None:
+                        sink(job.service, finding)
+                    else:
+                        collected.append(finding)
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+        return collected
+
+    def run(self, jobs, sink=None):
+        """
+        Executes all jobs and waits for them to finish or time out.
+
+        Args:
+            jobs (list): A list of ScanJob objects.
+            sink (callable): (Optional) Callback receiving (service, finding) as findings are produced
+                by jobs with an iter_findings factory. It is never called after run() returns.
+
+        Returns:
+            results (dict): Mapping of job key to the list of findings produced by that job (only
+                error findings for iterator jobs when a sink is given).
+        """
+        pending = deque(jobs)
+        running = {}  # future -> (job, state)
+        abandoned = set()  # futures of timed-out jobs whose in-flight step has not returned yet
+        running_per_service = {}
+        results = {}
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scan')
+        try:
+            while pending or running:
+                abandoned = {future for future in abandoned if not future.done()}
+
+                # Dispatch every pending job that fits into the free worker slots and its service limit
+                deferred = deque()
+                while pending and len(running) + len(abandoned) < self.max_workers:
+                    job = pending.popleft()
+                    if not self._has_capacity(job.service, running_per_service):
+                        deferred.append(job)
+                        continue
+                    state = _JobState()
+                    running[executor.submit(self._execute, job, state, sink)] = (job, state)
+                    running_per_service[job.service] = running_per_service.get(job.service, 0) + 1
+                    logger.info("Started scan job %s", job.key)
+                deferred.extend(pending)
+                pending = deferred
+
+                # Deadlines count from the moment a job starts; jobs not started yet are polled for
+                wait_for = None
+                now = time.monotonic()
+                for job, state in running.values():
+                    timeout = self._timeout_for(job.service)
+                    if not timeout:
+                        continue
+                    started = state.started
+                    remaining = self.START_POLL_INTERVAL if started is None else max(0.0, started + timeout - now)
+                    wait_for = remaining if wait_for is None else min(wait_for, remaining)
+                done, _ = wait(list(running) + list(abandoned), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    if future not in running:
+                        continue
+                    job, _ = running.pop(future)
+                    running_per_service[job.service] -= 1
+                    try:
+                        results[job.key] = future.result()
+                        logger.info("Finished scan job %s", job.key)
+                    except Exception as e:
+                        logger.error("Scan job %s failed: %s", job.key, e)
+                        results[job.key] = [Finding.error(e)]
+
+                now = time.monotonic()
+                for future, (job, state) in list(running.items()):
+                    timeout = self._timeout_for(job.service)
+                    if not timeout or state.started is None or now < state.started + timeout:
+                        continue
+                    with state.lock:
+                        state.cancelled = True
+                    running.pop(future)
+                    running_per_service[job.service] -= 1
+                    if not future.done():
+                        abandoned.add(future)
+                    msg = f"Scan job {job.key} timed out after {timeout}s"
+                    logger.error(msg)
+                    results[job.key] = [Finding.error(msg)]
+        finally:
+            # Abandoned jobs stop at their next finding; nothing queued is left to start
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
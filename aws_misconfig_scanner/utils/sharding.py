@@ -0,0 +1,304 @@
+import json
+import os
+import time
+from aws_misconfig_scanner.utils.findings import json_default, json_object_hook
+from aws_misconfig_scanner.utils.logger import setup_logger
+
+"""
+sharding.py
+
+Sharded Scanning
+
+This module splits a scan into N shards of scan units, so the work of a large account (listing,
+parsing describe payloads, evaluating rules and policies) can be spread over several worker
+processes or hosts:
+
+- Shard: decides which scan units a worker runs. A scan unit is a service in a region (IAM and
+  the S3 bucket listing are global units), with the services feeding a region's resource graph
+  grouped into one unit. Every unit is listed, parsed and evaluated by exactly one shard, which
+  also correlates the graph of the regions it owns.
+- ShardQueue: a work queue on a shared filesystem. Shards are task files claimed by an atomic
+  rename from pending/ to claimed/, so any number of nodes can work the same queue without a
+  coordinator, and each shard's results are published atomically to results/.
+- merge_results: combines the partial results of every shard into one report whose layout does
+  not depend on the shard count or on which worker finished first.
+
+Author: Tom D.
+"""
+
+logger = setup_logger(__name__)
+
+# Seconds between polls while waiting on other nodes
+QUEUE_POLL_SECONDS = 2.0
+
+
+class Shard:
+    """
+    Class: Shard
+
+    Description:
+        One of N disjoint slices of a scan's units.
+
+    Attributes:
+        index (int): Index of this shard, from 0 to count - 1.
+        count (int): Total number of shards.
+    """
+
+    def __init__(self, index, count):
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"Invalid shard {index} of {count}")
+        self.index = index
+        self.count = count
+
+    def units(self, units):
+        """
+        Returns the scan units owned by this shard.
+
+        Units are dealt round-robin in the order given, which must be the same in every shard.
+
+        Args:
+            units (iterable): Every scan unit of the scan.
+
+        Returns:
+            owned (set): The units of this shard.
+        """
+        return {unit for position, unit in enumerate(units) if position % self.count == self.index}
+
+    def __repr__(self):
+        return f"Shard({self.index}/{self.count})"
+
+
+def canonical_key(finding):
+    """
+    Returns the sort key giving findings a deterministic order.
+    """
+    return json.dumps(finding, sort_keys=True, default=json_default)
+
+
+def merge_results(partials, service_order=()):
+    """
+    Merges the per-shard results of a sharded scan into one report.
+
+    Args:
+        partials (iterable): Findings dictionaries (service -> findings), one per shard.
+        service_order (iterable): (Optional) Services listed first, in this order; any other
+            service follows in name order.
+
+    Returns:
+        findings (dict): Findings per service, each list sorted canonically.
+    """
+    merged = {}
+    for partial in partials:
+        for service, findings in partial.items():
+            merged.setdefault(service, []).extend(findings)
+    order = [service for service in service_order if service in merged]
+    order += sorted(service for service in merged if service not in order)
+    return {service: sorted(merged[service], key=canonical_key) for service in order}
+
+
+class ShardQueue:
+    """
+    Class: ShardQueue
+
+    Description:
+        Work queue of shards on a shared filesystem (e.g. NFS or EFS), worked by any number of
+        processes on any number of hosts.
+
+        Layout:
+            manifest.json       shard count and scan options, written once by the first node
+            pending/shard-N     shards nobody has claimed yet
+            claimed/shard-N     shards being worked on (mtime = claim time)
+            results/shard-N     published results of finished shards
+
+        A shard is claimed by renaming its task file from pending/ to claimed/; rename is atomic, so
+        exactly one worker wins. A worker that dies leaves its shard in claimed/, from where
+        requeue_stale() moves it back to pending/.
+
+    Attributes:
+        root (str): Queue directory.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self.pending_dir = os.path.join(root, 'pending')
+        self.claimed_dir = os.path.join(root, 'claimed')
+        self.results_dir = os.path.join(root, 'results')
+
+    @staticmethod
+    def _task_name(index):
+        return f"shard-{index:05d}.json"
+
+    @staticmethod
+    def _write_atomic(path, payload):
+        """
+        Writes JSON to a temporary file, syncs it and renames it into place.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, default=json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def initialize(self, shard_count, options=None):
+        """
+        Creates the queue with one pending task per shard, unless another node already has.
+
+        Args:
+            shard_count (int): Number of shards.
+            options (dict): (Optional) Scan options recorded in the manifest.
+
+        Returns:
+            manifest (dict): The queue's manifest.
+
+        Raises:
+            ValueError: If the queue exists with a different shard count.
+        """
+        for directory in (self.pending_dir, self.claimed_dir, self.results_dir):
+            os.makedirs(directory, exist_ok=True)
+        manifest = {'shards': shard_count, 'options': options or {}}
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, default=str)
+        try:
+            # link() fails if the manifest exists, so exactly one node creates the tasks
+            os.link(tmp_path, self.manifest_path)
+            created = True
+        except FileExistsError:
+            created = False
+        finally:
+            os.remove(tmp_path)
+
+        if created:
+            for index in range(shard_count):
+                self._write_atomic(os.path.join(self.pending_dir, self._task_name(index)), {'shard': index})
+            logger.info("Created shard queue %s with %s shards", self.root, shard_count)
+            return manifest
+
+        manifest = self.read_manifest()
+        if manifest['shards'] != shard_count:
+            raise ValueError(f"Shard queue {self.root} has {manifest['shards']} shards, not {shard_count}")
+        return manifest
+
+    def read_manifest(self):
+        """
+        Returns the queue's manifest.
+        """
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _names(self, directory):
+        return {name for name in os.listdir(directory) if name.endswith('.json')}
+
+    def wait_until_ready(self, shard_count, timeout=60.0):
+        """
+        Waits until every shard task created by the initializing node is visible.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            seen = self._names(self.pending_dir) | self._names(self.claimed_dir) | self._names(self.results_dir)
+            if len(seen) >= shard_count or time.monotonic() >= deadline:
+                return
+            time.sleep(min(QUEUE_POLL_SECONDS, 0.1))
+
+    def claim(self):
+        """
+        Claims the next pending shard.
+
+        Returns:
+            index (int): Index of the claimed shard, or None if no shard is pending.
+        """
+        for name in sorted(self._names(self.pending_dir)):
+            claimed_path = os.path.join(self.claimed_dir, name)
+            try:
+                os.rename(os.path.join(self.pending_dir, name), claimed_path)
+            except FileNotFoundError:
+                continue  # Claimed by another worker first
+            os.utime(claimed_path)
+            with open(claimed_path, 'r', encoding='utf-8') as f:
+                return json.load(f)['shard']
+        return None
+
+    def complete(self, index, results):
+        """
+        Publishes the results of a shard and releases its claim.
+
+        Args:
+            index (int): Index of the finished shard.
+            results (dict): Findings of the shard, per service.
+        """
+        name = self._task_name(index)
+        self._write_atomic(os.path.join(self.results_dir, name), {'shard': index, 'results': results})
+        try:
+            os.remove(os.path.join(self.claimed_dir, name))
+        except FileNotFoundError:
+            pass  # Requeued as stale meanwhile; the published results still win
+
+    def requeue_stale(self, max_age):
+        """
+        Moves shards claimed more than max_age seconds ago, and not finished, back to pending.
+
+        Returns:
+            requeued (list): Indexes of the requeued shards.
+        """
+        requeued = []
+        finished = self._names(self.results_dir)
+        now = time.time()
+        for name in sorted(self._names(self.claimed_dir) - finished):
+            claimed_path = os.path.join(self.claimed_dir, name)
+            try:
+                if now - os.path.getmtime(claimed_path) < max_age:
+                    continue
+                os.rename(claimed_path, os.path.join(self.pending_dir, name))
+            except FileNotFoundError:
+                continue
+            requeued.append(int(name[len('shard-'):-len('.json')]))
+        if requeued:
+            logger.warning("Requeued stale shards: %s", requeued)
+        return requeued
+
+    def finished(self):
+        """
+        Returns the number of shards whose results have been published.
+        """
+        return len(self._names(self.results_dir))
+
+    def work(self, run_shard, shard_count, timeout=None, stale_after=None):
+        """
+        Claims and runs shards until every shard of the queue has published its results.
+
+        Args:
+            run_shard (callable): Function taking a shard index and returning its findings per service.
+            shard_count (int): Number of shards.
+            timeout (float): (Optional) Maximum time to wait for other workers in seconds (None = no limit).
+            stale_after (float): (Optional) Requeue claims older than this many seconds while waiting.
+
+        Returns:
+            complete (bool): True if every shard finished in time.
+        """
+        self.wait_until_ready(shard_count)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self.finished() < shard_count:
+            index = self.claim()
+            if index is not None:
+                logger.info("Claimed shard %s of %s from %s", index, shard_count, self.root)
+                self.complete(index, run_shard(index))
+                continue
+            # Everything is claimed: wait for the other workers, taking over shards whose worker died
+            if stale_after is not None and self.requeue_stale(stale_after):
+                continue
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(QUEUE_POLL_SECONDS)
+        return True
+
+    def results(self):
+        """
+        Returns the published per-shard results, in shard order.
+        """
+        partials = []
+        for name in sorted(self._names(self.results_dir)):
+            with open(os.path.join(self.results_dir, name), 'r', encoding='utf-8') as f:
+                partials.append(json.load(f, object_hook=json_object_hook)['results'])
+        return partials
@@ -0,0 +1,131 @@
+import io
+import json
+import zipfile
+
+import boto3
+import pytest
+from moto import mock_aws
+from moto.ec2 import exceptions as ec2_exceptions
+from moto.ec2 import utils as ec2_utils
+from moto.ec2.models import core as ec2_core, security_groups as ec2_security_groups
+
+from aws_misconfig_scanner.modules import iam_scanner
+from aws_misconfig_scanner.utils.aws_clients import ClientFactory
+from aws_misconfig_scanner.utils.metrics import Metrics
+from aws_misconfig_scanner.utils.rate_limiter import RateLimiter
+
+REGION = 'us-east-1'
+
+
+class UnsupportedFilter(ec2_exceptions.InvalidFilter):
+    """
+    Reports a describe filter moto does not emulate the way AWS reports a filter an endpoint does
+    not support, instead of raising NotImplementedError inside the client call.
+    """
+
+    def __init__(self, filter_name, method_name=None):
+        super().__init__(filter_name)
+
+
+def _reject_unsupported(filter_function):
+    def wrapper(*args, **kwargs):
+        try:
+            return filter_function(*args, **kwargs)
+        except NotImplementedError as e:
+            raise UnsupportedFilter(str(e))
+    return wrapper
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    """
+    Runs the test against moto's in-memory AWS with dummy credentials. Filters moto does not
+    emulate are rejected with InvalidFilter, so pushed-down queries fall back to client-side evaluation.
+    """
+    monkeypatch.setattr(ec2_core, 'FilterNotImplementedError', UnsupportedFilter)
+    monkeypatch.setattr(ec2_security_groups, 'MotoNotImplementedError', UnsupportedFilter)
+    monkeypatch.setattr(ec2_utils, 'passes_filter_dict', _reject_unsupported(ec2_utils.passes_filter_dict))
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_SESSION_TOKEN', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', REGION)
+    with mock_aws():
+        yield
+
+
+@pytest.fixture
+def clients(aws):
+    """
+    Client factory with its own rate limiter and metrics registry, isolated from other tests.
+    """
+    return ClientFactory(session=boto3.session.Session(region_name=REGION), rate_limiter=RateLimiter(),
+                         metrics=Metrics())
+
+
+def populate_account(clients):
+    """
+    Creates a small account with a finding for every scanner: an exposed EC2 instance behind an
+    SSH-open security group, an open RDS instance, an unencrypted Lambda function, an S3 bucket,
+    and an IAM user with an admin policy and an unused access key.
+    """
+    ec2 = clients.client('ec2')
+    vpc_id = ec2.describe_vpcs()['Vpcs'][0]['VpcId']
+    subnet_id = ec2.describe_subnets()['Subnets'][0]['SubnetId']
+    image = ec2.describe_images()['Images'][0]['ImageId']
+    group_id = ec2.create_security_group(GroupName='ssh', Description='ssh', VpcId=vpc_id)['GroupId']
+    ec2.authorize_security_group_ingress(GroupId=group_id, IpPermissions=[
+        {'IpProtocol': 'tcp', 'FromPort': 22, 'ToPort': 22, 'IpRanges': [{'CidrIp': '0.0.0.0/0'}]},
+        {'IpProtocol': 'tcp', 'FromPort': 5432, 'ToPort': 5432, 'IpRanges': [{'CidrIp': '0.0.0.0/0'}]},
+    ])
+    for public in (True, False, True):
+        ec2.run_instances(ImageId=image, MinCount=1, MaxCount=1, NetworkInterfaces=[
+            {'DeviceIndex': 0, 'SubnetId': subnet_id, 'AssociatePublicIpAddress': public, 'Groups': [group_id]}
+        ])
+    for index in range(3):
+        clients.client('rds').create_db_instance(
+            DBInstanceIdentifier=f"db-{index}", DBInstanceClass='db.t3.micro', Engine='postgres',
+            MasterUsername='admin', MasterUserPassword='password123', AllocatedStorage=20,
+            PubliclyAccessible=index != 1, VpcSecurityGroupIds=[group_id]
+        )
+
+    iam = clients.client('iam')
+    iam.create_user(UserName='alice')
+    iam.create_access_key(UserName='alice')
+    iam.create_policy(PolicyName='everything', PolicyDocument=json.dumps(
+        {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': '*', 'Resource': '*'}]}
+    ))
+    role = iam.create_role(RoleName='fn', AssumeRolePolicyDocument=json.dumps({
+        'Version': '2012-10-17',
+        'Statement': [{'Effect': 'Allow', 'Principal': {'Service': 'lambda.amazonaws.com'}, 'Action': 'sts:AssumeRole'}]
+    }))['Role']['Arn']
+    for index in range(3):
+        clients.client('lambda').create_function(FunctionName=f"fn-{index}", Runtime='python3.12', Role=role,
+                                                 Handler='handler.handler', Code={'ZipFile': lambda_zip()})
+    for index in range(3):
+        clients.client('s3').create_bucket(Bucket=f"bucket-{index}")
+
+
+def lambda_zip():
+    """
+    Returns a minimal Lambda deployment package.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('handler.py', 'def handler(event, context):\n    return None\n')
+    return buffer.getvalue()
+
+
+def canonical(results):
+    """
+    Returns scan results per service as sorted finding dictionaries, independent of finding order.
+    """
+    return {service: sorted(json.dumps(finding.to_dict(), sort_keys=True, default=str) for finding in findings)
+            for service, findings in results.items()}
+
+
+@pytest.fixture
+def populated(clients, monkeypatch):
+    # moto reports a new credential report as still generating on the first request
+    monkeypatch.setattr(iam_scanner, 'CREDENTIAL_REPORT_POLL_SECONDS', 0)
+    populate_account(clients)
+    return clients
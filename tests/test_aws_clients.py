@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import Counter
+
+import boto3
+
+from aws_misconfig_scanner.main import AWSMisconfigurationScanner
+from aws_misconfig_scanner.utils.aws_clients import ClientFactory
+from aws_misconfig_scanner.utils.metrics import Metrics
+from aws_misconfig_scanner.utils.rate_limiter import RateLimiter
+from conftest import REGION
+
+
+class CountingSession:
+    """
+    boto3 session wrapper counting client creations; creation is slowed down to widen races.
+    """
+
+    def __init__(self, delay=0.0):
+        self.session = boto3.session.Session(region_name=REGION)
+        self.region_name = REGION
+        self.delay = delay
+        self.created = []
+        self._lock = threading.Lock()
+
+    def client(self, service_name, region_name=None, config=None):
+        time.sleep(self.delay)
+        with self._lock:
+            self.created.append((service_name, region_name))
+        return self.session.client(service_name, region_name=region_name, config=config)
+
+
+class RegistrationLog:
+    def __init__(self):
+        self.registrations = Counter()
+        self.accounts = set()
+
+    def register(self, client, account_id=None):
+        self.registrations[id(client)] += 1
+        self.accounts.add(account_id)
+
+
+def _factory(session, *hooks, account_id=None):
+    return ClientFactory(session=session, account_id=account_id, rate_limiter=RateLimiter(), metrics=Metrics(),
+                         event_hooks=hooks)
+
+
+def test_clients_are_created_lazily(aws):
+    session = CountingSession()
+    clients = _factory(session)
+    AWSMisconfigurationScanner(clients=clients)
+    assert session.created == []
+    clients.client('ec2')
+    assert session.created == [('ec2', REGION)]
+
+
+def test_one_client_per_service_and_region(aws):
+    session = CountingSession()
+    clients = _factory(session)
+    ec2 = clients.client('ec2')
+    assert clients.client('ec2', REGION) is ec2
+    assert clients.client('ec2', 'eu-west-1') is not ec2
+    assert clients.client('ec2', 'eu-west-1').meta.region_name == 'eu-west-1'
+    assert clients.client('rds') is not ec2
+    assert sorted(session.created) == [('ec2', 'eu-west-1'), ('ec2', REGION), ('rds', REGION)]
+
+
+def test_concurrent_first_use_creates_one_client(aws):
+    session = CountingSession(delay=0.05)
+    clients = _factory(session)
+    barrier = threading.Barrier(16)
+    returned = []
+
+    def worker():
+        barrier.wait()
+        returned.append(clients.client('ec2'))
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(returned) == 16 and all(client is returned[0] for client in returned)
+    assert session.created == [('ec2', REGION)]
+
+
+def test_event_hooks_are_registered_once_per_client(aws):
+    hooks = RegistrationLog(), RegistrationLog()
+    clients = _factory(CountingSession(), *hooks, account_id='111111111111')
+    created = {id(clients.client(service, region)) for _ in range(3)
+               for service in ('ec2', 's3') for region in (REGION, 'eu-west-1')}
+    assert len(created) == 4
+    for hook in hooks:
+        assert hook.registrations == Counter({client_id: 1 for client_id in created})
+        assert hook.accounts == {'111111111111'}
+
+
+def test_factory_for_another_session_keeps_configuration_and_hooks(aws):
+    hook = RegistrationLog()
+    clients = _factory(CountingSession(), hook)
+    other = clients.with_session(CountingSession(), account_id='222222222222')
+    client = other.client('ec2')
+    assert other.config is clients.config and other.metrics is clients.metrics
+    assert other.rate_limiter is clients.rate_limiter
+    assert client is not clients.client('ec2')
+    assert hook.registrations[id(client)] == 1 and hook.accounts == {None, '222222222222'}
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from aws_misconfig_scanner.modules.lambda_scanner import LambdaScanner
+from aws_misconfig_scanner.utils.cache import ScanCache
+from aws_misconfig_scanner.utils.findings import Finding
+from aws_misconfig_scanner.utils.query import Check, ResourceQuery
+from conftest import lambda_zip
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ScanCache(str(tmp_path / 'cache.sqlite3'), max_entries=10)
+    yield cache
+    cache.close()
+
+
+def test_entries_are_reused_until_the_marker_changes(cache):
+    computed = []
+
+    def compute():
+        computed.append(1)
+        return [Finding.error('cached')]
+
+    assert cache.get_or_compute('ns', 'key', 'v1', compute)[0]['Error'] == 'cached'
+    assert cache.get_or_compute('ns', 'key', 'v1', compute)[0]['Error'] == 'cached'
+    cache.get_or_compute('ns', 'key', 'v2', compute)
+    assert len(computed) == 2
+    assert cache.stats()['hits'] == 1
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for index in range(11):
+        cache.put('ns', str(index), 'marker', [])
+    assert cache.stats()['entries'] == 9
+    assert cache.get('ns', '0', 'marker') is None
+    assert cache.get('ns', '10', 'marker') == []
+
+
+class SingleResourceClient:
+    """
+    Serves one describe page holding the same resource id in every account.
+    """
+
+    meta = type('Meta', (), {'region_name': 'us-east-1'})()
+
+    def get_paginator(self, operation):
+        return self
+
+    def paginate(self, Filters=None):
+        yield {'Things': [{'Id': 'db-1', 'Public': True}]}
+
+
+def test_query_cache_keys_include_the_account(cache):
+    query = ResourceQuery('describe_things', ('Things',), 'Id', checks=[
+        Check('public', ('Public',), lambda resource: [Finding.error(resource['Id'])])
+    ])
+    for account_id in ('111111111111', '222222222222', '111111111111', '222222222222'):
+        list(query.iter_findings(SingleResourceClient(), cache=cache, account_id=account_id))
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert (stats['hits'], stats['misses']) == (2, 2)
+
+
+def test_lambda_policy_and_concurrency_changes_invalidate_cached_evaluations(clients, cache):
+    role = clients.client('iam').create_role(RoleName='fn', AssumeRolePolicyDocument=json.dumps({
+        'Version': '2012-10-17',
+        'Statement': [{'Effect': 'Allow', 'Principal': {'Service': 'lambda.amazonaws.com'}, 'Action': 'sts:AssumeRole'}]
+    }))['Role']['Arn']
+    lambda_client = clients.client('lambda')
+    lambda_client.create_function(FunctionName='fn', Runtime='python3.12', Role=role, Handler='handler.handler',
+                                  Code={'ZipFile': lambda_zip()})
+
+    def rules():
+        return sorted(finding.rule_id for finding in LambdaScanner(cache=cache, clients=clients).iter_findings())
+
+    assert rules() == ['lambda-env-kms', 'lambda-reserved-concurrency']
+    assert rules() == ['lambda-env-kms', 'lambda-reserved-concurrency']
+    assert cache.stats()['hits'] == 1
+
+    lambda_client.add_permission(FunctionName='fn', StatementId='public', Action='lambda:InvokeFunction',
+                                 Principal='*')
+    lambda_client.put_function_concurrency(FunctionName='fn', ReservedConcurrentExecutions=5)
+    assert rules() == ['lambda-env-kms', 'lambda-public-resource-policy']
+    assert cache.stats()['hits'] == 1
@@ -0,0 +1,34 @@
+import pytest
+
+from aws_misconfig_scanner.main import AWSMisconfigurationScanner
+from conftest import canonical
+
+
+def _scan(clients, **options):
+    return canonical(AWSMisconfigurationScanner(clients=clients).run_all_scans(**options))
+
+
+def test_populated_account_has_findings_for_every_service(populated):
+    results = _scan(populated)
+    assert all(results[service] for service in ('EC2', 'IAM', 'Lambda', 'RDS', 'SecurityGroups', 'S3', 'Exposure'))
+    assert not any('"Error"' in finding for findings in results.values() for finding in findings)
+
+
+@pytest.mark.parametrize('options', [
+    {'concurrent': True},
+    {'engine': 'asyncio'},
+    {'engine': 'asyncio', 'max_workers': 2, 'service_concurrency': {'EC2': 1}},
+])
+def test_engines_produce_the_same_findings(populated, options):
+    assert _scan(populated, **options) == _scan(populated)
+
+
+def test_engines_stream_the_same_findings(populated):
+    streamed = {}
+
+    def sink(service, finding):
+        streamed.setdefault(service, []).append(finding)
+
+    counts = AWSMisconfigurationScanner(clients=populated).run_all_scans(engine='asyncio', sink=sink)
+    assert canonical(streamed) == {service: findings for service, findings in _scan(populated).items() if findings}
+    assert counts == {service: len(findings) for service, findings in _scan(populated).items()}
@@ -0,0 +1,118 @@
+import json
+import pickle
+
+import pytest
+
+from aws_misconfig_scanner.utils.findings import (
+    Finding, Severity, count_by, error_type, finding_type, group_by, json_default, json_object_hook, literal_template,
+)
+
+PUBLIC_IP = finding_type('ec2-public-ip', 'high', 'ec2-instance', "Instance {id} has public IP {0}.")
+OPEN_PORTS = finding_type('sg-open-ports', Severity.CRITICAL, 'security-group', "Group {id} exposes {Ports} to {0}.")
+
+
+def _findings():
+    return [
+        Finding(PUBLIC_IP, 'i-1', ('1.2.3.4',), region='us-east-1'),
+        Finding(PUBLIC_IP, 'i-2', ('5.6.7.8',), region='eu-west-1'),
+        Finding(OPEN_PORTS, 'sg-1', ('0.0.0.0/0',), region='us-east-1', details={'Ports': [22, 3389]}),
+        Finding.error('AccessDenied', 'ec2-instance', region='eu-west-1'),
+    ]
+
+
+def test_finding_types_are_interned():
+    same = finding_type(''.join(['ec2-', 'public-ip']), 3, 'ec2-instance', "Instance {id} has public IP {0}.")
+    assert same is PUBLIC_IP
+    assert same.rule_id is PUBLIC_IP.rule_id
+    assert same.severity is Severity.HIGH
+    assert finding_type('ec2-public-ip', 'low', 'ec2-instance', "Instance {id} has public IP {0}.") is not PUBLIC_IP
+    assert error_type('s3-bucket') is error_type('s3-bucket')
+
+
+def test_message_is_rendered_from_the_template():
+    finding = _findings()[2]
+    assert finding.message == "Group sg-1 exposes 22, 3389 to 0.0.0.0/0."
+    assert str(finding) == finding.message
+    literal = Finding(finding_type('custom', 'low', None, literal_template("Policy {\"Action\": \"*\"}")))
+    assert literal.message == "Policy {\"Action\": \"*\"}"
+
+
+def test_to_dict_uses_the_legacy_keys():
+    finding, _, group, error = _findings()
+    assert finding.to_dict() == {
+        'InstanceId': 'i-1', 'Issue': "Instance i-1 has public IP 1.2.3.4.", 'RuleId': 'ec2-public-ip',
+        'Severity': 'HIGH', 'Region': 'us-east-1',
+    }
+    assert group.to_dict()['Ports'] == [22, 3389]
+    assert error.replace(account_id='111111111111').to_dict() == {
+        'Error': 'AccessDenied', 'Region': 'eu-west-1', 'AccountId': '111111111111',
+    }
+
+
+def test_finding_is_a_read_only_mapping():
+    finding = _findings()[2]
+    assert list(finding) == ['SecurityGroup', 'Ports', 'Issue', 'RuleId', 'Severity', 'Region']
+    assert len(finding) == 6
+    assert finding['SecurityGroup'] == 'sg-1'
+    assert 'Issue' in finding and 'Error' not in finding
+    assert finding.get('Error', 'none') == 'none'
+    assert dict(finding) == finding.to_dict()
+    assert finding == finding.to_dict()
+    with pytest.raises(KeyError):
+        finding['Error']
+    with pytest.raises(TypeError):
+        hash(finding)
+
+
+def test_details_accept_pairs_and_dicts():
+    from_pairs = Finding(OPEN_PORTS, 'sg-1', ('::/0',), details=[('Ports', [22])])
+    from_dict = Finding(OPEN_PORTS, 'sg-1', ('::/0',), details={'Ports': [22]})
+    assert from_pairs == from_dict
+    assert from_pairs.detail('Ports') == [22]
+    assert from_pairs.detail('Protocol', 'tcp') == 'tcp'
+
+
+def test_records_and_json_roundtrip():
+    findings = _findings()
+    assert [Finding.from_record(finding.to_record()) for finding in findings] == findings
+    decoded = json.loads(json.dumps({'EC2': findings}, default=json_default), object_hook=json_object_hook)
+    assert decoded == {'EC2': findings}
+    assert decoded['EC2'][0].type is PUBLIC_IP
+    assert decoded['EC2'][3].is_error
+
+
+def test_pickled_findings_keep_interned_types():
+    findings = pickle.loads(pickle.dumps(_findings()))
+    assert findings == _findings()
+    assert findings[0].type is PUBLIC_IP
+    assert findings[3].type is error_type('ec2-instance')
+
+
+def test_count_and_group_by():
+    findings = _findings()
+    assert count_by(findings) == {'ec2-public-ip': 2, 'sg-open-ports': 1, 'scan-error': 1}
+    assert count_by(findings, 'severity') == {Severity.HIGH: 2, Severity.CRITICAL: 1, None: 1}
+    assert count_by(findings, lambda finding: finding.is_error) == {False: 3, True: 1}
+    groups = group_by(findings, 'region')
+    assert list(groups) == ['us-east-1', 'eu-west-1']
+    assert [finding.resource_id for finding in groups['eu-west-1']] == ['i-2', None]
+    assert list(group_by(findings, 'type')) == [PUBLIC_IP, OPEN_PORTS, error_type('ec2-instance')]
+    with pytest.raises(ValueError):
+        count_by(findings, 'message')
+
+
+def test_replace_returns_a_modified_copy():
+    finding = _findings()[0]
+    tagged = finding.replace(account_id='111111111111', region='eu-west-1')
+    assert tagged.account_id == '111111111111' and tagged.region == 'eu-west-1'
+    assert tagged.type is finding.type and tagged.params == finding.params
+    assert finding.account_id is None and finding.region == 'us-east-1'
+    assert tagged != finding
+
+
+def test_error_findings():
+    error = Finding.error(ValueError('Bad {value}'), 's3-bucket', 'logs', details={'Code': 'AccessDenied'})
+    assert error.is_error and error.severity is None and error.rule_id == 'scan-error'
+    assert error.message == 'Bad {value}'
+    assert error.to_dict() == {'Bucket': 'logs', 'Code': 'AccessDenied', 'Error': 'Bad {value}'}
+    assert not _findings()[0].is_error
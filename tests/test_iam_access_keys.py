@@ -0,0 +1,70 @@
+import botocore
+import pytest
+
+from aws_misconfig_scanner.modules.iam_scanner import IAMScanner
+
+
+@pytest.fixture
+def scanner(clients):
+    iam = clients.client('iam')
+    iam.create_user(UserName='alice')
+    key_id = iam.create_access_key(UserName='alice')['AccessKey']['AccessKeyId']
+    scanner = IAMScanner(clients=clients)
+    scanner.key_id = key_id
+    return scanner
+
+
+def _unused(findings):
+    return [finding for finding in findings if finding.rule_id == 'iam-unused-access-key']
+
+
+def test_unused_key_from_credential_report(scanner):
+    findings = []
+    scanner.check_inactive_access_keys(findings)
+    [finding] = _unused(findings)
+    assert finding.resource_id == 'alice'
+    assert finding.detail('AccessKey') == 'access_key_1'
+    assert finding.message == "Access key access_key_1 for user alice has never been used."
+
+
+def test_falls_back_to_api_when_report_cannot_be_fetched(scanner, monkeypatch):
+    def unavailable():
+        raise botocore.exceptions.ClientError({'Error': {'Code': 'ReportInProgress', 'Message': 'busy'}},
+                                              'GetCredentialReport')
+
+    monkeypatch.setattr(scanner, '_fetch_credential_report', unavailable)
+    findings = []
+    scanner.check_inactive_access_keys(findings)
+    [finding] = _unused(findings)
+    # Both paths report the key under the same detail; only the API path knows its id
+    assert finding.detail('AccessKey') == scanner.key_id
+    assert finding.message == f"Access key {scanner.key_id} for user alice has never been used."
+
+
+def test_report_evaluation_errors_are_not_masked_by_the_fallback(scanner, monkeypatch):
+    content = (b"user,arn,access_key_1_active,access_key_1_last_used_date,access_key_2_active,"
+               b"access_key_2_last_used_date\n"
+               b"alice,arn:aws:iam::123456789012:user/alice,true,N/A,false,N/A\n"
+               b"bob,arn:aws:iam::123456789012:user/bob,true,not-a-date,false,N/A\n")
+    monkeypatch.setattr(scanner, '_fetch_credential_report', lambda: content)
+    findings = []
+    with pytest.raises(ValueError):
+        scanner.check_inactive_access_keys(findings)
+    # The per-key path did not run and add a duplicate of alice's finding
+    assert len(_unused(findings)) == 1
+
+
+def test_stale_key_reports_idle_days(scanner, monkeypatch):
+    content = (b"user,arn,access_key_1_active,access_key_1_last_used_date,access_key_2_active,"
+               b"access_key_2_last_used_date\n"
+               b"<root_account>,arn:aws:iam::123456789012:root,true,N/A,false,N/A\n"
+               b"bob,arn:aws:iam::123456789012:user/bob,false,N/A,true,2020-01-01T00:00:00+00:00\n")
+    monkeypatch.setattr(scanner, '_fetch_credential_report', lambda: content)
+    findings = []
+    scanner.check_inactive_access_keys(findings)
+    by_rule = {finding.rule_id: finding for finding in findings}
+    assert by_rule['iam-root-access-key'].detail('AccessKey') == 'access_key_1'
+    stale = by_rule['iam-stale-access-key']
+    assert stale.resource_id == 'bob'
+    assert stale.detail('AccessKey') == 'access_key_2'
+    assert stale.params[0] > 90
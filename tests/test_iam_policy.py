@@ -0,0 +1,121 @@
+import pytest
+
+from aws_misconfig_scanner.modules.iam_policy import (
+    ActionCatalog, PolicyAnalyzer, ResourcePolicyAnalyzer, document_hash, get_action_catalog,
+)
+
+CATALOG = ActionCatalog({
+    'iam': ['AttachUserPolicy', 'GetUser', 'ListUsers', 'PassRole'],
+    's3': ['GetObject', 'GetObjectAcl', 'ListBucket', 'PutObject'],
+    'sqs': ['SendMessage'],
+})
+
+
+def _document(*statements):
+    return {'Version': '2012-10-17', 'Statement': list(statements)}
+
+
+def _allow(action=None, resource='*', not_action=None, condition=None, effect='Allow'):
+    statement = {'Effect': effect, 'Resource': resource}
+    if action is not None:
+        statement['Action'] = action
+    if not_action is not None:
+        statement['NotAction'] = not_action
+    if condition is not None:
+        statement['Condition'] = condition
+    return statement
+
+
+@pytest.mark.parametrize('pattern, expected', [
+    ('*', 9),
+    ('s3:*', 4),
+    ('S3:Get*', 2),
+    ('s3:GetObject', 1),
+    ('s3:Get?bject', 1),
+    ('*:List*', 2),
+    ('ec2:DescribeInstances', 1),
+    ('ec2:Describe*', 0),
+])
+def test_patterns_expand_against_the_catalog(pattern, expected):
+    assert len(CATALOG.expand(pattern)) == expected
+
+
+def test_full_admin_and_explicit_denies():
+    analyzer = PolicyAnalyzer(CATALOG)
+    assert analyzer.analyze(_document(_allow('*'))).full_admin
+    narrowed = analyzer.analyze(_document(_allow('*'), _allow('iam:*', effect='Deny')))
+    assert not narrowed.full_admin
+    assert narrowed.wildcard_allows and narrowed.overly_permissive
+    assert analyzer.analyze(_document(_allow(not_action='sqs:*'))).not_action_allows
+
+
+def test_scoped_statements_are_constrained():
+    analyzer = PolicyAnalyzer(CATALOG)
+    assert not analyzer.analyze(_document(_allow('*', resource='arn:aws:s3:::bucket/*'))).overly_permissive
+    assert not analyzer.analyze(_document(_allow(['s3:GetObject', 'iam:GetUser']))).overly_permissive
+
+
+def test_conditioned_allows_are_reported_as_conditional():
+    analyzer = PolicyAnalyzer(CATALOG)
+    mfa = {'Bool': {'aws:MultiFactorAuthPresent': 'true'}}
+    analysis = analyzer.analyze(_document(_allow('*', condition=mfa)))
+    assert analysis.overly_permissive and not analysis.full_admin
+    assert analysis.conditional.full_admin
+    assert analysis.reasons() == [
+        'grants full administrative access (all actions on all resources) when its conditions are met'
+    ]
+    mixed = analyzer.analyze(_document(_allow('s3:*'), _allow('iam:PassRole', condition=mfa)))
+    assert mixed.reasons() == [
+        'grants all s3 actions on all resources',
+        'allows privilege escalation actions on all resources: iam:passrole when its conditions are met',
+    ]
+
+
+def test_conditioned_denies_are_ignored():
+    analyzer = PolicyAnalyzer(CATALOG)
+    analysis = analyzer.analyze(_document(_allow('*'), _allow('iam:*', effect='Deny', condition={'Bool': {}})))
+    assert analysis.full_admin and analysis.conditional is None
+
+
+def test_service_wildcards_and_escalations():
+    analyzer = PolicyAnalyzer(CATALOG)
+    analysis = analyzer.analyze(_document(_allow('s3:*'), _allow('iam:PassRole')))
+    assert analysis.service_wildcards == ('s3',)
+    assert analysis.escalations == ('iam:passrole',)
+    assert analysis.reasons() == ['grants all s3 actions on all resources',
+                                  'allows privilege escalation actions on all resources: iam:passrole']
+
+
+def test_combined_policies_can_grant_full_admin():
+    analyzer = PolicyAnalyzer(CATALOG)
+    parts = [analyzer.analyze(_document(_allow(pattern))) for pattern in ('iam:*', 's3:*', 'sqs:*')]
+    assert not any(part.full_admin for part in parts)
+    assert analyzer.combined_full_admin(parts)
+    assert not analyzer.combined_full_admin(parts[:2])
+
+
+def test_equivalent_documents_are_analyzed_once():
+    analyzer = PolicyAnalyzer(CATALOG)
+    first = _document({'Sid': 'A', **_allow(['s3:GetObject', 'IAM:PassRole'])})
+    second = _document({'Sid': 'B', **_allow(['iam:passrole', 's3:getobject'])})
+    assert document_hash(first) == document_hash(second)
+    assert analyzer.analyze(first) is analyzer.analyze(second)
+    assert analyzer.stats() == {'evaluations': 1, 'reuses': 1}
+
+
+def test_bundled_catalog_covers_common_actions():
+    catalog = get_action_catalog()
+    assert {'iam:passrole', 's3:getobject', 'lambda:invokefunction'} <= catalog.all_actions
+
+
+@pytest.mark.parametrize('statement, public', [
+    ({'Effect': 'Allow', 'Principal': '*', 'Action': 'lambda:InvokeFunction'}, True),
+    ({'Effect': 'Allow', 'Principal': {'AWS': ['*']}, 'Action': 'lambda:InvokeFunction'}, True),
+    ({'Effect': 'Allow', 'Principal': '*', 'Action': 'lambda:InvokeFunction',
+      'Condition': {'ArnLike': {'AWS:SourceArn': 'arn:aws:s3:::bucket'}}}, False),
+    ({'Effect': 'Allow', 'Principal': {'Service': 's3.amazonaws.com'}, 'Action': 'lambda:InvokeFunction'}, False),
+    ({'Effect': 'Deny', 'Principal': '*', 'Action': 'lambda:InvokeFunction'}, False),
+])
+def test_public_resource_policy_statements(statement, public):
+    positions = ResourcePolicyAnalyzer().public_statements(_document(statement))
+    assert positions == ((0,) if public else ())
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from aws_misconfig_scanner.modules.iam_scanner import IAMScanner
+from aws_misconfig_scanner.modules.iam_snapshot import IAMSnapshot, grants_full_admin, load_policy_document
+
+ADMIN_ARN = 'arn:aws:iam::aws:policy/AdministratorAccess'
+FULL_ADMIN = {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': '*', 'Resource': '*'}]}
+READ_ONLY = {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': 's3:GetObject', 'Resource': '*'}]}
+TRUST = json.dumps({'Version': '2012-10-17', 'Statement': [
+    {'Effect': 'Allow', 'Principal': {'Service': 'lambda.amazonaws.com'}, 'Action': 'sts:AssumeRole'}
+]})
+
+
+@pytest.fixture
+def managed_policies(monkeypatch):
+    # moto only knows AWS managed policies such as AdministratorAccess when asked to load them
+    monkeypatch.setenv('MOTO_IAM_LOAD_MANAGED_POLICIES', 'true')
+
+
+@pytest.fixture
+def account(managed_policies, clients):
+    iam = clients.client('iam')
+    iam.create_group(GroupName='admins')
+    iam.attach_group_policy(GroupName='admins', PolicyArn=ADMIN_ARN)
+    for user in ('alice', 'bob', 'carol'):
+        iam.create_user(UserName=user)
+    iam.add_user_to_group(GroupName='admins', UserName='alice')
+    iam.attach_user_policy(UserName='bob', PolicyArn=ADMIN_ARN)
+    local = iam.create_policy(PolicyName='reader', PolicyDocument=json.dumps(READ_ONLY))['Policy']['Arn']
+    iam.attach_user_policy(UserName='carol', PolicyArn=local)
+    iam.create_role(RoleName='deployer', AssumeRolePolicyDocument=TRUST)
+    iam.put_role_policy(RoleName='deployer', PolicyName='everything', PolicyDocument=json.dumps(FULL_ADMIN))
+    return clients
+
+
+def _by_rule(findings):
+    grouped = {}
+    for finding in findings:
+        grouped.setdefault(finding.rule_id, set()).add(finding.resource_id)
+    return grouped
+
+
+def test_snapshot_indexes_principals_and_policies(account):
+    snapshot = IAMSnapshot.from_client(account.client('iam'))
+    assert set(snapshot.users) == {'alice', 'bob', 'carol'}
+    assert set(snapshot.roles) >= {'deployer'}
+    assert [group['GroupName'] for group in snapshot.user_groups('alice')] == ['admins']
+    [local] = snapshot.local_policies()
+    assert local['PolicyName'] == 'reader'
+    assert snapshot.default_policy_document(local['Arn']) == READ_ONLY
+
+
+def test_snapshot_detects_inherited_and_inline_admin_access(account):
+    scanner = IAMScanner(clients=account)
+    snapshot = scanner.load_snapshot()
+    findings = []
+    scanner.check_users_for_admin_access(findings, snapshot)
+    scanner.check_roles_for_admin_access(findings, snapshot)
+    grouped = _by_rule(findings)
+    assert grouped['iam-user-administrator-access'] == {'bob'}
+    assert grouped['iam-user-group-admin-access'] == {'alice'}
+    assert grouped['iam-role-admin-access'] == {'deployer'}
+    assert 'carol' not in {finding.resource_id for finding in findings}
+
+
+def test_snapshot_agrees_with_api_path_on_direct_attachments(account):
+    scanner = IAMScanner(clients=account)
+    from_snapshot, from_api = [], []
+    scanner.check_users_for_admin_access(from_snapshot, scanner.load_snapshot())
+    scanner.check_users_for_admin_access(from_api)
+    direct = [finding for finding in from_snapshot if finding.rule_id == 'iam-user-administrator-access']
+    assert direct == from_api
+
+
+def test_snapshot_checks_make_no_per_principal_calls(account):
+    scanner = IAMScanner(clients=account)
+    list(scanner.iter_findings())
+    operations = {entry['operation'] for entry in account.metrics.snapshot()['api_calls']}
+    assert 'GetAccountAuthorizationDetails' in operations
+    assert not operations & {'ListAttachedUserPolicies', 'ListAttachedRolePolicies', 'GetPolicyVersion'}
+
+
+def test_url_encoded_documents_are_decoded():
+    encoded = '%7B%22Statement%22%3A%20%7B%22Effect%22%3A%20%22Allow%22%2C%20%22Action%22%3A%20%22%2A%22%2C%20' \
+              '%22Resource%22%3A%20%22%2A%22%7D%7D'
+    assert load_policy_document(encoded)['Statement']['Action'] == '*'
+    assert grants_full_admin(encoded)
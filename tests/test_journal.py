@@ -0,0 +1,71 @@
+from aws_misconfig_scanner.main import SERVICE_ORDER, AWSMisconfigurationScanner
+from aws_misconfig_scanner.utils.findings import Finding, finding_type
+from aws_misconfig_scanner.utils.journal import ScanJournal
+from conftest import canonical
+
+
+PUBLIC_BUCKET = finding_type('s3-public-bucket', 'high', 's3-bucket', 'Bucket {id} is public.')
+
+
+def _finding(resource_id):
+    return Finding(PUBLIC_BUCKET, resource_id)
+
+
+def test_unit_findings_are_journaled_as_found(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = ScanJournal(path)
+    progress = journal.unit(('S3', 'global'))
+    progress.start()
+    progress.record_finding(_finding('a'))
+    assert journal.completed == {}
+    progress.record_finding(_finding('b'))
+    progress.complete()
+    journal.close()
+
+    resumed = ScanJournal(path, resume=True)
+    assert resumed.unit(('S3', 'global')).replay() == [_finding('a'), _finding('b')]
+    resumed.close()
+
+
+def test_unfinished_and_superseded_attempts_are_discarded(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = ScanJournal(path)
+    interrupted = journal.unit('IAM')
+    interrupted.start()
+    interrupted.record_finding(_finding('old'))
+    retried = journal.unit('IAM')
+    retried.start()
+    retried.record_finding(_finding('new'))
+    retried.complete()
+    failed = journal.unit('Lambda')
+    failed.start()
+    failed.record_finding(Finding.error('AccessDenied'))
+    failed.complete()
+    unfinished = journal.unit('S3')
+    unfinished.start()
+    unfinished.record_finding(_finding('bucket'))
+    journal.close()
+
+    resumed = ScanJournal(path, resume=True)
+    assert resumed.completed == {'IAM': [_finding('new')]}
+    resumed.close()
+
+
+def test_resumed_scan_replays_finished_jobs(populated, tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = ScanJournal(path)
+    first = AWSMisconfigurationScanner(clients=populated, correlate=False, journal=journal).run_all_scans()
+    journal.close()
+
+    journal = ScanJournal(path, resume=True)
+    resumed = AWSMisconfigurationScanner(clients=populated, correlate=False, journal=journal).run_all_scans()
+    journal.close()
+    assert canonical(resumed) == canonical(first)
+    assert journal.stats()['replayed_units'] == len(SERVICE_ORDER)
+
+
+def test_graph_jobs_are_rescanned_when_correlating(populated, tmp_path):
+    journal = ScanJournal(str(tmp_path / 'journal.jsonl'))
+    AWSMisconfigurationScanner(clients=populated, journal=journal).run_all_scans()
+    journal.close()
+    assert journal.stats()['recorded_units'] == len(SERVICE_ORDER) - 3
@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from collections import Counter
+
+import boto3
+import botocore
+import pytest
+
+from aws_misconfig_scanner.modules.lambda_scanner import LambdaScanner
+from aws_misconfig_scanner.utils.aws_clients import ClientFactory
+from aws_misconfig_scanner.utils.cache import ScanCache
+from aws_misconfig_scanner.utils.metrics import Metrics
+from aws_misconfig_scanner.utils.rate_limiter import RateLimiter
+from aws_misconfig_scanner.utils.rules import load_rules
+from conftest import REGION, lambda_zip
+
+ENRICHMENT_OPERATIONS = {'GetFunctionConcurrency', 'GetPolicy'}
+
+
+class FunctionCalls:
+    """
+    Client event hook counting the per-function calls, delaying the calls of the functions in
+    slow and failing the (operation, function) pairs in fail with AccessDenied.
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self.slow = {}
+        self.fail = set()
+        self._lock = threading.Lock()
+
+    def register(self, client, account_id=None):
+        def intercept(params, model, **kwargs):
+            function_name = params.get('FunctionName')
+            with self._lock:
+                self.calls[(model.name, function_name)] += 1
+            time.sleep(self.slow.get(function_name, 0.0))
+            if (model.name, function_name) in self.fail:
+                raise botocore.exceptions.ClientError(
+                    {'Error': {'Code': 'AccessDenied', 'Message': 'Access Denied'}}, model.name
+                )
+        client.meta.events.register('before-parameter-build', intercept)
+
+    def operations(self):
+        return Counter(operation for operation, _ in self.calls.elements())
+
+
+@pytest.fixture
+def functions(aws):
+    """
+    Twelve functions, the first of which has a public resource policy; returns them in listing order.
+    """
+    hook = FunctionCalls()
+    clients = ClientFactory(session=boto3.session.Session(region_name=REGION), rate_limiter=RateLimiter(),
+                            metrics=Metrics(), event_hooks=[hook])
+    role = clients.client('iam').create_role(RoleName='fn', AssumeRolePolicyDocument=json.dumps({
+        'Version': '2012-10-17',
+        'Statement': [{'Effect': 'Allow', 'Principal': {'Service': 'lambda.amazonaws.com'}, 'Action': 'sts:AssumeRole'}]
+    }))['Role']['Arn']
+    client = clients.client('lambda')
+    for index in range(12):
+        client.create_function(FunctionName=f"fn-{index:02d}", Runtime='python3.12', Role=role,
+                               Handler='handler.handler', Code={'ZipFile': lambda_zip()})
+    client.add_permission(FunctionName='fn-00', StatementId='public', Action='lambda:InvokeFunction', Principal='*')
+    names = [function['FunctionName'] for function in client.list_functions()['Functions']]
+    hook.calls.clear()
+    return clients, hook, names
+
+
+def _rules(findings, function_name):
+    return sorted(finding.rule_id for finding in findings if finding.resource_id == function_name)
+
+
+def test_enrichment_calls_are_skipped_without_a_rule_reading_them(functions):
+    clients, hook, names = functions
+    rules = load_rules(disabled=['lambda-reserved-concurrency', 'lambda-public-resource-policy'])
+    scanner = LambdaScanner(clients=clients, rules=rules)
+    findings = list(scanner.iter_findings())
+    assert scanner.enrichments == []
+    assert not ENRICHMENT_OPERATIONS & set(hook.operations())
+    assert all(_rules(findings, name) == ['lambda-env-kms'] for name in names)
+
+    rules = load_rules(disabled=['lambda-reserved-concurrency'])
+    hook.calls.clear()
+    list(LambdaScanner(clients=clients, rules=rules).iter_findings())
+    assert hook.operations()['GetPolicy'] == len(names) and not hook.operations()['GetFunctionConcurrency']
+
+
+def test_findings_keep_listing_order_across_the_window(functions):
+    clients, hook, names = functions
+    # Early functions finish last, so completion order differs from listing order
+    hook.slow = {name: 0.02 * (len(names) - index) for index, name in enumerate(names[:6])}
+    findings = list(LambdaScanner(clients=clients, max_workers=2).iter_findings())
+    order = []
+    for finding in findings:
+        if not order or order[-1] != finding.resource_id:
+            order.append(finding.resource_id)
+    assert order == names
+    assert _rules(findings, names[0]) == ['lambda-env-kms', 'lambda-public-resource-policy',
+                                          'lambda-reserved-concurrency']
+
+
+def test_failed_enrichment_marks_its_fields_unavailable(functions):
+    clients, hook, names = functions
+    hook.fail = {('GetPolicy', names[0]), ('GetFunctionConcurrency', names[1])}
+    findings = list(LambdaScanner(clients=clients).iter_findings())
+    # Rules reading a field that could not be retrieved are skipped, the others still run
+    assert _rules(findings, names[0]) == ['lambda-env-kms', 'lambda-reserved-concurrency']
+    assert _rules(findings, names[1]) == ['lambda-env-kms']
+    assert all(_rules(findings, name) == ['lambda-env-kms', 'lambda-reserved-concurrency'] for name in names[2:])
+    assert not any(finding.is_error for finding in findings)
+
+
+def test_cached_evaluations_are_reused_but_enrichment_is_refetched(functions, tmp_path):
+    clients, hook, names = functions
+    cache = ScanCache(str(tmp_path / 'cache.sqlite3'))
+    first = list(LambdaScanner(clients=clients, cache=cache).iter_findings())
+    hook.calls.clear()
+    second = list(LambdaScanner(clients=clients, cache=cache).iter_findings())
+    assert second == first
+    assert cache.stats()['hits'] == len(names)
+    assert hook.operations()['GetPolicy'] == len(names)
+
+    # A policy change is picked up although the function configuration is unchanged
+    clients.client('lambda').remove_permission(FunctionName=names[0], StatementId='public')
+    third = list(LambdaScanner(clients=clients, cache=cache).iter_findings())
+    assert _rules(third, names[0]) == ['lambda-env-kms', 'lambda-reserved-concurrency']
+    cache.close()
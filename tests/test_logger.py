@@ -0,0 +1,142 @@
+import io
+import json
+import logging
+
+import pytest
+
+from aws_misconfig_scanner.utils.logger import JsonFormatter, LogPipeline, ProgressRollup, RateLimitFilter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Collector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _record(level=logging.WARNING, lineno=10, msg='Throttled on %s', args=('ec2',), **extra):
+    record = logging.LogRecord('aws_misconfig_scanner.test', level, 'scanner.py', lineno, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def _logger(name):
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    collector = Collector()
+    logger.handlers = [collector]
+    return logger, collector
+
+
+def test_rate_limit_lets_a_burst_through_per_call_site():
+    limiter = RateLimitFilter(2, 10.0, clock=FakeClock())
+    assert [limiter.filter(_record()) for _ in range(4)] == [True, True, False, False]
+    assert limiter.filter(_record(lineno=11))
+
+
+def test_rate_limit_window_reset_carries_the_suppressed_count():
+    clock = FakeClock()
+    limiter = RateLimitFilter(1, 10.0, clock=clock)
+    for _ in range(4):
+        limiter.filter(_record())
+    clock.now = 10.0
+    record = _record()
+    assert limiter.filter(record)
+    assert record.suppressed == 3
+    assert not hasattr(_record(), 'suppressed')
+    clock.now = 20.0
+    fresh = _record()
+    assert limiter.filter(fresh) and not hasattr(fresh, 'suppressed')
+
+
+def test_rate_limit_never_suppresses_errors_and_progress():
+    limiter = RateLimitFilter(1, 10.0, clock=FakeClock())
+    assert all(limiter.filter(_record(level=logging.ERROR)) for _ in range(5))
+    assert all(limiter.filter(_record(progress='S3 buckets')) for _ in range(5))
+
+
+def test_rate_limit_reports_pending_suppressions_once():
+    limiter = RateLimitFilter(1, 10.0, clock=FakeClock())
+    for _ in range(3):
+        limiter.filter(_record())
+    assert limiter.pending() == [('aws_misconfig_scanner.test', 'Throttled on %s', 2)]
+    assert limiter.pending() == []
+
+
+def test_json_formatter_includes_extra_fields():
+    record = _record(account_id='111111111111', processed=3, _private=True)
+    record.exc_text = 'Traceback ...'
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['message'] == 'Throttled on ec2'
+    assert entry['level'] == 'WARNING' and entry['logger'] == 'aws_misconfig_scanner.test'
+    assert entry['account_id'] == '111111111111' and entry['processed'] == 3
+    assert '_private' not in entry and 'args' not in entry
+    assert entry['exception'] == 'Traceback ...'
+
+
+def test_progress_rollup_summarizes_at_most_every_interval():
+    logger, collector = _logger('tests.progress.quiet')
+    rollup = ProgressRollup(logger, 'S3 buckets', interval=3600)
+    for _ in range(5):
+        rollup.tick()
+    rollup.done()
+    assert [record.getMessage().split(' in ')[0] for record in collector.records] == ['S3 buckets: 5 processed']
+    assert collector.records[0].progress == 'S3 buckets' and collector.records[0].processed == 5
+
+    logger, collector = _logger('tests.progress.busy')
+    rollup = ProgressRollup(logger, 'Lambda functions', interval=0)
+    rollup.tick(2)
+    rollup.tick()
+    assert [record.processed for record in collector.records] == [2, 3]
+    assert all(record.levelno == logging.INFO for record in collector.records)
+
+
+def test_progress_rollup_logs_empty_runs_at_debug():
+    logger, collector = _logger('tests.progress.empty')
+    ProgressRollup(logger, 'RDS instances', interval=3600).done()
+    assert [record.levelno for record in collector.records] == [logging.DEBUG]
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = LogPipeline()
+    stream = io.StringIO()
+    pipeline.configure(stream=stream, rate_limit=(1, 60.0))
+    logger = logging.getLogger('tests.pipeline')
+    logger.propagate = False
+    logger.handlers = []
+    pipeline.attach(logger)
+    yield pipeline, logger, stream
+    pipeline.stop()
+    logger.handlers = []
+
+
+def test_stop_writes_queued_records_and_suppression_reports(pipeline):
+    pipeline, logger, stream = pipeline
+    for index in range(3):
+        logger.warning("Retrying %s", index)
+    pipeline.stop()
+    lines = stream.getvalue().splitlines()
+    assert any(line.endswith('Retrying 0') for line in lines)
+    assert any(line.endswith('Suppressed 2 further records like: Retrying %s') for line in lines)
+    assert len(lines) == 2
+
+
+def test_stop_tolerates_a_closed_stream(pipeline, capsys):
+    pipeline, logger, stream = pipeline
+    for index in range(3):
+        logger.warning("Retrying %s", index)
+    stream.close()
+    pipeline.stop()
+    assert 'Logging error' not in capsys.readouterr().err
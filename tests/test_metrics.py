@@ -0,0 +1,125 @@
+import json
+import pstats
+import threading
+
+import boto3
+import botocore
+import pytest
+
+from aws_misconfig_scanner.main import AWSMisconfigurationScanner
+from aws_misconfig_scanner.utils.aws_clients import ClientFactory
+from aws_misconfig_scanner.utils.metrics import LATENCY_BUCKETS, Metrics
+from aws_misconfig_scanner.utils.profiler import ScanProfiler, format_top
+from aws_misconfig_scanner.utils.rate_limiter import RateLimiter
+from conftest import REGION
+
+
+def _factory(metrics):
+    return ClientFactory(session=boto3.session.Session(region_name=REGION), rate_limiter=RateLimiter(),
+                         metrics=metrics)
+
+
+def _calls(metrics):
+    return {(entry['service'], entry['operation'], entry['region']): entry for entry in metrics.snapshot()['api_calls']}
+
+
+def test_client_calls_are_recorded_per_operation_and_region(aws):
+    metrics = Metrics()
+    clients = _factory(metrics)
+    clients.client('s3').create_bucket(Bucket='metrics-bucket')
+    for _ in range(2):
+        clients.client('s3').list_buckets()
+    clients.client('ec2', 'eu-west-1').describe_instances()
+    with pytest.raises(botocore.exceptions.ClientError):
+        clients.client('s3').get_bucket_versioning(Bucket='missing-bucket')
+
+    calls = _calls(metrics)
+    assert set(calls) == {
+        ('s3', 'CreateBucket', REGION), ('s3', 'ListBuckets', REGION),
+        ('ec2', 'DescribeInstances', 'eu-west-1'), ('s3', 'GetBucketVersioning', REGION),
+    }
+    listing = calls[('s3', 'ListBuckets', REGION)]
+    assert listing['calls'] == 2 and listing['errors'] == 0 and listing['retries'] == 0
+    assert listing['response_bytes'] > 0
+    assert listing['latency_buckets']['+Inf'] == 2
+    assert calls[('s3', 'GetBucketVersioning', REGION)]['errors'] == 1
+
+
+def test_check_timings_accumulate_per_check():
+    metrics = Metrics()
+    metrics.record_checks([('public-ingress', 0.5), ('public-ip', 0.1), ('public-ingress', 1.5)])
+    with metrics.check_timer('public-ip'):
+        pass
+    checks = metrics.snapshot()['checks']
+    assert [entry['check'] for entry in checks] == ['public-ingress', 'public-ip']
+    assert checks[0] == {'check': 'public-ingress', 'runs': 2, 'seconds': 2.0, 'max_seconds': 1.5}
+    assert checks[1]['runs'] == 2 and checks[1]['max_seconds'] == 0.1
+    metrics.reset()
+    assert metrics.snapshot() == {'api_calls': [], 'scanners': [], 'checks': []}
+
+
+def test_scan_records_scanner_and_check_timings(populated):
+    metrics = Metrics()
+    AWSMisconfigurationScanner(clients=_factory(metrics)).run_all_scans()
+    snapshot = metrics.snapshot()
+    scanners = {(entry['scanner'], entry['region']) for entry in snapshot['scanners']}
+    assert {('EC2', REGION), ('RDS', REGION), ('S3', 'global'), ('IAM', 'global')} <= scanners
+    assert all(entry['runs'] == 1 for entry in snapshot['scanners'])
+    assert snapshot['checks'] and all(entry['runs'] >= 1 for entry in snapshot['checks'])
+    assert ('iam', 'GetAccountAuthorizationDetails', 'aws-global') in _calls(metrics)
+
+
+def test_json_export(tmp_path):
+    metrics = Metrics()
+    metrics.observe_call('ec2', 'DescribeInstances', REGION, 0.02, retries=1, response_bytes=512)
+    metrics.record_scanner('EC2', REGION, 1.25)
+    path = tmp_path / 'metrics.json'
+    metrics.export(str(path), 'json')
+    exported = json.loads(path.read_text())
+    assert exported == metrics.snapshot()
+    assert exported['api_calls'][0]['latency_buckets']['0.01'] == 0
+    assert exported['api_calls'][0]['latency_buckets']['0.025'] == 1
+    assert exported['scanners'] == [{'scanner': 'EC2', 'region': REGION, 'runs': 1, 'seconds': 1.25,
+                                     'max_seconds': 1.25}]
+    with pytest.raises(ValueError, match="Unknown metrics format 'xml'"):
+        metrics.export(str(path), 'xml')
+
+
+def test_prometheus_export():
+    metrics = Metrics()
+    metrics.observe_call('ec2', 'DescribeInstances', REGION, 0.02, retries=1, response_bytes=512)
+    metrics.observe_call('ec2', 'DescribeInstances', REGION, 40.0, error=True)
+    metrics.record_scanner('EC2', REGION, 1.25)
+    metrics.record_checks([('rule "quoted"', 0.5)])
+    lines = metrics.to_prometheus(prefix='scan').splitlines()
+    labels = f'service="ec2",operation="DescribeInstances",region="{REGION}"'
+    assert '# TYPE scan_api_calls_total counter' in lines
+    assert f'scan_api_calls_total{{{labels}}} 2' in lines
+    assert f'scan_api_errors_total{{{labels}}} 1' in lines
+    assert f'scan_api_retries_total{{{labels}}} 1' in lines
+    assert f'scan_api_response_bytes_total{{{labels}}} 512' in lines
+    assert '# TYPE scan_api_call_duration_seconds histogram' in lines
+    buckets = [line for line in lines if line.startswith('scan_api_call_duration_seconds_bucket')]
+    assert len(buckets) == len(LATENCY_BUCKETS) + 1
+    assert f'scan_api_call_duration_seconds_bucket{{{labels},le="0.01"}} 0' in lines
+    assert f'scan_api_call_duration_seconds_bucket{{{labels},le="0.025"}} 1' in lines
+    assert f'scan_api_call_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+    assert f'scan_api_call_duration_seconds_count{{{labels}}} 2' in lines
+    assert f'scan_scanner_duration_seconds_sum{{scanner="EC2",region="{REGION}"}} 1.250000' in lines
+    assert 'scan_check_duration_seconds_count{check="rule \\"quoted\\""} 1' in lines
+
+
+def _busy(iterations):
+    return sum(index * index for index in range(iterations))
+
+
+def test_profiler_merges_worker_thread_profiles(tmp_path):
+    path = tmp_path / 'scan.prof'
+    with ScanProfiler(str(path)) as profiler:
+        worker = threading.Thread(target=_busy, args=(20000,))
+        worker.start()
+        worker.join()
+    stats = pstats.Stats(str(path))
+    assert any(function == '_busy' for _, _, function in stats.stats)
+    assert '_busy' in format_top(stats, limit=50)
+    assert profiler.path == str(path)
@@ -0,0 +1,94 @@
+import boto3
+
+from aws_misconfig_scanner.main import ACCOUNT_ERRORS_SERVICE, scan_accounts
+from aws_misconfig_scanner.utils.organization import AccountSessions, discover_accounts
+
+CALLER_ACCOUNT = '123456789012'
+
+
+def _create_organization(clients, count):
+    organizations = clients.client('organizations')
+    organizations.create_organization(FeatureSet='ALL')
+    return [
+        organizations.create_account(Email=f"member-{index}@example.com", AccountName=f"member-{index}")
+        ['CreateAccountStatus']['AccountId']
+        for index in range(count)
+    ]
+
+
+def test_discover_accounts_lists_active_accounts(clients):
+    members = _create_organization(clients, 3)
+    clients.client('organizations').close_account(AccountId=members[1])
+    assert discover_accounts(clients) == sorted([CALLER_ACCOUNT, members[0], members[2]])
+
+
+def test_account_sessions_reuse_the_caller_session(clients):
+    sessions = AccountSessions(clients)
+    assert sessions.caller_account() == CALLER_ACCOUNT
+    assert sessions.session(CALLER_ACCOUNT) is clients.session
+    assert sessions.assume_calls == 0
+
+
+def test_account_sessions_assume_the_role_once_per_account(clients):
+    sessions = AccountSessions(clients, role_name='Auditor')
+    session = sessions.session('111111111111')
+    assert isinstance(session, boto3.session.Session)
+    assert sessions.session('111111111111') is session
+    assert session.client('sts').get_caller_identity()['Arn'].startswith(
+        'arn:aws:sts::111111111111:assumed-role/Auditor/'
+    )
+    sessions.session('222222222222')
+    assert sessions.assume_calls == 2
+
+
+def test_account_sessions_refresh_credentials_before_expiry(clients):
+    # Credentials valid for 15 minutes are already inside botocore's advisory refresh window
+    sessions = AccountSessions(clients, duration_seconds=900)
+    session = sessions.session('111111111111')
+    assert sessions.assume_calls == 1
+    session.get_credentials().get_frozen_credentials()
+    assert sessions.assume_calls == 2
+
+    sessions = AccountSessions(clients)
+    session = sessions.session('111111111111')
+    session.get_credentials().get_frozen_credentials()
+    assert sessions.assume_calls == 1
+
+
+def _populate_member(clients, account_id):
+    member = clients.with_session(AccountSessions(clients).session(account_id), account_id)
+    member.client('s3').create_bucket(Bucket='member-bucket')
+    member.client('iam').create_user(UserName='bob')
+    member.client('iam').create_access_key(UserName='bob')
+
+
+def _resource_ids(findings):
+    return {finding.resource_id for finding in findings}
+
+
+def test_scan_accounts_tags_findings_with_their_account(populated):
+    _populate_member(populated, '111111111111')
+    results = scan_accounts([CALLER_ACCOUNT, '111111111111'], clients=populated)
+
+    assert ACCOUNT_ERRORS_SERVICE not in results
+    findings = [finding for service_findings in results.values() for finding in service_findings]
+    assert {finding.account_id for finding in findings} == {CALLER_ACCOUNT, '111111111111'}
+    by_account = {
+        account_id: _resource_ids(finding for finding in results['S3'] if finding.account_id == account_id)
+        for account_id in (CALLER_ACCOUNT, '111111111111')
+    }
+    assert by_account['111111111111'] == {'member-bucket'}
+    assert by_account[CALLER_ACCOUNT] == {'bucket-0', 'bucket-1', 'bucket-2'}
+    member_iam = _resource_ids(finding for finding in results['IAM'] if finding.account_id == '111111111111')
+    assert 'bob' in member_iam and 'alice' not in member_iam
+
+
+def test_scan_accounts_tags_streamed_findings(populated):
+    _populate_member(populated, '111111111111')
+    streamed = []
+    counts = scan_accounts([CALLER_ACCOUNT, '111111111111'], clients=populated,
+                           sink=lambda service, finding: streamed.append((service, finding)))
+    assert sum(counts.values()) == len(streamed)
+    assert {finding.account_id for _, finding in streamed} == {CALLER_ACCOUNT, '111111111111'}
+    assert {finding.account_id for service, finding in streamed
+            if service == 'S3' and finding.resource_id == 'member-bucket'} == {'111111111111'}
@@ -0,0 +1,109 @@
+import botocore
+import pytest
+
+from aws_misconfig_scanner.modules.ec2_scanner import EC2Scanner
+from aws_misconfig_scanner.utils.findings import Finding
+from aws_misconfig_scanner.utils.query import Check, ResourceQuery
+
+PUBLIC_FILTER = [{'Name': 'public', 'Values': ['*']}]
+RESOURCES = [{'Id': 'a', 'Public': True, 'Extra': 1}, {'Id': 'b', 'Public': False}, {'Id': 'c', 'Public': True}]
+
+
+def _client_error(code):
+    return botocore.exceptions.ClientError({'Error': {'Code': code, 'Message': code}}, 'DescribeThings')
+
+
+class FakeClient:
+    """
+    Serves describe_things pages of one resource each; filtered calls fail with the given error
+    after fail_after pages.
+    """
+
+    def __init__(self, error=None, fail_after=0):
+        self.error = error
+        self.fail_after = fail_after
+        self.calls = []
+        self.meta = type('Meta', (), {'region_name': 'us-east-1'})()
+
+    def get_paginator(self, operation):
+        return self
+
+    def paginate(self, Filters=None):
+        self.calls.append(Filters)
+        resources = RESOURCES
+        if Filters:
+            resources = [resource for resource in RESOURCES if resource['Public']]
+        for index, resource in enumerate(resources):
+            if Filters and self.error is not None and index == self.fail_after:
+                raise self.error
+            yield {'Things': [resource]}
+
+
+def _query(observed=None, evaluate=None):
+    def check_public(resource):
+        return [Finding.error(resource['Id'])] if resource.get('Public') else []
+
+    observers = [Check('observe', ('Public',), observed.append)] if observed is not None else []
+    return ResourceQuery('describe_things', ('Things',), 'Id',
+                         checks=[Check('public', ('Public',), evaluate or check_public, filter_sets=[PUBLIC_FILTER])],
+                         observers=observers)
+
+
+def _ids(findings):
+    return [finding['Error'] for finding in findings]
+
+
+def test_pushdown_and_client_side_evaluation_agree():
+    client = FakeClient()
+    assert _ids(_query().iter_findings(client)) == ['a', 'c']
+    assert _ids(_query().iter_findings(client, pushdown=False)) == ['a', 'c']
+    assert client.calls == [PUBLIC_FILTER, None]
+
+
+def test_resources_are_projected():
+    observed = []
+    list(_query(observed).iter_findings(FakeClient(), pushdown=False))
+    assert observed[0] == {'Id': 'a', 'Public': True}
+
+
+@pytest.mark.parametrize('code', ['InvalidFilter', 'InvalidParameterValue'])
+def test_rejected_filter_falls_back_to_client_side_evaluation(code):
+    client = FakeClient(_client_error(code), fail_after=1)
+    observed = []
+    # 'a' was returned by the filtered pass before the rejection and is not evaluated twice
+    assert _ids(_query(observed).iter_findings(client)) == ['a', 'c']
+    assert [resource['Id'] for resource in observed] == ['a', 'b', 'c']
+    assert client.calls == [PUBLIC_FILTER, None]
+
+
+def test_other_api_errors_are_raised():
+    client = FakeClient(_client_error('Throttling'), fail_after=1)
+    with pytest.raises(botocore.exceptions.ClientError):
+        list(_query().iter_findings(client))
+    assert client.calls == [PUBLIC_FILTER]
+
+
+def test_check_errors_are_not_mistaken_for_filter_rejection():
+    def failing_check(resource):
+        raise _client_error('InvalidParameterValue')
+
+    client = FakeClient()
+    with pytest.raises(botocore.exceptions.ClientError):
+        list(_query(evaluate=failing_check).iter_findings(client))
+    assert client.calls == [PUBLIC_FILTER]
+
+
+def test_ec2_pushdown_matches_client_side_scan(clients):
+    ec2 = clients.client('ec2')
+    subnet = ec2.describe_subnets()['Subnets'][0]
+    image = ec2.describe_images()['Images'][0]['ImageId']
+    ec2.run_instances(ImageId=image, MinCount=1, MaxCount=1, NetworkInterfaces=[
+        {'DeviceIndex': 0, 'SubnetId': subnet['SubnetId'], 'AssociatePublicIpAddress': True}
+    ])
+    ec2.run_instances(ImageId=image, MinCount=1, MaxCount=1, NetworkInterfaces=[
+        {'DeviceIndex': 0, 'SubnetId': subnet['SubnetId'], 'AssociatePublicIpAddress': False}
+    ])
+    pushed = EC2Scanner(clients=clients).scan_ec2_instances()
+    client_side = EC2Scanner(clients=clients, pushdown=False).scan_ec2_instances()
+    assert [finding.to_dict() for finding in pushed] == [finding.to_dict() for finding in client_side]
+    assert [finding.rule_id for finding in pushed] == ['ec2-public-ip']
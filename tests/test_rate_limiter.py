@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import pytest
+from botocore.hooks import HierarchicalEmitter
+
+from aws_misconfig_scanner.utils.rate_limiter import MIN_RATE, RateLimiter, TokenBucket
+
+
+class FakeClock:
+    """
+    Monotonic clock advanced only by the sleeps of the code under test (and by tests).
+    """
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _client(region='us-east-1'):
+    return SimpleNamespace(meta=SimpleNamespace(region_name=region, events=HierarchicalEmitter()))
+
+
+def _respond(client, operation, status=200, error_code=None):
+    parsed = {'Error': {'Code': error_code}} if error_code else {}
+    client.meta.events.emit(f"needs-retry.ec2.{operation}",
+                            response=(SimpleNamespace(status_code=status), parsed))
+
+
+def test_bucket_paces_calls_beyond_its_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(2.0, clock, clock.sleep)
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(0.5)
+    clock.now += 10.0  # An idle bucket refills to its capacity, not beyond
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, pytest.approx(0.5)]
+    assert bucket.calls == 7
+    assert bucket.wait_seconds == pytest.approx(1.5)
+    assert clock.sleeps == [pytest.approx(0.5)] * 3
+
+
+def test_throttling_halves_the_rate_down_to_the_floor():
+    bucket = TokenBucket(8.0, FakeClock())
+    bucket.on_throttle()
+    assert bucket.rate == 4.0
+    for _ in range(10):
+        bucket.on_throttle()
+    assert bucket.rate == MIN_RATE
+    assert bucket.throttles == 11
+
+
+def test_successes_recover_the_rate_additively_up_to_the_ceiling():
+    bucket = TokenBucket(10.0, FakeClock())
+    bucket.on_throttle()
+    bucket.on_success()
+    assert bucket.rate == pytest.approx(5.2)
+    for _ in range(100):
+        bucket.on_success()
+    assert bucket.rate == 10.0
+
+
+def test_buckets_are_separate_per_service_operation_and_region():
+    limiter = RateLimiter(service_rates={'ec2': 4.0, 'ec2.DescribeImages': 1.0}, default_rate=3.0)
+    instances = limiter.bucket('ec2', 'DescribeInstances', 'us-east-1')
+    assert limiter.bucket('ec2', 'DescribeInstances', 'us-east-1') is instances
+    assert limiter.bucket('ec2', 'DescribeInstances', 'eu-west-1') is not instances
+    assert instances.max_rate == 4.0
+    assert limiter.bucket('ec2', 'DescribeImages', 'us-east-1').max_rate == 1.0
+    assert limiter.bucket('unknown', 'Call', 'us-east-1').max_rate == 3.0
+
+
+def test_registered_clients_are_paced_and_adapt_to_throttling():
+    clock = FakeClock()
+    limiter = RateLimiter(service_rates={'ec2': 1.0}, clock=clock, sleep=clock.sleep)
+    east, west = _client('us-east-1'), _client('eu-west-1')
+    limiter.register(east)
+    limiter.register(west)
+
+    for _ in range(3):
+        east.meta.events.emit('before-send.ec2.DescribeInstances', request=None)
+    west.meta.events.emit('before-send.ec2.DescribeInstances', request=None)
+    _respond(east, 'DescribeInstances', status=400, error_code='RequestLimitExceeded')
+    _respond(east, 'DescribeInstances', status=400, error_code='InvalidParameterValue')
+    _respond(west, 'DescribeInstances')
+
+    assert limiter.stats() == {
+        'ec2.DescribeInstances@eu-west-1': {'calls': 1, 'throttles': 0, 'wait_seconds': 0.0, 'rate': 1.0},
+        'ec2.DescribeInstances@us-east-1': {'calls': 3, 'throttles': 1, 'wait_seconds': 2.0, 'rate': 0.5},
+    }
@@ -0,0 +1,65 @@
+import json
+import zipfile
+
+import boto3
+import botocore
+import pytest
+
+from aws_misconfig_scanner.main import AWSMisconfigurationScanner
+from aws_misconfig_scanner.utils.aws_clients import ClientFactory
+from aws_misconfig_scanner.utils.metrics import Metrics
+from aws_misconfig_scanner.utils.rate_limiter import RateLimiter
+from aws_misconfig_scanner.utils.recording import SnapshotRecorder, SnapshotReplayer
+from conftest import REGION, canonical
+
+
+def _scan(clients):
+    return canonical(AWSMisconfigurationScanner(clients=clients).run_all_scans())
+
+
+@pytest.fixture
+def snapshot(populated, tmp_path):
+    """
+    Records a scan of the populated account and returns its findings and snapshot path.
+    """
+    path = str(tmp_path / 'snapshot.zip')
+    recorder = SnapshotRecorder(path, region=REGION)
+    clients = ClientFactory(session=boto3.session.Session(region_name=REGION), rate_limiter=RateLimiter(),
+                            metrics=Metrics(), event_hooks=[recorder])
+    findings = _scan(clients)
+    recorder.close()
+    assert recorder.calls > 0
+    return findings, path
+
+
+def test_replayed_scan_reproduces_the_recorded_findings(snapshot, populated):
+    recorded, path = snapshot
+    # Resources created after recording are invisible to the replayed scan
+    populated.client('s3').create_bucket(Bucket='created-after-recording')
+
+    replayer = SnapshotReplayer(path)
+    replayed = _scan(replayer.client_factory(rate_limiter=RateLimiter(), metrics=Metrics()))
+    stats = replayer.stats()
+    replayer.close()
+    assert replayed == recorded
+    assert stats['replayed'] > 0 and stats['misses'] == 0
+
+
+def test_unrecorded_calls_fail_with_snapshot_miss(snapshot):
+    _, path = snapshot
+    replayer = SnapshotReplayer(path)
+    clients = replayer.client_factory(rate_limiter=RateLimiter(), metrics=Metrics())
+    with pytest.raises(botocore.exceptions.ClientError) as error:
+        clients.client('sqs').list_queues()
+    assert error.value.response['Error']['Code'] == 'SnapshotMiss'
+    assert replayer.stats()['misses'] == 1
+    replayer.close()
+
+
+def test_unsupported_snapshot_format_is_rejected(tmp_path):
+    path = str(tmp_path / 'snapshot.zip')
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('manifest.json', json.dumps({'format': 999, 'created': 'never', 'calls': 0}))
+        archive.writestr('index.json', '{}')
+    with pytest.raises(ValueError, match='Unsupported snapshot format 999'):
+        SnapshotReplayer(path)
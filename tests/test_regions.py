@@ -0,0 +1,113 @@
+import threading
+
+import boto3
+import botocore
+import pytest
+
+from aws_misconfig_scanner.main import REGIONAL_SCANNERS, SERVICE_ORDER, AWSMisconfigurationScanner, _tag_region
+from aws_misconfig_scanner.utils.aws_clients import ClientFactory
+from aws_misconfig_scanner.utils.findings import Finding, finding_type
+from aws_misconfig_scanner.utils.metrics import Metrics
+from aws_misconfig_scanner.utils.rate_limiter import RateLimiter
+from conftest import REGION
+
+OTHER_REGION = 'eu-west-1'
+REGIONS = [REGION, OTHER_REGION]
+
+
+class RegionFailure:
+    """
+    Client event hook recording the parameters of every call, and failing every call made by the
+    clients of one region.
+    """
+
+    def __init__(self, region=None):
+        self.region = region
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def register(self, client, account_id=None):
+        region = client.meta.region_name
+
+        def intercept(params, model, **kwargs):
+            with self._lock:
+                self.calls.append((model.name, region, params))
+            if region == self.region:
+                raise botocore.exceptions.ClientError(
+                    {'Error': {'Code': 'UnauthorizedOperation', 'Message': 'Region disabled'}}, model.name
+                )
+        client.meta.events.register('before-parameter-build', intercept)
+
+
+def _factory(hook):
+    return ClientFactory(session=boto3.session.Session(region_name=REGION), rate_limiter=RateLimiter(),
+                         metrics=Metrics(), event_hooks=[hook])
+
+
+@pytest.fixture
+def two_regions(populated):
+    """
+    The populated account plus a world-open security group in a second region.
+    """
+    ec2 = populated.client('ec2', OTHER_REGION)
+    group = ec2.create_security_group(GroupName='west-open', Description='open')
+    ec2.authorize_security_group_ingress(GroupId=group['GroupId'], IpPermissions=[
+        {'IpProtocol': 'tcp', 'FromPort': 22, 'ToPort': 22, 'IpRanges': [{'CidrIp': '0.0.0.0/0'}]},
+    ])
+    return populated, group['GroupId']
+
+
+def test_jobs_fan_regional_services_out_and_scan_global_services_once(clients):
+    jobs = AWSMisconfigurationScanner(clients=clients)._scan_jobs(REGIONS)
+    expected = []
+    for service in SERVICE_ORDER:
+        if service in REGIONAL_SCANNERS:
+            expected.extend((service, region) for region in REGIONS)
+        else:
+            expected.append((service, 'global'))
+    assert [job.key for job in jobs] == expected
+    assert [job.key for job in jobs if job.service in ('IAM', 'S3')] == [('IAM', 'global'), ('S3', 'global')]
+
+
+def test_discover_regions_lists_enabled_regions(aws):
+    hook = RegionFailure()
+    regions = AWSMisconfigurationScanner(clients=_factory(hook)).discover_regions()
+    assert regions == sorted(regions) and REGION in regions and OTHER_REGION in regions
+    (operation, _, params), = hook.calls
+    assert operation == 'DescribeRegions'
+    assert params['Filters'] == [{'Name': 'opt-in-status', 'Values': ['opt-in-not-required', 'opted-in']}]
+
+
+def test_tag_region_keeps_regions_set_by_the_scanner():
+    finding_kind = finding_type('test-rule', 'low', 'ec2-instance', "Instance {id}.")
+    findings = [Finding(finding_kind, 'i-1'), Finding(finding_kind, 'i-2', region=OTHER_REGION)]
+    tagged = list(_tag_region(lambda: iter(findings), REGION)())
+    assert [finding.region for finding in tagged] == [REGION, OTHER_REGION]
+
+
+def test_every_finding_is_tagged_with_its_region(two_regions):
+    clients, group_id = two_regions
+    results = AWSMisconfigurationScanner(clients=clients).run_all_scans(regions=REGIONS)
+    for service, findings in results.items():
+        assert findings, service
+        for finding in findings:
+            assert not finding.is_error
+            if service == 'IAM':
+                assert finding.region == 'global'
+            else:
+                assert finding.region in REGIONS, (service, finding)
+    assert {finding.region for finding in results['SecurityGroups'] if finding.resource_id == group_id} == \
+        {OTHER_REGION}
+    assert {finding.region for finding in results['EC2']} == {REGION}
+
+
+def test_failing_region_does_not_fail_the_other_regions(two_regions):
+    clients, _ = two_regions
+    healthy = AWSMisconfigurationScanner(clients=clients).run_all_scans(regions=[REGION])
+    results = AWSMisconfigurationScanner(clients=_factory(RegionFailure(OTHER_REGION))).run_all_scans(regions=REGIONS)
+    for service in REGIONAL_SCANNERS:
+        in_region = [finding for finding in results[service] if finding.region == REGION]
+        assert in_region == healthy[service], service
+        failed = [finding for finding in results[service] if finding.region == OTHER_REGION]
+        assert failed and all(finding.is_error for finding in failed), service
+    assert results['IAM'] == healthy['IAM'] and results['S3'] == healthy['S3']
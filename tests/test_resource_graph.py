@@ -0,0 +1,106 @@
+from aws_misconfig_scanner.modules.ec2_scanner import EC2Scanner
+from aws_misconfig_scanner.modules.rds_scanner import RDSScanner
+from aws_misconfig_scanner.modules.resource_graph import ResourceGraph
+from aws_misconfig_scanner.modules.sg_scanner import DANGEROUS_PORTS, SGScanner
+
+
+def _group(group_id, port, cidr='0.0.0.0/0'):
+    return {'GroupId': group_id,
+            'IpPermissions': [{'IpProtocol': 'tcp', 'FromPort': port, 'ToPort': port, 'IpRanges': [{'CidrIp': cidr}]}]}
+
+
+def _instance(instance_id, group_ids, public_ip=None):
+    interface = {'NetworkInterfaceId': f"eni-{instance_id}", 'SubnetId': 'subnet-1',
+                 'Groups': [{'GroupId': group_id} for group_id in group_ids]}
+    if public_ip:
+        interface['Association'] = {'PublicIp': public_ip}
+    return {'InstanceId': instance_id, 'NetworkInterfaces': [interface]}
+
+
+def _database(db_id, group_ids, public, port=5432):
+    return {'DBInstanceIdentifier': db_id, 'PubliclyAccessible': public, 'Endpoint': {'Port': port},
+            'VpcSecurityGroups': [{'VpcSecurityGroupId': group_id, 'Status': 'active'} for group_id in group_ids]}
+
+
+def _reached(findings):
+    return {(finding.rule_id, finding.resource_id): finding for finding in findings}
+
+
+def test_only_reachable_resources_are_reported():
+    graph = ResourceGraph()
+    graph.exposures.add_group(_group('sg-ssh', 22))
+    graph.exposures.add_group(_group('sg-db', 5432))
+    graph.exposures.add_group(_group('sg-internal', 22, '10.0.0.0/8'))
+    graph.add_instance(_instance('i-public', ['sg-ssh'], '203.0.113.1'), 'us-east-1')
+    graph.add_instance(_instance('i-private', ['sg-ssh']), 'us-east-1')
+    graph.add_instance(_instance('i-internal', ['sg-internal'], '203.0.113.2'), 'us-east-1')
+    graph.add_db_instance(_database('db-public', ['sg-db'], True), 'us-east-1')
+    graph.add_db_instance(_database('db-private', ['sg-db'], False), 'us-east-1')
+    graph.add_db_instance(_database('db-other-port', ['sg-db'], True, port=3306), 'us-east-1')
+
+    reached = _reached(graph.correlate(DANGEROUS_PORTS))
+    assert set(reached) == {('exposure-ec2-reachable', 'i-public'), ('exposure-rds-reachable', 'db-public')}
+    instance = reached[('exposure-ec2-reachable', 'i-public')]
+    assert (instance.detail('Ports'), instance.detail('SecurityGroups'), instance.region) == \
+        ([22], ['sg-ssh'], 'us-east-1')
+    assert reached[('exposure-rds-reachable', 'db-public')].detail('Ports') == [5432]
+    assert graph.resources_in_group('sg-db') == ([], ['db-other-port', 'db-private', 'db-public'])
+
+
+def _populated_graph(order):
+    graph = ResourceGraph()
+    for group_id, port in (('sg-ssh', 22), ('sg-rdp', 3389), ('sg-db', 5432), ('sg-mysql', 3306)):
+        graph.exposures.add_group(_group(group_id, port))
+    for index in order:
+        graph.add_instance(_instance(f"i-{index:02d}", ['sg-rdp', 'sg-ssh'][index % 2:], f"203.0.113.{index}"))
+        graph.add_db_instance(_database(f"db-{index:02d}", ['sg-mysql', 'sg-db'][index % 2:], True,
+                                        port=3306 if index % 2 == 0 else 5432))
+    return graph
+
+
+def test_findings_are_sorted_by_resource_id():
+    order = [7, 2, 11, 0, 5, 9, 3, 10, 1, 8, 6, 4]
+    findings = _populated_graph(order).correlate(DANGEROUS_PORTS)
+    ids = sorted(f"{index:02d}" for index in order)
+    assert [finding.resource_id for finding in findings] == [f"i-{i}" for i in ids] + [f"db-{i}" for i in ids]
+    assert findings == _populated_graph(sorted(order)).correlate(DANGEROUS_PORTS)
+
+
+def test_clear_removes_every_resource():
+    graph = ResourceGraph()
+    graph.exposures.add_group(_group('sg-ssh', 22))
+    graph.add_instance(_instance('i-public', ['sg-ssh'], '203.0.113.1'))
+    graph.clear()
+    assert graph.correlate(DANGEROUS_PORTS) == []
+
+
+def test_scanners_feed_the_graph(clients):
+    ec2 = clients.client('ec2')
+    subnet_id = ec2.describe_subnets()['Subnets'][0]['SubnetId']
+    vpc_id = ec2.describe_vpcs()['Vpcs'][0]['VpcId']
+    image = ec2.describe_images()['Images'][0]['ImageId']
+    group_id = ec2.create_security_group(GroupName='ssh', Description='ssh', VpcId=vpc_id)['GroupId']
+    ec2.authorize_security_group_ingress(GroupId=group_id, IpPermissions=_group(group_id, 22)['IpPermissions'])
+    db_group_id = ec2.create_security_group(GroupName='db', Description='db', VpcId=vpc_id)['GroupId']
+    ec2.authorize_security_group_ingress(GroupId=db_group_id, IpPermissions=_group(db_group_id, 5432)['IpPermissions'])
+
+    def run(public):
+        return ec2.run_instances(ImageId=image, MinCount=1, MaxCount=1, NetworkInterfaces=[{
+            'DeviceIndex': 0, 'SubnetId': subnet_id, 'AssociatePublicIpAddress': public, 'Groups': [group_id]
+        }])['Instances'][0]['InstanceId']
+
+    public_instance = run(True)
+    run(False)
+    clients.client('rds').create_db_instance(
+        DBInstanceIdentifier='db', DBInstanceClass='db.t3.micro', Engine='postgres', MasterUsername='admin',
+        MasterUserPassword='password123', AllocatedStorage=20, PubliclyAccessible=True,
+        VpcSecurityGroupIds=[db_group_id]
+    )
+
+    graph = ResourceGraph()
+    for scanner in (EC2Scanner(clients=clients, graph=graph), SGScanner(clients=clients, graph=graph),
+                    RDSScanner(clients=clients, graph=graph)):
+        list(scanner.iter_findings())
+    assert set(_reached(graph.correlate(DANGEROUS_PORTS))) == {
+        ('exposure-ec2-reachable', public_instance), ('exposure-rds-reachable', 'db'),
+    }
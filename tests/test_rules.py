@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from aws_misconfig_scanner.modules.rds_scanner import RDSScanner
+from aws_misconfig_scanner.utils.rules import RuleSet, compile_condition, load_rules
+
+
+@pytest.mark.parametrize('condition, resource, expected', [
+    ({'field': 'A', 'op': 'truthy'}, {'A': 1}, True),
+    ({'field': 'A', 'op': 'truthy'}, {}, False),
+    ({'field': 'A', 'op': 'missing'}, {}, True),
+    ({'field': 'A', 'op': 'missing'}, {'A': None}, False),
+    ({'field': 'A', 'op': 'eq', 'value': 0, 'default': 0}, {}, True),
+    ({'field': 'A', 'op': 'lt', 'value': 7}, {'A': 'seven'}, False),
+    ({'field': 'A.B', 'op': 'in', 'value': ['x', 'y']}, {'A': {'B': 'y'}}, True),
+    ({'field': 'A.B', 'op': 'present'}, {'A': 'flat'}, False),
+    ({'all': [{'field': 'A', 'op': 'truthy'}, {'not': {'field': 'B', 'op': 'truthy'}}]}, {'A': 1, 'B': 0}, True),
+    ({'any': [{'field': 'A', 'op': 'truthy'}, {'field': 'B', 'op': 'truthy'}]}, {}, False),
+])
+def test_conditions(condition, resource, expected):
+    predicate, _ = compile_condition(condition)
+    assert predicate(resource) is expected
+
+
+@pytest.mark.parametrize('definition', [
+    {'severity': 'HIGH', 'resource': 'x', 'condition': {'field': 'A', 'op': 'truthy'}},
+    {'id': 'r', 'severity': 'URGENT', 'resource': 'x', 'condition': {'field': 'A', 'op': 'truthy'}},
+    {'id': 'r', 'resource': 'x', 'condition': {'field': 'A', 'op': 'like'}},
+    {'id': 'r', 'resource': 'x', 'condition': {'field': 'A', 'op': 'eq'}},
+])
+def test_invalid_rules_are_rejected(definition):
+    with pytest.raises(ValueError):
+        RuleSet([definition])
+
+
+def test_rule_groups_report_fields_and_evaluate_in_one_pass():
+    rules = RuleSet([
+        {'id': 'a', 'severity': 'LOW', 'resource': 'x', 'condition': {'field': 'Tags.Owner', 'op': 'missing'}},
+        {'id': 'b', 'severity': 'HIGH', 'resource': 'x', 'condition': {'field': 'Open', 'op': 'truthy'}},
+        {'id': 'c', 'severity': 'HIGH', 'resource': 'y', 'condition': {'field': 'Open', 'op': 'truthy'}},
+    ], disabled=['b'])
+    group = rules.group('x')
+    assert group.fields == ('Tags',)
+    assert not group.needs('Open')
+    [finding] = group.evaluate({'Open': True}, 'res-1', 'us-east-1')
+    assert (finding.rule_id, finding.resource_id, finding.region) == ('a', 'res-1', 'us-east-1')
+    assert group.evaluate({'Tags': {'Owner': 'me'}}, 'res-1', unavailable={'Tags'}) == []
+
+
+def test_rule_files_override_bundled_rules(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({'rules': [{
+        'id': 'rds-backup-retention', 'severity': 'HIGH', 'resource': 'rds-instance',
+        'condition': {'field': 'BackupRetentionPeriod', 'op': 'lt', 'value': 7, 'default': 0},
+        'message': 'Backup retention is shorter than a week.'
+    }]}))
+    rules = load_rules([str(path)], disabled=['rds-storage-encryption'])
+    group = rules.group('rds-instance')
+    findings = group.evaluate({'BackupRetentionPeriod': 3, 'StorageEncrypted': False}, 'db')
+    assert [(finding.rule_id, str(finding.severity)) for finding in findings] == [('rds-backup-retention', 'HIGH')]
+
+
+def test_rds_scanner_evaluates_bundled_rules(clients):
+    rds = clients.client('rds')
+    rds.create_db_instance(DBInstanceIdentifier='open', DBInstanceClass='db.t3.micro', Engine='postgres',
+                           MasterUsername='admin', MasterUserPassword='password123', AllocatedStorage=20,
+                           PubliclyAccessible=True, StorageEncrypted=False, BackupRetentionPeriod=0)
+    rds.create_db_instance(DBInstanceIdentifier='closed', DBInstanceClass='db.t3.micro', Engine='postgres',
+                           MasterUsername='admin', MasterUserPassword='password123', AllocatedStorage=20,
+                           PubliclyAccessible=False, StorageEncrypted=True, BackupRetentionPeriod=7)
+    findings = RDSScanner(clients=clients).scan_rds_instances()
+    assert sorted((finding.resource_id, finding.rule_id) for finding in findings) == [
+        ('open', 'rds-backup-retention'), ('open', 'rds-public-access'), ('open', 'rds-storage-encryption'),
+    ]
@@ -0,0 +1,200 @@
+import json
+import threading
+from collections import Counter
+
+import boto3
+import botocore
+import pytest
+
+from aws_misconfig_scanner.modules.s3_scanner import S3Scanner
+from aws_misconfig_scanner.utils.aws_clients import ClientFactory
+from aws_misconfig_scanner.utils.metrics import Metrics
+from aws_misconfig_scanner.utils.rate_limiter import RateLimiter
+from conftest import REGION
+
+
+class CallLog:
+    """
+    Client event hook recording every API call as (operation, bucket, client region), and failing
+    the calls listed in fail with AccessDenied.
+    """
+
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+        self._lock = threading.Lock()
+
+    def register(self, client, account_id=None):
+        region = client.meta.region_name
+
+        def record(params, model, **kwargs):
+            bucket = params.get('Bucket')
+            with self._lock:
+                self.calls.append((model.name, bucket, region))
+            if (model.name, bucket) in self.fail:
+                raise botocore.exceptions.ClientError(
+                    {'Error': {'Code': 'AccessDenied', 'Message': 'Access Denied'}}, model.name
+                )
+        client.meta.events.register('before-parameter-build', record)
+
+    def operations(self, bucket=None):
+        return Counter(operation for operation, name, _ in self.calls if bucket is None or name == bucket)
+
+
+def _factory(log):
+    return ClientFactory(session=boto3.session.Session(region_name=REGION), rate_limiter=RateLimiter(),
+                         metrics=Metrics(), event_hooks=[log])
+
+
+def _create_bucket(clients, name, region=REGION):
+    configuration = {} if region == 'us-east-1' else {'CreateBucketConfiguration': {'LocationConstraint': region}}
+    clients.client('s3', region).create_bucket(Bucket=name, **configuration)
+
+
+def _scan(clients):
+    scanner = S3Scanner(clients=clients)
+    return scanner, list(scanner.iter_findings())
+
+
+def _bucket_order(findings):
+    order = []
+    for finding in findings:
+        if not order or order[-1] != finding.resource_id:
+            order.append(finding.resource_id)
+    return order
+
+
+@pytest.fixture
+def two_regions(aws):
+    """
+    Ten buckets alternating between us-east-1 and eu-west-1.
+    """
+    log = CallLog()
+    clients = _factory(log)
+    names = [f"bucket-{index:02d}" for index in range(10)]
+    for index, name in enumerate(names):
+        _create_bucket(clients, name, REGION if index % 2 == 0 else 'eu-west-1')
+    log.calls.clear()
+    return clients, log, names
+
+
+def test_bucket_calls_go_to_the_bucket_region(two_regions):
+    clients, log, names = two_regions
+    _, findings = _scan(clients)
+    for operation, bucket, region in log.calls:
+        if bucket is not None and operation != 'GetBucketLocation':
+            assert region == (REGION if names.index(bucket) % 2 == 0 else 'eu-west-1'), (operation, bucket)
+    assert {finding.region for finding in findings} == {REGION, 'eu-west-1'}
+    assert all(finding.region == (REGION if names.index(finding.resource_id) % 2 == 0 else 'eu-west-1')
+               for finding in findings)
+
+
+def test_bucket_region_is_resolved_once_per_bucket(two_regions):
+    clients, log, names = two_regions
+    _scan(clients)
+    assert all(log.operations(name)['GetBucketLocation'] == 1 for name in names)
+
+
+def test_findings_keep_listing_order(two_regions):
+    clients, _, names = two_regions
+    _, findings = _scan(clients)
+    assert not any(finding.is_error for finding in findings)
+    assert _bucket_order(findings) == names
+
+
+def test_failing_bucket_does_not_abort_the_scan(two_regions):
+    clients, log, names = two_regions
+    log.fail = {('GetBucketLocation', 'bucket-03'), ('GetBucketVersioning', 'bucket-06')}
+    _, findings = _scan(clients)
+    assert _bucket_order(findings) == names
+    errors = [finding for finding in findings if finding.is_error]
+    assert [finding.resource_id for finding in errors] == ['bucket-03', 'bucket-06']
+    assert [finding.rule_id for finding in findings if finding.resource_id == 'bucket-03'] == ['scan-error']
+    assert Counter(finding.rule_id for finding in findings if finding.resource_id == 'bucket-06') == \
+        {'s3-no-encryption': 1, 'scan-error': 1}
+
+
+PUBLIC_POLICY = {
+    'Version': '2012-10-17',
+    'Statement': [{'Effect': 'Allow', 'Principal': '*', 'Action': 's3:GetObject', 'Resource': 'arn:aws:s3:::{}/*'}],
+}
+
+BLOCK_ALL = {'BlockPublicAcls': False, 'IgnorePublicAcls': True, 'BlockPublicPolicy': False,
+             'RestrictPublicBuckets': True}
+
+
+@pytest.fixture
+def public_buckets(aws):
+    """
+    Three buckets, each with a public-read ACL and a public bucket policy.
+    """
+    log = CallLog()
+    clients = _factory(log)
+    names = ['public-0', 'public-1', 'public-2']
+    s3 = clients.client('s3')
+    for name in names:
+        _create_bucket(clients, name)
+        s3.put_bucket_acl(Bucket=name, ACL='public-read')
+        s3.put_bucket_policy(Bucket=name, Policy=json.dumps(PUBLIC_POLICY).replace('{}', name))
+    log.calls.clear()
+    return clients, log, names
+
+
+def _rules(findings, bucket):
+    return sorted(finding.rule_id for finding in findings if finding.resource_id == bucket)
+
+
+def test_findings_without_block_public_access(public_buckets):
+    clients, log, names = public_buckets
+    scanner, findings = _scan(clients)
+    assert all(_rules(findings, name) == ['s3-no-encryption', 's3-public-acl', 's3-public-policy',
+                                          's3-versioning-disabled'] for name in names)
+    assert scanner.elision_stats() == {
+        'elided': {}, 'planning': {'s3control.GetPublicAccessBlock': 1, 's3.GetPublicAccessBlock': 3},
+    }
+    assert log.operations()['GetBucketAcl'] == 3 and log.operations()['GetBucketPolicyStatus'] == 3
+
+
+def test_account_block_public_access_elides_gated_checks(public_buckets):
+    clients, log, names = public_buckets
+    clients.client('s3control').put_public_access_block(AccountId='123456789012',
+                                                        PublicAccessBlockConfiguration=BLOCK_ALL)
+    log.calls.clear()
+    scanner, findings = _scan(clients)
+    assert all(_rules(findings, name) == ['s3-no-encryption', 's3-versioning-disabled'] for name in names)
+    assert scanner.elision_stats() == {
+        'elided': {'s3.GetBucketAcl': 3, 's3.GetBucketPolicyStatus': 3},
+        'planning': {'s3control.GetPublicAccessBlock': 1},
+    }
+    operations = log.operations()
+    assert not operations['GetBucketAcl'] and not operations['GetBucketPolicyStatus']
+    assert operations['GetPublicAccessBlock'] == 1  # Only the account-level lookup
+
+
+def test_bucket_block_public_access_elides_its_own_checks(public_buckets):
+    clients, log, names = public_buckets
+    clients.client('s3').put_public_access_block(
+        Bucket='public-1', PublicAccessBlockConfiguration=dict(BLOCK_ALL, RestrictPublicBuckets=False)
+    )
+    log.calls.clear()
+    scanner, findings = _scan(clients)
+    assert _rules(findings, 'public-1') == ['s3-no-encryption', 's3-public-policy', 's3-versioning-disabled']
+    assert _rules(findings, 'public-0') == _rules(findings, 'public-2') == [
+        's3-no-encryption', 's3-public-acl', 's3-public-policy', 's3-versioning-disabled'
+    ]
+    assert scanner.elision_stats()['elided'] == {'s3.GetBucketAcl': 1}
+    assert log.operations('public-1')['GetBucketAcl'] == 0
+    assert log.operations('public-1')['GetBucketPolicyStatus'] == 1
+
+
+def test_failed_gating_calls_check_every_bucket(public_buckets):
+    clients, log, names = public_buckets
+    clients.client('s3control').put_public_access_block(AccountId='123456789012',
+                                                        PublicAccessBlockConfiguration=BLOCK_ALL)
+    log.fail = {('GetPublicAccessBlock', None)} | {('GetPublicAccessBlock', name) for name in names}
+    log.calls.clear()
+    scanner, findings = _scan(clients)
+    assert not any(finding.is_error for finding in findings)
+    assert all(_rules(findings, name) == ['s3-no-encryption', 's3-public-acl', 's3-public-policy',
+                                          's3-versioning-disabled'] for name in names)
+    assert scanner.elision_stats()['elided'] == {}
@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+
+from aws_misconfig_scanner.main import parse_args
+from aws_misconfig_scanner.utils.async_engine import AsyncScanEngine
+from aws_misconfig_scanner.utils.findings import Finding
+from aws_misconfig_scanner.utils.scheduler import ScanJob, ScanScheduler
+
+
+def _job(service, steps, key=None):
+    """
+    Builds a job yielding one error finding per step after sleeping for that step's duration.
+    """
+    def iter_findings():
+        for index, seconds in enumerate(steps):
+            time.sleep(seconds)
+            yield Finding.error(f"{service}-{index}")
+    return ScanJob(service, lambda: list(iter_findings()), key=key, iter_findings=iter_findings)
+
+
+def _messages(findings):
+    return [finding['Error'] for finding in findings]
+
+
+def test_runs_every_job():
+    scheduler = ScanScheduler(max_workers=2)
+    results = scheduler.run([_job('EC2', [0, 0]), _job('IAM', [0]), _job('S3', [])])
+    assert _messages(results['EC2']) == ['EC2-0', 'EC2-1']
+    assert _messages(results['IAM']) == ['IAM-0']
+    assert results['S3'] == []
+
+
+def test_failed_job_is_reported_as_error_finding():
+    def fail():
+        raise RuntimeError("boom")
+        yield  # pragma: no cover
+
+    results = ScanScheduler().run([ScanJob('EC2', None, iter_findings=fail)])
+    assert _messages(results['EC2']) == ['boom']
+
+
+def test_timed_out_job_is_reported_and_stops():
+    steps = []
+
+    def slow():
+        for index in range(5):
+            steps.append(index)
+            time.sleep(0.2)
+            yield Finding.error(str(index))
+
+    started = time.monotonic()
+    results = ScanScheduler(default_timeout=0.1).run([ScanJob('EC2', None, iter_findings=slow)])
+    assert time.monotonic() - started < 0.2
+    assert _messages(results['EC2']) == ['Scan job EC2 timed out after 0.1s']
+    time.sleep(0.5)
+    # The abandoned job finished its in-flight step and did not start another one
+    assert steps == [0]
+
+
+def test_abandoned_job_keeps_its_worker_slot_and_deadlines_start_at_job_start():
+    # With one worker, 'slow' holds the only thread until its step returns at 0.6s. 'fast' must not
+    # be queued behind it with a deadline already running, or it would time out without running.
+    scheduler = ScanScheduler(max_workers=1, timeouts={'Slow': 0.2, 'Fast': 0.3})
+    results = scheduler.run([_job('Slow', [0.6]), _job('Fast', [0.1])])
+    assert _messages(results['Slow']) == ['Scan job Slow timed out after 0.2s']
+    assert _messages(results['Fast']) == ['Fast-0']
+
+
+def test_sink_is_not_called_after_run_returns():
+    received = []
+    release = threading.Event()
+
+    def stuck():
+        yield Finding.error('first')
+        release.wait(2)
+        yield Finding.error('late')
+
+    results = ScanScheduler(default_timeout=0.1).run(
+        [ScanJob('EC2', None, iter_findings=stuck)], sink=lambda service, finding: received.append(finding)
+    )
+    release.set()
+    time.sleep(0.2)
+    assert _messages(received) == ['first']
+    assert _messages(results['EC2']) == ['Scan job EC2 timed out after 0.1s']
+
+
+def test_service_concurrency_limits_running_jobs():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def job():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        yield from ()
+
+    jobs = [ScanJob('EC2', None, key=('EC2', index), iter_findings=job) for index in range(4)]
+    ScanScheduler(max_workers=4, service_concurrency={'EC2': 1}).run(jobs)
+    assert max(peak) == 1
+
+
+@pytest.mark.parametrize('engine', [ScanScheduler, AsyncScanEngine])
+def test_concurrency_limit_below_one_is_rejected(engine):
+    with pytest.raises(ValueError):
+        engine(service_concurrency={'EC2': 0})
+
+
+@pytest.mark.parametrize('argv', [
+    ['--service-concurrency', 'EC2=0'],
+    ['--service-concurrency', 'EC2'],
+    ['--service-timeout', 'IAM=soon'],
+    ['--api-rate', '=5'],
+])
+def test_malformed_key_values_are_parser_errors(argv, capsys):
+    with pytest.raises(SystemExit) as exc:
+        parse_args(argv)
+    assert exc.value.code == 2
+    assert argv[0] in capsys.readouterr().err
+
+
+def test_key_values_are_parsed():
+    args = parse_args(['--service-concurrency', 'EC2=2', '--service-timeout', 'IAM=90', '--api-rate', 'iam=5'])
+    assert args.service_concurrency == {'EC2': 2}
+    assert args.service_timeout == {'IAM': 90.0}
+    assert args.api_rate == {'iam': 5.0}
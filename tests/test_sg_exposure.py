@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from aws_misconfig_scanner.modules.sg_exposure import ExposureIndex, classify_source, normalize_permission
+from aws_misconfig_scanner.modules.sg_scanner import SGScanner
+
+
+@pytest.mark.parametrize('cidr, expected', [
+    ('0.0.0.0/0', 'world'),
+    ('::/0', 'world'),
+    ('0.0.0.0/1', 'wide'),
+    ('128.0.0.0/1', 'wide'),
+    ('8.0.0.0/8', 'wide'),
+    ('2600::/16', 'wide'),
+    ('8.8.0.0/16', None),
+    ('203.0.113.7/32', None),
+    ('10.0.0.0/8', None),
+    ('192.168.0.0/16', None),
+    ('fc00::/7', None),
+    ('not-a-cidr', None),
+])
+def test_sources_are_classified(cidr, expected):
+    assert classify_source(cidr) == expected
+
+
+def _permission(protocol, from_port=None, to_port=None, cidrs=(), prefix_lists=()):
+    permission = {'IpProtocol': protocol, 'IpRanges': [{'CidrIp': cidr} for cidr in cidrs],
+                  'PrefixListIds': [{'PrefixListId': prefix_list} for prefix_list in prefix_lists]}
+    if from_port is not None:
+        permission.update(FromPort=from_port, ToPort=to_port)
+    return permission
+
+
+def test_permissions_are_normalized():
+    [all_traffic] = normalize_permission('sg-1', _permission('-1', cidrs=['0.0.0.0/0']))
+    assert (all_traffic.protocol, all_traffic.describe_ports()) == ('-1', 'All traffic')
+    [numbered] = normalize_permission('sg-1', _permission('6', 22, 22, cidrs=['0.0.0.0/0', '10.0.0.0/8']))
+    assert (numbered.protocol, numbered.describe_ports()) == ('tcp', 'Port 22/tcp')
+    [icmp] = normalize_permission('sg-1', _permission('icmp', -1, -1, cidrs=['8.0.0.0/8']))
+    assert (icmp.from_port, icmp.exposure) == (None, 'wide')
+    [listed] = normalize_permission('sg-1', _permission('tcp', 443, 443, prefix_lists=['pl-1']),
+                                    lambda prefix_list_id: ['10.1.0.0/16', '0.0.0.0/0'])
+    assert listed.source == 'pl-1: 0.0.0.0/0'
+
+
+def test_index_answers_port_queries():
+    index = ExposureIndex()
+    index.add_group({'GroupId': 'sg-range', 'IpPermissions': [_permission('tcp', 20, 30, cidrs=['0.0.0.0/0'])]})
+    index.add_group({'GroupId': 'sg-all', 'IpPermissions': [_permission('-1', cidrs=['8.0.0.0/8'])]})
+    index.add_group({'GroupId': 'sg-udp', 'IpPermissions': [_permission('udp', 22, 22, cidrs=['0.0.0.0/0'])]})
+    assert sorted(exposure.group_id for exposure in index.reachable(22)) == ['sg-all', 'sg-range']
+    assert [exposure.group_id for exposure in index.reachable(3389)] == ['sg-all']
+    assert sorted(exposure.group_id for exposure in index.reachable(22, 'udp')) == ['sg-all', 'sg-udp']
+    assert set(index.exposed_ports([22, 80])) == {22, 80}
+
+    # A group seen again replaces its earlier exposures
+    index.add_group({'GroupId': 'sg-range', 'IpPermissions': [_permission('tcp', 443, 443, cidrs=['0.0.0.0/0'])]})
+    assert [exposure.group_id for exposure in index.reachable(25)] == ['sg-all']
+
+
+def test_group_seen_again_without_exposures_is_removed():
+    index = ExposureIndex()
+    index.add_group({'GroupId': 'sg-ssh', 'IpPermissions': [_permission('tcp', 22, 22, cidrs=['0.0.0.0/0'])]})
+    index.add_group({'GroupId': 'sg-web', 'IpPermissions': [_permission('tcp', 443, 443, cidrs=['0.0.0.0/0'])]})
+    assert [exposure.group_id for exposure in index.reachable(22)] == ['sg-ssh']
+
+    # The group was closed (or only reaches private ranges) since it was first indexed
+    closed = {'GroupId': 'sg-ssh', 'IpPermissions': [_permission('tcp', 22, 22, cidrs=['10.0.0.0/8'])]}
+    assert index.add_group(closed) == []
+    assert index.reachable(22) == []
+    assert [exposure.group_id for exposure in index.exposures] == ['sg-web']
+    assert index.add_group({'GroupId': 'sg-web', 'IpPermissions': []}) == []
+    assert index.exposures == [] and index.reachable(443) == []
+
+
+def test_interval_index_matches_linear_scan():
+    generator = random.Random(7)
+    index = ExposureIndex()
+    permissions = []
+    for number in range(200):
+        start = generator.randrange(0, 65535)
+        permission = _permission('tcp', start, min(65535, start + generator.choice([0, 1, 10, 1000, 30000])),
+                                 cidrs=['0.0.0.0/0'])
+        permissions.append((f"sg-{number}", permission))
+        index.add_group({'GroupId': f"sg-{number}", 'IpPermissions': [permission]})
+    for port in [0, 22, 443, 8080, 65535] + [generator.randrange(0, 65536) for _ in range(200)]:
+        expected = sorted(group_id for group_id, permission in permissions
+                          if permission['FromPort'] <= port <= permission['ToPort'])
+        assert sorted(exposure.group_id for exposure in index.reachable(port)) == expected
+
+
+def test_scanner_reports_world_and_wide_ingress(clients):
+    ec2 = clients.client('ec2')
+    vpc_id = ec2.describe_vpcs()['Vpcs'][0]['VpcId']
+
+    def group(name, permissions):
+        group_id = ec2.create_security_group(GroupName=name, Description=name, VpcId=vpc_id)['GroupId']
+        ec2.authorize_security_group_ingress(GroupId=group_id, IpPermissions=permissions)
+        return group_id
+
+    world = group('world', [_permission('tcp', 20, 25, cidrs=['0.0.0.0/0'])])
+    wide = group('wide', [_permission('tcp', 3389, 3389, cidrs=['8.0.0.0/8'])])
+    group('private', [_permission('tcp', 22, 22, cidrs=['10.0.0.0/8'])])
+
+    findings = SGScanner(clients=clients).scan_security_groups()
+    assert sorted((finding.resource_id, finding.rule_id, finding.params[0]) for finding in findings) == sorted([
+        (world, 'sg-world-ingress', 'Ports 20-25/tcp'),
+        (world, 'sg-world-dangerous-port', 22),
+        (wide, 'sg-wide-ingress', 'Port 3389/tcp'),
+        (wide, 'sg-wide-dangerous-port', 3389),
+    ])
@@ -0,0 +1,119 @@
+import os
+import threading
+from collections import Counter
+
+import boto3
+import pytest
+
+from aws_misconfig_scanner.main import EXPOSURE_SERVICE, SERVICE_ORDER, AWSMisconfigurationScanner
+from aws_misconfig_scanner.utils.aws_clients import ClientFactory
+from aws_misconfig_scanner.utils.metrics import Metrics
+from aws_misconfig_scanner.utils.rate_limiter import RateLimiter
+from aws_misconfig_scanner.utils.sharding import Shard, ShardQueue, merge_results
+from conftest import REGION, canonical
+
+REGIONS = [REGION, 'eu-west-1']
+
+
+class CallCounter:
+    """
+    Client event hook counting the API calls of a scan per (operation, region).
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def register(self, client, account_id=None):
+        region = client.meta.region_name
+
+        def count(model, **kwargs):
+            with self._lock:
+                self.calls[(model.name, region)] += 1
+        client.meta.events.register('before-parameter-build', count)
+
+
+def _counted_factory(counter):
+    return ClientFactory(session=boto3.session.Session(region_name=REGION), rate_limiter=RateLimiter(),
+                         metrics=Metrics(), event_hooks=[counter])
+
+
+def _scan_shard(clients, index, count, regions=None):
+    return AWSMisconfigurationScanner(clients=clients, shard=Shard(index, count)).run_all_scans(regions=regions)
+
+
+def _merge(partials):
+    return merge_results(partials, SERVICE_ORDER + [EXPOSURE_SERVICE])
+
+
+@pytest.mark.parametrize('shard_count', [1, 3, 5])
+def test_sharded_report_matches_unsharded_report(populated, shard_count):
+    unsharded = _merge([AWSMisconfigurationScanner(clients=populated).run_all_scans()])
+    sharded = _merge([_scan_shard(populated, index, shard_count) for index in range(shard_count)])
+    assert list(sharded) == list(unsharded)
+    assert canonical(sharded) == canonical(unsharded)
+
+
+@pytest.mark.parametrize('shard_count', [2, 4])
+def test_sharded_multi_region_report_matches_unsharded_report(populated, shard_count):
+    unsharded = _merge([AWSMisconfigurationScanner(clients=populated).run_all_scans(regions=REGIONS)])
+    sharded = _merge([_scan_shard(populated, index, shard_count, REGIONS) for index in range(shard_count)])
+    assert canonical(sharded) == canonical(unsharded)
+
+
+def test_every_scan_unit_is_run_by_exactly_one_shard(populated):
+    shard_jobs = [AWSMisconfigurationScanner(clients=populated, shard=Shard(index, 3))._scan_jobs(REGIONS)
+                  for index in range(3)]
+    keys = [job.key for jobs in shard_jobs for job in jobs]
+    assert sorted(keys) == sorted(job.key for job in AWSMisconfigurationScanner(clients=populated)._scan_jobs(REGIONS))
+    # The services feeding a region's resource graph stay in one shard
+    for region in REGIONS:
+        assert sum(any(job.key[1] == region and job.service in ('EC2', 'RDS', 'SecurityGroups') for job in jobs)
+                   for jobs in shard_jobs) == 1
+
+
+def test_sharded_scan_issues_each_call_once(populated):
+    unsharded = CallCounter()
+    AWSMisconfigurationScanner(clients=_counted_factory(unsharded)).run_all_scans(regions=REGIONS)
+    sharded = CallCounter()
+    for index in range(3):
+        _scan_shard(_counted_factory(sharded), index, 3, REGIONS)
+    # The credential report is generated once per account, by whichever scan runs first
+    for counter in (unsharded, sharded):
+        del counter.calls[('GenerateCredentialReport', 'aws-global')]
+    assert sharded.calls == unsharded.calls
+    assert sharded.calls[('GetAccountAuthorizationDetails', 'aws-global')] >= 1
+
+
+def test_shard_units_are_dealt_round_robin():
+    units = ['a', 'b', 'c', 'd', 'e']
+    assert [Shard(index, 2).units(units) for index in range(2)] == [{'a', 'c', 'e'}, {'b', 'd'}]
+    assert Shard(0, 1).units(units) == set(units)
+    with pytest.raises(ValueError):
+        Shard(2, 2)
+
+
+def test_queue_report_matches_unsharded_report(populated, tmp_path):
+    unsharded = _merge([AWSMisconfigurationScanner(clients=populated).run_all_scans()])
+    queue = ShardQueue(str(tmp_path))
+    queue.initialize(3)
+    assert queue.work(lambda index: _scan_shard(populated, index, 3), 3)
+    assert canonical(_merge(queue.results())) == canonical(unsharded)
+
+
+def test_queue_stops_waiting_for_dead_worker_after_timeout(tmp_path, monkeypatch):
+    monkeypatch.setattr('aws_misconfig_scanner.utils.sharding.QUEUE_POLL_SECONDS', 0.01)
+    queue = ShardQueue(str(tmp_path))
+    queue.initialize(2)
+    assert queue.claim() == 0  # Claimed by a worker that never finishes
+    assert not queue.work(lambda index: {}, 2, timeout=0.05)
+    assert queue.finished() == 1
+
+
+def test_queue_requeues_shards_of_dead_worker(tmp_path):
+    queue = ShardQueue(str(tmp_path))
+    queue.initialize(2)
+    assert queue.claim() == 0
+    os.utime(os.path.join(queue.claimed_dir, 'shard-00000.json'), (0, 0))
+    assert queue.work(lambda index: {'S3': []}, 2, timeout=1.0, stale_after=60.0)
+    assert queue.finished() == 2